@@ -0,0 +1,27 @@
+"""Esquema inicial (database/schema.sql)
+
+Línea base de las migraciones: las tablas las crea database/schema.sql, por lo
+que esta revisión no ejecuta nada. Las bases de datos existentes se marcan con
+`alembic stamp 0001` antes de aplicar las revisiones siguientes.
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-11-20 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    pass
+
+
+def downgrade() -> None:
+    pass
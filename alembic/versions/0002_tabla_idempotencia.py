@@ -0,0 +1,40 @@
+"""Tabla idempotencia
+
+Respuestas almacenadas por Idempotency-Key de depósitos, retiros y transferencias.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-11-20 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "idempotencia",
+        sa.Column("Clave", sa.String(100), primary_key=True),
+        sa.Column("Ruta", sa.String(100), nullable=False),
+        sa.Column("HashSolicitud", sa.String(64), nullable=False),
+        sa.Column("Estado", sa.String(20), nullable=False),
+        sa.Column("CodigoEstado", sa.Integer(), nullable=True),
+        sa.Column("Respuesta", sa.Text(), nullable=True),
+        sa.Column("FechaCreacion", sa.DateTime(), nullable=False),
+        sa.Column("FechaExpiracion", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_idempotencia_FechaExpiracion", "idempotencia", ["FechaExpiracion"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_idempotencia_FechaExpiracion", table_name="idempotencia")
+    op.drop_table("idempotencia")
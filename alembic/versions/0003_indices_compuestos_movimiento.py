@@ -0,0 +1,58 @@
+"""Índices compuestos de movimiento
+
+Los listados por cuenta filtran por IdCuenta y ordenan por (Fecha, IdMovimiento)
+descendente, y los reportes por fecha recorren rangos de Fecha. Con índices de
+una sola columna MySQL resuelve el orden con un filesort sobre todos los
+movimientos de la cuenta; con los índices compuestos lee la página en orden.
+
+Los índices de una sola columna sobre IdCuenta y Fecha quedan cubiertos por los
+compuestos (son su prefijo) y se eliminan si existen.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-11-20 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Índices de una sola columna que crea Base.metadata.create_all con index=True
+INDICES_SIMPLES = {
+    "ix_movimiento_IdCuenta": ["IdCuenta"],
+    "ix_movimiento_Fecha": ["Fecha"],
+}
+
+
+def _indices_existentes() -> set:
+    return {indice["name"] for indice in sa.inspect(op.get_bind()).get_indexes("movimiento")}
+
+
+def upgrade() -> None:
+    # Primero los compuestos: en MySQL la llave foránea de IdCuenta necesita un
+    # índice que empiece por esa columna antes de poder eliminar el simple
+    op.create_index("ix_movimiento_cuenta_fecha", "movimiento", ["IdCuenta", "Fecha", "IdMovimiento"])
+    op.create_index("ix_movimiento_fecha_sucursal", "movimiento", ["Fecha", "IdSucursal"])
+
+    existentes = _indices_existentes()
+    for nombre in INDICES_SIMPLES:
+        if nombre in existentes:
+            op.drop_index(nombre, table_name="movimiento")
+
+
+def downgrade() -> None:
+    existentes = _indices_existentes()
+    for nombre, columnas in INDICES_SIMPLES.items():
+        if nombre not in existentes:
+            op.create_index(nombre, "movimiento", columnas)
+
+    op.drop_index("ix_movimiento_fecha_sucursal", table_name="movimiento")
+    op.drop_index("ix_movimiento_cuenta_fecha", table_name="movimiento")
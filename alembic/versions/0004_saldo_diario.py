@@ -0,0 +1,36 @@
+"""Tabla saldo_diario
+
+Instantáneas del saldo de cada cuenta al cierre de los días con movimientos,
+para consultar saldos históricos sin recorrer los movimientos. Después de
+aplicarla, llenar los días anteriores con
+`python -m app.jobs.reconstruir_saldos_diarios`.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-11-24 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "saldo_diario",
+        sa.Column("IdCuenta", sa.Integer(), sa.ForeignKey("cuenta.IdCuenta", ondelete="CASCADE"), primary_key=True),
+        sa.Column("Fecha", sa.Date(), primary_key=True),
+        sa.Column("Saldo", sa.DECIMAL(15, 2), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("saldo_diario")
@@ -0,0 +1,78 @@
+"""Particionar movimiento por mes
+
+Solo MySQL; en otros motores no hace nada. La tabla pasa a RANGE COLUMNS(Fecha)
+con una partición por mes desde el mes del movimiento más antiguo hasta tres
+meses después del actual, más `pfuturo` (MAXVALUE). Los meses siguientes los
+crea `python -m app.jobs.particiones_movimiento`.
+
+Restricciones de MySQL para tablas particionadas:
+- La llave primaria debe incluir la columna de partición: pasa a (IdMovimiento, Fecha).
+- Fecha debe ser NOT NULL.
+- InnoDB no admite llaves foráneas en tablas particionadas: se eliminan las de
+  movimiento. Las eliminaciones en cascada de cuentas las hace el ORM
+  (relación Cuenta.movimientos) y las referencias se validan al contabilizar.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-11-26 00:00:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.particiones import (
+    definicion_particion, definicion_particion_futura, meses_entre, sumar_meses
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MESES_ADELANTE = 3
+
+LLAVES_FORANEAS = [
+    ("IdCuenta", "cuenta", "CASCADE"),
+    ("IdSucursal", "sucursal", None),
+    ("IdTipoMovimiento", "tipomovimiento", None),
+]
+
+
+def _es_mysql() -> bool:
+    return op.get_bind().dialect.name in ("mysql", "mariadb")
+
+
+def upgrade() -> None:
+    if not _es_mysql():
+        return
+    bind = op.get_bind()
+    for llave in sa.inspect(bind).get_foreign_keys("movimiento"):
+        op.drop_constraint(llave["name"], "movimiento", type_="foreignkey")
+
+    op.execute("ALTER TABLE movimiento MODIFY Fecha DATE NOT NULL")
+    op.execute("ALTER TABLE movimiento DROP PRIMARY KEY, ADD PRIMARY KEY (IdMovimiento, Fecha)")
+
+    hoy = date.today()
+    primera = bind.execute(sa.text("SELECT MIN(Fecha) FROM movimiento")).scalar() or hoy
+    meses = meses_entre(min(primera, hoy), sumar_meses(hoy.replace(day=1), MESES_ADELANTE))
+    particiones = [definicion_particion(mes) for mes in meses] + [definicion_particion_futura()]
+    op.execute(
+        "ALTER TABLE movimiento PARTITION BY RANGE COLUMNS(Fecha) (\n    "
+        + ",\n    ".join(particiones) + "\n)"
+    )
+
+
+def downgrade() -> None:
+    if not _es_mysql():
+        return
+    op.execute("ALTER TABLE movimiento REMOVE PARTITIONING")
+    op.execute("ALTER TABLE movimiento DROP PRIMARY KEY, ADD PRIMARY KEY (IdMovimiento)")
+    for columna, tabla, al_eliminar in LLAVES_FORANEAS:
+        op.create_foreign_key(
+            f"fk_movimiento_{columna}", "movimiento", tabla, [columna], [columna], ondelete=al_eliminar
+        )
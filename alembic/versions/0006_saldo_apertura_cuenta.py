@@ -0,0 +1,36 @@
+"""Saldo de apertura de las cuentas
+
+Agrega cuenta.SaldoApertura, el saldo con el que se abrió la cuenta, para que
+la conciliación (`python -m app.jobs.conciliacion`) pueda verificar que
+Saldo = SaldoApertura + suma de los movimientos. Las cuentas existentes
+quedan en NULL (la conciliación las omite) hasta que
+`python -m app.jobs.saldos_apertura` lo establece con sus movimientos,
+incluidos los archivados, y deja un reporte de los valores asignados.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-12-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "cuenta",
+        sa.Column("SaldoApertura", sa.DECIMAL(15, 2), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("cuenta", "SaldoApertura")
@@ -0,0 +1,40 @@
+"""Tabla saldo_fragmento
+
+Fragmentos del saldo de las cuentas "calientes" (cuentas de nómina, cajas de
+sucursal): los créditos se reparten entre varias filas para no serializarse
+en el bloqueo de cuenta.Saldo. Ninguna cuenta queda fragmentada al aplicarla.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-12-08 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "saldo_fragmento",
+        sa.Column("IdCuenta", sa.Integer(), sa.ForeignKey("cuenta.IdCuenta", ondelete="CASCADE"), primary_key=True),
+        sa.Column("Fragmento", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("Saldo", sa.DECIMAL(15, 2), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    # Devolver a cuenta.Saldo lo acumulado en fragmentos antes de eliminarlos
+    op.execute(
+        "UPDATE cuenta SET Saldo = Saldo + COALESCE(("
+        "SELECT SUM(f.Saldo) FROM saldo_fragmento f WHERE f.IdCuenta = cuenta.IdCuenta), 0)"
+    )
+    op.drop_table("saldo_fragmento")
@@ -0,0 +1,41 @@
+"""Tabla resumen_sucursal_diario
+
+Cantidad y total de movimientos por día, sucursal y tipo, mantenidos por las
+operaciones. La tabla se crea vacía: para llenarla con los movimientos
+existentes ejecutar `python -m app.jobs.reconstruir_resumen_sucursal`.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2025-12-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "resumen_sucursal_diario",
+        sa.Column("Fecha", sa.Date(), primary_key=True),
+        sa.Column("IdSucursal", sa.Integer(), sa.ForeignKey("sucursal.IdSucursal"), primary_key=True),
+        sa.Column(
+            "IdTipoMovimiento", sa.Integer(), sa.ForeignKey("tipomovimiento.IdTipoMovimiento"), primary_key=True
+        ),
+        sa.Column("Cantidad", sa.Integer(), nullable=False),
+        sa.Column("Total", sa.DECIMAL(18, 2), nullable=False),
+    )
+    op.create_index("ix_resumen_sucursal_fecha", "resumen_sucursal_diario", ["IdSucursal", "Fecha"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_resumen_sucursal_fecha", table_name="resumen_sucursal_diario")
+    op.drop_table("resumen_sucursal_diario")
@@ -0,0 +1,44 @@
+"""Tabla evento_cuenta
+
+Bandeja de salida de los movimientos para las suscripciones en tiempo real
+(SSE y WebSocket). Purgar los eventos antiguos con
+`python -m app.jobs.purgar_eventos`.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2025-12-22 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "evento_cuenta",
+        sa.Column("IdEvento", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("IdCuenta", sa.Integer(), sa.ForeignKey("cuenta.IdCuenta", ondelete="CASCADE"), nullable=False),
+        sa.Column("IdMovimiento", sa.Integer(), nullable=True),
+        sa.Column("IdTipoMovimiento", sa.Integer(), nullable=False),
+        sa.Column("Fecha", sa.Date(), nullable=False),
+        sa.Column("Valor", sa.DECIMAL(15, 2), nullable=False),
+        sa.Column("Descripcion", sa.String(200), nullable=True),
+        sa.Column("FechaCreacion", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_evento_cuenta_cuenta", "evento_cuenta", ["IdCuenta", "IdEvento"])
+    op.create_index("ix_evento_cuenta_FechaCreacion", "evento_cuenta", ["FechaCreacion"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_evento_cuenta_FechaCreacion", table_name="evento_cuenta")
+    op.drop_index("ix_evento_cuenta_cuenta", table_name="evento_cuenta")
+    op.drop_table("evento_cuenta")
@@ -0,0 +1,47 @@
+"""Tabla cuota_prestamo
+
+Plan de cuotas de cada préstamo, con vencimiento y estado, para el cobro
+diario (`python -m app.jobs.cobrar_cuotas`). Los préstamos existentes no
+tienen plan: generarlo con `python -m app.jobs.cobrar_cuotas --generar-planes`.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2025-12-29 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cuota_prestamo",
+        sa.Column("IdCuota", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column(
+            "IdPrestamo", sa.Integer(), sa.ForeignKey("prestamo.IdPrestamo", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("NumeroCuota", sa.Integer(), nullable=False),
+        sa.Column("FechaVencimiento", sa.Date(), nullable=False),
+        sa.Column("Capital", sa.DECIMAL(15, 2), nullable=False),
+        sa.Column("Interes", sa.DECIMAL(15, 2), nullable=False),
+        sa.Column("Seguro", sa.DECIMAL(10, 2), nullable=False),
+        sa.Column("Valor", sa.DECIMAL(15, 2), nullable=False),
+        sa.Column("Estado", sa.String(10), nullable=False),
+        sa.Column("FechaPago", sa.Date(), nullable=True),
+        sa.UniqueConstraint("IdPrestamo", "NumeroCuota", name="uq_cuota_prestamo_numero"),
+    )
+    op.create_index("ix_cuota_prestamo_estado_vencimiento", "cuota_prestamo", ["Estado", "FechaVencimiento"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_cuota_prestamo_estado_vencimiento", table_name="cuota_prestamo")
+    op.drop_table("cuota_prestamo")
@@ -8,8 +8,22 @@ from app.crud import cuentahabiente
 from app.crud import sucursal
 from app.crud import cuenta
 from app.crud import titular
+from app.crud import contabilizacion
+from app.crud import saldo_diario
+from app.crud import saldo_fragmento
+from app.crud import resumen_sucursal
+from app.crud import evento_cuenta
+from app.crud import gran_movimiento
+from app.crud import velocidad
 from app.crud import movimiento
+from app.crud import extracto
+from app.crud import conciliacion
+from app.crud import analitica
+from app.crud import cuota_prestamo
 from app.crud import prestamo
+from app.crud import portafolio
+from app.crud import nomina
+from app.crud import idempotencia
 
 __all__ = [
     "ciudad",
@@ -18,6 +32,20 @@ __all__ = [
     "sucursal",
     "cuenta",
     "titular",
+    "contabilizacion",
+    "saldo_diario",
+    "saldo_fragmento",
+    "resumen_sucursal",
+    "evento_cuenta",
+    "gran_movimiento",
+    "velocidad",
     "movimiento",
+    "extracto",
+    "conciliacion",
+    "analitica",
+    "cuota_prestamo",
     "prestamo",
+    "portafolio",
+    "nomina",
+    "idempotencia",
 ]
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+Agregados de movimientos calculados en la base de datos.
+
+Cada consulta es un solo SELECT ... GROUP BY sobre movimiento: solo viajan
+los grupos (a lo sumo `limite`), no las filas. El rango de fechas es
+obligatorio y acotado a ANALITICA_MAX_DIAS, y los filtros comparan columnas
+sin funciones, así que usan el índice (Fecha, IdSucursal) y, en MySQL, solo
+leen las particiones del rango. La ciudad se resuelve con una subconsulta
+sobre sucursal en lugar de filtrar la unión.
+
+Los movimientos archivados (`app.utils.archivo`) no están en la tabla: un
+rango que empieza antes del corte del archivo se rechaza.
+"""
+
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import func, select, type_coerce
+from sqlalchemy.orm import Session
+
+from app.models.cuenta import Cuenta
+from app.models.movimiento import Movimiento
+from app.models.sucursal import Sucursal
+from app.utils.archivo import archivo_movimientos
+from app.utils.tiempo_consulta import ejecutar_con_limite
+
+ANALITICA_MAX_DIAS = int(os.getenv("ANALITICA_MAX_DIAS", "366"))
+ANALITICA_MAX_GRUPOS = int(os.getenv("ANALITICA_MAX_GRUPOS", "1000"))
+ANALITICA_TIEMPO_MAXIMO = float(os.getenv("ANALITICA_TIEMPO_MAXIMO", "10"))
+
+# Dimensión -> columna de la respuesta
+DIMENSIONES = {
+    "ciudad": "IdCiudad",
+    "sucursal": "IdSucursal",
+    "tipo_cuenta": "IdTipoCuenta",
+    "tipo_movimiento": "IdTipoMovimiento",
+    "dia": "Periodo",
+    "semana": "Periodo",
+    "mes": "Periodo",
+}
+PERIODOS = ("dia", "semana", "mes")
+
+
+def _expresion_periodo(dialecto: str, periodo: str):
+    """Primer día del periodo (las semanas empiezan el lunes)"""
+    if periodo == "dia":
+        return Movimiento.Fecha
+    if dialecto in ("mysql", "mariadb"):
+        if periodo == "semana":
+            return func.subdate(Movimiento.Fecha, func.weekday(Movimiento.Fecha))
+        return func.date_format(Movimiento.Fecha, "%Y-%m-01")
+    if dialecto == "sqlite":
+        if periodo == "semana":
+            return func.date(Movimiento.Fecha, "weekday 0", "-6 days")
+        return func.date(Movimiento.Fecha, "start of month")
+    return func.date_trunc("week" if periodo == "semana" else "month", Movimiento.Fecha)
+
+
+def _a_fecha(valor) -> date:
+    # DATE_FORMAT y las funciones de fecha de SQLite retornan texto
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor)[:10])
+
+
+def agregar_movimientos(
+    db: Session,
+    agrupar: Sequence[str],
+    desde: date,
+    hasta: date,
+    ciudad_id: Optional[int] = None,
+    sucursal_id: Optional[int] = None,
+    tipo_cuenta_id: Optional[int] = None,
+    tipo_movimiento_id: Optional[int] = None,
+    limite: int = ANALITICA_MAX_GRUPOS,
+) -> dict:
+    """
+    Cantidad, total y promedio de Valor (con signo: los débitos restan) por
+    las dimensiones de `agrupar`, en orden de esas dimensiones. Lanza
+    ValueError si el rango o la agrupación no son válidos y
+    ConsultaExcedioTiempo si la consulta supera ANALITICA_TIEMPO_MAXIMO.
+    """
+    agrupar = list(dict.fromkeys(agrupar))
+    desconocidas = [d for d in agrupar if d not in DIMENSIONES]
+    if desconocidas:
+        raise ValueError(f"Dimensiones desconocidas: {', '.join(desconocidas)}")
+    if sum(d in PERIODOS for d in agrupar) > 1:
+        raise ValueError("Solo se puede agrupar por un periodo (dia, semana o mes)")
+    if hasta < desde:
+        raise ValueError("hasta debe ser posterior o igual a desde")
+    if (hasta - desde).days + 1 > ANALITICA_MAX_DIAS:
+        raise ValueError(f"El rango no puede superar {ANALITICA_MAX_DIAS} días")
+    corte = archivo_movimientos.fecha_corte()
+    if corte is not None and desde < corte:
+        raise ValueError(f"Los movimientos anteriores a {corte.isoformat()} están archivados")
+
+    dialecto = db.get_bind().dialect.name
+    expresiones = {
+        "ciudad": Sucursal.IdCiudad,
+        "sucursal": Movimiento.IdSucursal,
+        "tipo_cuenta": Cuenta.IdTipoCuenta,
+        "tipo_movimiento": Movimiento.IdTipoMovimiento,
+    }
+    columnas = [
+        (_expresion_periodo(dialecto, d) if d in PERIODOS else expresiones[d]).label(DIMENSIONES[d])
+        for d in agrupar
+    ]
+    consulta = select(
+        *columnas,
+        func.count().label("Cantidad"),
+        type_coerce(func.sum(Movimiento.Valor), Movimiento.Valor.type).label("Total"),
+    ).select_from(Movimiento)
+    if "ciudad" in agrupar:
+        consulta = consulta.join(Sucursal, Sucursal.IdSucursal == Movimiento.IdSucursal)
+    if "tipo_cuenta" in agrupar or tipo_cuenta_id is not None:
+        consulta = consulta.join(Cuenta, Cuenta.IdCuenta == Movimiento.IdCuenta)
+
+    consulta = consulta.where(Movimiento.Fecha >= desde, Movimiento.Fecha <= hasta)
+    if ciudad_id is not None:
+        consulta = consulta.where(
+            Movimiento.IdSucursal.in_(select(Sucursal.IdSucursal).where(Sucursal.IdCiudad == ciudad_id))
+        )
+    if sucursal_id is not None:
+        consulta = consulta.where(Movimiento.IdSucursal == sucursal_id)
+    if tipo_cuenta_id is not None:
+        consulta = consulta.where(Cuenta.IdTipoCuenta == tipo_cuenta_id)
+    if tipo_movimiento_id is not None:
+        consulta = consulta.where(Movimiento.IdTipoMovimiento == tipo_movimiento_id)
+    if columnas:
+        consulta = consulta.group_by(*columnas).order_by(*columnas)
+    # Una fila de más indica que hay más grupos que el límite
+    filas = ejecutar_con_limite(db, consulta.limit(limite + 1), ANALITICA_TIEMPO_MAXIMO)
+
+    grupos: List[Dict] = []
+    for fila in filas[:limite]:
+        if not fila.Cantidad:
+            continue  # Sin agrupación y sin movimientos
+        grupo = {DIMENSIONES[d]: getattr(fila, DIMENSIONES[d]) for d in agrupar}
+        if "Periodo" in grupo:
+            grupo["Periodo"] = _a_fecha(grupo["Periodo"])
+        total = Decimal(fila.Total)
+        grupo.update({
+            "Cantidad": fila.Cantidad,
+            "Total": total,
+            "Promedio": (total / fila.Cantidad).quantize(Decimal("0.01")),
+        })
+        grupos.append(grupo)
+    return {
+        "Agrupacion": agrupar,
+        "Desde": desde,
+        "Hasta": hasta,
+        "Grupos": grupos,
+        "Truncado": len(filas) > limite,
+    }
@@ -0,0 +1,37 @@
+"""
+Ejecución de las operaciones de crud desde endpoints asíncronos.
+
+Las funciones de crud reciben una `Session` síncrona. Con una `AsyncSession`
+(modo DB_ASYNC) se ejecutan mediante `run_sync`: el código corre en un
+greenlet sobre el event loop y cada consulta se delega al driver asíncrono,
+sin ocupar un hilo mientras espera a la base de datos. Con una `Session`
+síncrona se ejecutan en el threadpool, como hace FastAPI con los endpoints
+`def`.
+"""
+
+from typing import Any, Callable, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import SesionBD
+
+T = TypeVar("T")
+
+
+async def ejecutar(db: SesionBD, funcion: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Ejecutar `funcion(sesion, *args, **kwargs)` con la sesión síncrona correspondiente"""
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(funcion, *args, **kwargs)
+    return await run_in_threadpool(funcion, db, *args, **kwargs)
+
+
+async def liberar_conexion(db: SesionBD) -> None:
+    """
+    Devolver la conexión de la sesión al pool antes de una respuesta de larga
+    duración (streams de eventos); la sesión sigue siendo utilizable.
+    """
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        await run_in_threadpool(db.close)
@@ -0,0 +1,86 @@
+"""
+Escrituras genéricas con el mínimo de viajes a la base de datos.
+
+Las sesiones se crean con `expire_on_commit=False`: después del commit los
+objetos conservan los valores con los que se escribieron (la llave
+autoincremental la puebla el INSERT vía lastrowid o RETURNING), por lo que la
+respuesta se construye en memoria sin `refresh()`.
+"""
+
+from sqlalchemy import delete, inspect, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Optional, Type, TypeVar
+
+M = TypeVar("M")
+
+_INSERT_POR_DIALECTO = {
+    "mysql": mysql.insert,
+    "mariadb": mysql.insert,
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def insert_upsert(db: Session, modelo: Type[M]):
+    """
+    INSERT del dialecto de la sesión, que admite `on_duplicate_key_update`
+    (MySQL) u `on_conflict_do_update` (SQLite, PostgreSQL).
+    """
+    dialecto = db.get_bind().dialect.name
+    insertar = _INSERT_POR_DIALECTO.get(dialecto)
+    if insertar is None:
+        raise NotImplementedError(f"Upsert de {modelo.__tablename__} no soportado en {dialecto}")
+    return insertar(modelo)
+
+
+def _filtro_llave(modelo: Type[M], llave: Any) -> list:
+    """Condiciones sobre la llave primaria (simple o compuesta) del modelo"""
+    columnas = inspect(modelo).primary_key
+    valores = llave if isinstance(llave, tuple) else (llave,)
+    return [columna == valor for columna, valor in zip(columnas, valores)]
+
+
+def actualizar(db: Session, modelo: Type[M], llave: Any, valores: Dict[str, Any]) -> Optional[M]:
+    """
+    Actualizar por llave primaria y retornar el objeto actualizado (None si no existe).
+
+    Con motores que soportan UPDATE ... RETURNING se ejecuta un solo UPDATE que
+    retorna la fila completa (UPDATE + COMMIT). En MySQL se lee la fila, se
+    asignan los valores y el flush emite el UPDATE (SELECT + UPDATE + COMMIT).
+    """
+    filtro = _filtro_llave(modelo, llave)
+    if not valores:
+        return db.execute(select(modelo).where(*filtro)).scalar_one_or_none()
+
+    if db.get_bind().dialect.update_returning:
+        objeto = db.execute(
+            update(modelo).where(*filtro).values(**valores).returning(modelo)
+        ).scalar_one_or_none()
+        if objeto is not None:
+            db.commit()
+        return objeto
+
+    objeto = db.execute(select(modelo).where(*filtro)).scalar_one_or_none()
+    if objeto is not None:
+        for clave, valor in valores.items():
+            setattr(objeto, clave, valor)
+        db.commit()
+    return objeto
+
+
+def eliminar(db: Session, modelo: Type[M], llave: Any) -> bool:
+    """
+    Eliminar por llave primaria con un DELETE directo (DELETE + COMMIT).
+
+    Solo para modelos sin relaciones en cascada: no carga el objeto, por lo que
+    las cascadas del ORM no se aplican.
+    """
+    resultado = db.execute(
+        delete(modelo).where(*_filtro_llave(modelo, llave)).execution_options(synchronize_session=False)
+    )
+    if resultado.rowcount == 0:
+        db.rollback()
+        return False
+    db.commit()
+    return True
@@ -1,6 +1,8 @@
 from sqlalchemy.orm import Session
+from app.crud import base
 from app.models.ciudad import Ciudad
 from app.schemas.ciudad import CiudadCreate, CiudadUpdate
+from app.utils.paginacion import paginar
 from typing import List, Optional
 
 
@@ -9,9 +11,9 @@ def get_ciudad(db: Session, ciudad_id: int) -> Optional[Ciudad]:
     return db.query(Ciudad).filter(Ciudad.IdCiudad == ciudad_id).first()
 
 
-def get_ciudades(db: Session, skip: int = 0, limit: int = 100) -> List[Ciudad]:
+def get_ciudades(db: Session, skip: int = 0, limit: int = 100, despues_de: Optional[tuple] = None) -> List[Ciudad]:
     """Obtener lista de ciudades con paginación"""
-    return db.query(Ciudad).offset(skip).limit(limit).all()
+    return paginar(db.query(Ciudad), [Ciudad.IdCiudad], skip, limit, despues_de).all()
 
 
 def create_ciudad(db: Session, ciudad: CiudadCreate) -> Ciudad:
@@ -19,20 +21,12 @@ def create_ciudad(db: Session, ciudad: CiudadCreate) -> Ciudad:
     db_ciudad = Ciudad(**ciudad.dict())
     db.add(db_ciudad)
     db.commit()
-    db.refresh(db_ciudad)
     return db_ciudad
 
 
 def update_ciudad(db: Session, ciudad_id: int, ciudad: CiudadUpdate) -> Optional[Ciudad]:
     """Actualizar una ciudad existente"""
-    db_ciudad = get_ciudad(db, ciudad_id)
-    if db_ciudad:
-        update_data = ciudad.dict(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(db_ciudad, key, value)
-        db.commit()
-        db.refresh(db_ciudad)
-    return db_ciudad
+    return base.actualizar(db, Ciudad, ciudad_id, ciudad.dict(exclude_unset=True))
 
 
 def delete_ciudad(db: Session, ciudad_id: int) -> bool:
@@ -0,0 +1,154 @@
+"""
+Conciliación de saldos: el Saldo de cada cuenta (más sus fragmentos, si está
+fragmentada) debe ser igual a su SaldoApertura más la suma de sus movimientos
+(incluidos los archivados).
+
+Cada lote de cuentas se concilia con una sola consulta que agrupa los
+movimientos por cuenta y la une con cuenta, así que el saldo y la suma
+se leen en la misma vista de los datos.
+
+Las cuentas anteriores a cuenta.SaldoApertura (NULL) no se concilian hasta
+que `establecer_aperturas` les asigna un saldo de apertura.
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, or_, select, type_coerce, update
+from sqlalchemy.orm import Session
+
+from app.models.cuenta import Cuenta
+from app.models.movimiento import Movimiento
+from app.models.saldo_diario import SaldoDiario
+from app.models.saldo_fragmento import SaldoFragmento
+from app.utils.archivo import archivo_movimientos
+
+
+def rango_cuentas(db: Session) -> Optional[Tuple[int, int]]:
+    """Menor y mayor IdCuenta (None si no hay cuentas)"""
+    menor, mayor = db.execute(select(func.min(Cuenta.IdCuenta), func.max(Cuenta.IdCuenta))).one()
+    return None if menor is None else (menor, mayor)
+
+
+def ultimo_movimiento(db: Session) -> int:
+    return db.execute(select(func.coalesce(func.max(Movimiento.IdMovimiento), 0))).scalar_one()
+
+
+def cuentas_sin_apertura(db: Session) -> int:
+    return db.execute(select(func.count()).where(Cuenta.SaldoApertura.is_(None))).scalar_one()
+
+
+def cuentas_tocadas(db: Session, despues_de_movimiento: int, desde: date) -> List[int]:
+    """
+    Cuentas con movimientos posteriores a `despues_de_movimiento` o con
+    cambios de saldo (instantánea en saldo_diario) desde `desde`.
+    """
+    con_movimientos = select(Movimiento.IdCuenta).where(Movimiento.IdMovimiento > despues_de_movimiento)
+    con_cambios = select(SaldoDiario.IdCuenta).where(SaldoDiario.Fecha >= desde)
+    return sorted(db.execute(
+        select(Cuenta.IdCuenta).where(or_(Cuenta.IdCuenta.in_(con_movimientos), Cuenta.IdCuenta.in_(con_cambios)))
+    ).scalars())
+
+
+def _saldos_y_sumas(
+    db: Session, desde: int, hasta: int, cuenta_ids: Optional[Sequence[int]], *condiciones
+) -> List[tuple]:
+    """
+    (fila de cuenta, suma de movimientos con los archivados) de las cuentas
+    con IdCuenta entre `desde` y `hasta` o las de `cuenta_ids`. El Saldo de la
+    fila incluye los fragmentos.
+    """
+    def filtro(columna):
+        if cuenta_ids is not None:
+            return columna.in_(cuenta_ids)
+        return columna.between(desde, hasta)
+
+    sumas = (
+        select(Movimiento.IdCuenta, func.sum(Movimiento.Valor).label("Suma"))
+        .where(filtro(Movimiento.IdCuenta))
+        .group_by(Movimiento.IdCuenta)
+        .subquery()
+    )
+    fragmentos = (
+        select(SaldoFragmento.IdCuenta, func.sum(SaldoFragmento.Saldo).label("Suma"))
+        .where(filtro(SaldoFragmento.IdCuenta))
+        .group_by(SaldoFragmento.IdCuenta)
+        .subquery()
+    )
+    filas = db.execute(
+        select(
+            Cuenta.IdCuenta, Cuenta.Numero, type_coerce(Cuenta.Saldo + func.coalesce(fragmentos.c.Suma, 0), Cuenta.Saldo.type).label("Saldo"),
+            Cuenta.SaldoApertura, sumas.c.Suma
+        )
+        .outerjoin(sumas, sumas.c.IdCuenta == Cuenta.IdCuenta)
+        .outerjoin(fragmentos, fragmentos.c.IdCuenta == Cuenta.IdCuenta)
+        .where(filtro(Cuenta.IdCuenta), *condiciones)
+        .order_by(Cuenta.IdCuenta)
+    ).all()
+    archivadas = archivo_movimientos.sumas_por_cuenta(desde, hasta)
+    return [(fila, Decimal(fila.Suma or 0) + archivadas.get(fila.IdCuenta, Decimal("0"))) for fila in filas]
+
+
+def conciliar_cuentas(
+    db: Session,
+    desde: Optional[int] = None,
+    hasta: Optional[int] = None,
+    cuenta_ids: Optional[Sequence[int]] = None
+) -> Tuple[int, List[dict]]:
+    """
+    Conciliar las cuentas con IdCuenta entre `desde` y `hasta` o las de
+    `cuenta_ids` que tienen saldo de apertura. Retorna cuántas cuentas se
+    revisaron y las discrepancias.
+    """
+    if cuenta_ids is not None:
+        if not cuenta_ids:
+            return 0, []
+        desde, hasta = min(cuenta_ids), max(cuenta_ids)
+
+    filas = _saldos_y_sumas(db, desde, hasta, cuenta_ids, Cuenta.SaldoApertura.isnot(None))
+    discrepancias = []
+    for fila, movimientos in filas:
+        esperado = Decimal(fila.SaldoApertura) + movimientos
+        saldo = Decimal(fila.Saldo or 0)
+        if saldo != esperado:
+            discrepancias.append({
+                "IdCuenta": fila.IdCuenta,
+                "Numero": fila.Numero,
+                "Saldo": saldo,
+                "SaldoApertura": Decimal(fila.SaldoApertura),
+                "SumaMovimientos": movimientos,
+                "SaldoEsperado": esperado,
+                "Diferencia": saldo - esperado,
+            })
+    return len(filas), discrepancias
+
+
+def establecer_aperturas(db: Session, desde: int, hasta: int, recalcular: bool = False) -> List[dict]:
+    """
+    Asignar SaldoApertura = Saldo - suma de movimientos (incluidos los
+    archivados) a las cuentas del rango sin saldo de apertura, o a todas con
+    `recalcular`. El valor deja la cuenta conciliada hoy, así que cualquier
+    descuadre anterior queda dentro del saldo de apertura: se retorna una fila
+    por cuenta asignada (valor anterior y nuevo) para el reporte de línea base.
+    """
+    condiciones = [] if recalcular else [Cuenta.SaldoApertura.is_(None)]
+    asignadas = []
+    for fila, movimientos in _saldos_y_sumas(db, desde, hasta, None, *condiciones):
+        apertura = Decimal(fila.Saldo or 0) - movimientos
+        anterior = None if fila.SaldoApertura is None else Decimal(fila.SaldoApertura)
+        if apertura == anterior:
+            continue
+        asignadas.append({
+            "IdCuenta": fila.IdCuenta,
+            "Numero": fila.Numero,
+            "Saldo": Decimal(fila.Saldo or 0),
+            "SumaMovimientos": movimientos,
+            "SaldoAperturaAnterior": anterior,
+            "SaldoApertura": apertura,
+        })
+    if asignadas:
+        # UPDATE por llave primaria en bloque (executemany)
+        db.execute(update(Cuenta), [{"IdCuenta": a["IdCuenta"], "SaldoApertura": a["SaldoApertura"]} for a in asignadas])
+    db.commit()
+    return asignadas
@@ -0,0 +1,343 @@
+"""
+Motor de contabilización de saldos.
+
+Los saldos se modifican con UPDATE atómicos en la base de datos en lugar de
+leer el valor, calcularlo en Python y escribirlo de vuelta, de modo que las
+operaciones concurrentes sobre una misma cuenta no pierden actualizaciones.
+
+Las cuentas con saldo fragmentado (ver `app.utils.fragmentos`) reciben los
+créditos en una fila de saldo_fragmento elegida al azar y su saldo es
+cuenta.Saldo más la suma de sus fragmentos. Los fragmentos solo disminuyen con
+la fila de cuenta bloqueada (débitos y consolidación), así que un débito que
+la bloquea ve una suma que a lo sumo crece mientras decide.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, TypeVar
+
+from sqlalchemy import case, func, insert, select, type_coerce, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.models.cuenta import Cuenta
+from app.models.movimiento import Movimiento
+from app.models.saldo_fragmento import SaldoFragmento
+from app.utils.concurrencia import dormir
+from app.utils.fragmentos import cuentas_fragmentadas
+from app.utils.metricas import estadisticas_bloqueo
+
+T = TypeVar("T")
+
+# Códigos de error de MySQL recuperables reintentando la transacción
+ERRORES_REINTENTABLES = {
+    1213,  # Deadlock found when trying to get lock
+    1205,  # Lock wait timeout exceeded
+}
+
+# Cuentas por sentencia en las actualizaciones masivas (límite de parámetros del driver)
+TAMANO_LOTE_CUENTAS = 5000
+
+MAX_INTENTOS = 5
+ESPERA_BASE = 0.01  # Segundos antes del primer reintento
+ESPERA_MAXIMA = 0.5  # Tope de la espera entre reintentos
+
+
+class MedicionBloqueo:
+    """Tiempo acumulado en sentencias que esperan bloqueos de fila"""
+
+    def __init__(self):
+        self.espera = 0.0
+
+    @contextmanager
+    def medir(self):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.espera += time.perf_counter() - inicio
+
+    @property
+    def espera_ms(self) -> float:
+        return self.espera * 1000
+
+
+def es_error_reintentable(error: OperationalError) -> bool:
+    """Indica si el error corresponde a un conflicto de bloqueos"""
+    orig = getattr(error, "orig", None)
+    args = getattr(orig, "args", ())
+    if args and args[0] in ERRORES_REINTENTABLES:
+        return True
+    # SQLite reporta la contención entre escritores como "database is locked"
+    return "database is locked" in str(orig)
+
+
+def ejecutar_con_reintentos(
+    db: Session,
+    operacion: str,
+    unidad_de_trabajo: Callable[[MedicionBloqueo], T]
+) -> T:
+    """
+    Ejecutar una unidad de trabajo (incluido su commit) reintentando los deadlocks.
+
+    Entre intentos se espera un backoff exponencial acotado con jitter. El tiempo
+    de espera por bloqueos se registra por operación en las métricas y queda
+    disponible en `db.info["espera_bloqueo_ms"]`.
+    """
+    medicion = MedicionBloqueo()
+    for intento in range(1, MAX_INTENTOS + 1):
+        try:
+            resultado = unidad_de_trabajo(medicion)
+        except OperationalError as e:
+            db.rollback()
+            if intento == MAX_INTENTOS or not es_error_reintentable(e):
+                raise
+            espera = min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** (intento - 1))
+            dormir(espera * random.uniform(0.5, 1.0))
+            continue
+        except Exception:
+            db.rollback()
+            raise
+
+        estadisticas_bloqueo.registrar(operacion, medicion.espera_ms, reintentos=intento - 1)
+        db.info["espera_bloqueo_ms"] = medicion.espera_ms
+        return resultado
+
+
+def saldo_total():
+    """Saldo de la cuenta con sus fragmentos, para consultas de lectura sobre cuenta"""
+    fragmentos = (
+        select(func.sum(SaldoFragmento.Saldo))
+        .where(SaldoFragmento.IdCuenta == Cuenta.IdCuenta)
+        .scalar_subquery()
+    )
+    return type_coerce(Cuenta.Saldo + func.coalesce(fragmentos, 0), Cuenta.Saldo.type)
+
+
+def sumar_fragmentos(db: Session, cuenta_ids: Iterable[int], bloquear: bool = False) -> Dict[int, Decimal]:
+    """Suma de los fragmentos de cada cuenta (solo las que tienen fragmentos)"""
+    consulta = (
+        select(SaldoFragmento.IdCuenta, SaldoFragmento.Fragmento, SaldoFragmento.Saldo)
+        .where(SaldoFragmento.IdCuenta.in_(sorted(set(cuenta_ids))))
+        .order_by(SaldoFragmento.IdCuenta, SaldoFragmento.Fragmento)
+    )
+    if bloquear:
+        consulta = consulta.with_for_update()
+    sumas: Dict[int, Decimal] = {}
+    for fila in db.execute(consulta):
+        sumas[fila.IdCuenta] = sumas.get(fila.IdCuenta, Decimal("0")) + fila.Saldo
+    return sumas
+
+
+class CuentaBloqueada(NamedTuple):
+    IdCuenta: int
+    Numero: str
+    Saldo: Decimal  # Incluye los fragmentos de las cuentas fragmentadas
+    Sobregiro: Optional[Decimal]
+
+
+def bloquear_cuentas(db: Session, cuenta_ids: Iterable[int], medicion: MedicionBloqueo) -> Dict[int, CuentaBloqueada]:
+    """
+    Bloquear (SELECT ... FOR UPDATE) las cuentas indicadas en orden ascendente de ID.
+
+    Todas las operaciones que bloquean varias cuentas lo hacen en el mismo orden,
+    por lo que no pueden formar un ciclo de espera entre ellas. Los fragmentos
+    de las cuentas fragmentadas se suman después de obtener los bloqueos, sin
+    bloquearlos: los créditos concurrentes siguen entrando.
+    """
+    ids = sorted(set(cuenta_ids))
+    with medicion.medir():
+        filas = db.execute(
+            select(Cuenta.IdCuenta, Cuenta.Numero, Cuenta.Saldo, Cuenta.Sobregiro)
+            .where(Cuenta.IdCuenta.in_(ids))
+            .order_by(Cuenta.IdCuenta)
+            .with_for_update()
+        ).all()
+    fragmentadas = [fila.IdCuenta for fila in filas if cuentas_fragmentadas.fragmentada(fila.IdCuenta)]
+    fragmentos = sumar_fragmentos(db, fragmentadas) if fragmentadas else {}
+    return {
+        fila.IdCuenta: CuentaBloqueada(
+            fila.IdCuenta, fila.Numero, fila.Saldo + fragmentos.get(fila.IdCuenta, 0), fila.Sobregiro
+        )
+        for fila in filas
+    }
+
+
+def acreditar(db: Session, cuenta_id: int, valor: Decimal, medicion: MedicionBloqueo) -> bool:
+    """
+    Sumar `valor` al saldo de la cuenta. Retorna False si la cuenta no existe.
+
+    En una cuenta fragmentada el crédito va a un fragmento al azar y no
+    bloquea la fila de cuenta.
+    """
+    fragmento = cuentas_fragmentadas.fragmento_aleatorio(cuenta_id)
+    if fragmento is not None:
+        with medicion.medir():
+            resultado = db.execute(
+                update(SaldoFragmento)
+                .where(SaldoFragmento.IdCuenta == cuenta_id, SaldoFragmento.Fragmento == fragmento)
+                .values(Saldo=SaldoFragmento.Saldo + valor)
+                .execution_options(synchronize_session=False)
+            )
+        if resultado.rowcount == 1:
+            return True
+        # La cuenta dejó de estar fragmentada (o cambió su cantidad de fragmentos)
+    with medicion.medir():
+        resultado = db.execute(
+            update(Cuenta)
+            .where(Cuenta.IdCuenta == cuenta_id)
+            .values(Saldo=Cuenta.Saldo + valor)
+            .execution_options(synchronize_session=False)
+        )
+    return resultado.rowcount == 1
+
+
+def debitar(db: Session, cuenta_id: int, valor: Decimal, medicion: MedicionBloqueo) -> None:
+    """
+    Restar `valor` del saldo si `Saldo + Sobregiro` lo cubre, en un único UPDATE condicional.
+
+    Marca SobregiroNoAutorizado cuando el saldo resultante queda negativo. La
+    asignación del indicador va primero porque MySQL evalúa el SET de izquierda a
+    derecha y debe ver el saldo anterior al débito. Las cuentas fragmentadas
+    se debitan con `debitar_fragmentada`.
+    """
+    if cuentas_fragmentadas.fragmentada(cuenta_id):
+        return debitar_fragmentada(db, cuenta_id, valor, medicion)
+    with medicion.medir():
+        resultado = db.execute(
+            update(Cuenta)
+            .where(
+                Cuenta.IdCuenta == cuenta_id,
+                Cuenta.Saldo + func.coalesce(Cuenta.Sobregiro, 0) >= valor
+            )
+            .ordered_values(
+                (Cuenta.SobregiroNoAutorizado, case(
+                    (Cuenta.Saldo - valor < 0, True),
+                    else_=Cuenta.SobregiroNoAutorizado
+                )),
+                (Cuenta.Saldo, Cuenta.Saldo - valor),
+            )
+            .execution_options(synchronize_session=False)
+        )
+    if resultado.rowcount == 1:
+        return
+
+    # El UPDATE no aplicó: distinguir cuenta inexistente de saldo insuficiente
+    cuenta = db.execute(
+        select(Cuenta.Saldo, Cuenta.Sobregiro, saldo_total().label("SaldoTotal")).where(Cuenta.IdCuenta == cuenta_id)
+    ).first()
+    if cuenta is None:
+        raise ValueError(f"Cuenta con ID {cuenta_id} no encontrada")
+    if cuenta.SaldoTotal != cuenta.Saldo:
+        # Fragmentada en otro proceso: los fragmentos pueden cubrir el débito
+        return debitar_fragmentada(db, cuenta_id, valor, medicion)
+    saldo_disponible = cuenta.Saldo + (cuenta.Sobregiro or Decimal("0"))
+    raise ValueError(f"Saldo insuficiente. Disponible: {saldo_disponible}, Solicitado: {valor}")
+
+
+def debitar_fragmentada(db: Session, cuenta_id: int, valor: Decimal, medicion: MedicionBloqueo) -> None:
+    """
+    Débito de una cuenta fragmentada: bloquea la cuenta y, si cuenta.Saldo no
+    alcanza, vacía en ella los fragmentos necesarios (en orden) antes de restar.
+    """
+    with medicion.medir():
+        cuenta = db.execute(
+            select(Cuenta.Saldo, Cuenta.Sobregiro).where(Cuenta.IdCuenta == cuenta_id).with_for_update()
+        ).first()
+    if cuenta is None:
+        raise ValueError(f"Cuenta con ID {cuenta_id} no encontrada")
+    
+    tomados, movido, total = [], Decimal("0"), cuenta.Saldo
+    if cuenta.Saldo < valor:
+        with medicion.medir():
+            fragmentos = db.execute(
+                select(SaldoFragmento.Fragmento, SaldoFragmento.Saldo)
+                .where(SaldoFragmento.IdCuenta == cuenta_id)
+                .order_by(SaldoFragmento.Fragmento)
+                .with_for_update()
+            ).all()
+        total += sum((f.Saldo for f in fragmentos), Decimal("0"))
+        saldo_disponible = total + (cuenta.Sobregiro or Decimal("0"))
+        if saldo_disponible < valor:
+            raise ValueError(f"Saldo insuficiente. Disponible: {saldo_disponible}, Solicitado: {valor}")
+        for fragmento in fragmentos:
+            if cuenta.Saldo + movido >= valor:
+                break
+            if fragmento.Saldo:
+                tomados.append(fragmento.Fragmento)
+                movido += fragmento.Saldo
+    
+    if tomados:
+        db.execute(
+            update(SaldoFragmento)
+            .where(SaldoFragmento.IdCuenta == cuenta_id, SaldoFragmento.Fragmento.in_(tomados))
+            .values(Saldo=0)
+            .execution_options(synchronize_session=False)
+        )
+    valores = {"Saldo": Cuenta.Saldo + (movido - valor)}
+    if total - valor < 0:
+        valores["SobregiroNoAutorizado"] = True
+    db.execute(
+        update(Cuenta)
+        .where(Cuenta.IdCuenta == cuenta_id)
+        .values(**valores)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def aplicar_deltas(
+    db: Session,
+    deltas: Dict[int, Decimal],
+    sobregiradas: Iterable[int],
+    medicion: MedicionBloqueo
+) -> None:
+    """
+    Aplicar variaciones netas de saldo a varias cuentas con un UPDATE multi-fila.
+
+    Las cuentas deben estar bloqueadas con `bloquear_cuentas` y los saldos
+    validados en memoria; `sobregiradas` son las que quedan con saldo negativo.
+    """
+    ids = sorted(cuenta_id for cuenta_id, delta in deltas.items() if delta != 0)
+    sobregiradas = set(sobregiradas)
+    for inicio in range(0, len(ids), TAMANO_LOTE_CUENTAS):
+        lote = ids[inicio:inicio + TAMANO_LOTE_CUENTAS]
+        negativas = [cuenta_id for cuenta_id in lote if cuenta_id in sobregiradas]
+        valores = {
+            "Saldo": Cuenta.Saldo + case(
+                {cuenta_id: deltas[cuenta_id] for cuenta_id in lote},
+                value=Cuenta.IdCuenta
+            )
+        }
+        if negativas:
+            valores["SobregiroNoAutorizado"] = case(
+                (Cuenta.IdCuenta.in_(negativas), True),
+                else_=Cuenta.SobregiroNoAutorizado
+            )
+        with medicion.medir():
+            db.execute(
+                update(Cuenta)
+                .where(Cuenta.IdCuenta.in_(lote))
+                .values(**valores)
+                .execution_options(synchronize_session=False)
+            )
+
+
+def insertar_movimientos(db: Session, filas: List[dict]) -> List[Optional[int]]:
+    """
+    Insertar movimientos en bloque y retornar sus IDs en el mismo orden.
+
+    Con motores que soportan INSERT ... RETURNING en executemany se obtienen los
+    IDs generados; con MySQL el insert se agrupa en sentencias multi-fila pero
+    los IDs no quedan disponibles y se retorna None en su lugar.
+    """
+    if not filas:
+        return []
+    if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+        return list(db.scalars(
+            insert(Movimiento).returning(Movimiento.IdMovimiento, sort_by_parameter_order=True),
+            filas
+        ))
+    db.execute(insert(Movimiento), filas)
+    return [None] * len(filas)
@@ -1,6 +1,10 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from app.crud import base
+from app.crud.contabilizacion import saldo_total
 from app.models.cuenta import Cuenta
 from app.schemas.cuenta import CuentaCreate, CuentaUpdate
+from app.utils.paginacion import paginar
 from typing import List, Optional
 
 
@@ -14,9 +18,9 @@ def get_cuenta_by_numero(db: Session, numero: str) -> Optional[Cuenta]:
     return db.query(Cuenta).filter(Cuenta.Numero == numero).first()
 
 
-def get_cuentas(db: Session, skip: int = 0, limit: int = 100) -> List[Cuenta]:
+def get_cuentas(db: Session, skip: int = 0, limit: int = 100, despues_de: Optional[tuple] = None) -> List[Cuenta]:
     """Obtener lista de cuentas con paginación"""
-    return db.query(Cuenta).offset(skip).limit(limit).all()
+    return paginar(db.query(Cuenta), [Cuenta.IdCuenta], skip, limit, despues_de).all()
 
 
 def get_cuentas_by_sucursal(db: Session, sucursal_id: int) -> List[Cuenta]:
@@ -29,20 +33,12 @@ def create_cuenta(db: Session, cuenta: CuentaCreate) -> Cuenta:
     db_cuenta = Cuenta(**cuenta.dict())
     db.add(db_cuenta)
     db.commit()
-    db.refresh(db_cuenta)
     return db_cuenta
 
 
 def update_cuenta(db: Session, cuenta_id: int, cuenta: CuentaUpdate) -> Optional[Cuenta]:
     """Actualizar una cuenta existente"""
-    db_cuenta = get_cuenta(db, cuenta_id)
-    if db_cuenta:
-        update_data = cuenta.dict(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(db_cuenta, key, value)
-        db.commit()
-        db.refresh(db_cuenta)
-    return db_cuenta
+    return base.actualizar(db, Cuenta, cuenta_id, cuenta.dict(exclude_unset=True))
 
 
 def delete_cuenta(db: Session, cuenta_id: int) -> bool:
@@ -56,8 +52,11 @@ def delete_cuenta(db: Session, cuenta_id: int) -> bool:
 
 
 def get_saldo_cuenta(db: Session, cuenta_id: int) -> Optional[dict]:
-    """Consultar el saldo de una cuenta"""
-    cuenta = get_cuenta(db, cuenta_id)
+    """Consultar el saldo de una cuenta (con sus fragmentos, si está fragmentada)"""
+    cuenta = db.execute(
+        select(Cuenta.IdCuenta, Cuenta.Numero, saldo_total().label("Saldo"), Cuenta.Sobregiro)
+        .where(Cuenta.IdCuenta == cuenta_id)
+    ).first()
     if cuenta:
         return {
             "IdCuenta": cuenta.IdCuenta,
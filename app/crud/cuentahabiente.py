@@ -1,8 +1,10 @@
 from sqlalchemy.orm import Session, joinedload
+from app.crud import base
 from app.models.cuentahabiente import Cuentahabiente
 from app.models.ciudad import Ciudad
 from app.models.tipo_documento import TipoDocumento
 from app.schemas.cuentahabiente import CuentahabienteCreate, CuentahabienteUpdate
+from app.utils.paginacion import paginar
 from typing import List, Optional
 
 
@@ -22,12 +24,15 @@ def get_cuentahabiente_by_documento(db: Session, documento: str) -> Optional[Cue
     ).filter(Cuentahabiente.Documento == documento).first()
 
 
-def get_cuentahabientes(db: Session, skip: int = 0, limit: int = 100) -> List[Cuentahabiente]:
+def get_cuentahabientes(
+    db: Session, skip: int = 0, limit: int = 100, despues_de: Optional[tuple] = None
+) -> List[Cuentahabiente]:
     """Obtener lista de cuentahabientes con paginación e información relacionada"""
-    return db.query(Cuentahabiente).options(
+    query = db.query(Cuentahabiente).options(
         joinedload(Cuentahabiente.ciudad),
         joinedload(Cuentahabiente.tipo_documento)
-    ).offset(skip).limit(limit).all()
+    )
+    return paginar(query, [Cuentahabiente.IdCuentahabiente], skip, limit, despues_de).all()
 
 
 def create_cuentahabiente(db: Session, cuentahabiente: CuentahabienteCreate) -> Cuentahabiente:
@@ -35,20 +40,12 @@ def create_cuentahabiente(db: Session, cuentahabiente: CuentahabienteCreate) ->
     db_cuentahabiente = Cuentahabiente(**cuentahabiente.dict())
     db.add(db_cuentahabiente)
     db.commit()
-    db.refresh(db_cuentahabiente)
     return db_cuentahabiente
 
 
 def update_cuentahabiente(db: Session, cuentahabiente_id: int, cuentahabiente: CuentahabienteUpdate) -> Optional[Cuentahabiente]:
     """Actualizar un cuentahabiente existente"""
-    db_cuentahabiente = get_cuentahabiente(db, cuentahabiente_id)
-    if db_cuentahabiente:
-        update_data = cuentahabiente.dict(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(db_cuentahabiente, key, value)
-        db.commit()
-        db.refresh(db_cuentahabiente)
-    return db_cuentahabiente
+    return base.actualizar(db, Cuentahabiente, cuentahabiente_id, cuentahabiente.dict(exclude_unset=True))
 
 
 def delete_cuentahabiente(db: Session, cuentahabiente_id: int) -> bool:
@@ -0,0 +1,244 @@
+"""
+Plan de cuotas de los préstamos (tabla cuota_prestamo) y su cobro.
+
+Al crear un préstamo se generan sus cuotas desde la tabla de amortización
+(`app.utils.amortizacion`), una por mes a partir de la fecha del préstamo; si
+la fecha es anterior a hoy, las cuotas ya vencidas se registran como pagadas
+por fuera del sistema. Al cambiar la tasa, el plazo o el seguro se reemplazan
+las cuotas no pagadas: el capital pendiente se reamortiza en las cuotas que
+faltan. Un préstamo anterior a la tabla recibe primero su plan original.
+
+El cobro (`cobrar_cuotas`, que ejecuta `app.jobs.cobrar_cuotas`) toma las
+cuotas vencidas de un grupo de préstamos y, en una transacción, debita las
+cuentas con un UPDATE multi-fila, inserta los movimientos en bloque y marca
+las cuotas. Una cuota queda PAGADA en la misma transacción que su débito, así
+que repetir el cobro después de una falla no cobra dos veces. Las cuotas que
+la cuenta no cubre quedan en MORA y se intentan de nuevo en el siguiente cobro.
+"""
+
+import calendar
+import os
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional, Sequence
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.crud import contabilizacion
+from app.crud import evento_cuenta
+from app.crud import gran_movimiento
+from app.crud import resumen_sucursal
+from app.crud import saldo_diario
+from app.models.cuenta import Cuenta
+from app.models.cuota_prestamo import CuotaPrestamo
+from app.models.prestamo import Prestamo
+from app.utils.amortizacion import tabla_amortizacion
+from app.utils.eventos import centro_eventos
+from app.utils.particiones import sumar_meses
+
+PENDIENTE = "PENDIENTE"
+PAGADA = "PAGADA"
+MORA = "MORA"
+POR_COBRAR = (PENDIENTE, MORA)
+
+# Tipo de los movimientos de cobro (por defecto Pago de Servicios)
+TIPO_MOVIMIENTO_COBRO = int(os.getenv("COBRO_TIPO_MOVIMIENTO", "5"))
+
+
+def vencimiento(fecha: date, numero: int) -> date:
+    """Vencimiento de la cuota `numero`: el mismo día, `numero` meses después (o el último día del mes)"""
+    mes = sumar_meses(fecha, numero)
+    return mes.replace(day=min(fecha.day, calendar.monthrange(mes.year, mes.month)[1]))
+
+
+def _insertar_plan(
+    db: Session, prestamo: Prestamo, saldo: Decimal, plazo: int, primera: int, pagadas_hasta: Optional[date] = None
+) -> int:
+    """Insertar las cuotas `primera`..`primera + plazo - 1` que amortizan `saldo`"""
+    tabla = tabla_amortizacion(saldo, prestamo.Interes, plazo, prestamo.Seguro or Decimal("0"))
+    filas = []
+    for cuota in tabla["Cuotas"]:
+        numero = primera + cuota["Periodo"] - 1
+        fecha = vencimiento(prestamo.Fecha, numero)
+        filas.append({
+            "IdPrestamo": prestamo.IdPrestamo,
+            "NumeroCuota": numero,
+            "FechaVencimiento": fecha,
+            "Capital": cuota["Capital"],
+            "Interes": cuota["Interes"],
+            "Seguro": cuota["Seguro"],
+            "Valor": cuota["CuotaTotal"],
+            "Estado": PAGADA if pagadas_hasta is not None and fecha < pagadas_hasta else PENDIENTE,
+        })
+    db.execute(insert(CuotaPrestamo), filas)
+    return len(filas)
+
+
+def generar_cuotas(db: Session, prestamo: Prestamo, pagadas_hasta: Optional[date] = None) -> int:
+    """
+    Generar el plan de un préstamo nuevo, sin confirmar. Con `pagadas_hasta`,
+    las cuotas que vencen antes de esa fecha se registran como pagadas.
+    """
+    return _insertar_plan(db, prestamo, prestamo.Valor, prestamo.Plazo, 1, pagadas_hasta)
+
+
+def tiene_plan(db: Session, prestamo_id: int) -> bool:
+    return db.execute(
+        select(CuotaPrestamo.IdCuota).where(CuotaPrestamo.IdPrestamo == prestamo_id).limit(1)
+    ).first() is not None
+
+
+def asegurar_plan(db: Session, prestamo: Prestamo, pagadas_hasta: date) -> int:
+    """
+    Generar, sin confirmar, el plan de un préstamo que no tiene cuotas (creado
+    antes de la tabla cuota_prestamo), con las vencidas antes de `pagadas_hasta`
+    pagadas. Llamarlo antes de cambiar los términos del préstamo.
+    """
+    if tiene_plan(db, prestamo.IdPrestamo):
+        return 0
+    return generar_cuotas(db, prestamo, pagadas_hasta)
+
+
+def regenerar_cuotas(db: Session, prestamo: Prestamo) -> int:
+    """
+    Reemplazar las cuotas no pagadas según los términos actuales del préstamo,
+    sin confirmar: el capital aún no pagado se amortiza en las cuotas que faltan
+    para completar el plazo. Retorna cuántas cuotas quedaron por cobrar.
+    """
+    pagadas = db.execute(
+        select(
+            func.count().label("Cantidad"),
+            func.coalesce(func.sum(CuotaPrestamo.Capital), 0).label("Capital"),
+            func.coalesce(func.max(CuotaPrestamo.NumeroCuota), 0).label("Ultima"),
+        ).where(CuotaPrestamo.IdPrestamo == prestamo.IdPrestamo, CuotaPrestamo.Estado == PAGADA)
+    ).one()
+    db.execute(
+        delete(CuotaPrestamo)
+        .where(CuotaPrestamo.IdPrestamo == prestamo.IdPrestamo, CuotaPrestamo.Estado != PAGADA)
+        .execution_options(synchronize_session=False)
+    )
+    restantes = prestamo.Plazo - pagadas.Cantidad
+    saldo = prestamo.Valor - Decimal(pagadas.Capital)
+    if restantes <= 0 or saldo <= 0:
+        return 0
+    return _insertar_plan(db, prestamo, saldo, restantes, pagadas.Ultima + 1)
+
+
+def get_cuotas_prestamo(db: Session, prestamo_id: int) -> List[CuotaPrestamo]:
+    return db.execute(
+        select(CuotaPrestamo).where(CuotaPrestamo.IdPrestamo == prestamo_id).order_by(CuotaPrestamo.NumeroCuota)
+    ).scalars().all()
+
+
+def generar_planes_faltantes(db: Session, fecha: date, lote: int = 500) -> int:
+    """
+    Generar el plan de los préstamos que no tienen cuotas (creados antes de la
+    tabla cuota_prestamo), un lote de préstamos por transacción. Las cuotas
+    vencidas antes de `fecha` se cobraron por fuera del sistema y quedan pagadas.
+    Retorna cuántos planes se generaron.
+    """
+    total = 0
+    while True:
+        prestamos = db.execute(
+            select(Prestamo)
+            .where(~select(CuotaPrestamo.IdCuota).where(CuotaPrestamo.IdPrestamo == Prestamo.IdPrestamo).exists())
+            .order_by(Prestamo.IdPrestamo)
+            .limit(lote)
+        ).scalars().all()
+        if not prestamos:
+            return total
+        for prestamo in prestamos:
+            generar_cuotas(db, prestamo, pagadas_hasta=fecha)
+        db.commit()
+        total += len(prestamos)
+
+
+def prestamos_por_cobrar(db: Session, fecha: date) -> List[int]:
+    """IDs de los préstamos con cuotas por cobrar vencidas hasta `fecha`"""
+    return db.execute(
+        select(CuotaPrestamo.IdPrestamo)
+        .where(CuotaPrestamo.Estado.in_(POR_COBRAR), CuotaPrestamo.FechaVencimiento <= fecha)
+        .distinct()
+        .order_by(CuotaPrestamo.IdPrestamo)
+    ).scalars().all()
+
+
+def cobrar_cuotas(db: Session, prestamo_ids: Sequence[int], fecha: date) -> dict:
+    """
+    Cobrar en una transacción las cuotas vencidas hasta `fecha` de los préstamos
+    indicados. Las cuotas de cada cuenta se cobran en orden de préstamo y número
+    de cuota mientras el saldo más el sobregiro las cubra; las demás quedan en mora.
+    """
+    def unidad_de_trabajo(medicion):
+        with medicion.medir():
+            # Bloquear las cuotas antes que las cuentas: un cobro simultáneo de los
+            # mismos préstamos espera aquí y después ya no las ve por cobrar
+            cuotas = db.execute(
+                select(
+                    CuotaPrestamo.IdCuota, CuotaPrestamo.NumeroCuota, CuotaPrestamo.Valor,
+                    Prestamo.IdCuenta, Prestamo.Numero, Prestamo.Plazo, Cuenta.IdSucursal,
+                )
+                .join(Prestamo, Prestamo.IdPrestamo == CuotaPrestamo.IdPrestamo)
+                .join(Cuenta, Cuenta.IdCuenta == Prestamo.IdCuenta)
+                .where(
+                    CuotaPrestamo.IdPrestamo.in_(sorted(set(prestamo_ids))),
+                    CuotaPrestamo.Estado.in_(POR_COBRAR),
+                    CuotaPrestamo.FechaVencimiento <= fecha,
+                )
+                .order_by(CuotaPrestamo.IdPrestamo, CuotaPrestamo.NumeroCuota)
+                .with_for_update(of=CuotaPrestamo)
+            ).all()
+        if not cuotas:
+            return {"Cobradas": 0, "EnMora": 0, "Valor": Decimal("0")}
+        cuentas = contabilizacion.bloquear_cuentas(db, {c.IdCuenta for c in cuotas}, medicion)
+        saldos = {cuenta_id: cuenta.Saldo for cuenta_id, cuenta in cuentas.items()}
+
+        pagadas, en_mora, filas = [], [], []
+        for cuota in cuotas:
+            cuenta = cuentas[cuota.IdCuenta]
+            if cuota.Valor > saldos[cuenta.IdCuenta] + (cuenta.Sobregiro or 0):
+                en_mora.append(cuota.IdCuota)
+                continue
+            pagadas.append(cuota.IdCuota)
+            if not cuota.Valor:
+                continue
+            saldos[cuenta.IdCuenta] -= cuota.Valor
+            filas.append({
+                "IdCuenta": cuenta.IdCuenta,
+                "IdSucursal": cuota.IdSucursal,
+                "Fecha": fecha,
+                "Valor": -cuota.Valor,
+                "IdTipoMovimiento": TIPO_MOVIMIENTO_COBRO,
+                "Descripcion": f"Cuota {cuota.NumeroCuota}/{cuota.Plazo} préstamo {cuota.Numero}",
+            })
+
+        deltas = {cuenta_id: saldos[cuenta_id] - cuentas[cuenta_id].Saldo for cuenta_id in cuentas}
+        sobregiradas = [cuenta_id for cuenta_id, saldo in saldos.items() if saldo < 0 and deltas[cuenta_id]]
+        contabilizacion.aplicar_deltas(db, deltas, sobregiradas, medicion)
+        saldo_diario.registrar_saldos(db, [cuenta_id for cuenta_id, delta in deltas.items() if delta != 0])
+        ids = contabilizacion.insertar_movimientos(db, filas)
+        evento_cuenta.registrar_eventos(db, filas, ids)
+        resumen_sucursal.acumular(
+            db, [(f["Fecha"], f["IdSucursal"], f["IdTipoMovimiento"], f["Valor"]) for f in filas]
+        )
+        for estado, ids_cuotas, valores in ((PAGADA, pagadas, {"FechaPago": fecha}), (MORA, en_mora, {})):
+            if ids_cuotas:
+                db.execute(
+                    update(CuotaPrestamo)
+                    .where(CuotaPrestamo.IdCuota.in_(ids_cuotas))
+                    .values(Estado=estado, **valores)
+                    .execution_options(synchronize_session=False)
+                )
+        db.commit()
+        return {
+            "Cobradas": len(pagadas),
+            "EnMora": len(en_mora),
+            "Valor": -sum((f["Valor"] for f in filas), Decimal("0")),
+            "Movimientos": [(f["IdCuenta"], f["Valor"]) for f in filas],
+        }
+
+    resultado = contabilizacion.ejecutar_con_reintentos(db, "cobro_cuotas", unidad_de_trabajo)
+    centro_eventos.avisar()
+    gran_movimiento.contabilizar_volumen(db, resultado.pop("Movimientos", []))
+    return resultado
@@ -0,0 +1,147 @@
+"""
+Bandeja de eventos de cuenta (tabla evento_cuenta).
+
+Las funciones de contabilización registran un evento por movimiento en la
+misma transacción, así que un evento existe si y solo si su movimiento se
+confirmó. El relevo de `app.utils.eventos` los lee para notificar a los
+suscriptores; el job `app.jobs.purgar_eventos` elimina los antiguos.
+"""
+
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.cuenta import Cuenta
+from app.models.evento_cuenta import EventoCuenta
+from app.models.movimiento import Movimiento
+from app.utils.eventos import EVENTOS_ESPERA_HUECOS, EVENTOS_MAX_REPETICION, CursorEventos
+from app.utils.fragmentos import cuentas_fragmentadas
+
+# Eventos por lectura del relevo
+TAMANO_LOTE_EVENTOS = 1000
+
+COLUMNAS_EVENTO = (
+    EventoCuenta.IdEvento, EventoCuenta.IdCuenta, EventoCuenta.IdMovimiento, EventoCuenta.IdTipoMovimiento,
+    EventoCuenta.Fecha, EventoCuenta.Valor, EventoCuenta.Descripcion,
+)
+
+
+def fila_movimiento(movimiento: Movimiento) -> dict:
+    return {
+        "IdCuenta": movimiento.IdCuenta,
+        "IdTipoMovimiento": movimiento.IdTipoMovimiento,
+        "Fecha": movimiento.Fecha,
+        "Valor": movimiento.Valor,
+        "Descripcion": movimiento.Descripcion,
+    }
+
+
+def registrar_eventos(db: Session, filas: Sequence[dict], ids_movimientos: Sequence[Optional[int]]) -> None:
+    """Registrar un evento por movimiento (filas como las de insertar_movimientos), sin confirmar"""
+    if not filas:
+        return
+    ahora = datetime.now()
+    db.execute(insert(EventoCuenta), [
+        {
+            "IdCuenta": fila["IdCuenta"],
+            "IdMovimiento": id_movimiento,
+            "IdTipoMovimiento": fila["IdTipoMovimiento"],
+            "Fecha": fila["Fecha"],
+            "Valor": fila["Valor"],
+            "Descripcion": fila.get("Descripcion"),
+            "FechaCreacion": ahora,
+        }
+        for fila, id_movimiento in zip(filas, ids_movimientos)
+    ])
+
+
+def registrar_movimientos(db: Session, movimientos: Sequence[Movimiento]) -> None:
+    """Registrar los eventos de movimientos del ORM; los inserta primero para conocer sus IDs"""
+    db.flush()
+    registrar_eventos(db, [fila_movimiento(m) for m in movimientos], [m.IdMovimiento for m in movimientos])
+
+
+def leer_nuevos(db: Session, cursor: CursorEventos, limite: int = TAMANO_LOTE_EVENTOS) -> List[dict]:
+    """
+    Eventos posteriores al cursor (y los de sus huecos que ya se confirmaron),
+    en orden de ID, y avanzar el cursor. La primera lectura solo ubica el
+    cursor en el último evento existente.
+    """
+    if cursor.ultimo is None:
+        cursor.ultimo = db.execute(select(func.max(EventoCuenta.IdEvento))).scalar() or 0
+        return []
+    condicion = EventoCuenta.IdEvento > cursor.ultimo
+    if cursor.huecos:
+        condicion = or_(condicion, EventoCuenta.IdEvento.in_(list(cursor.huecos)))
+    filas = db.execute(
+        select(*COLUMNAS_EVENTO).where(condicion).order_by(EventoCuenta.IdEvento).limit(limite)
+    ).all()
+    cursor.avanzar([f.IdEvento for f in filas])
+    return [f._asdict() for f in filas]
+
+
+class Pendientes(NamedTuple):
+    """Eventos por reenviar al reanudar una suscripción"""
+    eventos: List[dict]
+    # Con más de EVENTOS_MAX_REPETICION pendientes no se reenvían: el cliente
+    # recarga su estado y continúa desde este ID
+    reinicio: Optional[int] = None
+
+
+def get_eventos_cuenta(
+    db: Session, cuenta_id: int, despues_de: Optional[int], limite: int = EVENTOS_MAX_REPETICION
+) -> Optional[Pendientes]:
+    """
+    Eventos de la cuenta posteriores a `despues_de` (ninguno si es None). None si la cuenta no existe.
+
+    Los créditos de una cuenta fragmentada no bloquean la fila de cuenta, así
+    que un evento con ID menor que `despues_de` puede haberse confirmado
+    después de que el cliente lo recibiera. En esas cuentas se repiten también
+    los eventos anteriores creados hasta EVENTOS_ESPERA_HUECOS segundos antes
+    de `despues_de`; el cliente descarta los IdEvento que ya tiene.
+    """
+    if db.get(Cuenta, cuenta_id) is None:
+        return None
+    if despues_de is None:
+        return Pendientes([])
+    condicion = EventoCuenta.IdEvento > despues_de
+    if cuentas_fragmentadas.fragmentada(cuenta_id):
+        creado = db.execute(
+            select(EventoCuenta.FechaCreacion).where(EventoCuenta.IdEvento == despues_de)
+        ).scalar()
+        if creado is not None:
+            condicion = or_(condicion, and_(
+                EventoCuenta.IdEvento < despues_de,
+                EventoCuenta.FechaCreacion >= creado - timedelta(seconds=EVENTOS_ESPERA_HUECOS),
+            ))
+    filas = db.execute(
+        select(*COLUMNAS_EVENTO)
+        .where(EventoCuenta.IdCuenta == cuenta_id, condicion)
+        .order_by(EventoCuenta.IdEvento)
+        .limit(limite + 1)
+    ).all()
+    if len(filas) <= limite:
+        return Pendientes([f._asdict() for f in filas])
+    ultimo = db.execute(
+        select(func.max(EventoCuenta.IdEvento)).where(EventoCuenta.IdCuenta == cuenta_id)
+    ).scalar()
+    return Pendientes([], reinicio=ultimo)
+
+
+def purgar_eventos_antiguos(db: Session, antes_de: datetime, lote: int = 1000) -> int:
+    """Eliminar los eventos creados antes de `antes_de` en lotes de `lote` filas. Retorna cuántos se eliminaron"""
+    total = 0
+    while True:
+        ids = db.execute(
+            select(EventoCuenta.IdEvento).where(EventoCuenta.FechaCreacion < antes_de).limit(lote)
+        ).scalars().all()
+        if not ids:
+            break
+        db.execute(delete(EventoCuenta).where(EventoCuenta.IdEvento.in_(ids)))
+        db.commit()
+        total += len(ids)
+        if len(ids) < lote:
+            break
+    return total
@@ -0,0 +1,127 @@
+"""
+Extracto de cuenta: saldo de apertura, movimientos con saldo acumulado y cierre.
+
+El saldo acumulado se calcula en la base de datos con una función de ventana
+(`SUM(Valor) OVER (ORDER BY Fecha, IdMovimiento)`). Con motores sin funciones
+de ventana (MySQL < 8.0, SQLite < 3.25) la consulta trae solo los movimientos
+y el acumulado se calcula al recorrerlos, en la misma pasada.
+
+Si el periodo incluye meses archivados (`app.utils.archivo`), esos
+movimientos se leen del archivo y van antes de los de la consulta; en ese
+caso el acumulado también se calcula al recorrerlos.
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session
+
+from app.crud.contabilizacion import saldo_total
+from app.models.cuenta import Cuenta
+from app.models.movimiento import Movimiento
+from app.models.tipo_movimiento import TipoMovimiento
+from app.utils.archivo import archivo_movimientos
+
+
+def soporta_funciones_ventana(db: Session) -> bool:
+    """Indica si el motor de la sesión soporta funciones de ventana"""
+    dialecto = db.get_bind().dialect
+    version = dialecto.server_version_info or ()
+    if dialecto.name == "sqlite":
+        return version >= (3, 25)
+    if dialecto.name in ("mysql", "mariadb"):
+        if getattr(dialecto, "is_mariadb", False):
+            return version >= (10, 2)
+        return version >= (8, 0)
+    return True
+
+
+def saldo_apertura(db: Session, cuenta_id: int, desde: date) -> Optional[Decimal]:
+    """
+    Saldo de la cuenta al inicio de `desde`: el saldo actual menos los movimientos
+    desde esa fecha. Retorna None si la cuenta no existe.
+    """
+    saldo = db.execute(select(saldo_total()).where(Cuenta.IdCuenta == cuenta_id)).scalar_one_or_none()
+    if saldo is None:
+        return None
+    corte = archivo_movimientos.fecha_corte()
+    archivados = Decimal("0")
+    if corte is not None and desde < corte:
+        archivados = archivo_movimientos.sumar_cuenta(cuenta_id, desde)
+        desde = corte
+    posteriores = db.execute(
+        select(func.coalesce(func.sum(Movimiento.Valor), 0))
+        .where(Movimiento.IdCuenta == cuenta_id, Movimiento.Fecha >= desde)
+    ).scalar_one()
+    return saldo - Decimal(posteriores) - archivados
+
+
+class FilaArchivada(NamedTuple):
+    """Movimiento archivado con las mismas columnas que la consulta del extracto (sin SumaAcumulada)"""
+    IdMovimiento: int
+    Fecha: date
+    IdTipoMovimiento: int
+    TipoMovimiento: Optional[str]
+    Descripcion: Optional[str]
+    Valor: Decimal
+
+
+def movimientos_archivados_extracto(db: Session, cuenta_id: int, desde: date, hasta: date) -> List[FilaArchivada]:
+    """Movimientos del periodo que están en meses archivados, en orden"""
+    corte = archivo_movimientos.fecha_corte()
+    if corte is None or desde >= corte:
+        return []
+    archivados = list(archivo_movimientos.movimientos_cuenta(cuenta_id, desde, hasta))
+    if not archivados:
+        return []
+    tipos = dict(db.execute(select(TipoMovimiento.IdTipoMovimiento, TipoMovimiento.TipoMovimiento)).all())
+    return [
+        FilaArchivada(f.IdMovimiento, f.Fecha, f.IdTipoMovimiento, tipos.get(f.IdTipoMovimiento),
+                      f.Descripcion, f.Valor)
+        for f in archivados
+    ]
+
+
+def consulta_movimientos_extracto(cuenta_id: int, desde: date, hasta: date, con_ventana: bool) -> Select:
+    """Movimientos del periodo en orden; con `con_ventana` incluye la suma acumulada"""
+    orden = (Movimiento.Fecha, Movimiento.IdMovimiento)
+    columnas = [
+        Movimiento.IdMovimiento, Movimiento.Fecha, Movimiento.IdTipoMovimiento,
+        TipoMovimiento.TipoMovimiento, Movimiento.Descripcion, Movimiento.Valor
+    ]
+    if con_ventana:
+        columnas.append(
+            func.sum(Movimiento.Valor).over(order_by=orden, rows=(None, 0)).label("SumaAcumulada")
+        )
+    return (
+        select(*columnas)
+        .join(TipoMovimiento, TipoMovimiento.IdTipoMovimiento == Movimiento.IdTipoMovimiento)
+        .where(Movimiento.IdCuenta == cuenta_id, Movimiento.Fecha >= desde, Movimiento.Fecha <= hasta)
+        .order_by(*orden)
+    )
+
+
+def preparar_extracto(
+    db: Session, cuenta_id: int, desde: date, hasta: date
+) -> Optional[Tuple[Decimal, List[FilaArchivada], Select, bool]]:
+    """
+    Saldo de apertura, movimientos archivados y consulta de movimientos del extracto.
+
+    Las lecturas van en la misma transacción de la sesión, que debe seguir
+    abierta mientras se recorre la consulta para que la apertura y los
+    movimientos correspondan a la misma vista de los datos. Los archivados
+    van antes que las filas de la consulta.
+    Retorna None si la cuenta no existe.
+    """
+    apertura = saldo_apertura(db, cuenta_id, desde)
+    if apertura is None:
+        return None
+    archivados = movimientos_archivados_extracto(db, cuenta_id, desde, hasta)
+    corte = archivo_movimientos.fecha_corte()
+    if corte is not None and desde < corte:
+        desde = corte
+    # La suma de ventana partiría de cero después de los archivados: se acumula al recorrer
+    con_ventana = not archivados and soporta_funciones_ventana(db)
+    return apertura, archivados, consulta_movimientos_extracto(cuenta_id, desde, hasta, con_ventana), con_ventana
@@ -0,0 +1,99 @@
+"""
+Clasificación de cuentas con GranMovimiento según su volumen reciente.
+
+Las operaciones de contabilización alimentan `volumen_cuentas` después del
+commit y marcan las cuentas que superan el umbral. Como cada proceso solo ve
+sus propias operaciones (su volumen puede quedarse corto, nunca pasarse), ese
+camino solo marca; desmarcar lo hace el recálculo completo
+(`app.jobs.clasificar_gran_movimiento`), que parte de la base de datos.
+
+Marcar es accesorio a la operación, que ya está confirmada: si falla, las
+marcas vuelven a quedar pendientes y la operación responde normalmente.
+"""
+
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterable, Optional, Set, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.cuenta import Cuenta
+from app.models.movimiento import Movimiento
+from app.utils.volumen import VolumenCuentas, volumen_cuentas
+
+# Cuentas por sentencia en las actualizaciones masivas (límite de parámetros del driver)
+TAMANO_LOTE_CUENTAS = 5000
+
+logger = logging.getLogger(__name__)
+
+
+def aplicar_marcas(db: Session, cuentas: Iterable[int], valor: bool) -> int:
+    """Fijar GranMovimiento en las cuentas con UPDATE por lotes; retorna las filas modificadas"""
+    ids = sorted(cuentas)
+    modificadas = 0
+    for inicio in range(0, len(ids), TAMANO_LOTE_CUENTAS):
+        lote = ids[inicio:inicio + TAMANO_LOTE_CUENTAS]
+        resultado = db.execute(
+            update(Cuenta)
+            .where(Cuenta.IdCuenta.in_(lote), func.coalesce(Cuenta.GranMovimiento, False) != valor)
+            .values(GranMovimiento=valor)
+            .execution_options(synchronize_session=False)
+        )
+        modificadas += resultado.rowcount
+    return modificadas
+
+
+def contabilizar_volumen(db: Session, movimientos: Iterable[Tuple[int, object]], volumen: VolumenCuentas = volumen_cuentas) -> None:
+    """
+    Registrar movimientos (cuenta, valor) ya confirmados y aplicar las marcas pendientes.
+
+    Las marcas se acumulan y se aplican como máximo una vez por intervalo, en
+    una transacción corta propia; sin marcas pendientes no hay viajes a la base
+    de datos. Un error al marcar no se propaga: la operación ya se confirmó y
+    las marcas se intentan de nuevo con la siguiente.
+    """
+    volumen.registrar(movimientos)
+    pendientes = volumen.tomar_pendientes()
+    if not pendientes:
+        return
+    try:
+        aplicar_marcas(db, pendientes, True)
+        db.commit()
+    except Exception:
+        db.rollback()
+        volumen.devolver_pendientes(pendientes)
+        logger.exception("No se pudo marcar GranMovimiento en %s cuentas", len(pendientes))
+
+
+def recalcular_gran_movimiento(
+    db: Session, hoy: Optional[date] = None, volumen: VolumenCuentas = volumen_cuentas
+) -> Tuple[Set[int], Set[int]]:
+    """
+    Recalcular GranMovimiento de todas las cuentas con una sola pasada agrupada.
+
+    Lee las sumas diarias por cuenta de la ventana (un GROUP BY sobre los
+    movimientos recientes), las carga en cubetas nuevas que reemplazan las del
+    proceso y corrige con UPDATE por lotes las cuentas cuya marca cambió.
+    Retorna (marcadas, desmarcadas).
+    """
+    hoy = hoy or date.today()
+    recalculado = VolumenCuentas(volumen.dias, Decimal(volumen.umbral) / 100)
+    filas = db.execute(
+        select(Movimiento.IdCuenta, Movimiento.Fecha, func.sum(func.abs(Movimiento.Valor)))
+        .where(Movimiento.Fecha > hoy - timedelta(days=volumen.dias), Movimiento.Fecha <= hoy)
+        .group_by(Movimiento.IdCuenta, Movimiento.Fecha)
+        .execution_options(yield_per=10000)
+    )
+    for cuenta_id, fecha, suma in filas:
+        recalculado.registrar([(cuenta_id, suma)], fecha)
+
+    sobre_umbral = recalculado.cuentas_sobre_umbral(hoy)
+    marcadas_bd = set(db.execute(select(Cuenta.IdCuenta).where(Cuenta.GranMovimiento.is_(True))).scalars())
+    marcar, desmarcar = sobre_umbral - marcadas_bd, marcadas_bd - sobre_umbral
+    aplicar_marcas(db, marcar, True)
+    aplicar_marcas(db, desmarcar, False)
+    db.commit()
+    volumen.reemplazar(recalculado, sobre_umbral)
+    return marcar, desmarcar
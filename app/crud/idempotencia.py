@@ -0,0 +1,81 @@
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.idempotencia import Idempotencia
+from typing import Optional
+from datetime import datetime, timedelta
+
+
+def get_idempotencia(db: Session, clave: str) -> Optional[Idempotencia]:
+    """Obtener el registro de una clave (lee siempre el último estado confirmado)"""
+    # Terminar la transacción actual para no leer una instantánea anterior
+    db.rollback()
+    return db.execute(select(Idempotencia).where(Idempotencia.Clave == clave)).scalar_one_or_none()
+
+
+def reservar_idempotencia(db: Session, clave: str, ruta: str, hash_solicitud: str, ttl: timedelta) -> bool:
+    """
+    Registrar la clave como EN_PROCESO. Retorna False si otra solicitud ya la reservó.
+    
+    La llave primaria sobre la clave garantiza que una sola ejecución gane,
+    incluso entre procesos distintos.
+    """
+    ahora = datetime.now()
+    # Una clave vencida se puede reutilizar
+    db.execute(delete(Idempotencia).where(
+        Idempotencia.Clave == clave, Idempotencia.FechaExpiracion < ahora
+    ))
+    db.add(Idempotencia(
+        Clave=clave,
+        Ruta=ruta,
+        HashSolicitud=hash_solicitud,
+        Estado="EN_PROCESO",
+        FechaCreacion=ahora,
+        FechaExpiracion=ahora + ttl
+    ))
+    try:
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+
+def completar_idempotencia(db: Session, clave: str, codigo_estado: int, respuesta: str) -> None:
+    """Almacenar la respuesta final de la clave"""
+    db.execute(
+        update(Idempotencia)
+        .where(Idempotencia.Clave == clave)
+        .values(Estado="COMPLETADO", CodigoEstado=codigo_estado, Respuesta=respuesta)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def liberar_idempotencia(db: Session, clave: str) -> None:
+    """Eliminar una reserva cuya ejecución falló, para que la clave se pueda reintentar"""
+    db.rollback()
+    db.execute(delete(Idempotencia).where(
+        Idempotencia.Clave == clave, Idempotencia.Estado == "EN_PROCESO"
+    ))
+    db.commit()
+
+
+def purgar_idempotencias_vencidas(db: Session, lote: int = 1000) -> int:
+    """Eliminar los registros vencidos en lotes de `lote` filas. Retorna cuántos se eliminaron"""
+    ahora = datetime.now()
+    total = 0
+    while True:
+        claves = db.execute(
+            select(Idempotencia.Clave)
+            .where(Idempotencia.FechaExpiracion < ahora)
+            .limit(lote)
+        ).scalars().all()
+        if not claves:
+            break
+        db.execute(delete(Idempotencia).where(Idempotencia.Clave.in_(claves)))
+        db.commit()
+        total += len(claves)
+        if len(claves) < lote:
+            break
+    return total
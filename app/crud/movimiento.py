@@ -1,26 +1,140 @@
+from sqlalchemy import Select, func, select
 from sqlalchemy.orm import Session
 from app.models.movimiento import Movimiento
-from app.models.cuenta import Cuenta
+from app.crud import contabilizacion
+from app.crud import saldo_diario
+from app.crud import gran_movimiento
+from app.crud import resumen_sucursal
+from app.crud import evento_cuenta
 from app.schemas.movimiento import (
     MovimientoCreate, DepositoCreate, RetiroCreate, TransferenciaCreate
 )
+from app.utils.archivo import archivo_movimientos
+from app.utils.eventos import centro_eventos
+from app.utils.velocidad import LimiteVelocidadExcedido, limites_velocidad
+from app.utils.paginacion import CursorInvalido, paginar
+from app.utils.particiones import inicio_mes, sumar_meses
+from dataclasses import asdict
+from itertools import islice
 from typing import List, Optional
 from datetime import date, datetime
-from decimal import Decimal
 
 
-def get_movimiento(db: Session, movimiento_id: int) -> Optional[Movimiento]:
-    return db.query(Movimiento).filter(Movimiento.IdMovimiento == movimiento_id).first()
+def get_movimiento(db: Session, movimiento_id: int, fecha: Optional[date] = None) -> Optional[Movimiento]:
+    """Obtener un movimiento por ID; con `fecha` solo se consulta la partición de ese día"""
+    query = db.query(Movimiento).filter(Movimiento.IdMovimiento == movimiento_id)
+    if fecha is not None:
+        query = query.filter(Movimiento.Fecha == fecha)
+    return query.first()
 
 
-def get_movimientos(db: Session, skip: int = 0, limit: int = 100) -> List[Movimiento]:
-    return db.query(Movimiento).order_by(Movimiento.Fecha.desc()).offset(skip).limit(limit).all()
+# Orden de los listados: más recientes primero, IdMovimiento desempata las fechas iguales
+ORDEN_MOVIMIENTOS = [Movimiento.Fecha, Movimiento.IdMovimiento]
+# Meses de la primera ventana de un listado sin `desde` (se duplica hasta llenar la página)
+VENTANA_LISTADO_MESES = 3
 
 
-def get_movimientos_by_cuenta(db: Session, cuenta_id: int, skip: int = 0, limit: int = 100) -> List[Movimiento]:
-    return db.query(Movimiento).filter(
-        Movimiento.IdCuenta == cuenta_id
-    ).order_by(Movimiento.Fecha.desc()).offset(skip).limit(limit).all()
+def _validar_cursor(despues_de: Optional[tuple]) -> None:
+    """El cursor debe ser (Fecha, IdMovimiento): las ventanas y el archivo lo usan antes que la consulta"""
+    if despues_de is None:
+        return
+    if len(despues_de) != len(ORDEN_MOVIMIENTOS):
+        raise CursorInvalido("Cursor inválido para este listado")
+    fecha, movimiento_id = despues_de
+    if (not isinstance(fecha, date) or isinstance(fecha, datetime)
+            or not isinstance(movimiento_id, int) or isinstance(movimiento_id, bool)):
+        raise CursorInvalido("Cursor inválido para este listado")
+
+
+def _filtrar_fechas(query, desde: Optional[date], hasta: Optional[date]):
+    """Rango de fechas opcional; con movimiento particionada limita las particiones leídas"""
+    if desde is not None:
+        query = query.filter(Movimiento.Fecha >= desde)
+    if hasta is not None:
+        query = query.filter(Movimiento.Fecha <= hasta)
+    return query
+
+
+def _paginar_por_ventanas(
+    query, skip: int, limit: int, despues_de: Optional[tuple], hasta: Optional[date]
+) -> List[Movimiento]:
+    """
+    Página (más recientes primero) de una consulta sin cota inferior de fecha.
+
+    Se consulta solo una ventana reciente, `Fecha >= inicio`, que se duplica
+    mientras no llene la página y queden fechas anteriores. Como las filas van
+    de la más reciente a la más antigua, las de la ventana son el principio del
+    listado completo: el resultado es el mismo, pero cada consulta lleva un rango
+    de fechas con el que el optimizador descarta particiones.
+    """
+    primera = query.with_entities(func.min(Movimiento.Fecha)).scalar()
+    if primera is None:
+        return []
+    ancla = despues_de[0] if despues_de else (hasta or date.today())
+    meses = VENTANA_LISTADO_MESES
+    while True:
+        inicio = max(sumar_meses(inicio_mes(ancla), -(meses - 1)), primera)
+        movimientos = paginar(
+            query.filter(Movimiento.Fecha >= inicio), ORDEN_MOVIMIENTOS, skip, limit, despues_de, descendente=True
+        ).all()
+        if len(movimientos) == limit or inicio <= primera:
+            return movimientos
+        meses *= 2
+
+
+def get_movimientos(
+    db: Session, skip: int = 0, limit: int = 100, despues_de: Optional[tuple] = None,
+    desde: Optional[date] = None, hasta: Optional[date] = None
+) -> List[Movimiento]:
+    _validar_cursor(despues_de)
+    query = _filtrar_fechas(db.query(Movimiento), desde, hasta)
+    if desde is None:
+        return _paginar_por_ventanas(query, skip, limit, despues_de, hasta)
+    return paginar(query, ORDEN_MOVIMIENTOS, skip, limit, despues_de, descendente=True).all()
+
+
+def get_movimientos_by_cuenta(
+    db: Session, cuenta_id: int, skip: int = 0, limit: int = 100, despues_de: Optional[tuple] = None,
+    desde: Optional[date] = None, hasta: Optional[date] = None
+) -> List[Movimiento]:
+    """
+    Movimientos de la cuenta, más recientes primero.
+
+    Los meses archivados (anteriores a `archivo_movimientos.fecha_corte()`) se
+    leen del archivo y van después de las filas de la base de datos, así que
+    la paginación por `skip` y por cursor funciona igual sobre ambas fuentes.
+    """
+    _validar_cursor(despues_de)
+    query = _filtrar_fechas(db.query(Movimiento).filter(Movimiento.IdCuenta == cuenta_id), desde, hasta)
+    corte = archivo_movimientos.fecha_corte()
+    if corte is None:
+        if desde is None:
+            return _paginar_por_ventanas(query, skip, limit, despues_de, hasta)
+        return paginar(query, ORDEN_MOVIMIENTOS, skip, limit, despues_de, descendente=True).all()
+    
+    movimientos = []
+    # La base de datos solo aporta las filas desde el corte; un cursor anterior al corte ya la recorrió
+    if (despues_de is None or despues_de[0] >= corte) and (hasta is None or hasta >= corte):
+        recientes = query.filter(Movimiento.Fecha >= corte)
+        movimientos = paginar(recientes, ORDEN_MOVIMIENTOS, skip, limit, despues_de, descendente=True).all()
+        if len(movimientos) == limit:
+            return movimientos
+        if despues_de is None and not movimientos and skip:
+            # El OFFSET pasó todas las filas de la base de datos: lo que sobra se aplica al archivo
+            skip = max(skip - recientes.count(), 0)
+        else:
+            skip = 0
+    
+    archivados = archivo_movimientos.movimientos_cuenta(cuenta_id, desde, hasta, descendente=True)
+    if despues_de is not None:
+        skip = 0
+        if despues_de[0] < corte:
+            llave = tuple(despues_de)
+            archivados = (f for f in archivados if (f.Fecha, f.IdMovimiento) < llave)
+    movimientos += [
+        Movimiento(**asdict(f)) for f in islice(archivados, skip, skip + limit - len(movimientos))
+    ]
+    return movimientos
 
 
 def get_movimientos_by_fecha(db: Session, fecha_inicio: date, fecha_fin: date) -> List[Movimiento]:
@@ -30,129 +144,259 @@ def get_movimientos_by_fecha(db: Session, fecha_inicio: date, fecha_fin: date) -
     ).order_by(Movimiento.Fecha.desc()).all()
 
 
+# Columnas de la exportación, en el orden de los archivos generados
+COLUMNAS_EXPORTACION = [
+    Movimiento.IdMovimiento, Movimiento.IdCuenta, Movimiento.IdSucursal, Movimiento.Fecha,
+    Movimiento.Valor, Movimiento.IdTipoMovimiento, Movimiento.Descripcion
+]
+
+
+def consulta_exportacion_by_fecha(fecha_inicio: date, fecha_fin: date) -> Select:
+    """Consulta por columnas (sin objetos ORM) para exportar un rango de fechas en streaming"""
+    return select(*COLUMNAS_EXPORTACION).where(
+        Movimiento.Fecha >= fecha_inicio,
+        Movimiento.Fecha <= fecha_fin
+    ).order_by(Movimiento.Fecha, Movimiento.IdMovimiento)
+
+
 def create_movimiento(db: Session, movimiento: MovimientoCreate) -> Movimiento:
     db_movimiento = Movimiento(**movimiento.dict())
     db.add(db_movimiento)
+    evento_cuenta.registrar_movimientos(db, [db_movimiento])
+    resumen_sucursal.acumular(db, [
+        (db_movimiento.Fecha, db_movimiento.IdSucursal, db_movimiento.IdTipoMovimiento, db_movimiento.Valor)
+    ])
     db.commit()
-    db.refresh(db_movimiento)
+    centro_eventos.avisar()
     return db_movimiento
 
 
 def realizar_deposito(db: Session, deposito: DepositoCreate) -> Movimiento:
     """Realizar un depósito en una cuenta"""
-    # Obtener la cuenta
-    cuenta = db.query(Cuenta).filter(Cuenta.IdCuenta == deposito.IdCuenta).first()
-    if not cuenta:
-        raise ValueError(f"Cuenta con ID {deposito.IdCuenta} no encontrada")
-    
-    # Actualizar saldo
-    cuenta.Saldo += deposito.Valor
-    
-    # Crear movimiento (tipo 1 = Depósito)
-    movimiento = Movimiento(
-        IdCuenta=deposito.IdCuenta,
-        IdSucursal=deposito.IdSucursal,
-        Fecha=date.today(),
-        Valor=deposito.Valor,
-        IdTipoMovimiento=1,  # Depósito
-        Descripcion=deposito.Descripcion or "Depósito"
-    )
-    
-    db.add(movimiento)
-    db.commit()
-    db.refresh(movimiento)
-    db.refresh(cuenta)
+    def unidad_de_trabajo(medicion):
+        # Actualizar saldo con un UPDATE atómico
+        if not contabilizacion.acreditar(db, deposito.IdCuenta, deposito.Valor, medicion):
+            raise ValueError(f"Cuenta con ID {deposito.IdCuenta} no encontrada")
+        saldo_diario.registrar_saldos(db, [deposito.IdCuenta])
+        
+        # Crear movimiento (tipo 1 = Depósito)
+        movimiento = Movimiento(
+            IdCuenta=deposito.IdCuenta,
+            IdSucursal=deposito.IdSucursal,
+            Fecha=date.today(),
+            Valor=deposito.Valor,
+            IdTipoMovimiento=1,  # Depósito
+            Descripcion=deposito.Descripcion or "Depósito"
+        )
+        
+        db.add(movimiento)
+        evento_cuenta.registrar_movimientos(db, [movimiento])
+        resumen_sucursal.acumular(db, [(movimiento.Fecha, movimiento.IdSucursal, 1, movimiento.Valor)])
+        db.commit()
+        return movimiento
     
+    movimiento = contabilizacion.ejecutar_con_reintentos(db, "deposito", unidad_de_trabajo)
+    centro_eventos.avisar()
+    gran_movimiento.contabilizar_volumen(db, [(movimiento.IdCuenta, movimiento.Valor)])
     return movimiento
 
 
 def realizar_retiro(db: Session, retiro: RetiroCreate) -> Movimiento:
     """Realizar un retiro de una cuenta"""
-    # Obtener la cuenta
-    cuenta = db.query(Cuenta).filter(Cuenta.IdCuenta == retiro.IdCuenta).first()
-    if not cuenta:
-        raise ValueError(f"Cuenta con ID {retiro.IdCuenta} no encontrada")
-    
-    # Verificar saldo disponible (saldo + sobregiro)
-    saldo_disponible = cuenta.Saldo + (cuenta.Sobregiro or Decimal("0"))
-    if retiro.Valor > saldo_disponible:
-        raise ValueError(f"Saldo insuficiente. Disponible: {saldo_disponible}, Solicitado: {retiro.Valor}")
-    
-    # Actualizar saldo
-    cuenta.Saldo -= retiro.Valor
-    
-    # Marcar sobregiro no autorizado si el saldo es negativo
-    if cuenta.Saldo < 0:
-        cuenta.SobregiroNoAutorizado = True
-    
-    # Crear movimiento (tipo 2 = Retiro)
-    movimiento = Movimiento(
-        IdCuenta=retiro.IdCuenta,
-        IdSucursal=retiro.IdSucursal,
-        Fecha=date.today(),
-        Valor=-retiro.Valor,  # Negativo para retiros
-        IdTipoMovimiento=2,  # Retiro
-        Descripcion=retiro.Descripcion or "Retiro"
-    )
-    
-    db.add(movimiento)
-    db.commit()
-    db.refresh(movimiento)
-    db.refresh(cuenta)
+    def unidad_de_trabajo(medicion):
+        # Debitar solo si saldo + sobregiro cubren el valor (UPDATE condicional)
+        contabilizacion.debitar(db, retiro.IdCuenta, retiro.Valor, medicion)
+        saldo_diario.registrar_saldos(db, [retiro.IdCuenta])
+        
+        # Crear movimiento (tipo 2 = Retiro)
+        movimiento = Movimiento(
+            IdCuenta=retiro.IdCuenta,
+            IdSucursal=retiro.IdSucursal,
+            Fecha=date.today(),
+            Valor=-retiro.Valor,  # Negativo para retiros
+            IdTipoMovimiento=2,  # Retiro
+            Descripcion=retiro.Descripcion or "Retiro"
+        )
+        
+        db.add(movimiento)
+        evento_cuenta.registrar_movimientos(db, [movimiento])
+        resumen_sucursal.acumular(db, [(movimiento.Fecha, movimiento.IdSucursal, 2, movimiento.Valor)])
+        db.commit()
+        return movimiento
     
+    # Límites de velocidad: se reserva antes de tocar la base de datos y se libera si la operación falla
+    reserva = limites_velocidad.reservar(retiro.IdCuenta, retiro.Valor)
+    try:
+        movimiento = contabilizacion.ejecutar_con_reintentos(db, "retiro", unidad_de_trabajo)
+    except Exception:
+        limites_velocidad.liberar(reserva)
+        raise
+    centro_eventos.avisar()
+    gran_movimiento.contabilizar_volumen(db, [(movimiento.IdCuenta, movimiento.Valor)])
     return movimiento
 
 
 def realizar_transferencia(db: Session, transferencia: TransferenciaCreate) -> tuple[Movimiento, Movimiento]:
     """Realizar una transferencia entre dos cuentas"""
-    # Obtener cuentas
-    cuenta_origen = db.query(Cuenta).filter(Cuenta.IdCuenta == transferencia.IdCuentaOrigen).first()
-    cuenta_destino = db.query(Cuenta).filter(Cuenta.IdCuenta == transferencia.IdCuentaDestino).first()
-    
-    if not cuenta_origen:
-        raise ValueError(f"Cuenta origen con ID {transferencia.IdCuentaOrigen} no encontrada")
-    if not cuenta_destino:
-        raise ValueError(f"Cuenta destino con ID {transferencia.IdCuentaDestino} no encontrada")
-    
-    # Verificar saldo disponible
-    saldo_disponible = cuenta_origen.Saldo + (cuenta_origen.Sobregiro or Decimal("0"))
-    if transferencia.Valor > saldo_disponible:
-        raise ValueError(f"Saldo insuficiente. Disponible: {saldo_disponible}, Solicitado: {transferencia.Valor}")
+    def unidad_de_trabajo(medicion):
+        # Bloquear ambas cuentas en orden de ID para evitar deadlocks
+        cuentas = contabilizacion.bloquear_cuentas(
+            db, [transferencia.IdCuentaOrigen, transferencia.IdCuentaDestino], medicion
+        )
+        cuenta_origen = cuentas.get(transferencia.IdCuentaOrigen)
+        cuenta_destino = cuentas.get(transferencia.IdCuentaDestino)
+        
+        if not cuenta_origen:
+            raise ValueError(f"Cuenta origen con ID {transferencia.IdCuentaOrigen} no encontrada")
+        if not cuenta_destino:
+            raise ValueError(f"Cuenta destino con ID {transferencia.IdCuentaDestino} no encontrada")
+        
+        # Actualizar saldos (el débito verifica saldo + sobregiro)
+        contabilizacion.debitar(db, transferencia.IdCuentaOrigen, transferencia.Valor, medicion)
+        contabilizacion.acreditar(db, transferencia.IdCuentaDestino, transferencia.Valor, medicion)
+        saldo_diario.registrar_saldos(db, [transferencia.IdCuentaOrigen, transferencia.IdCuentaDestino])
+        
+        # Crear movimiento de salida (tipo 3 = Transferencia Enviada)
+        movimiento_salida = Movimiento(
+            IdCuenta=transferencia.IdCuentaOrigen,
+            IdSucursal=transferencia.IdSucursal,
+            Fecha=date.today(),
+            Valor=-transferencia.Valor,
+            IdTipoMovimiento=3,  # Transferencia Enviada
+            Descripcion=transferencia.Descripcion or f"Transferencia a cuenta {cuenta_destino.Numero}"
+        )
+        
+        # Crear movimiento de entrada (tipo 4 = Transferencia Recibida)
+        movimiento_entrada = Movimiento(
+            IdCuenta=transferencia.IdCuentaDestino,
+            IdSucursal=transferencia.IdSucursal,
+            Fecha=date.today(),
+            Valor=transferencia.Valor,
+            IdTipoMovimiento=4,  # Transferencia Recibida
+            Descripcion=transferencia.Descripcion or f"Transferencia desde cuenta {cuenta_origen.Numero}"
+        )
+        
+        db.add(movimiento_salida)
+        db.add(movimiento_entrada)
+        evento_cuenta.registrar_movimientos(db, [movimiento_salida, movimiento_entrada])
+        resumen_sucursal.acumular(db, [
+            (movimiento_salida.Fecha, movimiento_salida.IdSucursal, 3, movimiento_salida.Valor),
+            (movimiento_entrada.Fecha, movimiento_entrada.IdSucursal, 4, movimiento_entrada.Valor),
+        ])
+        db.commit()
+        return movimiento_salida, movimiento_entrada
     
-    # Actualizar saldos
-    cuenta_origen.Saldo -= transferencia.Valor
-    cuenta_destino.Saldo += transferencia.Valor
-    
-    # Marcar sobregiro en cuenta origen si aplica
-    if cuenta_origen.Saldo < 0:
-        cuenta_origen.SobregiroNoAutorizado = True
-    
-    # Crear movimiento de salida (tipo 3 = Transferencia Enviada)
-    movimiento_salida = Movimiento(
-        IdCuenta=transferencia.IdCuentaOrigen,
-        IdSucursal=transferencia.IdSucursal,
-        Fecha=date.today(),
-        Valor=-transferencia.Valor,
-        IdTipoMovimiento=3,  # Transferencia Enviada
-        Descripcion=transferencia.Descripcion or f"Transferencia a cuenta {cuenta_destino.Numero}"
+    reserva = limites_velocidad.reservar(transferencia.IdCuentaOrigen, transferencia.Valor)
+    try:
+        mov_salida, mov_entrada = contabilizacion.ejecutar_con_reintentos(db, "transferencia", unidad_de_trabajo)
+    except Exception:
+        limites_velocidad.liberar(reserva)
+        raise
+    centro_eventos.avisar()
+    gran_movimiento.contabilizar_volumen(
+        db, [(mov_salida.IdCuenta, mov_salida.Valor), (mov_entrada.IdCuenta, mov_entrada.Valor)]
     )
+    return mov_salida, mov_entrada
+
+
+
+def realizar_transferencias_lote(db: Session, transferencias: List[TransferenciaCreate]) -> List[dict]:
+    """
+    Ejecutar un lote de transferencias en una sola transacción con operaciones de conjunto.
+
+    Carga y bloquea todas las cuentas involucradas en una consulta, valida los
+    saldos en memoria en el orden del lote, aplica los deltas netos con un UPDATE
+    multi-fila e inserta todos los movimientos en bloque. Las transferencias que
+    no pasan la validación se reportan como fallidas sin afectar a las demás.
+    """
+    def unidad_de_trabajo(medicion):
+        ids = {t.IdCuentaOrigen for t in transferencias} | {t.IdCuentaDestino for t in transferencias}
+        cuentas = contabilizacion.bloquear_cuentas(db, ids, medicion)
+        saldos = {cuenta_id: cuenta.Saldo for cuenta_id, cuenta in cuentas.items()}
+        
+        sobregiradas = set()
+        resultados = []
+        filas = []
+        hoy = date.today()
+        for indice, transferencia in enumerate(transferencias):
+            cuenta_origen = cuentas.get(transferencia.IdCuentaOrigen)
+            cuenta_destino = cuentas.get(transferencia.IdCuentaDestino)
+            error = rechazadas.get(indice)
+            if error is not None:
+                pass
+            elif not cuenta_origen:
+                error = f"Cuenta origen con ID {transferencia.IdCuentaOrigen} no encontrada"
+            elif not cuenta_destino:
+                error = f"Cuenta destino con ID {transferencia.IdCuentaDestino} no encontrada"
+            else:
+                saldo_disponible = saldos[cuenta_origen.IdCuenta] + (cuenta_origen.Sobregiro or 0)
+                if transferencia.Valor > saldo_disponible:
+                    error = f"Saldo insuficiente. Disponible: {saldo_disponible}, Solicitado: {transferencia.Valor}"
+            
+            if error:
+                resultados.append({"Indice": indice, "Exitosa": False, "Error": error})
+                continue
+            
+            saldos[cuenta_origen.IdCuenta] -= transferencia.Valor
+            saldos[cuenta_destino.IdCuenta] += transferencia.Valor
+            if saldos[cuenta_origen.IdCuenta] < 0:
+                sobregiradas.add(cuenta_origen.IdCuenta)
+            resultados.append({"Indice": indice, "Exitosa": True, "Error": None})
+            filas.append({
+                "IdCuenta": transferencia.IdCuentaOrigen,
+                "IdSucursal": transferencia.IdSucursal,
+                "Fecha": hoy,
+                "Valor": -transferencia.Valor,
+                "IdTipoMovimiento": 3,  # Transferencia Enviada
+                "Descripcion": transferencia.Descripcion or f"Transferencia a cuenta {cuenta_destino.Numero}"
+            })
+            filas.append({
+                "IdCuenta": transferencia.IdCuentaDestino,
+                "IdSucursal": transferencia.IdSucursal,
+                "Fecha": hoy,
+                "Valor": transferencia.Valor,
+                "IdTipoMovimiento": 4,  # Transferencia Recibida
+                "Descripcion": transferencia.Descripcion or f"Transferencia desde cuenta {cuenta_origen.Numero}"
+            })
+        
+        deltas = {cuenta_id: saldos[cuenta_id] - cuentas[cuenta_id].Saldo for cuenta_id in cuentas}
+        contabilizacion.aplicar_deltas(db, deltas, sobregiradas, medicion)
+        saldo_diario.registrar_saldos(db, [cuenta_id for cuenta_id, delta in deltas.items() if delta != 0])
+        ids = contabilizacion.insertar_movimientos(db, filas)
+        evento_cuenta.registrar_eventos(db, filas, ids)
+        resumen_sucursal.acumular(
+            db, [(f["Fecha"], f["IdSucursal"], f["IdTipoMovimiento"], f["Valor"]) for f in filas]
+        )
+        db.commit()
+        
+        # Los movimientos se insertaron en pares (salida, entrada) en el orden del lote
+        ids_movimientos = iter(ids)
+        for resultado in resultados:
+            if resultado["Exitosa"]:
+                resultado["IdMovimientoSalida"] = next(ids_movimientos)
+                resultado["IdMovimientoEntrada"] = next(ids_movimientos)
+        return resultados
     
-    # Crear movimiento de entrada (tipo 4 = Transferencia Recibida)
-    movimiento_entrada = Movimiento(
-        IdCuenta=transferencia.IdCuentaDestino,
-        IdSucursal=transferencia.IdSucursal,
-        Fecha=date.today(),
-        Valor=transferencia.Valor,
-        IdTipoMovimiento=4,  # Transferencia Recibida
-        Descripcion=transferencia.Descripcion or f"Transferencia desde cuenta {cuenta_origen.Numero}"
-    )
-    
-    db.add(movimiento_salida)
-    db.add(movimiento_entrada)
-    db.commit()
-    db.refresh(movimiento_salida)
-    db.refresh(movimiento_entrada)
-    db.refresh(cuenta_origen)
-    db.refresh(cuenta_destino)
-    
-    return movimiento_salida, movimiento_entrada
\ No newline at end of file
+    # Las transferencias que superan los límites de velocidad se rechazan sin afectar a las demás
+    reservas, rechazadas = {}, {}
+    for indice, transferencia in enumerate(transferencias):
+        try:
+            reservas[indice] = limites_velocidad.reservar(transferencia.IdCuentaOrigen, transferencia.Valor)
+        except LimiteVelocidadExcedido as e:
+            rechazadas[indice] = str(e)
+    try:
+        resultados = contabilizacion.ejecutar_con_reintentos(db, "transferencia_lote", unidad_de_trabajo)
+    except Exception:
+        for reserva in reservas.values():
+            limites_velocidad.liberar(reserva)
+        raise
+    for resultado in resultados:
+        if not resultado["Exitosa"] and resultado["Indice"] in reservas:
+            limites_velocidad.liberar(reservas[resultado["Indice"]])
+    centro_eventos.avisar()
+    gran_movimiento.contabilizar_volumen(db, [
+        (cuenta_id, transferencias[r["Indice"]].Valor)
+        for r in resultados if r["Exitosa"]
+        for cuenta_id in (transferencias[r["Indice"]].IdCuentaOrigen, transferencias[r["Indice"]].IdCuentaDestino)
+    ])
+    return resultados
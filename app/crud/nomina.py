@@ -0,0 +1,114 @@
+from sqlalchemy.orm import Session
+from app.crud import contabilizacion
+from app.crud import saldo_diario
+from app.crud import gran_movimiento
+from app.crud import resumen_sucursal
+from app.crud import evento_cuenta
+from app.schemas.nomina import DispersionNominaCreate
+from app.utils.eventos import centro_eventos
+from app.utils.velocidad import Reserva, limites_velocidad
+from typing import List
+from datetime import date
+
+
+def dispersar_nomina(db: Session, dispersion: DispersionNominaCreate) -> List[dict]:
+    """
+    Pagar una nómina completa en una sola transacción.
+    
+    La cuenta origen se debita una única vez por el total, todas las cuentas
+    destino se acreditan con un UPDATE multi-fila y los movimientos pareados
+    (tipo 3 en el origen, tipo 4 en cada destino) se insertan en bloque.
+    Los pagos a cuentas inexistentes se rechazan sin detener la dispersión;
+    si el origen no cubre el total de los pagos válidos no se paga ninguno.
+
+    Cada pago cuenta como una operación de la cuenta origen en los límites
+    de velocidad, igual que la transferencia enviada que registra.
+    """
+    def unidad_de_trabajo(medicion):
+        cuentas = contabilizacion.bloquear_cuentas(
+            db, [dispersion.IdCuentaOrigen] + [p.IdCuentaDestino for p in dispersion.Pagos], medicion
+        )
+        cuenta_origen = cuentas.get(dispersion.IdCuentaOrigen)
+        if not cuenta_origen:
+            raise ValueError(f"Cuenta origen con ID {dispersion.IdCuentaOrigen} no encontrada")
+        
+        resultados = []
+        creditos = {}
+        filas = []
+        hoy = date.today()
+        descripcion = dispersion.Descripcion or "Pago de nómina"
+        for indice, pago in enumerate(dispersion.Pagos):
+            resultado = {
+                "Indice": indice,
+                "Referencia": pago.Referencia,
+                "IdCuentaDestino": pago.IdCuentaDestino,
+                "Valor": pago.Valor,
+                "Estado": "PAGADO",
+                "IdMovimientoSalida": None,
+                "IdMovimientoEntrada": None,
+                "Error": None,
+            }
+            resultados.append(resultado)
+            cuenta_destino = cuentas.get(pago.IdCuentaDestino)
+            if not cuenta_destino:
+                resultado["Estado"] = "RECHAZADO"
+                resultado["Error"] = f"Cuenta destino con ID {pago.IdCuentaDestino} no encontrada"
+                continue
+            
+            creditos[pago.IdCuentaDestino] = creditos.get(pago.IdCuentaDestino, 0) + pago.Valor
+            filas.append({
+                "IdCuenta": dispersion.IdCuentaOrigen,
+                "IdSucursal": dispersion.IdSucursal,
+                "Fecha": hoy,
+                "Valor": -pago.Valor,
+                "IdTipoMovimiento": 3,  # Transferencia Enviada
+                "Descripcion": f"{descripcion} - cuenta {cuenta_destino.Numero}"[:200]
+            })
+            filas.append({
+                "IdCuenta": pago.IdCuentaDestino,
+                "IdSucursal": dispersion.IdSucursal,
+                "Fecha": hoy,
+                "Valor": pago.Valor,
+                "IdTipoMovimiento": 4,  # Transferencia Recibida
+                "Descripcion": f"{descripcion} - cuenta {cuenta_origen.Numero}"[:200]
+            })
+        
+        total = sum(creditos.values())
+        if total:
+            # Un solo débito por el total, con la misma verificación de saldo + sobregiro
+            contabilizacion.debitar(db, dispersion.IdCuentaOrigen, total, medicion)
+            contabilizacion.aplicar_deltas(db, creditos, [], medicion)
+            saldo_diario.registrar_saldos(db, [dispersion.IdCuentaOrigen, *creditos])
+            ids = contabilizacion.insertar_movimientos(db, filas)
+            evento_cuenta.registrar_eventos(db, filas, ids)
+            resumen_sucursal.acumular(
+                db, [(f["Fecha"], f["IdSucursal"], f["IdTipoMovimiento"], f["Valor"]) for f in filas]
+            )
+            db.commit()
+            ids_movimientos = iter(ids)
+            for resultado in resultados:
+                if resultado["Estado"] == "PAGADO":
+                    resultado["IdMovimientoSalida"] = next(ids_movimientos)
+                    resultado["IdMovimientoEntrada"] = next(ids_movimientos)
+        return resultados
+    
+    reserva = limites_velocidad.reservar(
+        dispersion.IdCuentaOrigen, sum(p.Valor for p in dispersion.Pagos), operaciones=len(dispersion.Pagos)
+    )
+    try:
+        resultados = contabilizacion.ejecutar_con_reintentos(db, "nomina", unidad_de_trabajo)
+    except Exception:
+        limites_velocidad.liberar(reserva)
+        raise
+    rechazados = [r["Valor"] for r in resultados if r["Estado"] != "PAGADO"]
+    if rechazados:
+        limites_velocidad.liberar(Reserva(
+            dispersion.IdCuentaOrigen, int(sum(rechazados) * 100), reserva.instante, len(rechazados)
+        ))
+    centro_eventos.avisar()
+    gran_movimiento.contabilizar_volumen(db, [
+        (cuenta_id, r["Valor"])
+        for r in resultados if r["Estado"] == "PAGADO"
+        for cuenta_id in (dispersion.IdCuentaOrigen, r["IdCuentaDestino"])
+    ])
+    return resultados
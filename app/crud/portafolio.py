@@ -0,0 +1,227 @@
+"""
+Analítica del portafolio de préstamos.
+
+Los préstamos se cargan en columnas (una consulta, un arreglo de NumPy por
+campo) y los saldos y flujos se calculan para toda la cartera a la vez con la
+forma cerrada de la amortización francesa: el saldo después de la cuota k es
+
+    Valor * ((1 + i)^n - (1 + i)^k) / ((1 + i)^n - 1)
+
+Los valores son estimaciones del plan contractual con los términos actuales de
+cada préstamo, no el libro de cuotas (cuota_prestamo): suponen que cada cuota se
+paga a su vencimiento (las cuotas en mora no cambian el saldo proyectado) y que
+el préstamo siempre tuvo su tasa, plazo y seguro vigentes, aunque al cambiarlos
+`regenerar_cuotas` reamortice solo el capital aún no pagado. Se calculan en
+punto flotante, redondeados al centavo solo en los totales.
+
+La proyección arma, por bloques de BLOQUE_PRESTAMOS préstamos, una matriz
+préstamo × mes con la cuota que vence en cada mes y la suma por columna.
+
+La cartera cargada y los resultados se guardan en `app.utils.portafolio`
+hasta que cambia un préstamo.
+"""
+
+import calendar
+from datetime import date
+from decimal import Decimal
+from typing import List, NamedTuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.cuenta import Cuenta
+from app.models.prestamo import Prestamo
+from app.models.sucursal import Sucursal
+from app.utils.particiones import sumar_meses
+from app.utils.portafolio import cache_portafolio
+
+# Filas de cada matriz préstamo × mes de la proyección
+BLOQUE_PRESTAMOS = 5000
+MAX_MESES_PROYECCION = 360
+
+DIMENSIONES_EXPOSICION = {"sucursal": "IdSucursal", "ciudad": "IdCiudad"}
+
+
+class Cartera(NamedTuple):
+    """Préstamos en columnas; `mes_inicio` es año * 12 + mes - 1 de la fecha del préstamo"""
+    IdPrestamo: np.ndarray
+    mes_inicio: np.ndarray
+    dia: np.ndarray
+    valor: np.ndarray
+    interes: np.ndarray  # Tasa anual (%)
+    plazo: np.ndarray
+    seguro: np.ndarray
+    IdSucursal: np.ndarray
+    IdCiudad: np.ndarray
+
+    def filtrar(self, mascara: np.ndarray) -> "Cartera":
+        return Cartera(*(columna[mascara] for columna in self))
+
+
+def _indice_mes(fecha: date) -> int:
+    return fecha.year * 12 + fecha.month - 1
+
+
+def _dinero(valor) -> Decimal:
+    return Decimal(f"{float(valor):.2f}")
+
+
+def cargar_cartera(db: Session) -> Cartera:
+    """Todos los préstamos, con la sucursal y la ciudad de su cuenta, en una consulta"""
+    filas = db.execute(
+        select(
+            Prestamo.IdPrestamo, Prestamo.Fecha, Prestamo.Valor, Prestamo.Interes,
+            Prestamo.Plazo, Prestamo.Seguro, Cuenta.IdSucursal, Sucursal.IdCiudad,
+        )
+        .join(Cuenta, Cuenta.IdCuenta == Prestamo.IdCuenta)
+        .join(Sucursal, Sucursal.IdSucursal == Cuenta.IdSucursal)
+        .order_by(Prestamo.IdPrestamo)
+    ).all()
+    ids, fechas, valores, intereses, plazos, seguros, sucursales, ciudades = zip(*filas) if filas else ((),) * 8
+    return Cartera(
+        IdPrestamo=np.array(ids, dtype=np.int64),
+        mes_inicio=np.fromiter((_indice_mes(f) for f in fechas), dtype=np.int64, count=len(fechas)),
+        dia=np.fromiter((f.day for f in fechas), dtype=np.int64, count=len(fechas)),
+        valor=np.array(valores, dtype=np.float64),
+        interes=np.array(intereses, dtype=np.float64),
+        plazo=np.array(plazos, dtype=np.int64),
+        seguro=np.array([s or 0 for s in seguros], dtype=np.float64),
+        IdSucursal=np.array(sucursales, dtype=np.int64),
+        IdCiudad=np.array(ciudades, dtype=np.int64),
+    )
+
+
+def _cartera(db: Session) -> Cartera:
+    return cache_portafolio.obtener(("cartera",), lambda: cargar_cartera(db))
+
+
+def saldos(c: Cartera, cuotas: np.ndarray) -> np.ndarray:
+    """Saldo después de pagar `cuotas` cuotas (arreglo de la forma de la cartera, o matriz por filas)"""
+    forma = (-1,) + (1,) * (np.ndim(cuotas) - 1)
+    valor, plazo = c.valor.reshape(forma), c.plazo.reshape(forma)
+    logaritmo = np.log1p(c.interes.reshape(forma) / 1200)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        con_tasa = valor * (np.expm1(plazo * logaritmo) - np.expm1(cuotas * logaritmo)) / np.expm1(plazo * logaritmo)
+    return np.where(logaritmo > 0, con_tasa, valor * (1 - cuotas / plazo))
+
+
+def cuotas_mensuales(c: Cartera) -> np.ndarray:
+    """Cuota fija (interés + capital) de cada préstamo, sin seguro"""
+    i = c.interes / 1200
+    with np.errstate(divide="ignore", invalid="ignore"):
+        con_tasa = c.valor * i / -np.expm1(-c.plazo * np.log1p(i))
+    return np.where(i > 0, con_tasa, c.valor / c.plazo)
+
+
+def cuotas_vencidas(c: Cartera, corte: date) -> np.ndarray:
+    """Cuotas que vencieron hasta `corte` (cada una vence el día del préstamo, o el último del mes)"""
+    vence_en_el_mes = np.minimum(c.dia, calendar.monthrange(corte.year, corte.month)[1])
+    cuotas = _indice_mes(corte) - c.mes_inicio - (corte.day < vence_en_el_mes)
+    return np.clip(cuotas, 0, c.plazo)
+
+
+def vigentes(c: Cartera, corte: date) -> Cartera:
+    """Préstamos otorgados hasta `corte` con cuotas por vencer"""
+    mes_corte = _indice_mes(corte)
+    otorgados = (c.mes_inicio < mes_corte) | ((c.mes_inicio == mes_corte) & (c.dia <= corte.day))
+    return c.filtrar(otorgados & (cuotas_vencidas(c, corte) < c.plazo))
+
+
+def calcular_resumen(cartera: Cartera, corte: date) -> dict:
+    c = vigentes(cartera, corte)
+    vencidas = cuotas_vencidas(c, corte)
+    saldo = saldos(c, vencidas)
+    cuota = cuotas_mensuales(c)
+    restantes = c.plazo - vencidas
+    total_saldo = saldo.sum()
+    return {
+        "FechaCorte": corte,
+        "Prestamos": len(c.IdPrestamo),
+        "ValorDesembolsado": _dinero(c.valor.sum()),
+        "SaldoCapital": _dinero(total_saldo),
+        "InteresesPorCobrar": _dinero((cuota * restantes - saldo).sum()),
+        "CuotaMensual": _dinero((cuota + c.seguro).sum()),
+        "TasaPromedio": _dinero((c.interes * saldo).sum() / total_saldo if total_saldo else 0),
+        "PlazoRestantePromedio": _dinero((restantes * saldo).sum() / total_saldo if total_saldo else 0),
+    }
+
+
+def calcular_proyeccion(cartera: Cartera, corte: date, meses: int) -> dict:
+    c = vigentes(cartera, corte)
+    columnas = {campo: np.zeros(meses) for campo in ("Cuotas", "Capital", "Interes", "Seguro", "SaldoFinal")}
+    desplazamiento = np.arange(meses + 1)
+    for inicio in range(0, len(c.IdPrestamo), BLOQUE_PRESTAMOS):
+        bloque = c.filtrar(slice(inicio, inicio + BLOQUE_PRESTAMOS))
+        plazo, vencidas = bloque.plazo[:, None], cuotas_vencidas(bloque, corte)[:, None]
+        # Número de la cuota que vence en cada mes de la proyección, más la del mes anterior
+        numeros = (_indice_mes(corte) - bloque.mes_inicio - 1)[:, None] + desplazamiento
+        saldo = saldos(bloque, np.clip(numeros, vencidas, plazo))
+        numero, anterior, posterior = numeros[:, 1:], saldo[:, :-1], saldo[:, 1:]
+        por_cobrar = (numero > vencidas) & (numero <= plazo)
+        columnas["Cuotas"] += por_cobrar.sum(axis=0)
+        columnas["Capital"] += np.where(por_cobrar, anterior - posterior, 0).sum(axis=0)
+        columnas["Interes"] += np.where(por_cobrar, anterior * (bloque.interes / 1200)[:, None], 0).sum(axis=0)
+        columnas["Seguro"] += np.where(por_cobrar, bloque.seguro[:, None], 0).sum(axis=0)
+        columnas["SaldoFinal"] += posterior.sum(axis=0)
+
+    mes_corte = corte.replace(day=1)
+    return {
+        "FechaCorte": corte,
+        "Meses": [
+            {
+                "Mes": sumar_meses(mes_corte, k),
+                "Cuotas": int(columnas["Cuotas"][k]),
+                "Capital": _dinero(columnas["Capital"][k]),
+                "Interes": _dinero(columnas["Interes"][k]),
+                "Seguro": _dinero(columnas["Seguro"][k]),
+                "Total": _dinero(columnas["Capital"][k] + columnas["Interes"][k] + columnas["Seguro"][k]),
+                "SaldoFinal": _dinero(columnas["SaldoFinal"][k]),
+            }
+            for k in range(meses)
+        ],
+    }
+
+
+def calcular_exposicion(cartera: Cartera, corte: date, por: str) -> dict:
+    c = vigentes(cartera, corte)
+    saldo = saldos(c, cuotas_vencidas(c, corte))
+    claves, grupo = np.unique(getattr(c, DIMENSIONES_EXPOSICION[por]), return_inverse=True)
+    saldo_grupo = np.bincount(grupo, weights=saldo, minlength=len(claves))
+    cantidad = np.bincount(grupo, minlength=len(claves))
+    cuota_grupo = np.bincount(grupo, weights=cuotas_mensuales(c) + c.seguro, minlength=len(claves))
+    total = saldo.sum()
+    grupos: List[dict] = [
+        {
+            "Id": int(claves[k]),
+            "Prestamos": int(cantidad[k]),
+            "SaldoCapital": _dinero(saldo_grupo[k]),
+            "CuotaMensual": _dinero(cuota_grupo[k]),
+            "Participacion": _dinero(saldo_grupo[k] / total * 100 if total else 0),
+        }
+        for k in np.argsort(-saldo_grupo, kind="stable")
+    ]
+    return {"FechaCorte": corte, "Agrupacion": por, "SaldoCapital": _dinero(total), "Grupos": grupos}
+
+
+def get_resumen(db: Session, fecha_corte: date) -> dict:
+    """Préstamos vigentes, saldo de capital, intereses por cobrar y cuota mensual de la cartera"""
+    return cache_portafolio.obtener(("resumen", fecha_corte), lambda: calcular_resumen(_cartera(db), fecha_corte))
+
+
+def get_proyeccion(db: Session, fecha_corte: date, meses: int) -> dict:
+    """Capital, interés y seguro por cobrar en cada uno de los `meses` meses desde el de corte"""
+    if not 1 <= meses <= MAX_MESES_PROYECCION:
+        raise ValueError(f"meses debe estar entre 1 y {MAX_MESES_PROYECCION}")
+    return cache_portafolio.obtener(
+        ("proyeccion", fecha_corte, meses), lambda: calcular_proyeccion(_cartera(db), fecha_corte, meses)
+    )
+
+
+def get_exposicion(db: Session, fecha_corte: date, por: str) -> dict:
+    """Saldo de capital por sucursal o ciudad de la cuenta del préstamo, de mayor a menor"""
+    if por not in DIMENSIONES_EXPOSICION:
+        raise ValueError(f"Agrupación desconocida: {por}")
+    return cache_portafolio.obtener(
+        ("exposicion", fecha_corte, por), lambda: calcular_exposicion(_cartera(db), fecha_corte, por)
+    )
@@ -1,9 +1,23 @@
 from sqlalchemy.orm import Session
+from app.crud import base
+from app.crud import cuota_prestamo
 from app.models.prestamo import Prestamo
-from app.schemas.prestamo import PrestamoCreate, PrestamoUpdate, CalculoCuota
+from app.schemas.prestamo import PrestamoCreate, PrestamoUpdate, CalculoCuota, CotizacionLote
+from app.utils.paginacion import paginar
+from app.utils.amortizacion import tabla_amortizacion
+from app.utils.cuota import calcular_cuota_exacta
+from app.utils.portafolio import cache_portafolio
 from typing import List, Optional
+from datetime import date
 from decimal import Decimal
 import math
+import os
+
+import numpy as np
+
+# Escenarios máximos por solicitud de cotización en lote
+COTIZACION_MAX_ESCENARIOS = int(os.getenv("COTIZACION_MAX_ESCENARIOS", "100000"))
+EPSILON = np.finfo(np.float64).eps
 
 
 def get_prestamo(db: Session, prestamo_id: int) -> Optional[Prestamo]:
@@ -14,8 +28,8 @@ def get_prestamo_by_numero(db: Session, numero: str) -> Optional[Prestamo]:
     return db.query(Prestamo).filter(Prestamo.Numero == numero).first()
 
 
-def get_prestamos(db: Session, skip: int = 0, limit: int = 100) -> List[Prestamo]:
-    return db.query(Prestamo).offset(skip).limit(limit).all()
+def get_prestamos(db: Session, skip: int = 0, limit: int = 100, despues_de: Optional[tuple] = None) -> List[Prestamo]:
+    return paginar(db.query(Prestamo), [Prestamo.IdPrestamo], skip, limit, despues_de).all()
 
 
 def get_prestamos_by_cuenta(db: Session, cuenta_id: int) -> List[Prestamo]:
@@ -31,35 +45,97 @@ def calcular_cuota(datos: CalculoCuota) -> dict:
     - P = Monto del préstamo
     - i = Tasa de interés mensual (tasa anual / 12 / 100)
     - n = Número de cuotas (plazo en meses)
-    """
-    P = float(datos.Valor)
-    tasa_anual = float(datos.Interes)
-    n = datos.Plazo
-    seguro = float(datos.Seguro or Decimal("0"))
     
-    # Si la tasa es 0, la cuota es simplemente el capital dividido por el plazo
-    if tasa_anual == 0:
-        cuota_capital = P / n
-        cuota_mensual = cuota_capital + seguro
+    Se evalúa en decimal exacto y se memoriza (ver app.utils.cuota).
+    """
+    return calcular_cuota_exacta(datos.Valor, datos.Interes, datos.Plazo, datos.Seguro)._asdict()
+
+
+def _cerca_de_medio_centavo(valores: np.ndarray, error: np.ndarray) -> np.ndarray:
+    """Valores cuyo redondeo al centavo podría cambiar dentro de `error` (o no finitos)"""
+    escalados = valores * 100
+    distancia = np.abs(escalados - np.floor(escalados) - 0.5)
+    return ~(distancia > 100 * error + 4 * EPSILON * np.abs(escalados))
+
+
+def cotizar_lote(datos: CotizacionLote) -> dict:
+    """
+    Cotizar muchos escenarios en una sola pasada vectorizada de la fórmula de
+    calcular_cuota. La pasada es en punto flotante con una cota de su error: los
+    escenarios que quedan a menos de esa cota de un medio centavo se recalculan
+    en decimal exacto, así que cada resultado coincide al centavo con calcular_cuota.
+    Lanza ValueError si las listas no son compatibles o hay demasiados escenarios.
+    """
+    columnas = [datos.Valor, datos.Interes, datos.Plazo, datos.Seguro]
+    dimensiones = [len(c) for c in columnas]
+    if datos.Modo == "grilla":
+        escenarios = math.prod(dimensiones)
+    else:
+        escenarios = max(dimensiones)
+        if any(d not in (1, escenarios) for d in dimensiones):
+            raise ValueError("En modo vectores las listas deben tener la misma longitud o un solo elemento")
+    if escenarios > COTIZACION_MAX_ESCENARIOS:
+        raise ValueError(f"No se pueden cotizar más de {COTIZACION_MAX_ESCENARIOS} escenarios por solicitud")
+
+    arreglos = [np.array([float(x) for x in c], dtype=np.float64) for c in columnas]
+    if datos.Modo == "grilla":
+        P, tasa_anual, n, seguro = (a.ravel() for a in np.meshgrid(*arreglos, indexing="ij"))
     else:
-        # Tasa mensual
-        i = tasa_anual / 12 / 100
-        
-        # Calcular cuota usando fórmula de amortización
-        factor = (i * math.pow(1 + i, n)) / (math.pow(1 + i, n) - 1)
-        cuota_capital = P * factor
+        P, tasa_anual, n, seguro = np.broadcast_arrays(*arreglos)
+
+    i = tasa_anual / 12 / 100
+    con_tasa = tasa_anual != 0
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        potencia = np.power(1 + i, n)
+        factor = (i * potencia) / (potencia - 1)
+        cuota_capital = np.where(con_tasa, P * factor, P / n)
         cuota_mensual = cuota_capital + seguro
-    
-    total_a_pagar = cuota_mensual * n
-    total_intereses = total_a_pagar - P
-    
+        total_a_pagar = cuota_mensual * n
+        total_intereses = total_a_pagar - P
+
+        # Cota del error relativo de la cuota: (1 + i)^n amplifica n veces el de (1 + i)
+        # y restarle 1 lo multiplica por (1 + i)^n / ((1 + i)^n - 1)
+        relativo = np.where(con_tasa, 4 * (n + 4) * EPSILON * (1 + potencia / (potencia - 1)), 4 * EPSILON)
+        error_cuota = relativo * np.abs(cuota_capital) + 2 * EPSILON * np.abs(cuota_mensual)
+        error_total = n * error_cuota + 2 * EPSILON * np.abs(total_a_pagar)
+        error_intereses = error_total + 2 * EPSILON * (np.abs(total_a_pagar) + P)
+        dudosos = np.flatnonzero(
+            _cerca_de_medio_centavo(cuota_mensual, error_cuota)
+            | _cerca_de_medio_centavo(total_a_pagar, error_total)
+            | _cerca_de_medio_centavo(total_intereses, error_intereses)
+        )
+
+    resultados = [np.rint(x * 100) / 100 for x in (cuota_mensual, total_a_pagar, total_intereses)]
+    for k in dudosos.tolist():
+        if datos.Modo == "grilla":
+            posiciones = np.unravel_index(k, dimensiones)
+        else:
+            posiciones = [k if d > 1 else 0 for d in dimensiones]
+        exacta = calcular_cuota_exacta(*(c[p] for c, p in zip(columnas, posiciones)))
+        for resultado, valor in zip(resultados, exacta):
+            resultado[k] = float(valor)
+
     return {
-        "CuotaMensual": round(Decimal(cuota_mensual), 2),
-        "TotalAPagar": round(Decimal(total_a_pagar), 2),
-        "TotalIntereses": round(Decimal(total_intereses), 2)
+        "Escenarios": escenarios,
+        "Dimensiones": dimensiones if datos.Modo == "grilla" else None,
+        "Valor": P.tolist(),
+        "Interes": tasa_anual.tolist(),
+        "Plazo": n.astype(np.int64).tolist(),
+        "Seguro": seguro.tolist(),
+        "CuotaMensual": resultados[0].tolist(),
+        "TotalAPagar": resultados[1].tolist(),
+        "TotalIntereses": resultados[2].tolist(),
     }
 
 
+def get_amortizacion_prestamo(db: Session, prestamo_id: int) -> Optional[dict]:
+    """Tabla de amortización francesa del préstamo con su valor, tasa, plazo y seguro"""
+    prestamo = get_prestamo(db, prestamo_id)
+    if prestamo is None:
+        return None
+    return tabla_amortizacion(prestamo.Valor, prestamo.Interes, prestamo.Plazo, prestamo.Seguro or Decimal("0"))
+
+
 def create_prestamo(db: Session, prestamo: PrestamoCreate) -> Prestamo:
     # Si no se proporciona la cuota, calcularla
     if prestamo.Cuota is None:
@@ -73,37 +149,47 @@ def create_prestamo(db: Session, prestamo: PrestamoCreate) -> Prestamo:
     
     db_prestamo = Prestamo(**prestamo.dict())
     db.add(db_prestamo)
+    db.flush()
+    # Con fecha anterior a hoy, las cuotas ya vencidas no se cobran de nuevo
+    cuota_prestamo.generar_cuotas(db, db_prestamo, pagadas_hasta=date.today())
     db.commit()
-    db.refresh(db_prestamo)
+    cache_portafolio.invalidar()
     return db_prestamo
 
 
 def update_prestamo(db: Session, prestamo_id: int, prestamo: PrestamoUpdate) -> Optional[Prestamo]:
-    db_prestamo = get_prestamo(db, prestamo_id)
-    if db_prestamo:
-        update_data = prestamo.dict(exclude_unset=True)
-        
-        # Si se actualizan parámetros del préstamo, recalcular la cuota
-        if any(k in update_data for k in ['Interes', 'Plazo', 'Seguro']) and 'Cuota' not in update_data:
-            calculo = calcular_cuota(CalculoCuota(
-                Valor=db_prestamo.Valor,
-                Interes=update_data.get('Interes', db_prestamo.Interes),
-                Plazo=update_data.get('Plazo', db_prestamo.Plazo),
-                Seguro=update_data.get('Seguro', db_prestamo.Seguro)
-            ))
-            update_data['Cuota'] = calculo["CuotaMensual"]
-        
-        for key, value in update_data.items():
-            setattr(db_prestamo, key, value)
-        db.commit()
-        db.refresh(db_prestamo)
+    update_data = prestamo.dict(exclude_unset=True)
+    
+    # Si se actualizan parámetros del préstamo, recalcular la cuota y reemplazar
+    # las cuotas no pagadas del plan (requiere los valores actuales)
+    if any(k in update_data for k in ['Interes', 'Plazo', 'Seguro']):
+        db_prestamo = get_prestamo(db, prestamo_id)
+        if db_prestamo:
+            if 'Cuota' not in update_data:
+                calculo = calcular_cuota(CalculoCuota(
+                    Valor=db_prestamo.Valor,
+                    Interes=update_data.get('Interes', db_prestamo.Interes),
+                    Plazo=update_data.get('Plazo', db_prestamo.Plazo),
+                    Seguro=update_data.get('Seguro', db_prestamo.Seguro)
+                ))
+                update_data['Cuota'] = calculo["CuotaMensual"]
+            # Sin plan (préstamo anterior a cuota_prestamo): el original, con lo vencido pagado
+            cuota_prestamo.asegurar_plan(db, db_prestamo, pagadas_hasta=date.today())
+            for key, value in update_data.items():
+                setattr(db_prestamo, key, value)
+            cuota_prestamo.regenerar_cuotas(db, db_prestamo)
+            db.commit()
+            cache_portafolio.invalidar()
+        return db_prestamo
+    
+    db_prestamo = base.actualizar(db, Prestamo, prestamo_id, update_data)
+    if db_prestamo is not None:
+        cache_portafolio.invalidar()
     return db_prestamo
 
 
 def delete_prestamo(db: Session, prestamo_id: int) -> bool:
-    db_prestamo = get_prestamo(db, prestamo_id)
-    if db_prestamo:
-        db.delete(db_prestamo)
-        db.commit()
-        return True
-    return False
\ No newline at end of file
+    eliminado = base.eliminar(db, Prestamo, prestamo_id)
+    if eliminado:
+        cache_portafolio.invalidar()
+    return eliminado
@@ -0,0 +1,158 @@
+"""
+Resumen diario de movimientos por sucursal y tipo (tabla resumen_sucursal_diario).
+
+Cada fila acumula la cantidad y la suma de Valor de los movimientos de un
+día, una sucursal y un tipo de movimiento. Las funciones de contabilización
+la actualizan en la misma transacción que insertan los movimientos, así que
+el resumen de una sucursal se lee sin recorrer movimiento. El job
+`app.jobs.reconstruir_resumen_sucursal` la recalcula para un rango de fechas.
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.crud.base import insert_upsert
+from app.models.movimiento import Movimiento
+from app.models.resumen_sucursal import ResumenSucursalDiario
+from app.models.sucursal import Sucursal
+from app.utils.archivo import archivo_movimientos
+from app.utils.particiones import sumar_meses
+
+# (Fecha, IdSucursal, IdTipoMovimiento)
+Llave = Tuple[date, int, int]
+
+# Filas por sentencia en los upserts masivos (límite de parámetros del driver)
+TAMANO_LOTE_FILAS = 2000
+
+
+def _upsert_acumulando(db: Session, filas: List[dict]) -> None:
+    """Sumar Cantidad y Total a las filas existentes o insertarlas"""
+    for inicio in range(0, len(filas), TAMANO_LOTE_FILAS):
+        sentencia = insert_upsert(db, ResumenSucursalDiario).values(filas[inicio:inicio + TAMANO_LOTE_FILAS])
+        if db.get_bind().dialect.name in ("mysql", "mariadb"):
+            sentencia = sentencia.on_duplicate_key_update(
+                Cantidad=ResumenSucursalDiario.Cantidad + sentencia.inserted.Cantidad,
+                Total=ResumenSucursalDiario.Total + sentencia.inserted.Total,
+            )
+        else:
+            sentencia = sentencia.on_conflict_do_update(
+                index_elements=[
+                    ResumenSucursalDiario.Fecha, ResumenSucursalDiario.IdSucursal, ResumenSucursalDiario.IdTipoMovimiento
+                ],
+                set_={
+                    "Cantidad": ResumenSucursalDiario.Cantidad + sentencia.excluded.Cantidad,
+                    "Total": ResumenSucursalDiario.Total + sentencia.excluded.Total,
+                }
+            )
+        db.execute(sentencia)
+
+
+def _agrupar(movimientos: Iterable[Tuple[date, int, int, Decimal]]) -> Dict[Llave, List]:
+    grupos: Dict[Llave, List] = {}
+    for fecha, sucursal_id, tipo_id, valor in movimientos:
+        grupo = grupos.setdefault((fecha, sucursal_id, tipo_id), [0, Decimal("0")])
+        grupo[0] += 1
+        grupo[1] += valor
+    return grupos
+
+
+def _filas(grupos: Dict[Llave, List]) -> List[dict]:
+    # En orden de llave: las transacciones concurrentes bloquean las filas en el mismo orden
+    return [
+        {"Fecha": fecha, "IdSucursal": sucursal_id, "IdTipoMovimiento": tipo_id, "Cantidad": cantidad, "Total": total}
+        for (fecha, sucursal_id, tipo_id), (cantidad, total) in sorted(grupos.items())
+    ]
+
+
+def acumular(db: Session, movimientos: Iterable[Tuple[date, int, int, Decimal]]) -> None:
+    """
+    Sumar movimientos (Fecha, IdSucursal, IdTipoMovimiento, Valor) al resumen.
+
+    Se llama antes del commit, después de los demás cambios: las filas del
+    resumen son compartidas por todas las operaciones de la sucursal en el
+    día y así su bloqueo dura lo menos posible.
+    """
+    filas = _filas(_agrupar(movimientos))
+    if filas:
+        _upsert_acumulando(db, filas)
+
+
+def get_resumen_sucursal(db: Session, sucursal_id: int, desde: date, hasta: date) -> Optional[dict]:
+    """
+    Resumen de la sucursal entre `desde` y `hasta` leído solo del resumen
+    diario (por día y tipo, más los totales por tipo). None si la sucursal no existe.
+    """
+    if db.get(Sucursal, sucursal_id) is None:
+        return None
+    filas = db.execute(
+        select(
+            ResumenSucursalDiario.Fecha, ResumenSucursalDiario.IdTipoMovimiento,
+            ResumenSucursalDiario.Cantidad, ResumenSucursalDiario.Total
+        )
+        .where(
+            ResumenSucursalDiario.IdSucursal == sucursal_id,
+            ResumenSucursalDiario.Fecha >= desde,
+            ResumenSucursalDiario.Fecha <= hasta
+        )
+        .order_by(ResumenSucursalDiario.Fecha, ResumenSucursalDiario.IdTipoMovimiento)
+    ).all()
+
+    totales: Dict[int, dict] = {}
+    for fila in filas:
+        total = totales.setdefault(
+            fila.IdTipoMovimiento, {"IdTipoMovimiento": fila.IdTipoMovimiento, "Cantidad": 0, "Total": Decimal("0.00")}
+        )
+        total["Cantidad"] += fila.Cantidad
+        total["Total"] += fila.Total
+    return {
+        "IdSucursal": sucursal_id,
+        "Desde": desde,
+        "Hasta": hasta,
+        "Dias": [fila._asdict() for fila in filas],
+        "TotalesPorTipo": [totales[tipo] for tipo in sorted(totales)],
+    }
+
+
+def reconstruir_rango(db: Session, desde: date, hasta: date) -> int:
+    """
+    Recalcular las filas del resumen entre `desde` y `hasta` y confirmar. Los
+    días anteriores al corte del archivo se agrupan desde los meses
+    archivados; los demás, con una consulta agrupada sobre movimiento.
+    Retorna cuántas filas quedaron en el rango.
+    """
+    grupos: Dict[Llave, List] = {}
+    corte = archivo_movimientos.fecha_corte()
+    if corte is not None and desde < corte:
+        for mes in archivo_movimientos.meses():
+            if mes > hasta or sumar_meses(mes, 1) <= desde:
+                continue
+            grupos.update(_agrupar(
+                (f.Fecha, f.IdSucursal, f.IdTipoMovimiento, f.Valor)
+                for f in archivo_movimientos.filas_mes(mes) if desde <= f.Fecha <= hasta
+            ))
+    
+    inicio = desde if corte is None else max(desde, corte)
+    if inicio <= hasta:
+        filas = db.execute(
+            select(
+                Movimiento.Fecha, Movimiento.IdSucursal, Movimiento.IdTipoMovimiento,
+                func.count().label("Cantidad"), func.sum(Movimiento.Valor).label("Total")
+            )
+            .where(Movimiento.Fecha >= inicio, Movimiento.Fecha <= hasta)
+            .group_by(Movimiento.Fecha, Movimiento.IdSucursal, Movimiento.IdTipoMovimiento)
+        )
+        for fila in filas:
+            grupos[(fila.Fecha, fila.IdSucursal, fila.IdTipoMovimiento)] = [fila.Cantidad, Decimal(fila.Total)]
+    
+    db.execute(delete(ResumenSucursalDiario).where(
+        ResumenSucursalDiario.Fecha >= desde, ResumenSucursalDiario.Fecha <= hasta
+    ))
+    filas = _filas(grupos)
+    if filas:
+        _upsert_acumulando(db, filas)
+    db.commit()
+    return len(filas)
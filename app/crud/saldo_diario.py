@@ -0,0 +1,151 @@
+"""
+Instantáneas diarias de saldo (tabla saldo_diario).
+
+Cada fila guarda el saldo de una cuenta al cierre de un día en que tuvo
+movimientos. Las funciones de contabilización la mantienen al día dentro de
+la misma transacción que modifica el saldo, y el job
+`app.jobs.reconstruir_saldos_diarios` la llena para los días anteriores.
+
+Como todo cambio de saldo escribe la instantánea de su día, el saldo al cierre
+de un día D es el de la instantánea más reciente con Fecha <= D.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.orm import Session
+
+from app.crud.base import insert_upsert
+from app.crud.contabilizacion import saldo_total
+from app.models.cuenta import Cuenta
+from app.models.movimiento import Movimiento
+from app.models.saldo_diario import SaldoDiario
+from app.utils.archivo import archivo_movimientos
+from app.utils.fragmentos import cuentas_fragmentadas
+
+# Cuentas por sentencia en los upserts masivos (límite de parámetros del driver)
+TAMANO_LOTE_CUENTAS = 5000
+
+def _upsert(db: Session):
+    """INSERT con actualización del saldo si ya existe la fila (cuenta, fecha)"""
+    return insert_upsert(db, SaldoDiario)
+
+
+def _con_actualizacion(db: Session, sentencia):
+    if db.get_bind().dialect.name in ("mysql", "mariadb"):
+        return sentencia.on_duplicate_key_update(Saldo=sentencia.inserted.Saldo)
+    return sentencia.on_conflict_do_update(
+        index_elements=[SaldoDiario.IdCuenta, SaldoDiario.Fecha],
+        set_={"Saldo": sentencia.excluded.Saldo}
+    )
+
+
+def registrar_saldos(
+    db: Session, cuenta_ids: Iterable[int], fecha: Optional[date] = None, incluir_fragmentadas: bool = False
+) -> None:
+    """
+    Copiar el saldo actual de las cuentas a su instantánea del día.
+
+    Se llama después de modificar los saldos y antes del commit: el saldo que
+    se copia es el de la transacción en curso, con las filas ya bloqueadas por
+    el UPDATE. Las cuentas fragmentadas se omiten para no volver a serializar
+    sus créditos en la fila del día; sus instantáneas las escribe
+    `app.crud.saldo_fragmento.consolidar_cuenta`.
+    """
+    ids = sorted(c for c in set(cuenta_ids) if incluir_fragmentadas or not cuentas_fragmentadas.fragmentada(c))
+    fecha = fecha or date.today()
+    for inicio in range(0, len(ids), TAMANO_LOTE_CUENTAS):
+        lote = ids[inicio:inicio + TAMANO_LOTE_CUENTAS]
+        origen = select(Cuenta.IdCuenta, literal(fecha, SaldoDiario.Fecha.type), saldo_total()).where(
+            Cuenta.IdCuenta.in_(lote)
+        )
+        sentencia = _upsert(db).from_select(["IdCuenta", "Fecha", "Saldo"], origen)
+        db.execute(_con_actualizacion(db, sentencia))
+
+
+def guardar_saldos(db: Session, filas: List[dict]) -> None:
+    """Upsert de instantáneas ya calculadas ({IdCuenta, Fecha, Saldo})"""
+    for inicio in range(0, len(filas), TAMANO_LOTE_CUENTAS):
+        sentencia = _upsert(db).values(filas[inicio:inicio + TAMANO_LOTE_CUENTAS])
+        db.execute(_con_actualizacion(db, sentencia))
+
+
+def get_saldo_en_fecha(db: Session, cuenta_id: int, fecha: date) -> Optional[dict]:
+    """
+    Saldo de la cuenta al cierre de `fecha`. Retorna None si la cuenta no existe.
+
+    Hoy (o una fecha futura) responde con el saldo actual. Para días anteriores
+    usa la instantánea más reciente con Fecha <= `fecha` (una lectura por la
+    llave primaria). Sin instantáneas previas, por ejemplo antes de ejecutar
+    la reconstrucción, descuenta del saldo actual los movimientos posteriores
+    (incluidos los archivados).
+    """
+    cuenta = db.execute(
+        select(Cuenta.IdCuenta, Cuenta.Numero, saldo_total().label("Saldo")).where(Cuenta.IdCuenta == cuenta_id)
+    ).first()
+    if cuenta is None:
+        return None
+    resultado = {"IdCuenta": cuenta.IdCuenta, "Numero": cuenta.Numero, "Fecha": fecha}
+    
+    if fecha >= date.today():
+        return {**resultado, "Saldo": cuenta.Saldo, "Origen": "SALDO_ACTUAL"}
+    
+    instantanea = db.execute(
+        select(SaldoDiario.Fecha, SaldoDiario.Saldo)
+        .where(SaldoDiario.IdCuenta == cuenta_id, SaldoDiario.Fecha <= fecha)
+        .order_by(SaldoDiario.Fecha.desc())
+        .limit(1)
+    ).first()
+    if instantanea is not None:
+        return {**resultado, "Saldo": instantanea.Saldo, "Origen": "INSTANTANEA"}
+    
+    desde = fecha + timedelta(days=1)
+    archivados = Decimal("0")
+    corte = archivo_movimientos.fecha_corte()
+    if corte is not None and desde < corte:
+        archivados = archivo_movimientos.sumar_cuenta(cuenta_id, desde)
+        desde = corte
+    posteriores = db.execute(
+        select(func.coalesce(func.sum(Movimiento.Valor), 0))
+        .where(Movimiento.IdCuenta == cuenta_id, Movimiento.Fecha >= desde)
+    ).scalar_one()
+    saldo = cuenta.Saldo - Decimal(posteriores) - archivados
+    return {**resultado, "Saldo": saldo, "Origen": "MOVIMIENTOS"}
+
+
+def reconstruir_saldos(
+    db: Session, cuenta_ids: List[int], hasta: date, desde: Optional[date] = None, confirmar: bool = True
+) -> int:
+    """
+    Calcular y guardar las instantáneas de los días con movimientos anteriores a `hasta`.
+
+    Parte del saldo actual y recorre hacia atrás las sumas diarias de
+    movimientos (solo hasta `desde`, si se indica). Los días desde `hasta` en
+    adelante no se escriben: esas instantáneas las mantienen las operaciones
+    en curso. Retorna cuántas instantáneas se guardaron.
+    """
+    saldos: Dict[int, Decimal] = dict(db.execute(
+        select(Cuenta.IdCuenta, saldo_total()).where(Cuenta.IdCuenta.in_(cuenta_ids))
+    ).all())
+    consulta = select(Movimiento.IdCuenta, Movimiento.Fecha, func.sum(Movimiento.Valor).label("Suma")).where(
+        Movimiento.IdCuenta.in_(cuenta_ids)
+    )
+    if desde is not None:
+        consulta = consulta.where(Movimiento.Fecha >= desde)
+    sumas = db.execute(
+        consulta.group_by(Movimiento.IdCuenta, Movimiento.Fecha)
+        .order_by(Movimiento.IdCuenta, Movimiento.Fecha.desc())
+    ).all()
+    
+    filas = []
+    for dia in sumas:
+        # Saldo al cierre de dia.Fecha, antes de descontar sus movimientos
+        if dia.Fecha < hasta:
+            filas.append({"IdCuenta": dia.IdCuenta, "Fecha": dia.Fecha, "Saldo": saldos[dia.IdCuenta]})
+        saldos[dia.IdCuenta] -= Decimal(dia.Suma)
+    guardar_saldos(db, filas)
+    if confirmar:
+        db.commit()
+    return len(filas)
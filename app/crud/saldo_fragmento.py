@@ -0,0 +1,111 @@
+"""
+Saldo fragmentado de cuentas calientes (tabla saldo_fragmento).
+
+Activar la fragmentación crea N fragmentos en cero; los créditos se reparten
+entre ellos y los débitos los vacían en cuenta.Saldo a medida que los
+necesitan (ver `app.crud.contabilizacion`). Consolidar devuelve los
+fragmentos a cuenta.Saldo y reescribe las instantáneas de saldo_diario que
+los créditos fragmentados no actualizan.
+"""
+
+from datetime import date, timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.crud import contabilizacion, saldo_diario
+from app.models.cuenta import Cuenta
+from app.models.saldo_fragmento import SaldoFragmento
+from app.utils.fragmentos import MAX_FRAGMENTOS, CuentasFragmentadas, cuentas_fragmentadas
+
+# Días recientes cuyas instantáneas se recalculan al consolidar
+DIAS_INSTANTANEAS = 2
+
+
+def cargar_fragmentadas(db: Session, registro: CuentasFragmentadas = cuentas_fragmentadas) -> int:
+    """Recargar el registro en memoria desde saldo_fragmento; retorna cuántas cuentas están fragmentadas"""
+    filas = db.execute(
+        select(SaldoFragmento.IdCuenta, func.count()).group_by(SaldoFragmento.IdCuenta)
+    ).all()
+    registro.reemplazar(filas)
+    return len(filas)
+
+
+def _vaciar_fragmentos(db: Session, cuenta_id: int, medicion) -> bool:
+    """
+    Sumar los fragmentos a cuenta.Saldo y dejarlos en cero, con la cuenta y
+    los fragmentos bloqueados. Retorna False si la cuenta no existe.
+    """
+    with medicion.medir():
+        existe = db.execute(
+            select(Cuenta.IdCuenta).where(Cuenta.IdCuenta == cuenta_id).with_for_update()
+        ).first()
+    if existe is None:
+        return False
+    suma = contabilizacion.sumar_fragmentos(db, [cuenta_id], bloquear=True).get(cuenta_id)
+    if suma:
+        db.execute(
+            update(Cuenta)
+            .where(Cuenta.IdCuenta == cuenta_id)
+            .values(Saldo=Cuenta.Saldo + suma)
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(
+            update(SaldoFragmento)
+            .where(SaldoFragmento.IdCuenta == cuenta_id)
+            .values(Saldo=0)
+            .execution_options(synchronize_session=False)
+        )
+    return True
+
+
+def _registrar_instantaneas(db: Session, cuenta_id: int, hoy: date) -> None:
+    """Instantáneas de hoy y de los días recientes, que los créditos a fragmentos no escriben"""
+    saldo_diario.reconstruir_saldos(
+        db, [cuenta_id], hasta=hoy, desde=hoy - timedelta(days=DIAS_INSTANTANEAS), confirmar=False
+    )
+    saldo_diario.registrar_saldos(db, [cuenta_id], hoy, incluir_fragmentadas=True)
+
+
+def fragmentar_cuenta(db: Session, cuenta_id: int, fragmentos: int) -> Optional[dict]:
+    """
+    Activar (`fragmentos` >= 2), cambiar o desactivar (0) la fragmentación del
+    saldo de una cuenta. Los fragmentos existentes se consolidan primero.
+    Retorna None si la cuenta no existe.
+    """
+    if fragmentos == 1 or not 0 <= fragmentos <= MAX_FRAGMENTOS:
+        raise ValueError(f"Fragmentos debe ser 0 (desactivar) o estar entre 2 y {MAX_FRAGMENTOS}")
+
+    def unidad_de_trabajo(medicion):
+        if not _vaciar_fragmentos(db, cuenta_id, medicion):
+            return None
+        db.execute(delete(SaldoFragmento).where(SaldoFragmento.IdCuenta == cuenta_id))
+        if fragmentos:
+            db.execute(insert(SaldoFragmento), [
+                {"IdCuenta": cuenta_id, "Fragmento": i, "Saldo": 0} for i in range(fragmentos)
+            ])
+        _registrar_instantaneas(db, cuenta_id, date.today())
+        db.commit()
+        return {"IdCuenta": cuenta_id, "Fragmentos": fragmentos}
+
+    resultado = contabilizacion.ejecutar_con_reintentos(db, "fragmentar", unidad_de_trabajo)
+    if resultado is not None:
+        cuentas_fragmentadas.actualizar(cuenta_id, fragmentos)
+    return resultado
+
+
+def consolidar_cuenta(db: Session, cuenta_id: int, hoy: Optional[date] = None) -> bool:
+    """Devolver los fragmentos de la cuenta a cuenta.Saldo y actualizar sus instantáneas"""
+    def unidad_de_trabajo(medicion):
+        if not _vaciar_fragmentos(db, cuenta_id, medicion):
+            return False
+        _registrar_instantaneas(db, cuenta_id, hoy or date.today())
+        db.commit()
+        return True
+
+    return contabilizacion.ejecutar_con_reintentos(db, "consolidar", unidad_de_trabajo)
+
+
+def get_cuentas_fragmentadas(db: Session) -> List[int]:
+    return list(db.execute(select(SaldoFragmento.IdCuenta).distinct().order_by(SaldoFragmento.IdCuenta)).scalars())
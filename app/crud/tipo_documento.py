@@ -1,6 +1,8 @@
 from sqlalchemy.orm import Session
+from app.crud import base
 from app.models.tipo_documento import TipoDocumento
 from app.schemas.tipo_documento import TipoDocumentoCreate, TipoDocumentoUpdate
+from app.utils.paginacion import paginar
 from typing import List, Optional
 
 
@@ -8,27 +10,19 @@ def get_tipo_documento(db: Session, tipo_documento_id: int) -> Optional[TipoDocu
     return db.query(TipoDocumento).filter(TipoDocumento.IdTipoDocumento == tipo_documento_id).first()
 
 
-def get_tipos_documento(db: Session, skip: int = 0, limit: int = 100) -> List[TipoDocumento]:
-    return db.query(TipoDocumento).offset(skip).limit(limit).all()
+def get_tipos_documento(db: Session, skip: int = 0, limit: int = 100, despues_de: Optional[tuple] = None) -> List[TipoDocumento]:
+    return paginar(db.query(TipoDocumento), [TipoDocumento.IdTipoDocumento], skip, limit, despues_de).all()
 
 
 def create_tipo_documento(db: Session, tipo_documento: TipoDocumentoCreate) -> TipoDocumento:
     db_tipo_documento = TipoDocumento(**tipo_documento.dict())
     db.add(db_tipo_documento)
     db.commit()
-    db.refresh(db_tipo_documento)
     return db_tipo_documento
 
 
 def update_tipo_documento(db: Session, tipo_documento_id: int, tipo_documento: TipoDocumentoUpdate) -> Optional[TipoDocumento]:
-    db_tipo_documento = get_tipo_documento(db, tipo_documento_id)
-    if db_tipo_documento:
-        update_data = tipo_documento.dict(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(db_tipo_documento, key, value)
-        db.commit()
-        db.refresh(db_tipo_documento)
-    return db_tipo_documento
+    return base.actualizar(db, TipoDocumento, tipo_documento_id, tipo_documento.dict(exclude_unset=True))
 
 
 def delete_tipo_documento(db: Session, tipo_documento_id: int) -> bool:
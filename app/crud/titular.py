@@ -1,4 +1,5 @@
 from sqlalchemy.orm import Session
+from app.crud.contabilizacion import saldo_total
 from app.models.titular import Titular
 from app.models.cuenta import Cuenta
 from app.models.cuentahabiente import Cuentahabiente
@@ -36,7 +37,7 @@ def get_cuentas_by_cuentahabiente(db: Session, cuentahabiente_id: int) -> List[d
         Titular.IdCuenta,
         Titular.IdCuentahabiente,
         Cuenta.Numero,
-        Cuenta.Saldo,
+        saldo_total().label("Saldo"),
         Cuentahabiente.Nombre
     ).join(
         Cuenta, Titular.IdCuenta == Cuenta.IdCuenta
@@ -69,7 +70,6 @@ def create_titular(db: Session, titular: TitularCreate) -> Titular:
     db_titular = Titular(**titular.dict())
     db.add(db_titular)
     db.commit()
-    db.refresh(db_titular)
     return db_titular
 
 
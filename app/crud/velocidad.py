@@ -0,0 +1,38 @@
+"""
+Carga inicial de los contadores de velocidad desde los movimientos recientes.
+"""
+
+import math
+import time
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.movimiento import Movimiento
+from app.utils.velocidad import LimitesVelocidad, limites_velocidad
+
+# Movimientos que cuentan para los límites: retiros y transferencias enviadas,
+# incluidos los débitos de nómina (cada pago reserva una operación)
+TIPOS_LIMITADOS = (2, 3)
+
+
+def precargar(db: Session, limites: LimitesVelocidad = limites_velocidad, ahora: Optional[float] = None) -> int:
+    """
+    Reconstruir los contadores con una consulta agrupada por cuenta y día
+    sobre los movimientos que pueden estar dentro de las ventanas. Retorna
+    cuántas filas (cuenta, día) se cargaron.
+    """
+    if not limites.reglas:
+        return 0
+    ahora = time.time() if ahora is None else ahora
+    dias = math.ceil(max(r.ventana for r in limites.reglas) / 86400)
+    desde = date.fromtimestamp(ahora) - timedelta(days=dias)
+    filas = db.execute(
+        select(Movimiento.IdCuenta, Movimiento.Fecha, func.count(), func.sum(func.abs(Movimiento.Valor)))
+        .where(Movimiento.IdTipoMovimiento.in_(TIPOS_LIMITADOS), Movimiento.Fecha >= desde)
+        .group_by(Movimiento.IdCuenta, Movimiento.Fecha)
+    ).all()
+    limites.cargar(filas, ahora)
+    return len(filas)
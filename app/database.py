@@ -1,6 +1,8 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from typing import Union
 import os
 from dotenv import load_dotenv
 
@@ -23,6 +25,10 @@ else:
         f"?charset=utf8mb4"
     )
 
+# Modo de acceso de la API: síncrono (PyMySQL en el threadpool) o asíncrono (aiomysql)
+DB_ASYNC = os.getenv("DB_ASYNC", "False").lower() in ("1", "true", "yes")
+ASYNC_DATABASE_URL = DATABASE_URL.replace("mysql+pymysql://", "mysql+aiomysql://", 1)
+
 # Crear engine de SQLAlchemy
 engine = create_engine(
     DATABASE_URL,
@@ -34,15 +40,42 @@ engine = create_engine(
 )
 
 # Crear sesión
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: los objetos conservan sus valores tras el commit y las
+# respuestas se construyen sin volver a consultar la base de datos
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Engine asíncrono (solo en modo DB_ASYNC), con el mismo tamaño de pool
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=True,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        pool_size=10,
+        max_overflow=20
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Sesión recibida por los endpoints según el modo configurado
+SesionBD = Union[Session, AsyncSession]
 
 # Base para modelos
 Base = declarative_base()
 
-# Dependencia para obtener sesión de BD
-def get_db():
+# Dependencia para obtener sesión de BD (modo síncrono)
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependencia para obtener sesión de BD (modo asíncrono)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependencia usada por los routers
+get_db = get_async_db if DB_ASYNC else get_sync_db
\ No newline at end of file
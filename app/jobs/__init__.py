@@ -0,0 +1,3 @@
+"""
+Tareas de mantenimiento ejecutables con `python -m app.jobs.<tarea>`.
+"""
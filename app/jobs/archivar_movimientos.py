@@ -0,0 +1,183 @@
+"""
+Archivar los meses cerrados de movimiento en archivos comprimidos.
+
+Cada mes anterior a la ventana de retención se escribe en
+ARCHIVO_MOVIMIENTOS_DIR (ver `app.utils.archivo`) y después se eliminan de
+movimiento, en una transacción, solo las filas que se escribieron (por
+IdMovimiento): una fila que llega al mes mientras se archiva (`POST
+/api/movimientos` acepta la fecha) se queda en la base de datos y se archiva
+en la siguiente ejecución. En MySQL, si el mes tiene su partición, se vacía
+con TRUNCATE PARTITION cuando, con la tabla bloqueada, la partición tiene
+exactamente las filas escritas.
+
+Los listados por cuenta, el extracto y el saldo a una fecha combinan las
+filas de la base de datos con las archivadas, así que el archivado no cambia
+sus respuestas. Si aparecen filas en un mes ya archivado (o el job se
+interrumpió entre escribir el archivo y borrar las filas) el mes se reescribe
+combinando ambas fuentes, sin duplicar movimientos.
+
+Conviene ejecutar antes `app.jobs.reconstruir_saldos_diarios`: la
+reconstrucción solo ve los movimientos que siguen en la base de datos.
+
+Uso:
+    python -m app.jobs.archivar_movimientos [--meses 24] [--directorio RUTA] [--simular]
+"""
+
+import argparse
+import heapq
+from array import array
+from datetime import date
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.crud.movimiento import COLUMNAS_EXPORTACION
+from app.models import Movimiento
+from app.utils.archivo import (
+    ARCHIVO_MESES_RETENCION, ArchivoMovimientos, archivo_movimientos, escribir_mes
+)
+from app.utils.particiones import inicio_mes, nombre_particion, sumar_meses
+
+# Filas leídas por viaje al recorrer un mes
+TAMANO_LOTE_LECTURA = 5000
+# IdMovimiento por sentencia DELETE (límite de parámetros del driver)
+TAMANO_LOTE_BORRADO = 5000
+
+
+def _llave(fila) -> tuple:
+    return fila.IdCuenta, fila.Fecha, fila.IdMovimiento
+
+
+def meses_por_archivar(db: Session, hoy: date, meses: int) -> List[date]:
+    """Meses con movimientos anteriores a la ventana de retención (que incluye el mes actual)"""
+    corte = sumar_meses(inicio_mes(hoy), -(meses - 1))
+    pendientes = []
+    desde = None
+    while True:
+        # Saltar de mes en mes con movimientos usando el índice por Fecha, sin recorrer los vacíos
+        consulta = select(func.min(Movimiento.Fecha)).where(Movimiento.Fecha < corte)
+        if desde is not None:
+            consulta = consulta.where(Movimiento.Fecha >= desde)
+        primera = db.execute(consulta).scalar()
+        if primera is None:
+            return pendientes
+        pendientes.append(inicio_mes(primera))
+        desde = sumar_meses(pendientes[-1], 1)
+
+
+def _filas_mes(db: Session, mes: date):
+    consulta = (
+        select(*COLUMNAS_EXPORTACION)
+        .where(Movimiento.Fecha >= mes, Movimiento.Fecha < sumar_meses(mes, 1))
+        .order_by(Movimiento.IdCuenta, Movimiento.Fecha, Movimiento.IdMovimiento)
+        .execution_options(yield_per=TAMANO_LOTE_LECTURA)
+    )
+    return db.execute(consulta)
+
+
+def _sin_duplicados(filas):
+    """Omitir las filas repetidas (mismo movimiento en el archivo y en la base de datos)"""
+    anterior = None
+    for fila in filas:
+        if fila.IdMovimiento != anterior:
+            yield fila
+        anterior = fila.IdMovimiento
+
+
+def _registrar_ids(filas, ids: array):
+    for fila in filas:
+        ids.append(fila.IdMovimiento)
+        yield fila
+
+
+def _truncar_particion(db: Session, mes: date, ids: array) -> bool:
+    """
+    TRUNCATE PARTITION del mes si la partición existe y contiene exactamente
+    las filas archivadas. La tabla queda bloqueada entre la verificación y el
+    TRUNCATE, así que no puede entrar una fila nueva en medio.
+    """
+    particion = nombre_particion(mes)
+    existe = db.execute(text(
+        "SELECT COUNT(*) FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'movimiento' AND PARTITION_NAME = :particion"
+    ), {"particion": particion}).scalar()
+    if not existe:
+        return False
+    db.execute(text("LOCK TABLES movimiento WRITE"))
+    try:
+        cantidad, suma = db.execute(text(
+            f"SELECT COUNT(*), COALESCE(SUM(IdMovimiento), 0) FROM movimiento PARTITION ({particion})"
+        )).one()
+        if (cantidad, suma) != (len(ids), sum(ids)):
+            return False
+        db.execute(text(f"ALTER TABLE movimiento TRUNCATE PARTITION {particion}"))
+        return True
+    finally:
+        db.execute(text("UNLOCK TABLES"))
+
+
+def _vaciar_mes(db: Session, mes: date, ids: array) -> None:
+    """Eliminar del mes las filas archivadas `ids`; las que llegaron después se conservan"""
+    if db.get_bind().dialect.name in ("mysql", "mariadb") and _truncar_particion(db, mes, ids):
+        return
+    fin = sumar_meses(mes, 1)
+    for inicio in range(0, len(ids), TAMANO_LOTE_BORRADO):
+        db.execute(
+            delete(Movimiento)
+            .where(
+                Movimiento.Fecha >= mes, Movimiento.Fecha < fin,
+                Movimiento.IdMovimiento.in_(ids[inicio:inicio + TAMANO_LOTE_BORRADO].tolist()),
+            )
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+
+
+def archivar_mes(db: Session, archivo: ArchivoMovimientos, mes: date) -> int:
+    """Archivar un mes (combinando con lo ya archivado) y vaciarlo; retorna las filas del archivo"""
+    ids = array("q")
+    nuevas = _filas_mes(db, mes)
+    previas = list(archivo.filas_mes(mes)) if mes in archivo.meses() else []
+    # Las filas de la base de datos van primero para que ganen sobre las archivadas
+    combinadas = heapq.merge(_registrar_ids(nuevas, ids), previas, key=_llave)
+    filas = escribir_mes(archivo.directorio, mes, _sin_duplicados(combinadas))
+    nuevas.close()
+    _vaciar_mes(db, mes, ids)
+    return filas
+
+
+def archivar(
+    meses: int = ARCHIVO_MESES_RETENCION,
+    directorio: Optional[str] = None,
+    simular: bool = False,
+    hoy: Optional[date] = None
+) -> List[Tuple[date, int]]:
+    """Archivar los meses vencidos, del más antiguo al más reciente; retorna (mes, filas) por mes"""
+    if meses < 1:
+        raise ValueError("La retención debe ser de al menos un mes")
+    archivo = ArchivoMovimientos(directorio) if directorio else archivo_movimientos
+    db = SessionLocal()
+    try:
+        pendientes = meses_por_archivar(db, hoy or date.today(), meses)
+        if simular:
+            return [(mes, 0) for mes in pendientes]
+        return [(mes, archivar_mes(db, archivo, mes)) for mes in pendientes]
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archivar los meses cerrados de movimiento")
+    parser.add_argument("--meses", type=int, default=ARCHIVO_MESES_RETENCION,
+                        help="Meses que permanecen en movimiento (incluido el actual)")
+    parser.add_argument("--directorio", default=None, help="Directorio del archivo (ARCHIVO_MOVIMIENTOS_DIR)")
+    parser.add_argument("--simular", action="store_true", help="Solo listar los meses por archivar")
+    args = parser.parse_args()
+
+    archivados = archivar(args.meses, args.directorio, args.simular)
+    if not archivados:
+        print("No hay meses por archivar")
+    for mes, filas in archivados:
+        print(f"{mes:%Y-%m}: {filas} movimientos archivados" if not args.simular else f"{mes:%Y-%m}: por archivar")
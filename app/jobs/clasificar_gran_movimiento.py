@@ -0,0 +1,31 @@
+"""
+Recalcular la marca GranMovimiento de todas las cuentas.
+
+Una cuenta tiene GranMovimiento si la suma de los valores absolutos de sus
+movimientos de los últimos VOLUMEN_DIAS días alcanza GRAN_MOVIMIENTO_UMBRAL.
+Las operaciones marcan las cuentas a medida que cruzan el umbral; este job,
+programado una vez al día, también desmarca las que bajaron de él al correr
+la ventana. Hace una sola consulta agrupada sobre los movimientos de la
+ventana y actualiza solo las cuentas cuya marca cambia, por lotes.
+
+Uso:
+    python -m app.jobs.clasificar_gran_movimiento
+"""
+
+from app.database import SessionLocal
+from app.crud.gran_movimiento import recalcular_gran_movimiento
+
+
+def clasificar():
+    """Recalcular las marcas; retorna (marcadas, desmarcadas)"""
+    db = SessionLocal()
+    try:
+        return recalcular_gran_movimiento(db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    marcadas, desmarcadas = clasificar()
+    print(f"Cuentas marcadas con GranMovimiento: {len(marcadas)}")
+    print(f"Cuentas desmarcadas: {len(desmarcadas)}")
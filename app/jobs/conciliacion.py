@@ -0,0 +1,144 @@
+"""
+Conciliar los saldos de las cuentas con sus movimientos.
+
+Verifica que Saldo = SaldoApertura + suma de movimientos en cada cuenta (ver
+`app.crud.conciliacion`). El espacio de IdCuenta se divide en lotes que se
+concilian en paralelo, una consulta agrupada por lote, cada hilo con su
+propia sesión.
+
+El progreso se guarda en CONCILIACION_DIR/estado.json después de cada lote:
+si la ejecución se interrumpe, la siguiente continúa con los lotes
+pendientes. Al terminar se escribe el reporte
+CONCILIACION_DIR/reporte_AAAAMMDD_HHMMSS.json con las discrepancias.
+
+Con --incremental solo se revisan las cuentas con movimientos o cambios de
+saldo desde la última ejecución terminada.
+
+Las cuentas sin saldo de apertura (anteriores a la migración 0006) no se
+concilian; el reporte las cuenta en SinApertura hasta que
+`python -m app.jobs.saldos_apertura` lo establezca.
+
+Uso:
+    python -m app.jobs.conciliacion [--incremental] [--lote 1000] [--hilos 4] [--reiniciar]
+
+Termina con código 1 si encontró discrepancias.
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+
+from app.database import SessionLocal
+from app.crud.conciliacion import (
+    conciliar_cuentas, cuentas_sin_apertura, cuentas_tocadas, rango_cuentas, ultimo_movimiento
+)
+from app.utils.reportes import escribir_json, fila_json, leer_json
+
+CONCILIACION_DIR = os.getenv("CONCILIACION_DIR", "conciliacion")
+
+
+def planificar_lotes(incremental: bool, estado: dict, tamano_lote: int) -> dict:
+    """Lotes de la nueva ejecución y el punto desde el que la siguiente será incremental"""
+    db = SessionLocal()
+    try:
+        plan = {
+            "Inicio": datetime.now().isoformat(timespec="seconds"),
+            "Modo": "COMPLETA",
+            "UltimoMovimiento": ultimo_movimiento(db),
+            "Fecha": date.today().isoformat(),
+            "Lotes": [],
+            "Completados": [],
+            "CuentasRevisadas": 0,
+            "SinApertura": cuentas_sin_apertura(db),
+            "Discrepancias": [],
+        }
+        if incremental and "UltimoMovimiento" in estado:
+            plan["Modo"] = "INCREMENTAL"
+            ids = cuentas_tocadas(db, estado["UltimoMovimiento"], date.fromisoformat(estado["Fecha"]))
+            plan["Lotes"] = [{"Cuentas": ids[i:i + tamano_lote]} for i in range(0, len(ids), tamano_lote)]
+        else:
+            rango = rango_cuentas(db)
+            if rango is not None:
+                plan["Lotes"] = [
+                    {"Desde": inicio, "Hasta": min(inicio + tamano_lote - 1, rango[1])}
+                    for inicio in range(rango[0], rango[1] + 1, tamano_lote)
+                ]
+        return plan
+    finally:
+        db.close()
+
+
+def conciliar_lote(lote: dict):
+    db = SessionLocal()
+    try:
+        if "Cuentas" in lote:
+            return conciliar_cuentas(db, cuenta_ids=lote["Cuentas"])
+        return conciliar_cuentas(db, desde=lote["Desde"], hasta=lote["Hasta"])
+    finally:
+        db.close()
+
+
+def conciliar(
+    incremental: bool = False,
+    tamano_lote: int = 1000,
+    hilos: int = 4,
+    directorio: str = CONCILIACION_DIR,
+    reiniciar: bool = False
+) -> dict:
+    """Ejecutar (o continuar) la conciliación; retorna el reporte"""
+    ruta_estado = os.path.join(directorio, "estado.json")
+    estado = leer_json(ruta_estado)
+    plan = None if reiniciar else estado.get("EnCurso")
+    if plan is None:
+        plan = planificar_lotes(incremental, estado, tamano_lote)
+        estado["EnCurso"] = plan
+        escribir_json(ruta_estado, estado)
+
+    completados = set(plan["Completados"])
+    pendientes = [i for i in range(len(plan["Lotes"])) if i not in completados]
+    with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+        futuros = {ejecutor.submit(conciliar_lote, plan["Lotes"][i]): i for i in pendientes}
+        for futuro in as_completed(futuros):
+            revisadas, discrepancias = futuro.result()
+            plan["Completados"].append(futuros[futuro])
+            plan["CuentasRevisadas"] += revisadas
+            plan["Discrepancias"] += [fila_json(d) for d in discrepancias]
+            escribir_json(ruta_estado, estado)
+
+    reporte = {
+        "Inicio": plan["Inicio"],
+        "Fin": datetime.now().isoformat(timespec="seconds"),
+        "Modo": plan["Modo"],
+        "Lotes": len(plan["Lotes"]),
+        "CuentasRevisadas": plan["CuentasRevisadas"],
+        "SinApertura": plan.get("SinApertura", 0),
+        "Discrepancias": sorted(plan["Discrepancias"], key=lambda d: d["IdCuenta"]),
+    }
+    reporte["Archivo"] = os.path.join(
+        directorio, f"reporte_{datetime.fromisoformat(reporte['Fin']):%Y%m%d_%H%M%S}.json"
+    )
+    escribir_json(reporte["Archivo"], reporte)
+    # La próxima ejecución incremental parte de lo visto al planificar esta
+    escribir_json(ruta_estado, {"UltimoMovimiento": plan["UltimoMovimiento"], "Fecha": plan["Fecha"]})
+    return reporte
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Conciliar saldos de cuentas con sus movimientos")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Solo las cuentas tocadas desde la última ejecución terminada")
+    parser.add_argument("--lote", type=int, default=1000, help="Cuentas por consulta")
+    parser.add_argument("--hilos", type=int, default=4, help="Lotes conciliados en paralelo")
+    parser.add_argument("--directorio", default=CONCILIACION_DIR, help="Directorio del estado y los reportes")
+    parser.add_argument("--reiniciar", action="store_true", help="Descartar una ejecución interrumpida")
+    args = parser.parse_args()
+
+    reporte = conciliar(args.incremental, args.lote, args.hilos, args.directorio, args.reiniciar)
+    print(f"Cuentas revisadas: {reporte['CuentasRevisadas']}")
+    print(f"Discrepancias: {len(reporte['Discrepancias'])}")
+    if reporte["SinApertura"]:
+        print(f"Sin saldo de apertura (no conciliadas): {reporte['SinApertura']}")
+    print(f"Reporte: {reporte['Archivo']}")
+    sys.exit(1 if reporte["Discrepancias"] else 0)
@@ -0,0 +1,28 @@
+"""
+Consolidar los saldos fragmentados.
+
+Devuelve a cuenta.Saldo lo acumulado en los fragmentos de cada cuenta
+fragmentada (una transacción corta por cuenta) y reescribe sus instantáneas
+de saldo_diario de hoy y de los días recientes, que los créditos a
+fragmentos no actualizan. Programarlo con frecuencia (por ejemplo cada
+minuto) y, al menos, poco después de medianoche.
+
+Uso:
+    python -m app.jobs.consolidar_fragmentos
+"""
+
+from app.database import SessionLocal
+from app.crud.saldo_fragmento import consolidar_cuenta, get_cuentas_fragmentadas
+
+
+def consolidar() -> int:
+    """Consolidar todas las cuentas fragmentadas; retorna cuántas se consolidaron"""
+    db = SessionLocal()
+    try:
+        return sum(consolidar_cuenta(db, cuenta_id) for cuenta_id in get_cuentas_fragmentadas(db))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print(f"Cuentas consolidadas: {consolidar()}")
@@ -0,0 +1,123 @@
+"""
+Mantenimiento de las particiones mensuales de movimiento (solo MySQL).
+
+- Crea por adelantado las particiones de los próximos meses dividiendo
+  `pfuturo`, que normalmente está vacía, así que la operación es inmediata.
+- Con --retener-meses separa los meses más antiguos: cada mes vencido se
+  archiva con `app.jobs.archivar_movimientos` (que vacía su partición) y la
+  partición, ya vacía, se elimina. Los listados, el extracto, el saldo a una
+  fecha y la conciliación siguen viendo esos movimientos en el archivo. Si
+  llegan filas al mes mientras se archiva, la partición se conserva y se
+  separa en la siguiente ejecución.
+
+Programarlo una vez al mes (o con más frecuencia; no hace nada si no hay cambios).
+
+Uso:
+    python -m app.jobs.particiones_movimiento [--meses-adelante 3] [--retener-meses N] [--simular]
+"""
+
+import argparse
+from datetime import date
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.database import SessionLocal, engine
+from app.jobs.archivar_movimientos import archivar_mes
+from app.utils.archivo import archivo_movimientos
+from app.utils.particiones import (
+    PARTICION_FUTURA, definicion_particion, definicion_particion_futura,
+    mes_de_particion, nombre_particion, planificar_mantenimiento
+)
+
+
+def particiones_existentes(conexion: Connection) -> List[str]:
+    return list(conexion.execute(text(
+        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'movimiento' AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    )).scalars())
+
+
+def sentencias_mantenimiento(
+    conexion: Connection,
+    hoy: date,
+    meses_adelante: int,
+    retener_meses: Optional[int]
+) -> Tuple[List[str], List[date]]:
+    """DDL que crea las particiones que faltan y meses vencidos por separar"""
+    nombres = particiones_existentes(conexion)
+    if PARTICION_FUTURA not in nombres:
+        raise RuntimeError("movimiento no está particionada (aplicar la migración 0005)")
+    meses = [mes for mes in map(mes_de_particion, nombres) if mes is not None]
+    primer_mes = None
+    if not meses:
+        primer_mes = conexion.execute(
+            text(f"SELECT MIN(Fecha) FROM movimiento PARTITION ({PARTICION_FUTURA})")
+        ).scalar()
+    crear, separar = planificar_mantenimiento(meses, hoy, meses_adelante, retener_meses, primer_mes)
+
+    sentencias = []
+    if crear:
+        nuevas = ",\n    ".join([definicion_particion(mes) for mes in crear] + [definicion_particion_futura()])
+        sentencias.append(
+            f"ALTER TABLE movimiento REORGANIZE PARTITION {PARTICION_FUTURA} INTO (\n    {nuevas}\n)"
+        )
+    return sentencias, separar
+
+
+def separar_mes(mes: date) -> Optional[str]:
+    """Archivar el mes y eliminar su partición si quedó vacía; retorna el DDL aplicado"""
+    particion = nombre_particion(mes)
+    db = SessionLocal()
+    try:
+        archivar_mes(db, archivo_movimientos, mes)
+        # Con la tabla bloqueada no puede entrar una fila entre la verificación y el DROP
+        db.execute(text("LOCK TABLES movimiento WRITE"))
+        try:
+            if db.execute(text(f"SELECT COUNT(*) FROM movimiento PARTITION ({particion})")).scalar():
+                return None
+            sentencia = f"ALTER TABLE movimiento DROP PARTITION {particion}"
+            db.execute(text(sentencia))
+            return sentencia
+        finally:
+            db.execute(text("UNLOCK TABLES"))
+    finally:
+        db.close()
+
+
+def mantener(meses_adelante: int = 3, retener_meses: Optional[int] = None, simular: bool = False) -> List[str]:
+    """Aplicar (o solo retornar, con `simular`) el mantenimiento; retorna el DDL"""
+    if engine.dialect.name not in ("mysql", "mariadb"):
+        raise RuntimeError("El particionamiento de movimiento solo está disponible en MySQL")
+    with engine.connect() as conexion:
+        sentencias, separar = sentencias_mantenimiento(conexion, date.today(), meses_adelante, retener_meses)
+        if not simular:
+            # El DDL de MySQL hace commit implícito: cada sentencia se aplica por separado
+            for sentencia in sentencias:
+                conexion.execute(text(sentencia))
+    for mes in separar:
+        if simular:
+            sentencias += [f"-- archivar {mes:%Y-%m}", f"ALTER TABLE movimiento DROP PARTITION {nombre_particion(mes)}"]
+            continue
+        sentencia = separar_mes(mes)
+        sentencias.append(
+            sentencia or f"-- {nombre_particion(mes)} recibió filas mientras se archivaba; se separa en la siguiente ejecución"
+        )
+    return sentencias
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crear y separar particiones mensuales de movimiento")
+    parser.add_argument("--meses-adelante", type=int, default=3, help="Meses futuros con partición creada")
+    parser.add_argument("--retener-meses", type=int, default=None,
+                        help="Meses que permanecen en movimiento (incluido el actual); los anteriores se archivan")
+    parser.add_argument("--simular", action="store_true", help="Mostrar el DDL sin ejecutarlo")
+    args = parser.parse_args()
+
+    sentencias = mantener(args.meses_adelante, args.retener_meses, args.simular)
+    if not sentencias:
+        print("Las particiones de movimiento ya están al día")
+    for sentencia in sentencias:
+        print(f"{sentencia};")
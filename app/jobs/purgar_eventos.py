@@ -0,0 +1,32 @@
+"""
+Eliminar de la bandeja evento_cuenta los eventos antiguos.
+
+Los eventos solo se necesitan para reanudar suscripciones; un cliente
+desconectado por más tiempo que la retención recarga su estado.
+
+Uso:
+    python -m app.jobs.purgar_eventos [--horas 24] [--lote 1000]
+"""
+
+import argparse
+from datetime import datetime, timedelta
+
+from app.database import SessionLocal
+from app.crud.evento_cuenta import purgar_eventos_antiguos
+
+
+def purgar(horas: float = 24, lote: int = 1000) -> int:
+    """Purgar los eventos creados hace más de `horas` en lotes; retorna cuántos se eliminaron"""
+    db = SessionLocal()
+    try:
+        return purgar_eventos_antiguos(db, datetime.now() - timedelta(hours=horas), lote=lote)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Purgar eventos de cuenta antiguos")
+    parser.add_argument("--horas", type=float, default=24, help="Retención de los eventos en horas")
+    parser.add_argument("--lote", type=int, default=1000, help="Filas eliminadas por transacción")
+    args = parser.parse_args()
+    print(f"Eventos eliminados: {purgar(args.horas, args.lote)}")
@@ -0,0 +1,27 @@
+"""
+Eliminar las claves de idempotencia vencidas.
+
+Uso:
+    python -m app.jobs.purgar_idempotencia [--lote 1000]
+"""
+
+import argparse
+
+from app.database import SessionLocal
+from app.crud.idempotencia import purgar_idempotencias_vencidas
+
+
+def purgar(lote: int = 1000) -> int:
+    """Purgar los registros vencidos en lotes; retorna cuántos se eliminaron"""
+    db = SessionLocal()
+    try:
+        return purgar_idempotencias_vencidas(db, lote=lote)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Purgar claves de idempotencia vencidas")
+    parser.add_argument("--lote", type=int, default=1000, help="Filas eliminadas por transacción")
+    args = parser.parse_args()
+    print(f"Claves de idempotencia eliminadas: {purgar(args.lote)}")
@@ -0,0 +1,55 @@
+"""
+Reconstruir el resumen diario por sucursal y tipo de movimiento
+(tabla resumen_sucursal_diario).
+
+Recalcula las filas de un rango de fechas, un mes por transacción, desde
+movimiento (y desde el archivo para los meses archivados). Necesario al
+crear la tabla y después de cargar o corregir movimientos por fuera de la
+API; puede ejecutarse de nuevo en cualquier momento.
+
+Uso:
+    python -m app.jobs.reconstruir_resumen_sucursal [--desde AAAA-MM-DD] [--hasta AAAA-MM-DD]
+
+Sin --desde empieza en el movimiento más antiguo (incluidos los archivados).
+"""
+
+import argparse
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select
+
+from app.database import SessionLocal
+from app.crud.resumen_sucursal import reconstruir_rango
+from app.models import Movimiento
+from app.utils.archivo import archivo_movimientos
+from app.utils.particiones import inicio_mes, sumar_meses
+
+
+def reconstruir(desde: Optional[date] = None, hasta: Optional[date] = None) -> int:
+    """Reconstruir mes a mes; retorna cuántas filas del resumen quedaron"""
+    hasta = hasta or date.today()
+    db = SessionLocal()
+    try:
+        if desde is None:
+            meses = archivo_movimientos.meses()
+            desde = meses[0] if meses else db.execute(select(func.min(Movimiento.Fecha))).scalar()
+            if desde is None:
+                return 0
+        total = 0
+        mes = inicio_mes(desde)
+        while mes <= hasta:
+            fin_mes = sumar_meses(mes, 1) - timedelta(days=1)
+            total += reconstruir_rango(db, max(desde, mes), min(hasta, fin_mes))
+            mes = sumar_meses(mes, 1)
+        return total
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstruir el resumen diario por sucursal")
+    parser.add_argument("--desde", type=date.fromisoformat, default=None, help="Primer día (AAAA-MM-DD)")
+    parser.add_argument("--hasta", type=date.fromisoformat, default=None, help="Último día (por defecto hoy)")
+    args = parser.parse_args()
+    print(f"Filas del resumen: {reconstruir(args.desde, args.hasta)}")
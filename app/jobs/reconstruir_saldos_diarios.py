@@ -0,0 +1,50 @@
+"""
+Reconstruir las instantáneas diarias de saldo (tabla saldo_diario).
+
+Calcula el saldo al cierre de cada día con movimientos a partir del saldo
+actual y las sumas diarias de movimientos. Solo escribe días anteriores a hoy;
+las instantáneas del día en curso las mantienen las operaciones. Puede
+ejecutarse de nuevo en cualquier momento: las filas existentes se sobrescriben.
+
+Uso:
+    python -m app.jobs.reconstruir_saldos_diarios [--cuenta ID] [--lote 500]
+"""
+
+import argparse
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.crud.saldo_diario import reconstruir_saldos
+from app.models import Cuenta
+
+
+def reconstruir(cuenta_id: Optional[int] = None, lote: int = 500) -> int:
+    """Reconstruir por lotes de cuentas (una transacción por lote); retorna las instantáneas guardadas"""
+    hoy = date.today()
+    db = SessionLocal()
+    try:
+        if cuenta_id is not None:
+            return reconstruir_saldos(db, [cuenta_id], hasta=hoy)
+        total = 0
+        ultimo = 0
+        while True:
+            ids = db.execute(
+                select(Cuenta.IdCuenta).where(Cuenta.IdCuenta > ultimo).order_by(Cuenta.IdCuenta).limit(lote)
+            ).scalars().all()
+            if not ids:
+                return total
+            total += reconstruir_saldos(db, ids, hasta=hoy)
+            ultimo = ids[-1]
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstruir las instantáneas diarias de saldo")
+    parser.add_argument("--cuenta", type=int, default=None, help="Reconstruir solo esta cuenta")
+    parser.add_argument("--lote", type=int, default=500, help="Cuentas por transacción")
+    args = parser.parse_args()
+    print(f"Instantáneas de saldo guardadas: {reconstruir(args.cuenta, args.lote)}")
@@ -0,0 +1,72 @@
+"""
+Establecer el saldo de apertura de las cuentas anteriores a cuenta.SaldoApertura.
+
+La migración 0006 deja esas cuentas en NULL y la conciliación las omite. Este
+job les asigna Saldo - suma de sus movimientos, incluidos los archivados (ver
+`app.crud.conciliacion.establecer_aperturas`), por lotes de IdCuenta.
+
+Ese valor deja cada cuenta conciliada a hoy: un descuadre anterior queda
+absorbido en su saldo de apertura y la conciliación ya no lo verá. Por eso
+el job escribe la línea base CONCILIACION_DIR/apertura_AAAAMMDD_HHMMSS.json
+con cada saldo asignado (y el anterior, con --recalcular), para revisar las
+cuentas cuyo saldo no explican sus movimientos.
+
+Ejecutarlo después de archivar o separar meses no cambia el resultado: las
+sumas incluyen el archivo.
+
+Uso:
+    python -m app.jobs.saldos_apertura [--lote 1000] [--recalcular] [--directorio RUTA]
+
+--recalcular vuelve a calcular también las cuentas que ya tienen saldo de
+apertura (por ejemplo, las que la versión anterior de la migración 0006
+calculó sin los meses archivados) y reporta las que cambian.
+"""
+
+import argparse
+import os
+from datetime import datetime
+
+from app.database import SessionLocal
+from app.crud.conciliacion import establecer_aperturas, rango_cuentas
+from app.jobs.conciliacion import CONCILIACION_DIR
+from app.utils.reportes import escribir_json, fila_json
+
+
+def establecer(tamano_lote: int = 1000, recalcular: bool = False, directorio: str = CONCILIACION_DIR) -> dict:
+    """Asignar los saldos de apertura pendientes; retorna el reporte de línea base"""
+    inicio = datetime.now()
+    asignadas = []
+    db = SessionLocal()
+    try:
+        rango = rango_cuentas(db)
+        if rango is not None:
+            for desde in range(rango[0], rango[1] + 1, tamano_lote):
+                asignadas += establecer_aperturas(db, desde, min(desde + tamano_lote - 1, rango[1]), recalcular)
+    finally:
+        db.close()
+
+    reporte = {
+        "Inicio": inicio.isoformat(timespec="seconds"),
+        "Recalcular": recalcular,
+        "CuentasAsignadas": len(asignadas),
+        # Saldo que los movimientos no explican: apertura real o descuadre histórico
+        "ConSaldoNoExplicado": sum(1 for a in asignadas if a["SaldoApertura"] != 0),
+        "Cuentas": [fila_json(a) for a in asignadas],
+        "Archivo": os.path.join(directorio, f"apertura_{inicio:%Y%m%d_%H%M%S}.json"),
+    }
+    escribir_json(reporte["Archivo"], reporte)
+    return reporte
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Establecer el saldo de apertura de las cuentas existentes")
+    parser.add_argument("--lote", type=int, default=1000, help="Cuentas por transacción")
+    parser.add_argument("--recalcular", action="store_true",
+                        help="Recalcular también las cuentas que ya tienen saldo de apertura")
+    parser.add_argument("--directorio", default=CONCILIACION_DIR, help="Directorio del reporte")
+    args = parser.parse_args()
+
+    reporte = establecer(args.lote, args.recalcular, args.directorio)
+    print(f"Cuentas asignadas: {reporte['CuentasAsignadas']}")
+    print(f"Con saldo no explicado por sus movimientos: {reporte['ConSaldoNoExplicado']}")
+    print(f"Línea base: {reporte['Archivo']}")
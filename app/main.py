@@ -1,22 +1,91 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
+from app.database import engine, Base, SessionLocal
+import logging
 import os
 from dotenv import load_dotenv
 
 # Importar routers
-from app.routers import ciudades, cuentahabientes, cuentas, tipos, sucursales, movimientos, prestamos, titulares
+from app.routers import ciudades, cuentahabientes, cuentas, tipos, sucursales, movimientos, prestamos, titulares, nomina, analitica
+
+from app.utils.metricas import contar_viajes_bd
+from app.utils.paginacion import CursorInvalido
+from app.utils.velocidad import LimiteVelocidadExcedido
+from app.utils.tiempo_consulta import ConsultaExcedioTiempo
+from app.utils.fragmentos import FRAGMENTOS_REFRESCO
+from app.utils.eventos import EVENTOS_INTERVALO, CursorEventos, centro_eventos
+from app.crud import evento_cuenta, saldo_fragmento, velocidad
+
+logger = logging.getLogger(__name__)
 
 # Cargar variables de entorno
 load_dotenv()
 
+DEBUG = os.getenv("DEBUG", "False").lower() in ("1", "true", "yes")
+VELOCIDAD_PRECARGAR = os.getenv("VELOCIDAD_PRECARGAR", "True").lower() in ("1", "true", "yes")
+
+
+def _con_sesion(funcion):
+    db = SessionLocal()
+    try:
+        return funcion(db)
+    finally:
+        db.close()
+
+
+async def _refrescar_fragmentadas():
+    """Recargar periódicamente el registro de cuentas con saldo fragmentado"""
+    while True:
+        try:
+            await run_in_threadpool(_con_sesion, saldo_fragmento.cargar_fragmentadas)
+        except Exception:
+            logger.exception("No se pudo cargar el registro de cuentas fragmentadas")
+        await asyncio.sleep(FRAGMENTOS_REFRESCO)
+
+
+async def _relevar_eventos():
+    """Leer la bandeja evento_cuenta y entregar los eventos a las suscripciones de este proceso"""
+    cursor = CursorEventos()
+    while True:
+        try:
+            eventos = await run_in_threadpool(_con_sesion, lambda db: evento_cuenta.leer_nuevos(db, cursor))
+            centro_eventos.publicar(eventos)
+            if len(eventos) == evento_cuenta.TAMANO_LOTE_EVENTOS:
+                continue  # Hay más pendientes
+        except Exception:
+            logger.exception("No se pudieron leer los eventos de cuenta")
+        await centro_eventos.esperar_aviso(EVENTOS_INTERVALO)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Los límites de velocidad parten de los retiros y transferencias recientes
+    if VELOCIDAD_PRECARGAR:
+        try:
+            filas = await run_in_threadpool(_con_sesion, velocidad.precargar)
+            logger.info("Límites de velocidad precargados: %s filas", filas)
+        except Exception:
+            logger.exception("No se pudieron precargar los límites de velocidad")
+    refresco = asyncio.create_task(_refrescar_fragmentadas()) if FRAGMENTOS_REFRESCO > 0 else None
+    relevo = asyncio.create_task(_relevar_eventos()) if EVENTOS_INTERVALO > 0 else None
+    yield
+    for tarea in (refresco, relevo):
+        if tarea is not None:
+            tarea.cancel()
+
+
 # Crear instancia de FastAPI
 app = FastAPI(
     title="API Bancaria ByteBank",
     description="API REST para sistema bancario con FastAPI y MySQL",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configurar CORS para Blazor
@@ -34,8 +103,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Lock-Wait-Ms", "Idempotent-Replayed", "X-DB-Round-Trips", "Retry-After"],
 )
 
+
+# Un cursor de otro listado (llave de orden distinta) se detecta al construir la consulta
+@app.exception_handler(CursorInvalido)
+async def cursor_invalido(request: Request, exc: CursorInvalido):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+# Retiros y transferencias por encima de los límites de velocidad de la cuenta
+@app.exception_handler(LimiteVelocidadExcedido)
+async def limite_velocidad_excedido(request: Request, exc: LimiteVelocidadExcedido):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.reintentar_en)}
+    )
+
+# Consultas de analítica que superan su tiempo máximo de ejecución
+@app.exception_handler(ConsultaExcedioTiempo)
+async def consulta_excedio_tiempo(request: Request, exc: ConsultaExcedioTiempo):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+# En modo debug cada respuesta reporta sus viajes a la base de datos
+if DEBUG:
+    @app.middleware("http")
+    async def reportar_viajes_bd(request: Request, call_next):
+        with contar_viajes_bd() as contador:
+            response = await call_next(request)
+        response.headers["X-DB-Round-Trips"] = str(contador.total)
+        return response
+
 # Importar todos los modelos para que SQLAlchemy los reconozca
 from app.models import *
 
@@ -124,6 +223,18 @@ app.include_router(
     tags=["Préstamos"]
 )
 
+app.include_router(
+    nomina.router,
+    prefix="/api/nomina",
+    tags=["Nómina"]
+)
+
+app.include_router(
+    analitica.router,
+    prefix="/api/analitica",
+    tags=["Analítica"]
+)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -18,6 +18,14 @@ from app.models.titular import Titular
 from app.models.movimiento import Movimiento
 from app.models.prestamo import Prestamo
 
+# Tablas de soporte
+from app.models.idempotencia import Idempotencia
+from app.models.saldo_diario import SaldoDiario
+from app.models.saldo_fragmento import SaldoFragmento
+from app.models.resumen_sucursal import ResumenSucursalDiario
+from app.models.evento_cuenta import EventoCuenta
+from app.models.cuota_prestamo import CuotaPrestamo
+
 __all__ = [
     # Tablas maestras
     "Ciudad",
@@ -32,4 +40,11 @@ __all__ = [
     "Titular",
     "Movimiento",
     "Prestamo",
+    # Tablas de soporte
+    "Idempotencia",
+    "SaldoDiario",
+    "SaldoFragmento",
+    "ResumenSucursalDiario",
+    "EventoCuenta",
+    "CuotaPrestamo",
 ]
\ No newline at end of file
@@ -3,6 +3,11 @@ from sqlalchemy.orm import relationship
 from app.database import Base
 
 
+def _saldo_inicial(contexto):
+    """Saldo de apertura por defecto: el saldo con el que se crea la cuenta"""
+    return contexto.get_current_parameters().get("Saldo") or 0
+
+
 class Cuenta(Base):
     __tablename__ = "cuenta"
     
@@ -12,6 +17,9 @@ class Cuenta(Base):
     IdTipoCuenta = Column(Integer, ForeignKey("tipocuenta.IdTipoCuenta"), nullable=False)
     IdSucursal = Column(Integer, ForeignKey("sucursal.IdSucursal"), nullable=False)
     Saldo = Column(DECIMAL(15, 2), nullable=False, default=0.00)
+    # Saldo con el que se abrió la cuenta: Saldo = SaldoApertura + suma de sus movimientos.
+    # NULL en las cuentas anteriores a la columna hasta que lo establece app.jobs.saldos_apertura
+    SaldoApertura = Column(DECIMAL(15, 2), nullable=True, default=_saldo_inicial)
     Sobregiro = Column(DECIMAL(15, 2), nullable=True, default=0.00)
     GranMovimiento = Column(Boolean, nullable=True, default=False)
     SobregiroNoAutorizado = Column(Boolean, nullable=True, default=False)
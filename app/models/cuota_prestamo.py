@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Date, DECIMAL, ForeignKey, Index, UniqueConstraint
+from app.database import Base
+
+
+class CuotaPrestamo(Base):
+    """Cuota de un préstamo con su vencimiento y estado de cobro"""
+    __tablename__ = "cuota_prestamo"
+    __table_args__ = (
+        UniqueConstraint("IdPrestamo", "NumeroCuota", name="uq_cuota_prestamo_numero"),
+        # Cobro diario: cuotas por cobrar vencidas hasta la fecha
+        Index("ix_cuota_prestamo_estado_vencimiento", "Estado", "FechaVencimiento"),
+    )
+    
+    IdCuota = Column(Integer, primary_key=True, autoincrement=True)
+    IdPrestamo = Column(Integer, ForeignKey("prestamo.IdPrestamo", ondelete="CASCADE"), nullable=False)
+    NumeroCuota = Column(Integer, nullable=False)
+    FechaVencimiento = Column(Date, nullable=False)
+    Capital = Column(DECIMAL(15, 2), nullable=False)
+    Interes = Column(DECIMAL(15, 2), nullable=False)
+    Seguro = Column(DECIMAL(10, 2), nullable=False)
+    Valor = Column(DECIMAL(15, 2), nullable=False)  # Capital + interés + seguro
+    Estado = Column(String(10), nullable=False)  # PENDIENTE, PAGADA o MORA
+    FechaPago = Column(Date, nullable=True)
+    
+    def __repr__(self):
+        return f"<CuotaPrestamo(prestamo={self.IdPrestamo}, cuota={self.NumeroCuota}, estado={self.Estado})>"
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, DECIMAL, ForeignKey, Index
+from app.database import Base
+
+
+class EventoCuenta(Base):
+    """Bandeja de salida de los movimientos, para notificarlos a los suscriptores de cada cuenta"""
+    __tablename__ = "evento_cuenta"
+    __table_args__ = (
+        # Reanudación de una suscripción: eventos de la cuenta posteriores al último recibido
+        Index("ix_evento_cuenta_cuenta", "IdCuenta", "IdEvento"),
+    )
+    
+    IdEvento = Column(Integer, primary_key=True, autoincrement=True)
+    IdCuenta = Column(Integer, ForeignKey("cuenta.IdCuenta", ondelete="CASCADE"), nullable=False)
+    # Sin llave foránea: movimiento puede estar particionada o archivada; None en inserciones masivas con MySQL
+    IdMovimiento = Column(Integer, nullable=True)
+    IdTipoMovimiento = Column(Integer, nullable=False)
+    Fecha = Column(Date, nullable=False)
+    Valor = Column(DECIMAL(15, 2), nullable=False)
+    Descripcion = Column(String(200), nullable=True)
+    FechaCreacion = Column(DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<EventoCuenta(id={self.IdEvento}, cuenta={self.IdCuenta}, valor={self.Valor})>"
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from app.database import Base
+
+
+class Idempotencia(Base):
+    __tablename__ = "idempotencia"
+    
+    Clave = Column(String(100), primary_key=True)
+    Ruta = Column(String(100), nullable=False)
+    HashSolicitud = Column(String(64), nullable=False)
+    Estado = Column(String(20), nullable=False, default="EN_PROCESO")  # EN_PROCESO | COMPLETADO
+    CodigoEstado = Column(Integer, nullable=True)
+    Respuesta = Column(Text, nullable=True)  # Cuerpo JSON de la respuesta almacenada
+    FechaCreacion = Column(DateTime, nullable=False)
+    FechaExpiracion = Column(DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<Idempotencia(clave={self.Clave}, ruta={self.Ruta}, estado={self.Estado})>"
@@ -1,15 +1,21 @@
-from sqlalchemy import Column, Integer, Date, DECIMAL, String, ForeignKey
+from sqlalchemy import Column, Integer, Date, DECIMAL, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 
 class Movimiento(Base):
     __tablename__ = "movimiento"
+    __table_args__ = (
+        # Listados por cuenta: filtro por IdCuenta y orden (Fecha, IdMovimiento) sin filesort
+        Index("ix_movimiento_cuenta_fecha", "IdCuenta", "Fecha", "IdMovimiento"),
+        # Reportes por rango de fechas, opcionalmente por sucursal
+        Index("ix_movimiento_fecha_sucursal", "Fecha", "IdSucursal"),
+    )
     
     IdMovimiento = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    IdCuenta = Column(Integer, ForeignKey("cuenta.IdCuenta", ondelete="CASCADE"), nullable=False, index=True)
+    IdCuenta = Column(Integer, ForeignKey("cuenta.IdCuenta", ondelete="CASCADE"), nullable=False)
     IdSucursal = Column(Integer, ForeignKey("sucursal.IdSucursal"), nullable=False)
-    Fecha = Column(Date, nullable=False, index=True)
+    Fecha = Column(Date, nullable=False)
     Valor = Column(DECIMAL(15, 2), nullable=False)
     IdTipoMovimiento = Column(Integer, ForeignKey("tipomovimiento.IdTipoMovimiento"), nullable=False)
     Descripcion = Column(String(200), nullable=True)
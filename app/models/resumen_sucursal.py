@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Date, DECIMAL, ForeignKey, Index
+from app.database import Base
+
+
+class ResumenSucursalDiario(Base):
+    __tablename__ = "resumen_sucursal_diario"
+    __table_args__ = (
+        # Resumen de una sucursal por rango de fechas
+        Index("ix_resumen_sucursal_fecha", "IdSucursal", "Fecha"),
+    )
+    
+    Fecha = Column(Date, primary_key=True)
+    IdSucursal = Column(Integer, ForeignKey("sucursal.IdSucursal"), primary_key=True)
+    IdTipoMovimiento = Column(Integer, ForeignKey("tipomovimiento.IdTipoMovimiento"), primary_key=True)
+    Cantidad = Column(Integer, nullable=False, default=0)
+    Total = Column(DECIMAL(18, 2), nullable=False, default=0.00)  # Suma de Valor (los débitos restan)
+    
+    def __repr__(self):
+        return (
+            f"<ResumenSucursalDiario(fecha={self.Fecha}, sucursal={self.IdSucursal}, "
+            f"tipo={self.IdTipoMovimiento}, cantidad={self.Cantidad}, total={self.Total})>"
+        )
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, Date, DECIMAL, ForeignKey
+from app.database import Base
+
+
+class SaldoDiario(Base):
+    __tablename__ = "saldo_diario"
+    
+    IdCuenta = Column(Integer, ForeignKey("cuenta.IdCuenta", ondelete="CASCADE"), primary_key=True)
+    Fecha = Column(Date, primary_key=True)
+    Saldo = Column(DECIMAL(15, 2), nullable=False)  # Saldo al cierre del día
+    
+    def __repr__(self):
+        return f"<SaldoDiario(cuenta={self.IdCuenta}, fecha={self.Fecha}, saldo={self.Saldo})>"
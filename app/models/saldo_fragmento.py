@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, DECIMAL, ForeignKey
+from app.database import Base
+
+
+class SaldoFragmento(Base):
+    __tablename__ = "saldo_fragmento"
+    
+    IdCuenta = Column(Integer, ForeignKey("cuenta.IdCuenta", ondelete="CASCADE"), primary_key=True)
+    Fragmento = Column(Integer, primary_key=True, autoincrement=False)
+    # Parte del saldo de una cuenta fragmentada: su saldo es cuenta.Saldo + suma de fragmentos
+    Saldo = Column(DECIMAL(15, 2), nullable=False, default=0.00)
+    
+    def __repr__(self):
+        return f"<SaldoFragmento(cuenta={self.IdCuenta}, fragmento={self.Fragmento}, saldo={self.Saldo})>"
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from datetime import date
+from typing import List, Literal, Optional
+
+from app.database import SesionBD, get_db
+from app.schemas.analitica import AgregadoMovimientosResponse
+from app.crud import analitica as crud
+from app.crud.asincrono import ejecutar
+
+router = APIRouter()
+
+Dimension = Literal["ciudad", "sucursal", "tipo_cuenta", "tipo_movimiento", "dia", "semana", "mes"]
+
+
+@router.get(
+    "/movimientos",
+    response_model=AgregadoMovimientosResponse,
+    response_model_exclude_none=True
+)
+async def agregar_movimientos(
+    agrupar: List[Dimension] = Query([], description="Dimensiones, en orden (a lo sumo un periodo)"),
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    ciudad_id: Optional[int] = None,
+    sucursal_id: Optional[int] = None,
+    tipo_cuenta_id: Optional[int] = None,
+    tipo_movimiento_id: Optional[int] = None,
+    limite: int = Query(crud.ANALITICA_MAX_GRUPOS, ge=1, le=crud.ANALITICA_MAX_GRUPOS),
+    db: SesionBD = Depends(get_db)
+):
+    """
+    Cantidad, total y promedio de los movimientos entre `desde` y `hasta`
+    (por defecto, el mes en curso) agrupados por ciudad, sucursal, tipo de
+    cuenta, tipo de movimiento y día, semana o mes.
+    
+    Se calcula con una sola consulta agrupada en la base de datos. Retorna a lo
+    sumo `limite` grupos (`Truncado` indica si había más) y 504 si la consulta
+    supera el tiempo máximo.
+    """
+    hasta = hasta or date.today()
+    desde = desde or hasta.replace(day=1)
+    try:
+        return await ejecutar(
+            db, crud.agregar_movimientos,
+            agrupar=agrupar, desde=desde, hasta=hasta,
+            ciudad_id=ciudad_id, sucursal_id=sucursal_id,
+            tipo_cuenta_id=tipo_cuenta_id, tipo_movimiento_id=tipo_movimiento_id,
+            limite=limite
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
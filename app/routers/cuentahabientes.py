@@ -1,22 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from typing import List
 
-from app.database import get_db
+from app.database import SesionBD, get_db
 from app.schemas.cuentahabiente import CuentahabienteCreate, CuentahabienteUpdate, CuentahabienteResponse
 from app.crud import cuentahabiente as crud
+from app.crud.asincrono import ejecutar
+from app.utils.paginacion import Paginacion
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[CuentahabienteResponse])
-def listar_cuentahabientes(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+async def listar_cuentahabientes(
+    response: Response,
+    pagina: Paginacion = Depends(),
+    db: SesionBD = Depends(get_db)
 ):
     """Obtener lista de todos los cuentahabientes con información relacionada"""
-    cuentahabientes = crud.get_cuentahabientes(db, skip=skip, limit=limit)
+    cuentahabientes = await ejecutar(db, crud.get_cuentahabientes, skip=pagina.skip, limit=pagina.limit, despues_de=pagina.despues_de)
+    pagina.exponer_siguiente(response, cuentahabientes, lambda c: (c.IdCuentahabiente,))
     
     # Mapear los datos relacionados al response
     result = []
@@ -38,12 +40,12 @@ def listar_cuentahabientes(
 
 
 @router.get("/{cuentahabiente_id}", response_model=CuentahabienteResponse)
-def obtener_cuentahabiente(
+async def obtener_cuentahabiente(
     cuentahabiente_id: int,
-    db: Session = Depends(get_db)
+    db: SesionBD = Depends(get_db)
 ):
     """Obtener un cuentahabiente por ID con información relacionada"""
-    cuentahabiente = crud.get_cuentahabiente(db, cuentahabiente_id=cuentahabiente_id)
+    cuentahabiente = await ejecutar(db, crud.get_cuentahabiente, cuentahabiente_id=cuentahabiente_id)
     if cuentahabiente is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -64,12 +66,12 @@ def obtener_cuentahabiente(
 
 
 @router.get("/documento/{documento}", response_model=CuentahabienteResponse)
-def obtener_cuentahabiente_por_documento(
+async def obtener_cuentahabiente_por_documento(
     documento: str,
-    db: Session = Depends(get_db)
+    db: SesionBD = Depends(get_db)
 ):
     """Buscar cuentahabiente por número de documento con información relacionada"""
-    cuentahabiente = crud.get_cuentahabiente_by_documento(db, documento=documento)
+    cuentahabiente = await ejecutar(db, crud.get_cuentahabiente_by_documento, documento=documento)
     if cuentahabiente is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -90,29 +92,29 @@ def obtener_cuentahabiente_por_documento(
 
 
 @router.post("/", response_model=CuentahabienteResponse, status_code=status.HTTP_201_CREATED)
-def crear_cuentahabiente(
+async def crear_cuentahabiente(
     cuentahabiente: CuentahabienteCreate,
-    db: Session = Depends(get_db)
+    db: SesionBD = Depends(get_db)
 ):
     """Crear un nuevo cuentahabiente"""
     # Verificar si el documento ya existe
-    db_cuentahabiente = crud.get_cuentahabiente_by_documento(db, documento=cuentahabiente.Documento)
+    db_cuentahabiente = await ejecutar(db, crud.get_cuentahabiente_by_documento, documento=cuentahabiente.Documento)
     if db_cuentahabiente:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Ya existe un cuentahabiente con el documento {cuentahabiente.Documento}"
         )
-    return crud.create_cuentahabiente(db=db, cuentahabiente=cuentahabiente)
+    return await ejecutar(db, crud.create_cuentahabiente, cuentahabiente=cuentahabiente)
 
 
 @router.put("/{cuentahabiente_id}", response_model=CuentahabienteResponse)
-def actualizar_cuentahabiente(
+async def actualizar_cuentahabiente(
     cuentahabiente_id: int,
     cuentahabiente: CuentahabienteUpdate,
-    db: Session = Depends(get_db)
+    db: SesionBD = Depends(get_db)
 ):
     """Actualizar un cuentahabiente existente"""
-    db_cuentahabiente = crud.update_cuentahabiente(db, cuentahabiente_id=cuentahabiente_id, cuentahabiente=cuentahabiente)
+    db_cuentahabiente = await ejecutar(db, crud.update_cuentahabiente, cuentahabiente_id=cuentahabiente_id, cuentahabiente=cuentahabiente)
     if db_cuentahabiente is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -122,12 +124,12 @@ def actualizar_cuentahabiente(
 
 
 @router.delete("/{cuentahabiente_id}", status_code=status.HTTP_204_NO_CONTENT)
-def eliminar_cuentahabiente(
+async def eliminar_cuentahabiente(
     cuentahabiente_id: int,
-    db: Session = Depends(get_db)
+    db: SesionBD = Depends(get_db)
 ):
     """Eliminar un cuentahabiente"""
-    success = crud.delete_cuentahabiente(db, cuentahabiente_id=cuentahabiente_id)
+    success = await ejecutar(db, crud.delete_cuentahabiente, cuentahabiente_id=cuentahabiente_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
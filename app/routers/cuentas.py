@@ -1,32 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+import asyncio
+import json
 
-from app.database import get_db
-from app.schemas.cuenta import CuentaCreate, CuentaUpdate, CuentaResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Optional, Tuple
+from datetime import date
+
+from app.database import SesionBD, get_db
+from app.schemas.cuenta import (
+    CuentaCreate, CuentaUpdate, CuentaResponse, ExtractoResponse, FragmentacionSaldo, FragmentacionSaldoResponse
+)
 from app.crud import cuenta as crud
+from app.crud import extracto as crud_extracto
+from app.crud import saldo_diario as crud_saldo_diario
+from app.crud import saldo_fragmento as crud_saldo_fragmento
+from app.crud import evento_cuenta as crud_evento_cuenta
+from app.crud.asincrono import ejecutar, liberar_conexion
+from app.utils.eventos import EVENTOS_PING, Suscripcion, centro_eventos
+from app.utils.paginacion import Paginacion
+from app.utils.exportacion import anteponer_lote, formatear_extracto, iterar_lotes
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[CuentaResponse])
-def listar_cuentas(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+async def listar_cuentas(
+    response: Response,
+    pagina: Paginacion = Depends(),
+    db: SesionBD = Depends(get_db)
 ):
     """Obtener lista de todas las cuentas"""
-    cuentas = crud.get_cuentas(db, skip=skip, limit=limit)
+    cuentas = await ejecutar(db, crud.get_cuentas, skip=pagina.skip, limit=pagina.limit, despues_de=pagina.despues_de)
+    pagina.exponer_siguiente(response, cuentas, lambda c: (c.IdCuenta,))
     return cuentas
 
 
 @router.get("/{cuenta_id}", response_model=CuentaResponse)
-def obtener_cuenta(
+async def obtener_cuenta(
     cuenta_id: int,
-    db: Session = Depends(get_db)
+    db: SesionBD = Depends(get_db)
 ):
     """Obtener una cuenta por ID"""
-    cuenta = crud.get_cuenta(db, cuenta_id=cuenta_id)
+    cuenta = await ejecutar(db, crud.get_cuenta, cuenta_id=cuenta_id)
     if cuenta is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -36,12 +52,12 @@ def obtener_cuenta(
 
 
 @router.get("/numero/{numero}", response_model=CuentaResponse)
-def obtener_cuenta_por_numero(
+async def obtener_cuenta_por_numero(
     numero: str,
-    db: Session = Depends(get_db)
+    db: SesionBD = Depends(get_db)
 ):
     """Buscar cuenta por número"""
-    cuenta = crud.get_cuenta_by_numero(db, numero=numero)
+    cuenta = await ejecutar(db, crud.get_cuenta_by_numero, numero=numero)
     if cuenta is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -51,12 +67,21 @@ def obtener_cuenta_por_numero(
 
 
 @router.get("/{cuenta_id}/saldo")
-def consultar_saldo(
+async def consultar_saldo(
     cuenta_id: int,
-    db: Session = Depends(get_db)
+    fecha: Optional[date] = None,
+    db: SesionBD = Depends(get_db)
 ):
-    """Consultar saldo de una cuenta"""
-    saldo = crud.get_saldo_cuenta(db, cuenta_id=cuenta_id)
+    """
+    Consultar saldo de una cuenta.
+    
+    Con `fecha` retorna el saldo al cierre de ese día, a partir de las
+    instantáneas diarias de saldo.
+    """
+    if fecha is None:
+        saldo = await ejecutar(db, crud.get_saldo_cuenta, cuenta_id=cuenta_id)
+    else:
+        saldo = await ejecutar(db, crud_saldo_diario.get_saldo_en_fecha, cuenta_id=cuenta_id, fecha=fecha)
     if saldo is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -65,30 +90,72 @@ def consultar_saldo(
     return saldo
 
 
+@router.get(
+    "/{cuenta_id}/extracto",
+    response_class=StreamingResponse,
+    responses={200: {"model": ExtractoResponse, "content": {"application/json": {}}}}
+)
+async def obtener_extracto(
+    cuenta_id: int,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    db: SesionBD = Depends(get_db)
+):
+    """
+    Extracto de la cuenta entre `desde` y `hasta` (por defecto, el mes en curso).
+    
+    Incluye el saldo de apertura, cada movimiento con el saldo resultante
+    (calculado en la base de datos con una función de ventana), los totales por
+    tipo de movimiento y el saldo de cierre. Se calcula en una sola pasada y se
+    envía en streaming.
+    """
+    hasta = hasta or date.today()
+    desde = desde or hasta.replace(day=1)
+    if hasta < desde:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="hasta debe ser posterior o igual a desde"
+        )
+    
+    preparado = await ejecutar(db, crud_extracto.preparar_extracto, cuenta_id=cuenta_id, desde=desde, hasta=hasta)
+    if preparado is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Cuenta con ID {cuenta_id} no encontrada"
+        )
+    apertura, archivados, consulta, con_ventana = preparado
+    cabecera = {"IdCuenta": cuenta_id, "Desde": desde, "Hasta": hasta}
+    lotes = anteponer_lote(archivados, iterar_lotes(db, consulta))
+    return StreamingResponse(
+        formatear_extracto(cabecera, apertura, lotes, con_ventana),
+        media_type="application/json"
+    )
+
+
 @router.post("/", response_model=CuentaResponse, status_code=status.HTTP_201_CREATED)
-def crear_cuenta(
+async def crear_cuenta(
     cuenta: CuentaCreate,
-    db: Session = Depends(get_db)
+    db: SesionBD = Depends(get_db)
 ):
     """Crear una nueva cuenta"""
     # Verificar si el número de cuenta ya existe
-    db_cuenta = crud.get_cuenta_by_numero(db, numero=cuenta.Numero)
+    db_cuenta = await ejecutar(db, crud.get_cuenta_by_numero, numero=cuenta.Numero)
     if db_cuenta:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Ya existe una cuenta con el número {cuenta.Numero}"
         )
-    return crud.create_cuenta(db=db, cuenta=cuenta)
+    return await ejecutar(db, crud.create_cuenta, cuenta=cuenta)
 
 
 @router.put("/{cuenta_id}", response_model=CuentaResponse)
-def actualizar_cuenta(
+async def actualizar_cuenta(
     cuenta_id: int,
     cuenta: CuentaUpdate,
-    db: Session = Depends(get_db)
+    db: SesionBD = Depends(get_db)
 ):
     """Actualizar una cuenta existente"""
-    db_cuenta = crud.update_cuenta(db, cuenta_id=cuenta_id, cuenta=cuenta)
+    db_cuenta = await ejecutar(db, crud.update_cuenta, cuenta_id=cuenta_id, cuenta=cuenta)
     if db_cuenta is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -97,16 +164,173 @@ def actualizar_cuenta(
     return db_cuenta
 
 
+@router.put("/{cuenta_id}/fragmentos", response_model=FragmentacionSaldoResponse)
+async def fragmentar_saldo(
+    cuenta_id: int,
+    fragmentacion: FragmentacionSaldo,
+    db: SesionBD = Depends(get_db)
+):
+    """
+    Activar, cambiar o desactivar (0) el saldo fragmentado de una cuenta.
+    
+    Para cuentas que reciben muchos créditos concurrentes (cuentas de nómina,
+    cajas de sucursal): cada crédito suma en uno de los fragmentos en lugar de
+    esperar el bloqueo del saldo de la cuenta.
+    """
+    try:
+        resultado = await ejecutar(
+            db, crud_saldo_fragmento.fragmentar_cuenta, cuenta_id=cuenta_id, fragmentos=fragmentacion.Fragmentos
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if resultado is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Cuenta con ID {cuenta_id} no encontrada"
+        )
+    return resultado
+
+
 @router.delete("/{cuenta_id}", status_code=status.HTTP_204_NO_CONTENT)
-def eliminar_cuenta(
+async def eliminar_cuenta(
     cuenta_id: int,
-    db: Session = Depends(get_db)
+    db: SesionBD = Depends(get_db)
 ):
     """Eliminar una cuenta"""
-    success = crud.delete_cuenta(db, cuenta_id=cuenta_id)
+    success = await ejecutar(db, crud.delete_cuenta, cuenta_id=cuenta_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Cuenta con ID {cuenta_id} no encontrada"
         )
-    return None
\ No newline at end of file
+    return None
+
+
+async def _abrir_suscripcion(
+    db: SesionBD, cuenta_id: int, ultimo_evento: Optional[int]
+) -> Optional[Tuple[Suscripcion, crud_evento_cuenta.Pendientes]]:
+    """Suscribirse a la cuenta y leer los eventos posteriores a `ultimo_evento`; None si la cuenta no existe"""
+    # Primero la suscripción: lo que se confirme mientras se leen los pendientes llega por la cola
+    suscripcion = centro_eventos.suscribir(cuenta_id)
+    try:
+        pendientes = await ejecutar(
+            db, crud_evento_cuenta.get_eventos_cuenta, cuenta_id=cuenta_id, despues_de=ultimo_evento
+        )
+    except BaseException:
+        centro_eventos.cancelar(suscripcion)
+        raise
+    finally:
+        # El stream no usa la base de datos: no retener la conexión mientras dura
+        await liberar_conexion(db)
+    if pendientes is None:
+        centro_eventos.cancelar(suscripcion)
+        return None
+    return suscripcion, pendientes
+
+
+async def _flujo_eventos(
+    suscripcion: Suscripcion, pendientes: crud_evento_cuenta.Pendientes
+) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    (tipo, datos) para el cliente: "reinicio" si debe recargar su estado,
+    los pendientes, los nuevos eventos y un "ping" cada EVENTOS_PING segundos
+    sin eventos. Termina si el cliente no consume a tiempo y su cola se llena.
+    """
+    try:
+        reinicio = 0
+        if pendientes.reinicio is not None:
+            reinicio = pendientes.reinicio
+            yield "reinicio", {"IdEvento": reinicio}
+        # Los IDs de una cuenta fragmentada se confirman fuera de orden: se descartan
+        # los ya enviados y no los menores que el último
+        enviados = set()
+        for evento in pendientes.eventos:
+            enviados.add(evento["IdEvento"])
+            yield "movimiento", evento
+        while True:
+            try:
+                evento = await suscripcion.recibir(EVENTOS_PING)
+            except asyncio.TimeoutError:
+                yield "ping", {}
+                continue
+            if evento is None:
+                return
+            # Los que llegaron por la cola mientras se leían los pendientes ya se enviaron
+            if evento["IdEvento"] in enviados:
+                enviados.discard(evento["IdEvento"])
+            elif evento["IdEvento"] > reinicio:
+                yield "movimiento", evento
+    finally:
+        centro_eventos.cancelar(suscripcion)
+
+
+async def _formatear_sse(flujo: AsyncIterator[Tuple[str, dict]]) -> AsyncIterator[str]:
+    try:
+        async for tipo, datos in flujo:
+            if tipo == "ping":
+                yield ": ping\n\n"
+                continue
+            yield f"id: {datos['IdEvento']}\nevent: {tipo}\ndata: {json.dumps(jsonable_encoder(datos))}\n\n"
+    finally:
+        # Al desconectarse el cliente, cancelar la suscripción ahora y no cuando se recolecte el generador
+        await flujo.aclose()
+
+
+@router.get(
+    "/{cuenta_id}/eventos",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}}
+)
+async def suscribir_eventos(
+    cuenta_id: int,
+    ultimo_evento: Optional[int] = None,
+    last_event_id: Optional[int] = Header(None),
+    db: SesionBD = Depends(get_db)
+):
+    """
+    Movimientos de la cuenta en tiempo real (Server-Sent Events).
+    
+    Cada evento `movimiento` lleva como `id` su IdEvento. Al reconectarse, el
+    navegador envía `Last-Event-ID` (o el cliente pasa `ultimo_evento`) y
+    recibe primero lo que no alcanzó a recibir; si es demasiado llega un
+    evento `reinicio` y debe recargar el saldo y los movimientos. En una
+    cuenta fragmentada la reanudación puede repetir eventos ya recibidos.
+    Si el cliente no consume a tiempo, el servidor cierra el stream.
+    """
+    abierta = await _abrir_suscripcion(db, cuenta_id, last_event_id if last_event_id is not None else ultimo_evento)
+    if abierta is None:
+        raise HTTPException(status_code=404, detail="Cuenta no encontrada")
+    return StreamingResponse(
+        _formatear_sse(_flujo_eventos(*abierta)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/{cuenta_id}/eventos/ws")
+async def suscribir_eventos_ws(
+    websocket: WebSocket,
+    cuenta_id: int,
+    ultimo_evento: Optional[int] = None,
+    db: SesionBD = Depends(get_db)
+):
+    """
+    Movimientos de la cuenta en tiempo real por WebSocket: mensajes JSON con
+    `Tipo` ("movimiento", "reinicio" o "ping"), igual que el stream SSE. Si el
+    cliente no consume a tiempo se cierra con el código 1013 y debe
+    reconectarse con `ultimo_evento`.
+    """
+    abierta = await _abrir_suscripcion(db, cuenta_id, ultimo_evento)
+    if abierta is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Cuenta no encontrada")
+        return
+    flujo = _flujo_eventos(*abierta)
+    try:
+        await websocket.accept()
+        async for tipo, datos in flujo:
+            await websocket.send_json({"Tipo": tipo, **jsonable_encoder(datos)})
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Cola de eventos llena")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await flujo.aclose()
@@ -1,101 +1,275 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Any, Callable, List, Literal, Optional
 from datetime import date
 
-from app.database import get_db
+from app.database import SesionBD, get_db
 from app.schemas.movimiento import (
-    MovimientoResponse, DepositoCreate, RetiroCreate, TransferenciaCreate
+    MovimientoResponse, DepositoCreate, RetiroCreate, TransferenciaCreate,
+    TransferenciaLoteCreate, TransferenciaLoteResponse
 )
 from app.crud import movimiento as crud
+from app.crud.asincrono import ejecutar
+from app.utils.paginacion import Paginacion
+from app.utils.exportacion import TIPOS_CONTENIDO, comprimir_gzip, formatear_csv, formatear_ndjson, iterar_lotes
+from app.utils.metricas import estadisticas_bloqueo
+from app.utils.idempotencia import gestor_idempotencia, ConflictoIdempotencia, IdempotenciaEnProceso
 
 router = APIRouter()
 
 
+def _reportar_espera_bloqueo(response: Response, db: SesionBD) -> None:
+    """Exponer el tiempo de espera por bloqueos de la operación en la respuesta"""
+    espera_ms = db.info.get("espera_bloqueo_ms")
+    if espera_ms is not None:
+        response.headers["X-Lock-Wait-Ms"] = f"{espera_ms:.3f}"
+
+
+async def _ejecutar_idempotente(
+    db: SesionBD,
+    clave: Optional[str],
+    ruta: str,
+    solicitud: BaseModel,
+    response: Response,
+    operacion: Callable[[Session], Any]
+):
+    """
+    Ejecutar la operación una sola vez por Idempotency-Key.
+    
+    `operacion` recibe la sesión síncrona. Sin clave la operación se ejecuta
+    normalmente. Con clave, la respuesta (incluidos los errores 400) queda
+    almacenada y las repeticiones la reciben con el encabezado
+    `Idempotent-Replayed: true`.
+    """
+    if clave is None:
+        return await ejecutar(db, operacion)
+    if not clave or len(clave) > 100:
+        raise HTTPException(status_code=400, detail="Idempotency-Key debe tener entre 1 y 100 caracteres")
+    datos_solicitud = solicitud.model_dump(mode="json")
+
+    def ejecutar_una_vez(sesion: Session):
+        def operacion_registrable():
+            try:
+                return status.HTTP_201_CREATED, jsonable_encoder(operacion(sesion))
+            except HTTPException as e:
+                return e.status_code, {"detail": e.detail}
+
+        return gestor_idempotencia.ejecutar(sesion, clave, ruta, datos_solicitud, operacion_registrable)
+
+    try:
+        codigo_estado, cuerpo, repetida = await ejecutar(db, ejecutar_una_vez)
+    except ConflictoIdempotencia as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotenciaEnProceso as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    respuesta = JSONResponse(status_code=codigo_estado, content=cuerpo)
+    if repetida:
+        respuesta.headers["Idempotent-Replayed"] = "true"
+    elif "X-Lock-Wait-Ms" in response.headers:
+        respuesta.headers["X-Lock-Wait-Ms"] = response.headers["X-Lock-Wait-Ms"]
+    return respuesta
+
+
 @router.get("/", response_model=List[MovimientoResponse])
-def listar_movimientos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Obtener lista de movimientos"""
-    return crud.get_movimientos(db, skip=skip, limit=limit)
+async def listar_movimientos(
+    response: Response,
+    pagina: Paginacion = Depends(),
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    db: SesionBD = Depends(get_db)
+):
+    """Obtener lista de movimientos, opcionalmente limitada a un rango de fechas"""
+    movimientos = await ejecutar(
+        db, crud.get_movimientos, skip=pagina.skip, limit=pagina.limit, despues_de=pagina.despues_de,
+        desde=desde, hasta=hasta
+    )
+    pagina.exponer_siguiente(response, movimientos, lambda m: (m.Fecha, m.IdMovimiento))
+    return movimientos
+
+
+@router.get("/estadisticas/bloqueos")
+async def estadisticas_bloqueos():
+    """Tiempo de espera por bloqueos acumulado por tipo de operación en este proceso"""
+    return estadisticas_bloqueo.resumen()
+
+
+@router.get("/exportar")
+async def exportar_movimientos(
+    fecha_inicio: date,
+    fecha_fin: date,
+    formato: Literal["csv", "ndjson"] = "csv",
+    comprimir: bool = False,
+    db: SesionBD = Depends(get_db)
+):
+    """
+    Exportar los movimientos de un rango de fechas en CSV o NDJSON.
+    
+    Las filas se leen con un cursor del lado del servidor y se envían por lotes,
+    así que la memoria usada no depende del tamaño del rango. Con `comprimir`
+    la respuesta es un archivo .gz.
+    """
+    if fecha_fin < fecha_inicio:
+        raise HTTPException(status_code=400, detail="fecha_fin debe ser posterior o igual a fecha_inicio")
+    
+    columnas = [c.key for c in crud.COLUMNAS_EXPORTACION]
+    lotes = iterar_lotes(db, crud.consulta_exportacion_by_fecha(fecha_inicio, fecha_fin))
+    formatear = formatear_csv if formato == "csv" else formatear_ndjson
+    contenido = formatear(columnas, lotes)
+    
+    nombre = f"movimientos_{fecha_inicio.isoformat()}_{fecha_fin.isoformat()}.{formato}"
+    tipo_contenido = TIPOS_CONTENIDO[formato]
+    if comprimir:
+        contenido = comprimir_gzip(contenido)
+        nombre += ".gz"
+        tipo_contenido = "application/gzip"
+    return StreamingResponse(
+        contenido,
+        media_type=tipo_contenido,
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'}
+    )
 
 
 @router.get("/{movimiento_id}", response_model=MovimientoResponse)
-def obtener_movimiento(movimiento_id: int, db: Session = Depends(get_db)):
-    """Obtener un movimiento por ID"""
-    movimiento = crud.get_movimiento(db, movimiento_id=movimiento_id)
+async def obtener_movimiento(movimiento_id: int, fecha: Optional[date] = None, db: SesionBD = Depends(get_db)):
+    """Obtener un movimiento por ID (`fecha`, si se conoce, evita consultar todas las particiones)"""
+    movimiento = await ejecutar(db, crud.get_movimiento, movimiento_id=movimiento_id, fecha=fecha)
     if movimiento is None:
         raise HTTPException(status_code=404, detail="Movimiento no encontrado")
     return movimiento
 
 
 @router.get("/cuenta/{cuenta_id}", response_model=List[MovimientoResponse])
-def listar_movimientos_por_cuenta(
+async def listar_movimientos_por_cuenta(
     cuenta_id: int,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    response: Response,
+    pagina: Paginacion = Depends(),
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    db: SesionBD = Depends(get_db)
 ):
-    """Obtener movimientos de una cuenta específica"""
-    return crud.get_movimientos_by_cuenta(db, cuenta_id=cuenta_id, skip=skip, limit=limit)
+    """Obtener movimientos de una cuenta específica, opcionalmente en un rango de fechas"""
+    movimientos = await ejecutar(
+        db, crud.get_movimientos_by_cuenta, cuenta_id=cuenta_id, skip=pagina.skip, limit=pagina.limit,
+        despues_de=pagina.despues_de, desde=desde, hasta=hasta
+    )
+    pagina.exponer_siguiente(response, movimientos, lambda m: (m.Fecha, m.IdMovimiento))
+    return movimientos
 
 
 @router.get("/fecha/{fecha_inicio}/{fecha_fin}", response_model=List[MovimientoResponse])
-def listar_movimientos_por_fecha(
+async def listar_movimientos_por_fecha(
     fecha_inicio: date,
     fecha_fin: date,
-    db: Session = Depends(get_db)
+    db: SesionBD = Depends(get_db)
 ):
     """Obtener movimientos en un rango de fechas"""
-    return crud.get_movimientos_by_fecha(db, fecha_inicio=fecha_inicio, fecha_fin=fecha_fin)
+    return await ejecutar(db, crud.get_movimientos_by_fecha, fecha_inicio=fecha_inicio, fecha_fin=fecha_fin)
 
 
 @router.post("/deposito", response_model=MovimientoResponse, status_code=status.HTTP_201_CREATED)
-def realizar_deposito(deposito: DepositoCreate, db: Session = Depends(get_db)):
+async def realizar_deposito(
+    deposito: DepositoCreate,
+    response: Response,
+    db: SesionBD = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """
     Realizar un depósito en una cuenta.
     
     Actualiza automáticamente el saldo de la cuenta.
     """
-    try:
-        return crud.realizar_deposito(db=db, deposito=deposito)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    def operacion(sesion: Session):
+        try:
+            movimiento = crud.realizar_deposito(db=sesion, deposito=deposito)
+            _reportar_espera_bloqueo(response, sesion)
+            return MovimientoResponse.model_validate(movimiento)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return await _ejecutar_idempotente(db, idempotency_key, "deposito", deposito, response, operacion)
 
 
 @router.post("/retiro", response_model=MovimientoResponse, status_code=status.HTTP_201_CREATED)
-def realizar_retiro(retiro: RetiroCreate, db: Session = Depends(get_db)):
+async def realizar_retiro(
+    retiro: RetiroCreate,
+    response: Response,
+    db: SesionBD = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """
     Realizar un retiro de una cuenta.
     
     Valida el saldo disponible y actualiza el saldo de la cuenta.
     """
-    try:
-        return crud.realizar_retiro(db=db, retiro=retiro)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    def operacion(sesion: Session):
+        try:
+            movimiento = crud.realizar_retiro(db=sesion, retiro=retiro)
+            _reportar_espera_bloqueo(response, sesion)
+            return MovimientoResponse.model_validate(movimiento)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return await _ejecutar_idempotente(db, idempotency_key, "retiro", retiro, response, operacion)
 
 
 @router.post("/transferencia", status_code=status.HTTP_201_CREATED)
-def realizar_transferencia(transferencia: TransferenciaCreate, db: Session = Depends(get_db)):
+async def realizar_transferencia(
+    transferencia: TransferenciaCreate,
+    response: Response,
+    db: SesionBD = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """
     Realizar una transferencia entre dos cuentas.
     
     Crea dos movimientos: uno de débito en la cuenta origen
     y uno de crédito en la cuenta destino.
     """
-    try:
-        mov_salida, mov_entrada = crud.realizar_transferencia(db=db, transferencia=transferencia)
-        return {
-            "mensaje": "Transferencia realizada exitosamente",
-            "movimiento_salida": {
-                "IdMovimiento": mov_salida.IdMovimiento,
-                "IdCuenta": mov_salida.IdCuenta,
-                "Valor": mov_salida.Valor
-            },
-            "movimiento_entrada": {
-                "IdMovimiento": mov_entrada.IdMovimiento,
-                "IdCuenta": mov_entrada.IdCuenta,
-                "Valor": mov_entrada.Valor
+    def operacion(sesion: Session):
+        try:
+            mov_salida, mov_entrada = crud.realizar_transferencia(db=sesion, transferencia=transferencia)
+            _reportar_espera_bloqueo(response, sesion)
+            return {
+                "mensaje": "Transferencia realizada exitosamente",
+                "movimiento_salida": {
+                    "IdMovimiento": mov_salida.IdMovimiento,
+                    "IdCuenta": mov_salida.IdCuenta,
+                    "Valor": mov_salida.Valor
+                },
+                "movimiento_entrada": {
+                    "IdMovimiento": mov_entrada.IdMovimiento,
+                    "IdCuenta": mov_entrada.IdCuenta,
+                    "Valor": mov_entrada.Valor
+                }
             }
-        }
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return await _ejecutar_idempotente(db, idempotency_key, "transferencia", transferencia, response, operacion)
+
+
+@router.post("/transferencias/lote", response_model=TransferenciaLoteResponse)
+async def realizar_transferencias_lote(
+    lote: TransferenciaLoteCreate,
+    response: Response,
+    db: SesionBD = Depends(get_db)
+):
+    """
+    Realizar un lote de transferencias en una sola operación.
+    
+    Las transferencias se validan en orden: las que fallan (cuenta inexistente,
+    saldo insuficiente) se reportan en su resultado y las demás se aplican.
+    """
+    resultados = await ejecutar(db, crud.realizar_transferencias_lote, transferencias=lote.Transferencias)
+    _reportar_espera_bloqueo(response, db)
+    exitosas = sum(1 for r in resultados if r["Exitosa"])
+    return {
+        "Total": len(resultados),
+        "Exitosas": exitosas,
+        "Fallidas": len(resultados) - exitosas,
+        "Resultados": resultados
+    }
@@ -0,0 +1,60 @@
+import csv
+import io
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from app.database import SesionBD, get_db
+from app.schemas.nomina import DispersionNominaCreate
+from app.crud import nomina as crud
+from app.crud.asincrono import ejecutar
+
+router = APIRouter()
+
+COLUMNAS_RESULTADO = [
+    "Indice", "Referencia", "IdCuentaDestino", "Valor", "Estado",
+    "IdMovimientoSalida", "IdMovimientoEntrada", "Error"
+]
+
+
+def _filas_csv(resultados):
+    """Generar el archivo de resultados fila por fila"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNAS_RESULTADO)
+    writer.writeheader()
+    for resultado in resultados:
+        writer.writerow(resultado)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@router.post("/dispersion", status_code=status.HTTP_201_CREATED, response_class=StreamingResponse)
+async def dispersar_nomina(dispersion: DispersionNominaCreate, db: SesionBD = Depends(get_db)):
+    """
+    Pagar una nómina: un débito a la cuenta del empleador y un crédito por empleado.
+    
+    Retorna un archivo CSV con el resultado de cada pago (PAGADO o RECHAZADO).
+    """
+    try:
+        resultados = await ejecutar(db, crud.dispersar_nomina, dispersion=dispersion)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    pagados = [r for r in resultados if r["Estado"] == "PAGADO"]
+    headers = {
+        "Content-Disposition": 'attachment; filename="dispersion_nomina.csv"',
+        "X-Total-Pagado": str(sum(r["Valor"] for r in pagados)),
+        "X-Pagos-Exitosos": str(len(pagados)),
+        "X-Pagos-Rechazados": str(len(resultados) - len(pagados)),
+    }
+    espera_ms = db.info.get("espera_bloqueo_ms")
+    if espera_ms is not None:
+        headers["X-Lock-Wait-Ms"] = f"{espera_ms:.3f}"
+    return StreamingResponse(
+        _filas_csv(resultados),
+        status_code=status.HTTP_201_CREATED,
+        media_type="text/csv",
+        headers=headers
+    )
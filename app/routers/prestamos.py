@@ -1,49 +1,121 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Literal, Optional
+from datetime import date
+from decimal import Decimal
 
-from app.database import get_db
+from app.database import SesionBD, get_db
 from app.schemas.prestamo import (
     PrestamoCreate, PrestamoUpdate, PrestamoResponse,
-    CalculoCuota, CalculoCuotaResponse
+    CalculoCuota, CalculoCuotaResponse, CalculoAmortizacion, TablaAmortizacionResponse,
+    CotizacionLote, CotizacionLoteResponse, CuotaPrestamoResponse
 )
 from app.crud import prestamo as crud
+from app.crud import cuota_prestamo
+from app.crud import portafolio
+from app.crud.asincrono import ejecutar
+from app.schemas.portafolio import (
+    ResumenPortafolioResponse, ProyeccionPortafolioResponse, ExposicionPortafolioResponse
+)
+from app.utils.amortizacion import tabla_amortizacion
+from app.utils.cuota import estadisticas_cache
+from app.utils.paginacion import Paginacion
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[PrestamoResponse])
-def listar_prestamos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def listar_prestamos(response: Response, pagina: Paginacion = Depends(), db: SesionBD = Depends(get_db)):
     """Obtener lista de todos los préstamos"""
-    return crud.get_prestamos(db, skip=skip, limit=limit)
+    prestamos = await ejecutar(db, crud.get_prestamos, skip=pagina.skip, limit=pagina.limit, despues_de=pagina.despues_de)
+    pagina.exponer_siguiente(response, prestamos, lambda p: (p.IdPrestamo,))
+    return prestamos
+
+
+@router.get("/estadisticas/cuotas")
+async def estadisticas_cuotas():
+    """Aciertos y fallos de la caché de cálculo de cuotas en este proceso"""
+    return estadisticas_cache()
+
+
+@router.get("/portafolio/resumen", response_model=ResumenPortafolioResponse)
+async def resumen_portafolio(fecha_corte: Optional[date] = None, db: SesionBD = Depends(get_db)):
+    """
+    Préstamos vigentes, saldo de capital, intereses por cobrar y cuota mensual
+    de toda la cartera a la fecha de corte (por defecto hoy). Son estimaciones
+    del plan contractual con los términos actuales de cada préstamo, no la suma
+    de sus cuotas en `/{prestamo_id}/cuotas`.
+    """
+    return await ejecutar(db, portafolio.get_resumen, fecha_corte=fecha_corte or date.today())
+
+
+@router.get("/portafolio/proyeccion", response_model=ProyeccionPortafolioResponse)
+async def proyeccion_portafolio(
+    fecha_corte: Optional[date] = None,
+    meses: int = Query(12, ge=1, le=portafolio.MAX_MESES_PROYECCION),
+    db: SesionBD = Depends(get_db)
+):
+    """Capital, interés y seguro que vencen cada mes desde el de la fecha de corte, y el saldo al final del mes"""
+    return await ejecutar(db, portafolio.get_proyeccion, fecha_corte=fecha_corte or date.today(), meses=meses)
+
+
+@router.get("/portafolio/exposicion", response_model=ExposicionPortafolioResponse)
+async def exposicion_portafolio(
+    por: Literal["sucursal", "ciudad"] = "sucursal",
+    fecha_corte: Optional[date] = None,
+    db: SesionBD = Depends(get_db)
+):
+    """Saldo de capital por sucursal o ciudad de la cuenta del préstamo, de mayor a menor"""
+    return await ejecutar(db, portafolio.get_exposicion, fecha_corte=fecha_corte or date.today(), por=por)
 
 
 @router.get("/{prestamo_id}", response_model=PrestamoResponse)
-def obtener_prestamo(prestamo_id: int, db: Session = Depends(get_db)):
+async def obtener_prestamo(prestamo_id: int, db: SesionBD = Depends(get_db)):
     """Obtener un préstamo por ID"""
-    prestamo = crud.get_prestamo(db, prestamo_id=prestamo_id)
+    prestamo = await ejecutar(db, crud.get_prestamo, prestamo_id=prestamo_id)
     if prestamo is None:
         raise HTTPException(status_code=404, detail="Préstamo no encontrado")
     return prestamo
 
 
+@router.get("/{prestamo_id}/amortizacion", response_model=TablaAmortizacionResponse)
+async def obtener_amortizacion(prestamo_id: int, db: SesionBD = Depends(get_db)):
+    """
+    Tabla de amortización del préstamo: interés, capital, seguro y saldo de
+    cada cuota, calculada con el valor, la tasa, el plazo y el seguro del préstamo.
+    """
+    tabla = await ejecutar(db, crud.get_amortizacion_prestamo, prestamo_id=prestamo_id)
+    if tabla is None:
+        raise HTTPException(status_code=404, detail="Préstamo no encontrado")
+    return tabla
+
+
+@router.get("/{prestamo_id}/cuotas", response_model=List[CuotaPrestamoResponse])
+async def listar_cuotas(prestamo_id: int, db: SesionBD = Depends(get_db)):
+    """Plan de cuotas del préstamo con su vencimiento y estado de cobro"""
+    prestamo = await ejecutar(db, crud.get_prestamo, prestamo_id=prestamo_id)
+    if prestamo is None:
+        raise HTTPException(status_code=404, detail="Préstamo no encontrado")
+    return await ejecutar(db, cuota_prestamo.get_cuotas_prestamo, prestamo_id=prestamo_id)
+
+
 @router.get("/numero/{numero}", response_model=PrestamoResponse)
-def obtener_prestamo_por_numero(numero: str, db: Session = Depends(get_db)):
+async def obtener_prestamo_por_numero(numero: str, db: SesionBD = Depends(get_db)):
     """Buscar préstamo por número"""
-    prestamo = crud.get_prestamo_by_numero(db, numero=numero)
+    prestamo = await ejecutar(db, crud.get_prestamo_by_numero, numero=numero)
     if prestamo is None:
         raise HTTPException(status_code=404, detail="Préstamo no encontrado")
     return prestamo
 
 
 @router.get("/cuenta/{cuenta_id}", response_model=List[PrestamoResponse])
-def listar_prestamos_por_cuenta(cuenta_id: int, db: Session = Depends(get_db)):
+async def listar_prestamos_por_cuenta(cuenta_id: int, db: SesionBD = Depends(get_db)):
     """Obtener préstamos de una cuenta específica"""
-    return crud.get_prestamos_by_cuenta(db, cuenta_id=cuenta_id)
+    return await ejecutar(db, crud.get_prestamos_by_cuenta, cuenta_id=cuenta_id)
 
 
 @router.post("/calcular-cuota", response_model=CalculoCuotaResponse)
-def calcular_cuota_prestamo(datos: CalculoCuota):
+async def calcular_cuota_prestamo(datos: CalculoCuota):
     """
     Calcular la cuota mensual de un préstamo.
     
@@ -55,28 +127,59 @@ def calcular_cuota_prestamo(datos: CalculoCuota):
     return crud.calcular_cuota(datos)
 
 
+@router.post("/cotizaciones", response_model=CotizacionLoteResponse, response_model_exclude_none=True)
+async def cotizar_lote(datos: CotizacionLote):
+    """
+    Calcular la cuota de muchos escenarios en una sola solicitud.
+    
+    Recibe listas de montos, tasas, plazos y seguros, combinadas posición a
+    posición (modo "vectores") o como producto cartesiano (modo "grilla"), y
+    responde en columnas con la cuota, el total a pagar y los intereses de cada
+    escenario, iguales a los de /calcular-cuota.
+    """
+    try:
+        # Cálculo de CPU con NumPy y Decimal: fuera del event loop
+        return await run_in_threadpool(crud.cotizar_lote, datos)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/tabla-amortizacion", response_model=TablaAmortizacionResponse)
+async def calcular_tabla_amortizacion(datos: CalculoAmortizacion):
+    """
+    Tabla de amortización francesa (cuota fija) de un préstamo simulado.
+    
+    Los valores son exactos al centavo: en cada cuota Cuota = Interés + Capital,
+    los abonos a capital suman el valor y la última cuota se ajusta para dejar
+    el saldo en cero.
+    """
+    return await run_in_threadpool(
+        tabla_amortizacion, datos.Valor, datos.Interes, datos.Plazo, datos.Seguro or Decimal("0")
+    )
+
+
 @router.post("/", response_model=PrestamoResponse, status_code=status.HTTP_201_CREATED)
-def crear_prestamo(prestamo: PrestamoCreate, db: Session = Depends(get_db)):
+async def crear_prestamo(prestamo: PrestamoCreate, db: SesionBD = Depends(get_db)):
     """
     Crear un nuevo préstamo.
     
     Si no se proporciona la cuota, se calcula automáticamente.
     """
     # Verificar si el número ya existe
-    db_prestamo = crud.get_prestamo_by_numero(db, numero=prestamo.Numero)
+    db_prestamo = await ejecutar(db, crud.get_prestamo_by_numero, numero=prestamo.Numero)
     if db_prestamo:
         raise HTTPException(
             status_code=400,
             detail=f"Ya existe un préstamo con el número {prestamo.Numero}"
         )
-    return crud.create_prestamo(db=db, prestamo=prestamo)
+    return await ejecutar(db, crud.create_prestamo, prestamo=prestamo)
 
 
 @router.put("/{prestamo_id}", response_model=PrestamoResponse)
-def actualizar_prestamo(
+async def actualizar_prestamo(
     prestamo_id: int,
     prestamo: PrestamoUpdate,
-    db: Session = Depends(get_db)
+    db: SesionBD = Depends(get_db)
 ):
     """
     Actualizar un préstamo existente.
@@ -84,16 +187,16 @@ def actualizar_prestamo(
     Si se actualizan los parámetros (tasa, plazo, seguro),
     la cuota se recalcula automáticamente.
     """
-    db_prestamo = crud.update_prestamo(db, prestamo_id=prestamo_id, prestamo=prestamo)
+    db_prestamo = await ejecutar(db, crud.update_prestamo, prestamo_id=prestamo_id, prestamo=prestamo)
     if db_prestamo is None:
         raise HTTPException(status_code=404, detail="Préstamo no encontrado")
     return db_prestamo
 
 
 @router.delete("/{prestamo_id}", status_code=status.HTTP_204_NO_CONTENT)
-def eliminar_prestamo(prestamo_id: int, db: Session = Depends(get_db)):
+async def eliminar_prestamo(prestamo_id: int, db: SesionBD = Depends(get_db)):
     """Eliminar un préstamo"""
-    success = crud.delete_prestamo(db, prestamo_id=prestamo_id)
+    success = await ejecutar(db, crud.delete_prestamo, prestamo_id=prestamo_id)
     if not success:
         raise HTTPException(status_code=404, detail="Préstamo no encontrado")
     return None
\ No newline at end of file
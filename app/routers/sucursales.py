@@ -1,54 +1,85 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from datetime import date
+from typing import List, Optional
 
-from app.database import get_db
-from app.schemas.sucursal import SucursalCreate, SucursalUpdate, SucursalResponse
+from app.database import SesionBD, get_db
+from app.schemas.sucursal import SucursalCreate, SucursalUpdate, SucursalResponse, ResumenSucursalResponse
 from app.crud import sucursal as crud
+from app.crud import resumen_sucursal as crud_resumen
+from app.crud.asincrono import ejecutar
+from app.utils.paginacion import Paginacion
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[SucursalResponse])
-def listar_sucursales(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def listar_sucursales(response: Response, pagina: Paginacion = Depends(), db: SesionBD = Depends(get_db)):
     """Obtener lista de todas las sucursales"""
-    return crud.get_sucursales(db, skip=skip, limit=limit)
+    sucursales = await ejecutar(db, crud.get_sucursales, skip=pagina.skip, limit=pagina.limit, despues_de=pagina.despues_de)
+    pagina.exponer_siguiente(response, sucursales, lambda s: (s.IdSucursal,))
+    return sucursales
 
 
 @router.get("/{sucursal_id}", response_model=SucursalResponse)
-def obtener_sucursal(sucursal_id: int, db: Session = Depends(get_db)):
+async def obtener_sucursal(sucursal_id: int, db: SesionBD = Depends(get_db)):
     """Obtener una sucursal por ID"""
-    sucursal = crud.get_sucursal(db, sucursal_id=sucursal_id)
+    sucursal = await ejecutar(db, crud.get_sucursal, sucursal_id=sucursal_id)
     if sucursal is None:
         raise HTTPException(status_code=404, detail="Sucursal no encontrada")
     return sucursal
 
 
+@router.get("/{sucursal_id}/resumen", response_model=ResumenSucursalResponse)
+async def obtener_resumen_sucursal(
+    sucursal_id: int,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    db: SesionBD = Depends(get_db)
+):
+    """
+    Cantidad y total de movimientos de la sucursal por día y tipo entre
+    `desde` y `hasta` (por defecto, el mes en curso). Se lee del resumen
+    diario que mantienen las operaciones, sin recorrer movimiento.
+    """
+    hasta = hasta or date.today()
+    desde = desde or hasta.replace(day=1)
+    if hasta < desde:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="hasta debe ser posterior o igual a desde"
+        )
+    
+    resumen = await ejecutar(db, crud_resumen.get_resumen_sucursal, sucursal_id=sucursal_id, desde=desde, hasta=hasta)
+    if resumen is None:
+        raise HTTPException(status_code=404, detail="Sucursal no encontrada")
+    return resumen
+
+
 @router.get("/ciudad/{ciudad_id}", response_model=List[SucursalResponse])
-def listar_sucursales_por_ciudad(ciudad_id: int, db: Session = Depends(get_db)):
+async def listar_sucursales_por_ciudad(ciudad_id: int, db: SesionBD = Depends(get_db)):
     """Obtener sucursales de una ciudad específica"""
-    return crud.get_sucursales_by_ciudad(db, ciudad_id=ciudad_id)
+    return await ejecutar(db, crud.get_sucursales_by_ciudad, ciudad_id=ciudad_id)
 
 
 @router.post("/", response_model=SucursalResponse, status_code=status.HTTP_201_CREATED)
-def crear_sucursal(sucursal: SucursalCreate, db: Session = Depends(get_db)):
+async def crear_sucursal(sucursal: SucursalCreate, db: SesionBD = Depends(get_db)):
     """Crear una nueva sucursal"""
-    return crud.create_sucursal(db=db, sucursal=sucursal)
+    return await ejecutar(db, crud.create_sucursal, sucursal=sucursal)
 
 
 @router.put("/{sucursal_id}", response_model=SucursalResponse)
-def actualizar_sucursal(sucursal_id: int, sucursal: SucursalUpdate, db: Session = Depends(get_db)):
+async def actualizar_sucursal(sucursal_id: int, sucursal: SucursalUpdate, db: SesionBD = Depends(get_db)):
     """Actualizar una sucursal existente"""
-    db_sucursal = crud.update_sucursal(db, sucursal_id=sucursal_id, sucursal=sucursal)
+    db_sucursal = await ejecutar(db, crud.update_sucursal, sucursal_id=sucursal_id, sucursal=sucursal)
     if db_sucursal is None:
         raise HTTPException(status_code=404, detail="Sucursal no encontrada")
     return db_sucursal
 
 
 @router.delete("/{sucursal_id}", status_code=status.HTTP_204_NO_CONTENT)
-def eliminar_sucursal(sucursal_id: int, db: Session = Depends(get_db)):
+async def eliminar_sucursal(sucursal_id: int, db: SesionBD = Depends(get_db)):
     """Eliminar una sucursal"""
-    success = crud.delete_sucursal(db, sucursal_id=sucursal_id)
+    success = await ejecutar(db, crud.delete_sucursal, sucursal_id=sucursal_id)
     if not success:
         raise HTTPException(status_code=404, detail="Sucursal no encontrada")
     return None
\ No newline at end of file
@@ -35,12 +35,16 @@ from app.schemas.titular import (
 )
 from app.schemas.movimiento import (
     MovimientoBase, MovimientoCreate, MovimientoUpdate, MovimientoResponse,
-    DepositoCreate, RetiroCreate, TransferenciaCreate
+    DepositoCreate, RetiroCreate, TransferenciaCreate,
+    TransferenciaLoteCreate, ResultadoTransferenciaLote, TransferenciaLoteResponse
 )
 from app.schemas.prestamo import (
     PrestamoBase, PrestamoCreate, PrestamoUpdate, PrestamoResponse,
     CalculoCuota, CalculoCuotaResponse
 )
+from app.schemas.nomina import (
+    PagoNomina, DispersionNominaCreate
+)
 
 __all__ = [
     # Ciudad
@@ -64,7 +68,10 @@ __all__ = [
     # Movimiento
     "MovimientoBase", "MovimientoCreate", "MovimientoUpdate", "MovimientoResponse",
     "DepositoCreate", "RetiroCreate", "TransferenciaCreate",
+    "TransferenciaLoteCreate", "ResultadoTransferenciaLote", "TransferenciaLoteResponse",
     # Préstamo
     "PrestamoBase", "PrestamoCreate", "PrestamoUpdate", "PrestamoResponse",
     "CalculoCuota", "CalculoCuotaResponse",
+    # Nómina
+    "PagoNomina", "DispersionNominaCreate",
 ]
\ No newline at end of file
@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional
+
+
+class GrupoMovimientos(BaseModel):
+    """Un grupo del agregado; solo vienen las columnas de las dimensiones pedidas"""
+    IdCiudad: Optional[int] = None
+    IdSucursal: Optional[int] = None
+    IdTipoCuenta: Optional[int] = None
+    IdTipoMovimiento: Optional[int] = None
+    Periodo: Optional[date] = Field(None, description="Primer día del día, semana (lunes) o mes")
+    Cantidad: int
+    Total: Decimal = Field(..., description="Suma de Valor (los débitos restan)")
+    Promedio: Decimal
+
+
+class AgregadoMovimientosResponse(BaseModel):
+    Agrupacion: List[str]
+    Desde: date
+    Hasta: date
+    Grupos: List[GrupoMovimientos]
+    Truncado: bool = Field(..., description="Hay más grupos que el límite pedido")
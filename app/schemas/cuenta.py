@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from typing import List, Optional
 from decimal import Decimal
 from datetime import date
 
@@ -101,4 +101,44 @@ class CuentaResponse(BaseModel):
                 "GranMovimiento": False,
                 "SobregiroNoAutorizado": False
             }
-        }
\ No newline at end of file
+        }
+
+
+class MovimientoExtracto(BaseModel):
+    IdMovimiento: int
+    Fecha: date
+    IdTipoMovimiento: int
+    TipoMovimiento: str
+    Descripcion: Optional[str] = None
+    Valor: Decimal
+    Saldo: Decimal = Field(..., description="Saldo de la cuenta después del movimiento")
+
+
+class TotalTipoMovimiento(BaseModel):
+    IdTipoMovimiento: int
+    TipoMovimiento: str
+    Cantidad: int
+    Total: Decimal
+
+
+class ExtractoResponse(BaseModel):
+    """Documento del extracto (la respuesta se envía en streaming con esta forma)"""
+    IdCuenta: int
+    Desde: date
+    Hasta: date
+    SaldoApertura: Decimal = Field(..., description="Saldo al inicio del día `Desde`")
+    Movimientos: List[MovimientoExtracto]
+    TotalesPorTipo: List[TotalTipoMovimiento]
+    SaldoCierre: Decimal = Field(..., description="Saldo al final del día `Hasta`")
+
+
+class FragmentacionSaldo(BaseModel):
+    Fragmentos: int = Field(
+        ..., ge=0, le=64,
+        description="Fragmentos del saldo para repartir los créditos concurrentes (0 desactiva)"
+    )
+
+
+class FragmentacionSaldoResponse(BaseModel):
+    IdCuenta: int
+    Fragmentos: int
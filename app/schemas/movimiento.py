@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from typing import List, Optional
 from decimal import Decimal
 from datetime import date
 
@@ -76,4 +76,41 @@ class TransferenciaCreate(BaseModel):
     def validate_cuentas_diferentes(cls, v, values):
         if 'IdCuentaOrigen' in values and v == values['IdCuentaOrigen']:
             raise ValueError('La cuenta origen y destino no pueden ser la misma')
-        return v
\ No newline at end of file
+        return v
+
+
+# Schemas para transferencias en lote
+class TransferenciaLoteCreate(BaseModel):
+    Transferencias: List[TransferenciaCreate] = Field(
+        ..., min_length=1, max_length=10000,
+        description="Transferencias a ejecutar, en orden"
+    )
+
+
+class ResultadoTransferenciaLote(BaseModel):
+    Indice: int = Field(..., description="Posición de la transferencia en el lote")
+    Exitosa: bool
+    IdMovimientoSalida: Optional[int] = None
+    IdMovimientoEntrada: Optional[int] = None
+    Error: Optional[str] = None
+
+
+class TransferenciaLoteResponse(BaseModel):
+    Total: int
+    Exitosas: int
+    Fallidas: int
+    Resultados: List[ResultadoTransferenciaLote]
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "Total": 2,
+                "Exitosas": 1,
+                "Fallidas": 1,
+                "Resultados": [
+                    {"Indice": 0, "Exitosa": True, "IdMovimientoSalida": 10, "IdMovimientoEntrada": 11, "Error": None},
+                    {"Indice": 1, "Exitosa": False, "IdMovimientoSalida": None, "IdMovimientoEntrada": None,
+                     "Error": "Saldo insuficiente. Disponible: 0.00, Solicitado: 100.00"}
+                ]
+            }
+        }
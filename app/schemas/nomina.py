@@ -0,0 +1,35 @@
+from pydantic import BaseModel, Field, validator
+from typing import List, Optional
+from decimal import Decimal
+
+
+class PagoNomina(BaseModel):
+    IdCuentaDestino: int = Field(..., gt=0, description="Cuenta del empleado")
+    Valor: Decimal = Field(..., gt=0, description="Valor a pagar")
+    Referencia: Optional[str] = Field(None, max_length=50, description="Identificador del empleado")
+
+
+class DispersionNominaCreate(BaseModel):
+    IdCuentaOrigen: int = Field(..., gt=0, description="Cuenta del empleador")
+    IdSucursal: int = Field(..., gt=0)
+    Descripcion: Optional[str] = Field(None, max_length=200)
+    Pagos: List[PagoNomina] = Field(..., min_length=1, max_length=20000)
+    
+    @validator('Pagos')
+    def validate_pagos(cls, v, values):
+        if 'IdCuentaOrigen' in values and any(p.IdCuentaDestino == values['IdCuentaOrigen'] for p in v):
+            raise ValueError('La cuenta origen no puede recibir pagos de su propia nómina')
+        return v
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "IdCuentaOrigen": 4,
+                "IdSucursal": 1,
+                "Descripcion": "Nómina noviembre",
+                "Pagos": [
+                    {"IdCuentaDestino": 1, "Valor": "2500000.00", "Referencia": "EMP-001"},
+                    {"IdCuentaDestino": 3, "Valor": "1800000.00", "Referencia": "EMP-002"}
+                ]
+            }
+        }
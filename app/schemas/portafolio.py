@@ -0,0 +1,45 @@
+from pydantic import BaseModel, Field
+from datetime import date
+from decimal import Decimal
+from typing import List
+
+
+class ResumenPortafolioResponse(BaseModel):
+    FechaCorte: date
+    Prestamos: int = Field(..., description="Préstamos otorgados con cuotas por vencer")
+    ValorDesembolsado: Decimal
+    SaldoCapital: Decimal = Field(..., description="Capital pendiente según el plan de cuotas")
+    InteresesPorCobrar: Decimal
+    CuotaMensual: Decimal = Field(..., description="Suma de las cuotas mensuales (con seguro)")
+    TasaPromedio: Decimal = Field(..., description="Tasa anual (%) ponderada por saldo")
+    PlazoRestantePromedio: Decimal = Field(..., description="Cuotas por vencer, ponderadas por saldo")
+
+
+class MesProyeccion(BaseModel):
+    Mes: date = Field(..., description="Primer día del mes")
+    Cuotas: int
+    Capital: Decimal
+    Interes: Decimal
+    Seguro: Decimal
+    Total: Decimal
+    SaldoFinal: Decimal = Field(..., description="Capital pendiente al terminar el mes")
+
+
+class ProyeccionPortafolioResponse(BaseModel):
+    FechaCorte: date
+    Meses: List[MesProyeccion]
+
+
+class GrupoExposicion(BaseModel):
+    Id: int = Field(..., description="IdSucursal o IdCiudad")
+    Prestamos: int
+    SaldoCapital: Decimal
+    CuotaMensual: Decimal
+    Participacion: Decimal = Field(..., description="Porcentaje del saldo de capital de la cartera")
+
+
+class ExposicionPortafolioResponse(BaseModel):
+    FechaCorte: date
+    Agrupacion: str
+    SaldoCapital: Decimal
+    Grupos: List[GrupoExposicion]
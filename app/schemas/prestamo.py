@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from typing import Annotated, List, Literal, Optional
 from decimal import Decimal
 from datetime import date
 
@@ -79,4 +79,73 @@ class CalculoCuotaResponse(BaseModel):
                 "TotalAPagar": "12090492.00",
                 "TotalIntereses": "2090492.00"
             }
-        }
\ No newline at end of file
+        }
+
+
+class CalculoAmortizacion(CalculoCuota):
+    Plazo: int = Field(..., gt=0, le=360, description="Plazo en meses (máximo 360)")
+
+
+class CuotaAmortizacion(BaseModel):
+    Periodo: int
+    Cuota: Decimal = Field(..., description="Interés + capital")
+    Interes: Decimal
+    Capital: Decimal
+    Seguro: Decimal
+    CuotaTotal: Decimal = Field(..., description="Cuota + seguro")
+    Saldo: Decimal = Field(..., description="Capital pendiente después del pago")
+
+
+class TablaAmortizacionResponse(BaseModel):
+    Valor: Decimal
+    Interes: Decimal
+    Plazo: int
+    Seguro: Decimal
+    Cuota: Decimal = Field(..., description="Cuota fija (interés + capital); la última se ajusta")
+    CuotaTotal: Decimal = Field(..., description="Cuota fija más seguro")
+    TotalIntereses: Decimal
+    TotalSeguro: Decimal
+    TotalAPagar: Decimal
+    Cuotas: List[CuotaAmortizacion]
+
+
+class CotizacionLote(BaseModel):
+    """
+    Escenarios de cuota. En modo "vectores" el escenario k toma el k-ésimo valor
+    de cada lista (una lista de un solo elemento se repite en todos); en modo
+    "grilla" se cotiza cada combinación de las listas.
+    """
+    Modo: Literal["vectores", "grilla"] = "vectores"
+    Valor: List[Annotated[Decimal, Field(gt=0)]] = Field(..., min_length=1, description="Montos del préstamo")
+    Interes: List[Annotated[Decimal, Field(ge=0, le=100)]] = Field(..., min_length=1, description="Tasas anuales (%)")
+    Plazo: List[Annotated[int, Field(gt=0)]] = Field(..., min_length=1, description="Plazos en meses")
+    Seguro: List[Annotated[Decimal, Field(ge=0)]] = Field(default=[Decimal("0.00")], min_length=1)
+
+
+class CotizacionLoteResponse(BaseModel):
+    """Una columna por campo; la posición k de cada columna es el escenario k"""
+    Escenarios: int
+    Dimensiones: Optional[List[int]] = Field(
+        None, description="En modo grilla, tamaños (Valor, Interes, Plazo, Seguro); el último varía más rápido"
+    )
+    Valor: List[float]
+    Interes: List[float]
+    Plazo: List[int]
+    Seguro: List[float]
+    CuotaMensual: List[float]
+    TotalAPagar: List[float]
+    TotalIntereses: List[float]
+
+
+class CuotaPrestamoResponse(BaseModel):
+    NumeroCuota: int
+    FechaVencimiento: date
+    Capital: Decimal
+    Interes: Decimal
+    Seguro: Decimal
+    Valor: Decimal = Field(..., description="Capital + interés + seguro")
+    Estado: str = Field(..., description="PENDIENTE, PAGADA o MORA")
+    FechaPago: Optional[date] = None
+    
+    class Config:
+        from_attributes = True
@@ -1,5 +1,7 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional
 
 
 class SucursalBase(BaseModel):
@@ -39,4 +41,26 @@ class SucursalResponse(SucursalBase):
                 "Telefono": "601-3456789",
                 "Horario": "Lunes a Viernes 8:00-17:00"
             }
-        }
\ No newline at end of file
+        }
+
+
+class ResumenDiaSucursal(BaseModel):
+    Fecha: date
+    IdTipoMovimiento: int
+    Cantidad: int
+    Total: Decimal
+
+
+class TotalTipoSucursal(BaseModel):
+    IdTipoMovimiento: int
+    Cantidad: int
+    Total: Decimal
+
+
+class ResumenSucursalResponse(BaseModel):
+    """Movimientos de la sucursal por día y tipo, leídos del resumen diario"""
+    IdSucursal: int
+    Desde: date
+    Hasta: date
+    Dias: List[ResumenDiaSucursal]
+    TotalesPorTipo: List[TotalTipoSucursal]
@@ -0,0 +1,92 @@
+"""
+Tabla de amortización francesa (cuota fija) exacta al centavo.
+
+La cuota es la de `app.utils.cuota` (la misma de /calcular-cuota) y la tabla
+es la recursión de un plan real, en centavos enteros de Python: el interés de
+cada periodo es el saldo anterior por la tasa mensual redondeado al centavo
+(mitad hacia arriba, con aritmética entera sobre la tasa como fracción), el
+abono a capital es la cuota menos ese interés y el saldo baja en el abono. La cuota que deja el saldo en cero (la última, o
+antes si con préstamos muy pequeños la cuota termina el capital antes del
+plazo) abona lo pendiente más su interés.
+
+La recursión es secuencial; NumPy se usa solo donde sigue siendo exacto: las
+columnas derivadas y los totales, en centavos int64.
+
+Las tablas se guardan en caché por (Valor, Interes, Plazo, Seguro).
+"""
+
+from decimal import Decimal
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+
+from app.utils.cuota import calcular_cuota_exacta
+
+TABLAS_EN_CACHE = 1024
+
+
+def _a_decimal(centavos) -> Decimal:
+    return Decimal(int(centavos)).scaleb(-2)
+
+
+def _decimales(centavos: np.ndarray) -> List[Decimal]:
+    return [Decimal(c).scaleb(-2) for c in centavos.tolist()]
+
+
+def plan_en_centavos(valor: int, interes: Decimal, plazo: int) -> Tuple[int, List[int], List[int], List[int]]:
+    """
+    Cuota (sin seguro), intereses, abonos a capital y saldo después de cada
+    periodo, en centavos. `interes` es la tasa anual en %.
+    """
+    cuota = int(calcular_cuota_exacta(_a_decimal(valor), interes, plazo).CuotaMensual.scaleb(2))
+    # Interés del periodo = saldo * numerador / (denominador * 1200), redondeado mitad hacia arriba
+    numerador, denominador = interes.as_integer_ratio()
+    divisor = denominador * 1200
+    intereses, capital, saldos = [], [], []
+    saldo = valor
+    for periodo in range(1, plazo + 1):
+        interes_periodo = (2 * saldo * numerador + divisor) // (2 * divisor)
+        abono = cuota - interes_periodo
+        if periodo == plazo or abono >= saldo:
+            abono = saldo
+        saldo -= abono
+        intereses.append(interes_periodo)
+        capital.append(abono)
+        saldos.append(saldo)
+    return cuota, intereses, capital, saldos
+
+
+@lru_cache(maxsize=TABLAS_EN_CACHE)
+def tabla_amortizacion(valor: Decimal, interes: Decimal, plazo: int, seguro: Decimal) -> dict:
+    """Tabla completa y totales para un préstamo de `valor` a `interes` % anual en `plazo` meses"""
+    valor_centavos = int(valor * 100)
+    seguro_centavos = int(seguro * 100)
+    cuota, *columnas = plan_en_centavos(valor_centavos, interes, plazo)
+    intereses, capital, saldos = (np.array(columna, dtype=np.int64) for columna in columnas)
+    cuotas = capital + intereses
+    totales = cuotas + seguro_centavos
+
+    filas = zip(
+        range(1, plazo + 1), _decimales(cuotas), _decimales(intereses), _decimales(capital),
+        _decimales(totales), _decimales(saldos)
+    )
+    seguro_decimal = _a_decimal(seguro_centavos)
+    return {
+        "Valor": _a_decimal(valor_centavos),
+        "Interes": interes,
+        "Plazo": plazo,
+        "Seguro": seguro_decimal,
+        "Cuota": _a_decimal(cuota),
+        "CuotaTotal": _a_decimal(cuota + seguro_centavos),
+        "TotalIntereses": _a_decimal(intereses.sum()),
+        "TotalSeguro": _a_decimal(seguro_centavos * plazo),
+        "TotalAPagar": _a_decimal(totales.sum()),
+        "Cuotas": [
+            {
+                "Periodo": periodo, "Cuota": cuota_periodo, "Interes": interes_periodo, "Capital": abono,
+                "Seguro": seguro_decimal, "CuotaTotal": total, "Saldo": saldo
+            }
+            for periodo, cuota_periodo, interes_periodo, abono, total, saldo in filas
+        ],
+    }
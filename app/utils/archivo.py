@@ -0,0 +1,270 @@
+"""
+Archivo frío de movimientos en archivos mensuales comprimidos.
+
+Cada mes archivado ocupa dos archivos en ARCHIVO_MOVIMIENTOS_DIR:
+
+- `movimientos_AAAAMM.ndjson.gz`: los movimientos del mes, un objeto JSON por
+  línea, ordenados por (IdCuenta, Fecha, IdMovimiento) y comprimidos en
+  bloques. Cada bloque es un miembro gzip independiente (la concatenación
+  sigue siendo un gzip válido, legible con zcat).
+- `movimientos_AAAAMM.idx.json`: índice disperso con una entrada por bloque:
+  primera y última cuenta, desplazamiento, longitud y número de filas.
+
+Para leer los movimientos de una cuenta se buscan en el índice los bloques que
+la contienen y solo esos bytes se descomprimen, leyéndolos del archivo mapeado
+en memoria (mmap).
+"""
+
+import bisect
+import gzip
+import json
+import mmap
+import os
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from app.utils.particiones import sumar_meses
+
+ARCHIVO_MOVIMIENTOS_DIR = os.getenv("ARCHIVO_MOVIMIENTOS_DIR", "archivo/movimientos")
+ARCHIVO_MESES_RETENCION = int(os.getenv("ARCHIVO_MESES_RETENCION", "24"))
+
+FILAS_POR_BLOQUE = 2000
+
+COLUMNAS = ["IdMovimiento", "IdCuenta", "IdSucursal", "Fecha", "Valor", "IdTipoMovimiento", "Descripcion"]
+
+
+@dataclass
+class MovimientoArchivado:
+    IdMovimiento: int
+    IdCuenta: int
+    IdSucursal: int
+    Fecha: date
+    Valor: Decimal
+    IdTipoMovimiento: int
+    Descripcion: Optional[str]
+
+    @classmethod
+    def desde_json(cls, linea: bytes) -> "MovimientoArchivado":
+        datos = json.loads(linea)
+        datos["Fecha"] = date.fromisoformat(datos["Fecha"])
+        datos["Valor"] = Decimal(datos["Valor"])
+        return cls(**datos)
+
+
+def _nombre_base(mes: date) -> str:
+    return f"movimientos_{mes.year:04d}{mes.month:02d}"
+
+
+def _a_json(fila) -> str:
+    return json.dumps({
+        "IdMovimiento": fila.IdMovimiento,
+        "IdCuenta": fila.IdCuenta,
+        "IdSucursal": fila.IdSucursal,
+        "Fecha": fila.Fecha.isoformat(),
+        "Valor": str(fila.Valor),
+        "IdTipoMovimiento": fila.IdTipoMovimiento,
+        "Descripcion": fila.Descripcion,
+    }, ensure_ascii=False)
+
+
+class EscritorMes:
+    """
+    Escritura de un mes archivado a partir de filas ordenadas por (IdCuenta, Fecha, IdMovimiento).
+
+    Los archivos se escriben con un nombre temporal y se renombran al cerrar,
+    de modo que un lector nunca ve un mes a medio escribir.
+    """
+
+    def __init__(self, directorio: str, mes: date, filas_por_bloque: int = FILAS_POR_BLOQUE):
+        os.makedirs(directorio, exist_ok=True)
+        base = os.path.join(directorio, _nombre_base(mes))
+        self.ruta_datos = base + ".ndjson.gz"
+        self.ruta_indice = base + ".idx.json"
+        self.mes = mes
+        self.filas_por_bloque = filas_por_bloque
+        self._archivo = open(self.ruta_datos + ".tmp", "wb")
+        self._bloques: List[list] = []
+        self._pendientes: List[str] = []
+        self._primera_cuenta = None
+        self._ultima_cuenta = None
+        self.filas = 0
+
+    def escribir(self, fila) -> None:
+        if self._primera_cuenta is None:
+            self._primera_cuenta = fila.IdCuenta
+        self._ultima_cuenta = fila.IdCuenta
+        self._pendientes.append(_a_json(fila))
+        self.filas += 1
+        if len(self._pendientes) >= self.filas_por_bloque:
+            self._cerrar_bloque()
+
+    def _cerrar_bloque(self) -> None:
+        if not self._pendientes:
+            return
+        comprimido = gzip.compress(("\n".join(self._pendientes) + "\n").encode("utf-8"), mtime=0)
+        desplazamiento = self._archivo.tell()
+        self._archivo.write(comprimido)
+        self._bloques.append([
+            self._primera_cuenta, self._ultima_cuenta, desplazamiento, len(comprimido), len(self._pendientes)
+        ])
+        self._pendientes = []
+        self._primera_cuenta = None
+
+    def cerrar(self) -> None:
+        self._cerrar_bloque()
+        self._archivo.flush()
+        os.fsync(self._archivo.fileno())
+        self._archivo.close()
+        indice = {
+            "Mes": self.mes.isoformat(),
+            "Filas": self.filas,
+            "Columnas": COLUMNAS,
+            "Bloques": self._bloques,
+        }
+        with open(self.ruta_indice + ".tmp", "w", encoding="utf-8") as archivo:
+            json.dump(indice, archivo)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        # Primero los datos: el mes existe para los lectores cuando aparece el índice
+        os.replace(self.ruta_datos + ".tmp", self.ruta_datos)
+        os.replace(self.ruta_indice + ".tmp", self.ruta_indice)
+
+    def descartar(self) -> None:
+        self._archivo.close()
+        for ruta in (self.ruta_datos + ".tmp", self.ruta_indice + ".tmp"):
+            if os.path.exists(ruta):
+                os.remove(ruta)
+
+
+class ArchivoMovimientos:
+    """Lectura de los meses archivados en un directorio"""
+
+    def __init__(self, directorio: str = ARCHIVO_MOVIMIENTOS_DIR):
+        self.directorio = directorio
+        self._indices: Dict[date, dict] = {}
+        self._firma = None
+
+    def _cargar_indices(self) -> Dict[date, dict]:
+        """Índices de los meses archivados; se releen solo si el directorio cambió"""
+        try:
+            estado = os.stat(self.directorio)
+        except FileNotFoundError:
+            self._indices, self._firma = {}, None
+            return self._indices
+        firma = (self.directorio, estado.st_mtime_ns)
+        if firma != self._firma:
+            indices = {}
+            for nombre in os.listdir(self.directorio):
+                if nombre.startswith("movimientos_") and nombre.endswith(".idx.json"):
+                    with open(os.path.join(self.directorio, nombre), encoding="utf-8") as archivo:
+                        indice = json.load(archivo)
+                    indice["Ultimas"] = [bloque[1] for bloque in indice["Bloques"]]
+                    indices[date.fromisoformat(indice["Mes"])] = indice
+            self._indices, self._firma = indices, firma
+        return self._indices
+
+    def meses(self) -> List[date]:
+        return sorted(self._cargar_indices())
+
+    def fecha_corte(self) -> Optional[date]:
+        """Primer día posterior al último mes archivado (None si no hay archivo)"""
+        meses = self.meses()
+        if not meses:
+            return None
+        return sumar_meses(meses[-1], 1)
+
+    def filas_mes(self, mes: date) -> Iterator[MovimientoArchivado]:
+        """Todas las filas de un mes archivado, en el orden del archivo"""
+        ruta = os.path.join(self.directorio, _nombre_base(mes) + ".ndjson.gz")
+        if not os.path.exists(ruta):
+            return
+        with gzip.open(ruta, "rb") as archivo:
+            for linea in archivo:
+                yield MovimientoArchivado.desde_json(linea)
+
+    def _leer_mes(self, mes: date, indice: dict, cuenta_id: int) -> List[MovimientoArchivado]:
+        """Movimientos de la cuenta en un mes, leyendo solo los bloques que la contienen"""
+        bloques = indice["Bloques"]
+        inicio = bisect.bisect_left(indice["Ultimas"], cuenta_id)
+        candidatos = []
+        for bloque in bloques[inicio:]:
+            if bloque[0] > cuenta_id:
+                break
+            candidatos.append(bloque)
+        if not candidatos:
+            return []
+
+        filas = []
+        ruta = os.path.join(self.directorio, _nombre_base(mes) + ".ndjson.gz")
+        with open(ruta, "rb") as archivo, mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            for _, _, desplazamiento, longitud, _ in candidatos:
+                contenido = gzip.decompress(mapa[desplazamiento:desplazamiento + longitud])
+                marca = f'"IdCuenta": {cuenta_id},'.encode()
+                for linea in contenido.splitlines():
+                    # Filtro barato antes de decodificar: el bloque puede tener otras cuentas
+                    if marca in linea:
+                        fila = MovimientoArchivado.desde_json(linea)
+                        if fila.IdCuenta == cuenta_id:
+                            filas.append(fila)
+        return filas
+
+    def movimientos_cuenta(
+        self,
+        cuenta_id: int,
+        desde: Optional[date] = None,
+        hasta: Optional[date] = None,
+        descendente: bool = False
+    ) -> Iterator[MovimientoArchivado]:
+        """Movimientos archivados de la cuenta en orden de (Fecha, IdMovimiento)"""
+        indices = self._cargar_indices()
+        meses = sorted(indices, reverse=descendente)
+        for mes in meses:
+            if desde is not None and mes < desde.replace(day=1):
+                continue
+            if hasta is not None and mes > hasta:
+                continue
+            filas = [
+                f for f in self._leer_mes(mes, indices[mes], cuenta_id)
+                if (desde is None or f.Fecha >= desde) and (hasta is None or f.Fecha <= hasta)
+            ]
+            filas.sort(key=lambda f: (f.Fecha, f.IdMovimiento), reverse=descendente)
+            yield from filas
+
+    def sumar_cuenta(self, cuenta_id: int, desde: Optional[date] = None, hasta: Optional[date] = None) -> Decimal:
+        """Suma de los movimientos archivados de la cuenta en el rango"""
+        return sum((f.Valor for f in self.movimientos_cuenta(cuenta_id, desde, hasta)), Decimal("0"))
+
+    def sumas_por_cuenta(self, primera: int, ultima: int) -> Dict[int, Decimal]:
+        """Suma de todos los movimientos archivados de las cuentas entre `primera` y `ultima`"""
+        sumas: Dict[int, Decimal] = {}
+        for mes, indice in sorted(self._cargar_indices().items()):
+            bloques = indice["Bloques"][bisect.bisect_left(indice["Ultimas"], primera):]
+            bloques = [b for b in bloques if b[0] <= ultima]
+            if not bloques:
+                continue
+            ruta = os.path.join(self.directorio, _nombre_base(mes) + ".ndjson.gz")
+            with open(ruta, "rb") as archivo, mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                for _, _, desplazamiento, longitud, _ in bloques:
+                    for linea in gzip.decompress(mapa[desplazamiento:desplazamiento + longitud]).splitlines():
+                        fila = json.loads(linea)
+                        if primera <= fila["IdCuenta"] <= ultima:
+                            sumas[fila["IdCuenta"]] = sumas.get(fila["IdCuenta"], Decimal("0")) + Decimal(fila["Valor"])
+        return sumas
+
+
+def escribir_mes(directorio: str, mes: date, filas: Iterable, filas_por_bloque: int = FILAS_POR_BLOQUE) -> int:
+    """Archivar las filas de un mes (ordenadas por IdCuenta, Fecha, IdMovimiento); retorna cuántas se escribieron"""
+    escritor = EscritorMes(directorio, mes, filas_por_bloque)
+    try:
+        for fila in filas:
+            escritor.escribir(fila)
+        escritor.cerrar()
+    except BaseException:
+        escritor.descartar()
+        raise
+    return escritor.filas
+
+
+archivo_movimientos = ArchivoMovimientos()
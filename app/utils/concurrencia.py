@@ -0,0 +1,38 @@
+"""
+Esperas compatibles con los dos modos de acceso a la base de datos.
+
+En modo asíncrono el código de crud se ejecuta dentro de
+`AsyncSession.run_sync`, en un greenlet sobre el event loop: un `time.sleep`
+ahí bloquearía todas las solicitudes. Estas funciones ceden el control al
+event loop en ese caso y usan las esperas bloqueantes normales en el modo
+síncrono (threadpool).
+"""
+
+import asyncio
+import threading
+import time
+
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+
+INTERVALO_SONDEO_EVENTO = 0.005  # Segundos entre revisiones de un evento en modo asíncrono
+
+
+def dormir(segundos: float) -> None:
+    """Pausar la ejecución sin bloquear el event loop"""
+    if in_greenlet():
+        await_only(asyncio.sleep(segundos))
+    else:
+        time.sleep(segundos)
+
+
+def esperar_evento(evento: threading.Event, timeout: float) -> bool:
+    """Esperar a que el evento se active; retorna False si vence el timeout"""
+    if not in_greenlet():
+        return evento.wait(timeout)
+    limite = time.monotonic() + timeout
+    while not evento.is_set():
+        restante = limite - time.monotonic()
+        if restante <= 0:
+            return False
+        await_only(asyncio.sleep(min(INTERVALO_SONDEO_EVENTO, restante)))
+    return True
@@ -0,0 +1,79 @@
+"""
+Cuota de amortización francesa en aritmética decimal exacta.
+
+    Cuota = P * i * (1 + i)^n / ((1 + i)^n - 1),  i = tasa anual / 12 / 100
+
+Se evalúa con Decimal en un contexto propio de PRECISION dígitos (activo solo
+durante el cálculo; no depende del contexto del hilo) y la potencia la calcula
+libmpdec por cuadrados sucesivos, así que el resultado no arrastra el error
+de punto flotante en plazos largos ni montos grandes. Los valores se
+redondean al centavo, mitad hacia arriba.
+
+Sin caché, el cálculo debe costar lo mismo que la fórmula en punto flotante
+(benchmarks/bench_cuota.py): los operadores de Decimal son más baratos que los
+métodos de Context, las constantes ya son Decimal y la potencia es una sola
+llamada, más rápida con 28 dígitos que con más.
+
+Los resultados se memorizan en un LRU acotado (CUOTAS_EN_CACHE). Los Decimal
+iguales comparten llave aunque cambie su exponente: 12.5 y 12.50 son la misma
+entrada.
+"""
+
+import os
+from decimal import ROUND_HALF_UP, Context, Decimal, localcontext
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+CUOTAS_EN_CACHE = int(os.getenv("CUOTAS_EN_CACHE", "4096"))
+# Con montos de hasta 15 cifras enteras quedan más de 10 dígitos de guarda
+PRECISION = 28
+
+CENTAVO = Decimal("0.01")
+_CONTEXTO = Context(prec=PRECISION, rounding=ROUND_HALF_UP)
+_UNO = Decimal(1)
+_MESES_POR_CIEN = Decimal(1200)
+
+
+class Cuota(NamedTuple):
+    CuotaMensual: Decimal
+    TotalAPagar: Decimal
+    TotalIntereses: Decimal
+
+
+def potencia(base: Decimal, exponente: int, contexto: Context = _CONTEXTO) -> Decimal:
+    """base ** exponente (entero no negativo) en el contexto, por cuadrados sucesivos de libmpdec"""
+    return contexto.power(base, exponente)
+
+
+@lru_cache(maxsize=CUOTAS_EN_CACHE)
+def _cuota(valor: Decimal, interes: Decimal, plazo: int, seguro: Decimal) -> Cuota:
+    with localcontext(_CONTEXTO):
+        n = Decimal(plazo)
+        if interes == 0:
+            cuota_capital = valor / n
+        else:
+            i = interes / _MESES_POR_CIEN
+            factor = (_UNO + i) ** n
+            cuota_capital = valor * i * factor / (factor - _UNO)
+        cuota_mensual = cuota_capital + seguro
+        total_a_pagar = cuota_mensual * n
+        return Cuota(
+            cuota_mensual.quantize(CENTAVO),
+            total_a_pagar.quantize(CENTAVO),
+            (total_a_pagar - valor).quantize(CENTAVO),
+        )
+
+
+def calcular_cuota_exacta(valor, interes, plazo: int, seguro: Optional[Decimal] = None) -> Cuota:
+    """Cuota mensual (con seguro), total a pagar y total de intereses, al centavo"""
+    return _cuota(Decimal(valor), Decimal(interes), int(plazo), Decimal(seguro or 0))
+
+
+def estadisticas_cache() -> dict:
+    """Aciertos y fallos del LRU de cuotas en este proceso"""
+    info = _cuota.cache_info()
+    return {"Aciertos": info.hits, "Fallos": info.misses, "Tamano": info.currsize, "Capacidad": info.maxsize}
+
+
+def limpiar_cache() -> None:
+    _cuota.cache_clear()
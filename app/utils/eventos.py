@@ -0,0 +1,146 @@
+"""
+Distribución en memoria de los eventos de cuenta a los suscriptores.
+
+Las operaciones escriben sus movimientos en la bandeja evento_cuenta en la
+misma transacción. Un relevo en cada proceso de la API la lee cada
+EVENTOS_INTERVALO segundos (o antes, si una operación del mismo proceso
+avisa que confirmó) y entrega cada evento a las suscripciones de su cuenta.
+
+Cada suscripción tiene una cola acotada (EVENTOS_COLA). Si un consumidor
+lento la llena, se vacía y se cierra; el cliente se reconecta con el último
+ID recibido (Last-Event-ID) y recupera lo pendiente desde la bandeja.
+
+Los IDs de evento se asignan al insertar y se confirman en otro orden entre
+cuentas distintas, así que el relevo recuerda durante EVENTOS_ESPERA_HUECOS
+segundos los IDs saltados para leerlos si se confirman después. Dentro de
+una cuenta el orden se conserva mientras sus operaciones se serializan con
+el bloqueo de la fila de cuenta; los créditos de una cuenta fragmentada no la
+bloquean, así que los suscriptores descartan los eventos ya enviados y no los
+de ID menor que el último.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+EVENTOS_INTERVALO = float(os.getenv("EVENTOS_INTERVALO", "1.0"))
+EVENTOS_COLA = int(os.getenv("EVENTOS_COLA", "256"))
+EVENTOS_PING = float(os.getenv("EVENTOS_PING", "15"))
+EVENTOS_ESPERA_HUECOS = 10.0
+# Eventos pendientes que se reenvían al reanudar; con más, el cliente debe recargar
+EVENTOS_MAX_REPETICION = 1000
+
+
+class Suscripcion:
+    """Cola de eventos de una cuenta para un cliente conectado"""
+
+    def __init__(self, cuenta_id: int, tamano_cola: int = EVENTOS_COLA):
+        self.cuenta_id = cuenta_id
+        self.loop = asyncio.get_running_loop()
+        self.cola: "asyncio.Queue[Optional[dict]]" = asyncio.Queue(maxsize=tamano_cola)
+        self.desbordada = False
+
+    def _entregar(self, evento: dict) -> None:
+        if self.desbordada:
+            return
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Consumidor lento: descartar lo encolado y dejar solo la señal de cierre
+            self.desbordada = True
+            while not self.cola.empty():
+                self.cola.get_nowait()
+            self.cola.put_nowait(None)
+
+    async def recibir(self, espera: float) -> Optional[dict]:
+        """
+        Siguiente evento, o None si la suscripción se desbordó. Lanza
+        asyncio.TimeoutError si no llega ninguno en `espera` segundos.
+        """
+        return await asyncio.wait_for(self.cola.get(), espera)
+
+
+class CentroEventos:
+    """Suscripciones por cuenta; `publicar` y `avisar` se pueden llamar desde cualquier hilo"""
+
+    def __init__(self, tamano_cola: int = EVENTOS_COLA):
+        self.tamano_cola = tamano_cola
+        self._lock = threading.Lock()
+        self._suscripciones: Dict[int, Set[Suscripcion]] = {}
+        self._aviso: Optional[asyncio.Event] = None
+        self._loop_aviso: Optional[asyncio.AbstractEventLoop] = None
+
+    def suscribir(self, cuenta_id: int) -> Suscripcion:
+        suscripcion = Suscripcion(cuenta_id, self.tamano_cola)
+        with self._lock:
+            self._suscripciones.setdefault(cuenta_id, set()).add(suscripcion)
+        return suscripcion
+
+    def cancelar(self, suscripcion: Suscripcion) -> None:
+        with self._lock:
+            suscripciones = self._suscripciones.get(suscripcion.cuenta_id)
+            if suscripciones is not None:
+                suscripciones.discard(suscripcion)
+                if not suscripciones:
+                    del self._suscripciones[suscripcion.cuenta_id]
+
+    def publicar(self, eventos: Iterable[dict]) -> None:
+        try:
+            actual = asyncio.get_running_loop()
+        except RuntimeError:
+            actual = None
+        for evento in eventos:
+            with self._lock:
+                suscripciones = list(self._suscripciones.get(evento["IdCuenta"], ()))
+            for suscripcion in suscripciones:
+                if suscripcion.loop is actual:
+                    suscripcion._entregar(evento)
+                else:
+                    suscripcion.loop.call_soon_threadsafe(suscripcion._entregar, evento)
+
+    def avisar(self) -> None:
+        """Adelantar la próxima lectura de la bandeja (una operación acaba de confirmar eventos)"""
+        if self._aviso is not None and self._suscripciones:
+            self._loop_aviso.call_soon_threadsafe(self._aviso.set)
+
+    async def esperar_aviso(self, espera: float) -> None:
+        if self._aviso is None:
+            self._aviso, self._loop_aviso = asyncio.Event(), asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(self._aviso.wait(), espera)
+        except asyncio.TimeoutError:
+            pass
+        self._aviso.clear()
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self._suscripciones.values())
+
+
+class CursorEventos:
+    """Posición del relevo en evento_cuenta y los IDs saltados que aún pueden confirmarse"""
+
+    def __init__(self, espera_huecos: float = EVENTOS_ESPERA_HUECOS):
+        self.espera_huecos = espera_huecos
+        self.ultimo: Optional[int] = None
+        self.huecos: Dict[int, float] = {}
+
+    def avanzar(self, ids: List[int], ahora: Optional[float] = None) -> None:
+        ahora = time.monotonic() if ahora is None else ahora
+        for id_evento in ids:
+            self.huecos.pop(id_evento, None)
+        esperado = self.ultimo + 1
+        for id_evento in sorted(i for i in ids if i > self.ultimo):
+            for hueco in range(esperado, id_evento):
+                self.huecos[hueco] = ahora
+            esperado = id_evento + 1
+        self.ultimo = max(self.ultimo, esperado - 1)
+        self.huecos = {h: t for h, t in self.huecos.items() if ahora - t < self.espera_huecos}
+
+    def reiniciar(self) -> None:
+        self.ultimo = None
+        self.huecos = {}
+
+
+centro_eventos = CentroEventos()
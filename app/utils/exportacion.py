@@ -0,0 +1,146 @@
+"""
+Exportación en streaming de resultados grandes (CSV / NDJSON, opcionalmente gzip).
+
+Las filas se leen con un cursor del lado del servidor (`yield_per`, que activa
+`stream_results`) y se escriben a la respuesta por lotes, de modo que la
+memoria usada depende del tamaño del lote y no del número de filas. Las filas
+son tuplas de columnas: no se construyen objetos ORM ni modelos Pydantic.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, List, Optional, Sequence
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import iterate_in_threadpool
+
+from app.database import SesionBD
+
+TAMANO_LOTE_EXPORTACION = 1000  # Filas por lectura del cursor y por trozo de la respuesta
+
+TIPOS_CONTENIDO = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+async def iterar_lotes(db: SesionBD, consulta: Select, lote: Optional[int] = None) -> AsyncIterator[List[Any]]:
+    """Filas de la consulta en lotes, leídas con un cursor del lado del servidor"""
+    consulta = consulta.execution_options(yield_per=lote or TAMANO_LOTE_EXPORTACION)
+    if isinstance(db, AsyncSession):
+        resultado = await db.stream(consulta)
+        async for particion in resultado.partitions():
+            yield particion
+        return
+    # Sesión síncrona: cada lectura del cursor se hace en el threadpool
+    particiones = db.execute(consulta).partitions()
+    async for particion in iterate_in_threadpool(particiones):
+        yield particion
+
+
+async def anteponer_lote(filas: List[Any], lotes: AsyncIterator[List[Any]]) -> AsyncIterator[List[Any]]:
+    """Entregar `filas` como primer lote (si hay) y después los lotes de `lotes`"""
+    if filas:
+        yield filas
+    async for lote in lotes:
+        yield lote
+
+
+def _valor_json(valor: Any) -> Any:
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+async def formatear_csv(columnas: Sequence[str], lotes: AsyncIterator[List[Any]]) -> AsyncIterator[bytes]:
+    """Encabezado y un trozo de CSV por lote"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+    escritor.writerow(columnas)
+    yield buffer.getvalue().encode("utf-8")
+    async for filas in lotes:
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerows(filas)
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def formatear_ndjson(columnas: Sequence[str], lotes: AsyncIterator[List[Any]]) -> AsyncIterator[bytes]:
+    """Un objeto JSON por línea, un trozo por lote"""
+    async for filas in lotes:
+        yield "".join(
+            json.dumps({c: _valor_json(v) for c, v in zip(columnas, fila)}, ensure_ascii=False) + "\n"
+            for fila in filas
+        ).encode("utf-8")
+
+
+async def comprimir_gzip(trozos: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Comprimir los trozos como un único archivo gzip sin acumularlos en memoria"""
+    compresor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    async for trozo in trozos:
+        comprimido = compresor.compress(trozo)
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
+
+
+async def formatear_extracto(
+    cabecera: dict,
+    saldo_apertura: Decimal,
+    lotes: AsyncIterator[List[Any]],
+    con_suma_acumulada: bool
+) -> AsyncIterator[bytes]:
+    """
+    Documento JSON del extracto escrito a medida que llegan los movimientos.
+
+    En una sola pasada agrega el saldo a cada movimiento (a partir de la suma
+    acumulada de la consulta o, sin ella, acumulando aquí), los totales por
+    tipo de movimiento y el saldo de cierre, que van al final del documento.
+    """
+    encabezado = {**cabecera, "SaldoApertura": saldo_apertura}
+    yield (json.dumps({c: _valor_json(v) for c, v in encabezado.items()}, ensure_ascii=False)[:-1]
+           + ',"Movimientos":[').encode("utf-8")
+
+    saldo = saldo_apertura
+    totales = {}
+    primero = True
+    async for filas in lotes:
+        partes = []
+        for fila in filas:
+            saldo = saldo_apertura + fila.SumaAcumulada if con_suma_acumulada else saldo + fila.Valor
+            total = totales.setdefault(fila.IdTipoMovimiento, {
+                "IdTipoMovimiento": fila.IdTipoMovimiento,
+                "TipoMovimiento": fila.TipoMovimiento,
+                "Cantidad": 0,
+                "Total": Decimal("0"),
+            })
+            total["Cantidad"] += 1
+            total["Total"] += fila.Valor
+            movimiento = {
+                "IdMovimiento": fila.IdMovimiento,
+                "Fecha": _valor_json(fila.Fecha),
+                "IdTipoMovimiento": fila.IdTipoMovimiento,
+                "TipoMovimiento": fila.TipoMovimiento,
+                "Descripcion": fila.Descripcion,
+                "Valor": _valor_json(fila.Valor),
+                "Saldo": _valor_json(saldo),
+            }
+            partes.append(("" if primero else ",") + json.dumps(movimiento, ensure_ascii=False))
+            primero = False
+        if partes:
+            yield "".join(partes).encode("utf-8")
+
+    cierre = {
+        "TotalesPorTipo": [
+            {**t, "Total": _valor_json(t["Total"])} for _, t in sorted(totales.items())
+        ],
+        "SaldoCierre": _valor_json(saldo),
+    }
+    yield ("]," + json.dumps(cierre, ensure_ascii=False)[1:]).encode("utf-8")
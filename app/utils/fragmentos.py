@@ -0,0 +1,61 @@
+"""
+Registro en memoria de las cuentas con saldo fragmentado.
+
+Una cuenta fragmentada reparte sus créditos entre N filas de saldo_fragmento,
+elegidas al azar, para que los depósitos concurrentes no esperen el bloqueo
+de cuenta.Saldo. Consultar el registro evita leer la tabla en cada
+operación; la API lo carga al iniciar y lo recarga cada FRAGMENTOS_REFRESCO
+segundos (con 0 no lo carga: solo cambia con las activaciones hechas en el
+mismo proceso).
+
+Un registro desactualizado no afecta el saldo: un crédito aplicado a
+cuenta.Saldo en lugar de a un fragmento suma igual, y los débitos de una
+cuenta que el proceso aún no sabe fragmentada pasan a los fragmentos cuando
+cuenta.Saldo no los cubre.
+"""
+
+import os
+import random
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+FRAGMENTOS_REFRESCO = float(os.getenv("FRAGMENTOS_REFRESCO", "30"))
+MAX_FRAGMENTOS = 64
+
+
+class CuentasFragmentadas:
+    """Cantidad de fragmentos por cuenta fragmentada"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fragmentos: Dict[int, int] = {}
+
+    def fragmento_aleatorio(self, cuenta_id: int) -> Optional[int]:
+        """Fragmento para un crédito, o None si la cuenta no está fragmentada"""
+        fragmentos = self._fragmentos.get(cuenta_id)
+        return None if not fragmentos else random.randrange(fragmentos)
+
+    def fragmentada(self, cuenta_id: int) -> bool:
+        return cuenta_id in self._fragmentos
+
+    def actualizar(self, cuenta_id: int, fragmentos: int) -> None:
+        with self._lock:
+            if fragmentos:
+                self._fragmentos[cuenta_id] = fragmentos
+            else:
+                self._fragmentos.pop(cuenta_id, None)
+
+    def reemplazar(self, filas: Iterable[Tuple[int, int]]) -> None:
+        """Adoptar el contenido de saldo_fragmento (cuenta, cantidad de fragmentos)"""
+        fragmentos = dict(filas)
+        with self._lock:
+            self._fragmentos = fragmentos
+
+    def __iter__(self):
+        return iter(list(self._fragmentos))
+
+    def __len__(self) -> int:
+        return len(self._fragmentos)
+
+
+cuentas_fragmentadas = CuentasFragmentadas()
@@ -0,0 +1,224 @@
+"""
+Claves de idempotencia para las operaciones que mueven dinero.
+
+La primera solicitud con una clave ejecuta la operación y su respuesta queda
+almacenada en la tabla `idempotencia`; las repeticiones reciben la respuesta
+guardada sin volver a tocar las cuentas. Un LRU en memoria evita la consulta a
+la base de datos para las claves recientes y las solicitudes duplicadas que
+llegan mientras la primera se ejecuta esperan su resultado en lugar de
+competir con ella.
+
+La operación confirma sus cambios y la respuesta se guarda después, en otra
+transacción. Si algo falla entre ambas (por ejemplo al serializar la
+respuesta), la clave no se libera: un reintento volvería a mover el dinero.
+Se guarda en su lugar una respuesta 500 que los reintentos reciben; si
+tampoco se puede guardar, la clave queda EN_PROCESO hasta vencer.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.crud import idempotencia as crud
+from app.utils.concurrencia import dormir, esperar_evento
+
+IDEMPOTENCIA_TTL_HORAS = float(os.getenv("IDEMPOTENCIA_TTL_HORAS", "24"))
+IDEMPOTENCIA_CACHE_TAMANO = int(os.getenv("IDEMPOTENCIA_CACHE_TAMANO", "10000"))
+IDEMPOTENCIA_ESPERA_SEGUNDOS = float(os.getenv("IDEMPOTENCIA_ESPERA_SEGUNDOS", "30"))
+
+# Respuesta de una clave cuya operación se confirmó pero cuya respuesta no se pudo generar
+RESPUESTA_CONFIRMADA_SIN_RESPUESTA = {
+    "detail": "La operación se registró, pero su respuesta no se pudo generar; consulte los movimientos de la cuenta"
+}
+
+
+class ConflictoIdempotencia(ValueError):
+    """La clave ya se usó con otra ruta o con un cuerpo de solicitud diferente"""
+
+
+class IdempotenciaEnProceso(Exception):
+    """La ejecución original de la clave no terminó dentro del tiempo de espera"""
+
+
+class RespuestaAlmacenada:
+    """Respuesta registrada para una clave"""
+
+    __slots__ = ("ruta", "hash_solicitud", "codigo_estado", "cuerpo", "expiracion")
+
+    def __init__(self, ruta: str, hash_solicitud: str, codigo_estado: int, cuerpo: Any, expiracion: datetime):
+        self.ruta = ruta
+        self.hash_solicitud = hash_solicitud
+        self.codigo_estado = codigo_estado
+        self.cuerpo = cuerpo
+        self.expiracion = expiracion
+
+
+def calcular_hash(solicitud: Dict[str, Any]) -> str:
+    """Huella del cuerpo de la solicitud, independiente del orden de los campos"""
+    contenido = json.dumps(solicitud, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+class GestorIdempotencia:
+    """Coordina la ejecución única por clave dentro del proceso y entre procesos"""
+
+    def __init__(
+        self,
+        tamano_cache: int = IDEMPOTENCIA_CACHE_TAMANO,
+        ttl: timedelta = timedelta(hours=IDEMPOTENCIA_TTL_HORAS),
+        espera_maxima: float = IDEMPOTENCIA_ESPERA_SEGUNDOS,
+        intervalo_sondeo: float = 0.05
+    ):
+        self.tamano_cache = tamano_cache
+        self.ttl = ttl
+        self.espera_maxima = espera_maxima
+        self.intervalo_sondeo = intervalo_sondeo
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, RespuestaAlmacenada]" = OrderedDict()
+        self._en_curso: Dict[str, threading.Event] = {}
+
+    def ejecutar(
+        self,
+        db: Session,
+        clave: str,
+        ruta: str,
+        solicitud: Dict[str, Any],
+        operacion: Callable[[], Tuple[int, Any]]
+    ) -> Tuple[int, Any, bool]:
+        """
+        Ejecutar `operacion` una sola vez por clave.
+
+        `operacion` retorna (código de estado, cuerpo JSON) y debe confirmar sus
+        propios cambios. Retorna (código, cuerpo, repetida). Si la operación
+        lanza una excepción antes de confirmar, la reserva se libera y la clave
+        puede reintentarse; si ya confirmó, la clave se completa con un 500.
+        """
+        hash_solicitud = calcular_hash(solicitud)
+        limite = time.monotonic() + self.espera_maxima
+
+        while True:
+            almacenada = self._obtener_cache(clave)
+            if almacenada is not None:
+                return self._repetir(almacenada, ruta, hash_solicitud)
+
+            with self._lock:
+                evento = self._en_curso.get(clave)
+                propietario = evento is None
+                if propietario:
+                    evento = self._en_curso[clave] = threading.Event()
+            if propietario:
+                break
+
+            # Otra solicitud de este proceso ejecuta la misma clave: esperar su resultado
+            if not esperar_evento(evento, max(0.0, limite - time.monotonic())):
+                raise IdempotenciaEnProceso(
+                    f"La solicitud con Idempotency-Key '{clave}' aún está en proceso"
+                )
+
+        try:
+            return self._ejecutar_propietario(db, clave, ruta, hash_solicitud, operacion, limite)
+        finally:
+            with self._lock:
+                self._en_curso.pop(clave, None)
+            evento.set()
+
+    def _ejecutar_propietario(
+        self,
+        db: Session,
+        clave: str,
+        ruta: str,
+        hash_solicitud: str,
+        operacion: Callable[[], Tuple[int, Any]],
+        limite: float
+    ) -> Tuple[int, Any, bool]:
+        while True:
+            registro = crud.get_idempotencia(db, clave)
+            if registro is not None and registro.FechaExpiracion >= datetime.now():
+                if registro.Ruta != ruta or registro.HashSolicitud != hash_solicitud:
+                    raise ConflictoIdempotencia(
+                        f"La Idempotency-Key '{clave}' ya se usó con una solicitud diferente"
+                    )
+                if registro.Estado == "COMPLETADO":
+                    almacenada = RespuestaAlmacenada(
+                        registro.Ruta, registro.HashSolicitud, registro.CodigoEstado,
+                        json.loads(registro.Respuesta), registro.FechaExpiracion
+                    )
+                    self._guardar_cache(clave, almacenada)
+                    return almacenada.codigo_estado, almacenada.cuerpo, True
+                # Otro proceso la está ejecutando: sondear hasta que termine
+                if time.monotonic() >= limite:
+                    raise IdempotenciaEnProceso(
+                        f"La solicitud con Idempotency-Key '{clave}' aún está en proceso"
+                    )
+                dormir(self.intervalo_sondeo)
+                continue
+            if crud.reservar_idempotencia(db, clave, ruta, hash_solicitud, self.ttl):
+                break
+            # Otro proceso reservó la clave primero: volver a leerla
+
+        confirmaciones = []
+
+        def al_confirmar(sesion: Session) -> None:
+            confirmaciones.append(True)
+
+        event.listen(db, "after_commit", al_confirmar)
+        try:
+            codigo_estado, cuerpo = operacion()
+        except BaseException:
+            event.remove(db, "after_commit", al_confirmar)
+            try:
+                if confirmaciones:
+                    # El dinero ya se movió: liberar la clave permitiría repetir la operación
+                    db.rollback()
+                    crud.completar_idempotencia(db, clave, 500, json.dumps(RESPUESTA_CONFIRMADA_SIN_RESPUESTA))
+                else:
+                    crud.liberar_idempotencia(db, clave)
+            except Exception:
+                pass  # La reserva vencerá por TTL
+            raise
+        event.remove(db, "after_commit", al_confirmar)
+
+        crud.completar_idempotencia(db, clave, codigo_estado, json.dumps(cuerpo))
+        self._guardar_cache(clave, RespuestaAlmacenada(
+            ruta, hash_solicitud, codigo_estado, cuerpo, datetime.now() + self.ttl
+        ))
+        return codigo_estado, cuerpo, False
+
+    @staticmethod
+    def _repetir(almacenada: RespuestaAlmacenada, ruta: str, hash_solicitud: str) -> Tuple[int, Any, bool]:
+        if almacenada.ruta != ruta or almacenada.hash_solicitud != hash_solicitud:
+            raise ConflictoIdempotencia("La Idempotency-Key ya se usó con una solicitud diferente")
+        return almacenada.codigo_estado, almacenada.cuerpo, True
+
+    def _obtener_cache(self, clave: str) -> Optional[RespuestaAlmacenada]:
+        with self._lock:
+            almacenada = self._cache.get(clave)
+            if almacenada is None:
+                return None
+            if almacenada.expiracion < datetime.now():
+                del self._cache[clave]
+                return None
+            self._cache.move_to_end(clave)
+            return almacenada
+
+    def _guardar_cache(self, clave: str, almacenada: RespuestaAlmacenada) -> None:
+        with self._lock:
+            self._cache[clave] = almacenada
+            self._cache.move_to_end(clave)
+            while len(self._cache) > self.tamano_cache:
+                self._cache.popitem(last=False)
+
+    def limpiar_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+gestor_idempotencia = GestorIdempotencia()
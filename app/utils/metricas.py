@@ -0,0 +1,89 @@
+"""
+Métricas en memoria del proceso para las operaciones sobre la base de datos.
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class EstadisticasBloqueo:
+    """Acumula el tiempo de espera por bloqueos de cada tipo de operación"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._datos: Dict[str, dict] = {}
+
+    def registrar(self, operacion: str, espera_ms: float, reintentos: int = 0) -> None:
+        with self._lock:
+            datos = self._datos.setdefault(operacion, {
+                "Operaciones": 0,
+                "Reintentos": 0,
+                "EsperaTotalMs": 0.0,
+                "EsperaMaximaMs": 0.0,
+            })
+            datos["Operaciones"] += 1
+            datos["Reintentos"] += reintentos
+            datos["EsperaTotalMs"] += espera_ms
+            datos["EsperaMaximaMs"] = max(datos["EsperaMaximaMs"], espera_ms)
+
+    def resumen(self) -> Dict[str, dict]:
+        with self._lock:
+            resultado = {}
+            for operacion, datos in self._datos.items():
+                resultado[operacion] = {
+                    **datos,
+                    "EsperaPromedioMs": datos["EsperaTotalMs"] / datos["Operaciones"],
+                }
+            return resultado
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self._datos.clear()
+
+
+estadisticas_bloqueo = EstadisticasBloqueo()
+
+
+class ContadorViajesBD:
+    """Sentencias y commits enviados a la base de datos durante una solicitud"""
+
+    def __init__(self):
+        self.total = 0
+
+
+_contador_viajes: ContextVar[Optional[ContadorViajesBD]] = ContextVar("contador_viajes_bd", default=None)
+
+
+@contextmanager
+def contar_viajes_bd() -> Iterator[ContadorViajesBD]:
+    """
+    Contar los viajes a la base de datos hechos dentro del bloque.
+
+    El contador se propaga por el contexto, incluido el threadpool donde FastAPI
+    ejecuta los endpoints y dependencias síncronos.
+    """
+    contador = ContadorViajesBD()
+    token = _contador_viajes.set(contador)
+    try:
+        yield contador
+    finally:
+        _contador_viajes.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _registrar_sentencia(conn, cursor, statement, parameters, context, executemany):
+    contador = _contador_viajes.get()
+    if contador is not None:
+        contador.total += 1
+
+
+@event.listens_for(Engine, "commit")
+def _registrar_commit(conn):
+    contador = _contador_viajes.get()
+    if contador is not None:
+        contador.total += 1
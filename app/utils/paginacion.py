@@ -0,0 +1,126 @@
+"""
+Paginación por cursor (keyset) para los listados.
+
+El cursor es un token opaco con los valores de la llave de orden de la última
+fila entregada. La página siguiente se obtiene con un filtro sobre esa llave
+en lugar de un OFFSET, por lo que cuesta lo mismo sin importar la
+profundidad. `skip`/`limit` siguen funcionando igual que antes.
+
+El cursor de la página siguiente (`next_cursor`) va en el encabezado
+X-Next-Cursor y no en el cuerpo, para que los listados sigan respondiendo un
+arreglo JSON como antes; CORS lo expone (`expose_headers` en app.main) para
+que los clientes del navegador puedan leerlo.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query as ConsultaORM
+
+
+class CursorInvalido(ValueError):
+    """El cursor recibido no corresponde a un cursor emitido por la API"""
+
+
+def _a_json(valor: Any) -> Any:
+    if isinstance(valor, datetime):
+        return {"dt": valor.isoformat()}
+    if isinstance(valor, date):
+        return {"d": valor.isoformat()}
+    return valor
+
+
+def _desde_json(valor: Any) -> Any:
+    if isinstance(valor, dict):
+        if "dt" in valor:
+            return datetime.fromisoformat(valor["dt"])
+        if "d" in valor:
+            return date.fromisoformat(valor["d"])
+        raise CursorInvalido("Cursor inválido")
+    return valor
+
+
+def codificar_cursor(valores: Sequence[Any]) -> str:
+    """Token opaco con los valores de la llave de orden de una fila"""
+    contenido = json.dumps([_a_json(v) for v in valores], separators=(",", ":"))
+    return base64.urlsafe_b64encode(contenido.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> tuple:
+    """Valores de la llave de orden contenidos en el cursor"""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError):
+        raise CursorInvalido("Cursor inválido")
+    if not isinstance(valores, list) or not valores:
+        raise CursorInvalido("Cursor inválido")
+    return tuple(_desde_json(v) for v in valores)
+
+
+def condicion_posterior(columnas: Sequence[Any], valores: Sequence[Any], descendente: bool = False):
+    """
+    Filas que van después de `valores` en el orden de `columnas`.
+
+    Se expande como `c1 > v1 OR (c1 = v1 AND c2 > v2) OR ...` en lugar de una
+    comparación de tuplas para que MySQL pueda usar el índice compuesto.
+    """
+    if len(columnas) != len(valores):
+        raise CursorInvalido("Cursor inválido para este listado")
+    alternativas = []
+    for i, (columna, valor) in enumerate(zip(columnas, valores)):
+        iguales = [c == v for c, v in zip(columnas[:i], valores[:i])]
+        siguiente = columna < valor if descendente else columna > valor
+        alternativas.append(and_(*iguales, siguiente))
+    return or_(*alternativas)
+
+
+def paginar(
+    query: ConsultaORM,
+    columnas: Sequence[Any],
+    skip: int = 0,
+    limit: int = 100,
+    despues_de: Optional[tuple] = None,
+    descendente: bool = False
+) -> ConsultaORM:
+    """
+    Ordenar la consulta por `columnas` (llave única) y aplicar la página pedida.
+
+    Con `despues_de` (valores decodificados de un cursor) se filtra por la llave
+    y se ignora `skip`; sin él se usa el OFFSET tradicional.
+    """
+    orden = [c.desc() if descendente else c.asc() for c in columnas]
+    if despues_de is not None:
+        query = query.filter(condicion_posterior(columnas, despues_de, descendente))
+        # Cota redundante sobre la primera columna: un rango simple que el optimizador
+        # puede usar para el índice y para descartar particiones (el OR no lo permite)
+        primera, valor = columnas[0], despues_de[0]
+        query = query.filter(primera <= valor if descendente else primera >= valor)
+        skip = 0
+    return query.order_by(*orden).offset(skip).limit(limit)
+
+
+class Paginacion:
+    """Parámetros de paginación de los listados (dependencia de FastAPI)"""
+
+    def __init__(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (encabezado X-Next-Cursor)")
+    ):
+        self.skip = skip
+        self.limit = limit
+        try:
+            self.despues_de = decodificar_cursor(cursor) if cursor else None
+        except CursorInvalido as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    def exponer_siguiente(self, response: Response, filas: List[Any], llave: Callable[[Any], Sequence[Any]]) -> None:
+        """Agregar el encabezado X-Next-Cursor si la página vino completa"""
+        if filas and len(filas) == self.limit:
+            response.headers["X-Next-Cursor"] = codificar_cursor(llave(filas[-1]))
@@ -0,0 +1,84 @@
+"""
+Particionamiento mensual de la tabla movimiento (solo MySQL).
+
+La tabla se particiona por RANGE COLUMNS(Fecha) con una partición por mes
+(`pAAAAMM`, filas con Fecha < primer día del mes siguiente) y una partición
+`pfuturo` con MAXVALUE que recibe cualquier fecha posterior a la última
+partición creada. El job `app.jobs.particiones_movimiento` crea los meses
+siguientes por adelantado dividiendo `pfuturo` mientras está vacía, y archiva
+y elimina las particiones de los meses vencidos.
+"""
+
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+
+PARTICION_FUTURA = "pfuturo"
+
+
+def inicio_mes(fecha: date) -> date:
+    return fecha.replace(day=1)
+
+
+def sumar_meses(mes: date, meses: int) -> date:
+    """Primer día del mes que está `meses` después (o antes) de `mes`"""
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def nombre_particion(mes: date) -> str:
+    return f"p{mes.year:04d}{mes.month:02d}"
+
+
+def mes_de_particion(nombre: str) -> Optional[date]:
+    """Mes de una partición `pAAAAMM`; None para `pfuturo` u otros nombres"""
+    if len(nombre) != 7 or not nombre.startswith("p") or not nombre[1:].isdigit():
+        return None
+    return date(int(nombre[1:5]), int(nombre[5:7]), 1)
+
+
+def definicion_particion(mes: date) -> str:
+    return f"PARTITION {nombre_particion(mes)} VALUES LESS THAN ('{sumar_meses(mes, 1).isoformat()}')"
+
+
+def definicion_particion_futura() -> str:
+    return f"PARTITION {PARTICION_FUTURA} VALUES LESS THAN (MAXVALUE)"
+
+
+def meses_entre(desde: date, hasta: date) -> List[date]:
+    """Meses desde el de `desde` hasta el de `hasta`, ambos incluidos"""
+    meses = []
+    mes = inicio_mes(desde)
+    while mes <= inicio_mes(hasta):
+        meses.append(mes)
+        mes = sumar_meses(mes, 1)
+    return meses
+
+
+def planificar_mantenimiento(
+    existentes: Iterable[date],
+    hoy: date,
+    meses_adelante: int,
+    retener_meses: Optional[int] = None,
+    primer_mes: Optional[date] = None
+) -> Tuple[List[date], List[date]]:
+    """
+    Meses a crear y meses a separar.
+
+    Se crean los meses posteriores al último existente hasta `meses_adelante`
+    meses después del actual. Si todavía no hay particiones mensuales se
+    empieza en `primer_mes` (el mes más antiguo con datos en `pfuturo`) o en
+    el mes actual. Con `retener_meses` se separan los meses anteriores a los
+    últimos `retener_meses` meses, incluido el actual.
+    """
+    existentes = sorted(set(existentes))
+    if existentes:
+        siguiente = sumar_meses(existentes[-1], 1)
+    else:
+        siguiente = inicio_mes(min(primer_mes or hoy, hoy))
+    objetivo = sumar_meses(inicio_mes(hoy), meses_adelante)
+    crear = meses_entre(siguiente, objetivo) if siguiente <= objetivo else []
+    separar = []
+    if retener_meses is not None:
+        limite = sumar_meses(inicio_mes(hoy), -(retener_meses - 1))
+        separar = [mes for mes in existentes if mes < limite]
+    return crear, separar
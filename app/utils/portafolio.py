@@ -0,0 +1,70 @@
+"""
+Caché en memoria de la analítica del portafolio de préstamos.
+
+Cada resultado se guarda con la versión de los préstamos con la que se
+calculó. Crear, actualizar o eliminar un préstamo en este proceso incrementa
+la versión y descarta lo guardado; los cambios hechos en otros procesos (u
+otros datos que usa el portafolio, como la sucursal de la cuenta) se ven a
+más tardar PORTAFOLIO_TTL segundos después.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+PORTAFOLIO_TTL = float(os.getenv("PORTAFOLIO_TTL", "300"))
+# Resultados guardados (cada fecha de corte y horizonte es uno)
+PORTAFOLIO_RESULTADOS = 64
+
+
+class CachePortafolio:
+    """Resultados por llave, válidos mientras no cambie la versión de los préstamos"""
+
+    def __init__(self, ttl: float = PORTAFOLIO_TTL, maximo: int = PORTAFOLIO_RESULTADOS):
+        self.ttl = ttl
+        self.maximo = maximo
+        self.version = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        self._datos: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def invalidar(self) -> None:
+        """Un préstamo cambió: descartar todos los resultados"""
+        with self._lock:
+            self.version += 1
+            self._datos.clear()
+
+    def obtener(self, clave: Hashable, calcular: Callable[[], Any]) -> Any:
+        ahora = time.monotonic()
+        with self._lock:
+            version = self.version
+            entrada = self._datos.get(clave)
+            if entrada is not None and ahora - entrada[0] < self.ttl:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return entrada[1]
+            self.fallos += 1
+        valor = calcular()
+        with self._lock:
+            # Si un préstamo cambió mientras se calculaba, el resultado ya no es válido
+            if self.version == version:
+                self._datos[clave] = (ahora, valor)
+                self._datos.move_to_end(clave)
+                while len(self._datos) > self.maximo:
+                    self._datos.popitem(last=False)
+        return valor
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "Version": self.version,
+                "Aciertos": self.aciertos,
+                "Fallos": self.fallos,
+                "Resultados": len(self._datos),
+            }
+
+
+cache_portafolio = CachePortafolio()
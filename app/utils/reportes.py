@@ -0,0 +1,28 @@
+"""
+Archivos JSON de los reportes que escriben los jobs (conciliación, saldos de apertura).
+"""
+
+import json
+import os
+from decimal import Decimal
+
+
+def fila_json(fila: dict) -> dict:
+    """Fila de un reporte con los Decimal como texto, para no perder centavos en JSON"""
+    return {c: str(v) if isinstance(v, Decimal) else v for c, v in fila.items()}
+
+
+def leer_json(ruta: str) -> dict:
+    """Contenido del archivo, o vacío si no existe"""
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def escribir_json(ruta: str, contenido: dict) -> None:
+    """Escritura atómica: un corte a mitad deja el archivo anterior intacto"""
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    with open(ruta + ".tmp", "w", encoding="utf-8") as archivo:
+        json.dump(contenido, archivo, ensure_ascii=False, indent=2)
+    os.replace(ruta + ".tmp", ruta)
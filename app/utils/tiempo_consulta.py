@@ -0,0 +1,71 @@
+"""
+Tiempo máximo de ejecución de las consultas de lectura pesadas.
+
+En MySQL el SELECT lleva el hint `MAX_EXECUTION_TIME` y el servidor lo
+interrumpe al vencer el plazo (error 3024); en SQLite un progress handler
+de la conexión lo interrumpe. MariaDB ignora el hint y los demás motores no
+tienen límite: la consulta corre hasta terminar.
+"""
+
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import Select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+# Códigos de error de MySQL por plazo de ejecución vencido
+ERRORES_TIEMPO_EXCEDIDO = {
+    3024,  # Query execution was interrupted, maximum statement execution time exceeded
+    1969,  # Query execution was interrupted (max_statement_time exceeded), MariaDB
+}
+
+# Instrucciones de la máquina virtual de SQLite entre dos revisiones del plazo
+PASOS_SQLITE = 10000
+
+
+class ConsultaExcedioTiempo(Exception):
+    """La consulta no terminó dentro del tiempo máximo"""
+
+    def __init__(self, segundos: float):
+        super().__init__(f"La consulta superó el tiempo máximo de {segundos:g} s")
+        self.segundos = segundos
+
+
+def es_tiempo_excedido(error: OperationalError) -> bool:
+    orig = getattr(error, "orig", None)
+    args = getattr(orig, "args", ())
+    if args and args[0] in ERRORES_TIEMPO_EXCEDIDO:
+        return True
+    return "interrupted" in str(orig)
+
+
+@contextmanager
+def _plazo_sqlite(db: Session, segundos: float):
+    conexion = db.connection().connection.driver_connection
+    instalar = getattr(conexion, "set_progress_handler", None)
+    if instalar is None:
+        # aiosqlite no expone el progress handler
+        yield
+        return
+    limite = time.monotonic() + segundos
+    instalar(lambda: time.monotonic() > limite, PASOS_SQLITE)
+    try:
+        yield
+    finally:
+        instalar(None, 0)
+
+
+def ejecutar_con_limite(db: Session, consulta: Select, segundos: float) -> list:
+    """Ejecutar la consulta y traer sus filas; lanza ConsultaExcedioTiempo si vence el plazo"""
+    try:
+        if db.get_bind().dialect.name == "sqlite":
+            with _plazo_sqlite(db, segundos):
+                return db.execute(consulta).all()
+        consulta = consulta.prefix_with(f"/*+ MAX_EXECUTION_TIME({int(segundos * 1000)}) */", dialect="mysql")
+        return db.execute(consulta).all()
+    except OperationalError as error:
+        if not es_tiempo_excedido(error):
+            raise
+        db.rollback()
+        raise ConsultaExcedioTiempo(segundos) from error
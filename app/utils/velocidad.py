@@ -0,0 +1,230 @@
+"""
+Límites de velocidad de retiros y transferencias salientes por cuenta.
+
+Cada regla limita la cantidad de operaciones y el monto debitado en una
+ventana deslizante de una hora o de un día. Los límites están desactivados
+salvo que se configuren sus variables (VELOCIDAD_OPERACIONES_HORA,
+VELOCIDAD_MONTO_HORA, VELOCIDAD_OPERACIONES_DIA, VELOCIDAD_MONTO_DIA).
+Cada movimiento de débito (retiro o transferencia enviada, también los de
+una nómina) es una operación. Los contadores viven en
+memoria del proceso: por cuenta y regla, un arreglo de cubetas de tiempo
+(cantidad y centavos), así que verificar una operación no consulta la base
+de datos. Las cuentas se guardan en un LRU de tamaño acotado; primero se
+descartan las que no tienen operaciones dentro de ninguna ventana.
+
+Al iniciar la API, `app.crud.velocidad.precargar` reconstruye los contadores desde los movimientos
+recientes. Como `movimiento.Fecha` no tiene hora, esos movimientos se ubican
+al final de su día (o ahora, si es hoy) y solo cuentan para las reglas de un
+día o más.
+
+Los límites son por proceso: con varios workers cada uno aplica los suyos.
+"""
+
+import math
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, time as hora, timedelta
+from decimal import Decimal
+from itertools import islice
+from typing import Iterable, List, Optional, Tuple
+
+
+class LimiteVelocidadExcedido(Exception):
+    """La operación supera un límite de velocidad de la cuenta"""
+
+    def __init__(self, mensaje: str, reintentar_en: int):
+        super().__init__(mensaje)
+        self.reintentar_en = reintentar_en
+
+
+def _limite(variable: str) -> Optional[Decimal]:
+    valor = os.getenv(variable, "")
+    return Decimal(valor) if valor else None
+
+
+@dataclass(frozen=True)
+class ReglaVelocidad:
+    nombre: str
+    ventana: int  # Segundos
+    cubetas: int
+    max_operaciones: Optional[int] = None
+    max_monto: Optional[Decimal] = None
+
+    @property
+    def duracion_cubeta(self) -> float:
+        return self.ventana / self.cubetas
+
+
+def reglas_configuradas() -> List[ReglaVelocidad]:
+    """Reglas de las variables de entorno; una variable vacía o ausente desactiva ese límite"""
+    reglas = []
+    for nombre, ventana, cubetas, operaciones, monto in (
+        ("hora", 3600, 12, "VELOCIDAD_OPERACIONES_HORA", "VELOCIDAD_MONTO_HORA"),
+        ("día", 86400, 24, "VELOCIDAD_OPERACIONES_DIA", "VELOCIDAD_MONTO_DIA"),
+    ):
+        max_operaciones, max_monto = _limite(operaciones), _limite(monto)
+        if max_operaciones is not None or max_monto is not None:
+            reglas.append(ReglaVelocidad(
+                nombre, ventana, cubetas,
+                int(max_operaciones) if max_operaciones is not None else None, max_monto
+            ))
+    return reglas
+
+
+VELOCIDAD_MAX_CUENTAS = int(os.getenv("VELOCIDAD_MAX_CUENTAS", "100000"))
+CUENTAS_REVISADAS_AL_DESALOJAR = 16
+
+
+@dataclass
+class Reserva:
+    """Operaciones contabilizadas por `reservar`, para deshacerlas si fallan"""
+    cuenta_id: int
+    centavos: int
+    instante: float
+    operaciones: int = 1
+
+
+class _Contadores:
+    """Cubetas (cantidad, centavos) de una cuenta para cada regla"""
+    __slots__ = ("valores", "ultimas")
+
+    def __init__(self, reglas: List[ReglaVelocidad]):
+        self.valores = [array("q", [0] * (2 * r.cubetas)) for r in reglas]
+        self.ultimas = [-1] * len(reglas)
+
+
+class LimitesVelocidad:
+    """Contadores de las reglas de velocidad por cuenta, en memoria del proceso"""
+
+    def __init__(self, reglas: Optional[List[ReglaVelocidad]] = None, max_cuentas: int = VELOCIDAD_MAX_CUENTAS):
+        self.reglas = reglas_configuradas() if reglas is None else reglas
+        self.max_cuentas = max_cuentas
+        self._lock = threading.Lock()
+        self._cuentas: "OrderedDict[int, _Contadores]" = OrderedDict()
+
+    def _avanzar(self, contadores: _Contadores, i: int, cubeta: int) -> None:
+        """Vaciar las cubetas que salieron de la ventana al llegar a `cubeta`"""
+        regla, ultima = self.reglas[i], contadores.ultimas[i]
+        if cubeta <= ultima:
+            return
+        valores = contadores.valores[i]
+        for c in range(max(ultima + 1, cubeta - regla.cubetas + 1), cubeta + 1):
+            posicion = 2 * (c % regla.cubetas)
+            valores[posicion] = valores[posicion + 1] = 0
+        contadores.ultimas[i] = cubeta
+
+    def _sumar(
+        self, contadores: _Contadores, instante: float, operaciones: int, centavos: int, ahora: float,
+        solo_diarias: bool = False
+    ) -> None:
+        for i, regla in enumerate(self.reglas):
+            if solo_diarias and regla.ventana < 86400:
+                continue
+            cubeta = int(instante // regla.duracion_cubeta)
+            self._avanzar(contadores, i, int(ahora // regla.duracion_cubeta))
+            # Fuera de la ventana (por ejemplo, una reserva liberada tarde): nada que sumar
+            if cubeta <= contadores.ultimas[i] - regla.cubetas:
+                continue
+            posicion = 2 * (cubeta % regla.cubetas)
+            contadores.valores[i][posicion] += operaciones
+            contadores.valores[i][posicion + 1] += centavos
+
+    def _contadores(self, cuenta_id: int, ahora: float) -> _Contadores:
+        contadores = self._cuentas.get(cuenta_id)
+        if contadores is not None:
+            self._cuentas.move_to_end(cuenta_id)
+            return contadores
+        if len(self._cuentas) >= self.max_cuentas:
+            self._desalojar(ahora)
+        contadores = self._cuentas[cuenta_id] = _Contadores(self.reglas)
+        return contadores
+
+    def _desalojar(self, ahora: float) -> None:
+        """Sacar, entre las menos usadas, una cuenta sin operaciones vigentes; si no hay, la menos usada"""
+        for cuenta_id, contadores in islice(self._cuentas.items(), CUENTAS_REVISADAS_AL_DESALOJAR):
+            if all(self._totales(contadores, i, ahora) == (0, 0) for i in range(len(self.reglas))):
+                del self._cuentas[cuenta_id]
+                return
+        self._cuentas.popitem(last=False)
+
+    def _totales(self, contadores: _Contadores, i: int, ahora: float) -> Tuple[int, int]:
+        self._avanzar(contadores, i, int(ahora // self.reglas[i].duracion_cubeta))
+        valores = contadores.valores[i]
+        return sum(valores[0::2]), sum(valores[1::2])
+
+    def _reintentar_en(self, contadores: _Contadores, i: int, ahora: float, operaciones: int, centavos: int) -> int:
+        """Segundos hasta que salgan de la ventana suficientes cubetas para admitir la operación"""
+        regla, valores = self.reglas[i], contadores.valores[i]
+        total_operaciones, total_centavos = self._totales(contadores, i, ahora)
+        ultima = contadores.ultimas[i]
+        for c in range(ultima - regla.cubetas + 1, ultima + 1):
+            posicion = 2 * (c % regla.cubetas)
+            total_operaciones -= valores[posicion]
+            total_centavos -= valores[posicion + 1]
+            if self._admite(regla, total_operaciones + operaciones, total_centavos + centavos):
+                return max(1, math.ceil((c + regla.cubetas) * regla.duracion_cubeta - ahora))
+        return regla.ventana
+
+    @staticmethod
+    def _admite(regla: ReglaVelocidad, operaciones: int, centavos: int) -> bool:
+        if regla.max_operaciones is not None and operaciones > regla.max_operaciones:
+            return False
+        return regla.max_monto is None or centavos <= regla.max_monto * 100
+
+    def reservar(
+        self, cuenta_id: int, valor: Decimal, ahora: Optional[float] = None, operaciones: int = 1
+    ) -> Reserva:
+        """
+        Verificar los límites y contabilizar `operaciones` débitos que suman
+        `valor` en un solo paso.
+
+        Lanza LimiteVelocidadExcedido si alguna regla no los admite. Si la
+        operación no llega a confirmarse, deshacerla con `liberar`.
+        """
+        ahora = time.time() if ahora is None else ahora
+        centavos = int(abs(valor) * 100)
+        if not self.reglas:
+            return Reserva(cuenta_id, centavos, ahora, operaciones)
+        with self._lock:
+            contadores = self._contadores(cuenta_id, ahora)
+            for i, regla in enumerate(self.reglas):
+                realizadas, total = self._totales(contadores, i, ahora)
+                if not self._admite(regla, realizadas + operaciones, total + centavos):
+                    raise LimiteVelocidadExcedido(
+                        f"La cuenta {cuenta_id} superó el límite de retiros y transferencias por {regla.nombre}",
+                        self._reintentar_en(contadores, i, ahora, operaciones, centavos)
+                    )
+            self._sumar(contadores, ahora, operaciones, centavos, ahora)
+        return Reserva(cuenta_id, centavos, ahora, operaciones)
+
+    def liberar(self, reserva: Reserva, ahora: Optional[float] = None) -> None:
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            contadores = self._cuentas.get(reserva.cuenta_id)
+            if contadores is not None:
+                self._sumar(contadores, reserva.instante, -reserva.operaciones, -reserva.centavos, ahora)
+
+    def cargar(self, filas: Iterable[Tuple[int, date, int, Decimal]], ahora: Optional[float] = None) -> None:
+        """Agregar operaciones históricas (cuenta, fecha, cantidad, monto) ubicadas al final de su día"""
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            for cuenta_id, fecha, operaciones, monto in filas:
+                fin_del_dia = datetime.combine(fecha + timedelta(days=1), hora.min).timestamp() - 1
+                self._sumar(
+                    self._contadores(cuenta_id, ahora), min(fin_del_dia, ahora), operaciones,
+                    int(abs(monto) * 100), ahora, solo_diarias=True
+                )
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self._cuentas.clear()
+
+    def __len__(self) -> int:
+        return len(self._cuentas)
+
+
+limites_velocidad = LimitesVelocidad()
@@ -0,0 +1,155 @@
+"""
+Volumen de movimientos por cuenta en una ventana deslizante de días.
+
+El volumen de una cuenta es la suma de los valores absolutos de sus
+movimientos (créditos y débitos) en los últimos VOLUMEN_DIAS días, incluido
+hoy. Cada cuenta ocupa una fila de cubetas diarias en un arreglo compacto de
+enteros (centavos): la cubeta de un día es `ordinal % VOLUMEN_DIAS` y las de
+días que salieron de la ventana se limpian al avanzar la fila. Una vez por día
+se descartan las filas de las cuentas sin movimientos en la ventana, así que
+la memoria crece con las cuentas activas y no con todas las que operaron.
+
+Las cuentas cuyo volumen alcanza GRAN_MOVIMIENTO_UMBRAL quedan pendientes de
+marcar con GranMovimiento; `app.crud.gran_movimiento` aplica las marcas por
+lotes.
+"""
+
+import os
+import threading
+import time
+from array import array
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+VOLUMEN_DIAS = int(os.getenv("VOLUMEN_DIAS", "30"))
+GRAN_MOVIMIENTO_UMBRAL = Decimal(os.getenv("GRAN_MOVIMIENTO_UMBRAL", "100000000.00"))
+# Segundos mínimos entre dos aplicaciones de marcas pendientes (agrupa las de varias operaciones)
+INTERVALO_MARCAS = float(os.getenv("GRAN_MOVIMIENTO_INTERVALO", "1.0"))
+
+
+def a_centavos(valor) -> int:
+    return int(abs(Decimal(valor)) * 100)
+
+
+class VolumenCuentas:
+    """Cubetas diarias de volumen por cuenta, en memoria del proceso"""
+
+    def __init__(self, dias: int = VOLUMEN_DIAS, umbral: Decimal = GRAN_MOVIMIENTO_UMBRAL):
+        self.dias = dias
+        self.umbral = a_centavos(umbral)
+        self._lock = threading.Lock()
+        self._filas: Dict[int, int] = {}
+        self._cubetas = array("q")
+        self._ultimo_dia = array("l")
+        self._marcadas: Set[int] = set()
+        self._pendientes: Set[int] = set()
+        self._ultima_aplicacion = 0.0
+        self._dia_poda = 0
+
+    def _fila(self, cuenta_id: int) -> int:
+        fila = self._filas.get(cuenta_id)
+        if fila is None:
+            fila = len(self._ultimo_dia)
+            self._filas[cuenta_id] = fila
+            self._cubetas.extend([0] * self.dias)
+            self._ultimo_dia.append(0)
+        return fila
+
+    def _avanzar(self, fila: int, dia: int) -> None:
+        """Limpiar las cubetas de los días entre el último registrado y `dia`"""
+        ultimo = self._ultimo_dia[fila]
+        if dia <= ultimo:
+            return
+        inicio = fila * self.dias
+        for d in range(max(ultimo + 1, dia - self.dias + 1), dia + 1):
+            self._cubetas[inicio + d % self.dias] = 0
+        self._ultimo_dia[fila] = dia
+
+    def _podar(self, dia: int) -> None:
+        """Compactar las filas: descartar las cuentas cuyo último movimiento salió de la ventana"""
+        self._dia_poda = dia
+        vigentes = [(c, f) for c, f in self._filas.items() if self._ultimo_dia[f] > dia - self.dias]
+        if len(vigentes) == len(self._filas):
+            return
+        filas, cubetas, ultimo_dia = {}, array("q"), array("l")
+        for cuenta_id, fila in vigentes:
+            filas[cuenta_id] = len(ultimo_dia)
+            cubetas.extend(self._cubetas[fila * self.dias:(fila + 1) * self.dias])
+            ultimo_dia.append(self._ultimo_dia[fila])
+        self._filas, self._cubetas, self._ultimo_dia = filas, cubetas, ultimo_dia
+        # Una cuenta descartada que vuelva a superar el umbral se marca otra vez (sin efecto si ya lo está)
+        self._marcadas &= filas.keys()
+
+    def _total(self, fila: int, dia: int) -> int:
+        self._avanzar(fila, dia)
+        inicio = fila * self.dias
+        return sum(self._cubetas[inicio:inicio + self.dias])
+
+    def registrar(self, movimientos: Iterable[Tuple[int, object]], fecha: Optional[date] = None) -> None:
+        """Sumar movimientos (cuenta, valor) del día `fecha` (hoy por defecto)"""
+        dia = (fecha or date.today()).toordinal()
+        with self._lock:
+            if dia > self._dia_poda:
+                self._podar(dia)
+            for cuenta_id, valor in movimientos:
+                fila = self._fila(cuenta_id)
+                self._avanzar(fila, dia)
+                # Un movimiento con fecha anterior a la ventana no cuenta
+                if dia > self._ultimo_dia[fila] - self.dias:
+                    self._cubetas[fila * self.dias + dia % self.dias] += a_centavos(valor)
+                if cuenta_id not in self._marcadas and self._total(fila, self._ultimo_dia[fila]) >= self.umbral:
+                    self._pendientes.add(cuenta_id)
+
+    def volumen(self, cuenta_id: int, fecha: Optional[date] = None) -> Decimal:
+        """Volumen de la cuenta en la ventana que termina en `fecha`"""
+        with self._lock:
+            fila = self._filas.get(cuenta_id)
+            if fila is None:
+                return Decimal("0.00")
+            return Decimal(self._total(fila, (fecha or date.today()).toordinal())) / 100
+
+    def cuentas_sobre_umbral(self, fecha: Optional[date] = None) -> Set[int]:
+        dia = (fecha or date.today()).toordinal()
+        with self._lock:
+            return {c for c, fila in self._filas.items() if self._total(fila, dia) >= self.umbral}
+
+    def tomar_pendientes(self, forzar: bool = False) -> Set[int]:
+        """
+        Cuentas por marcar desde la última vez, si pasó INTERVALO_MARCAS (o con
+        `forzar`). Quedan registradas como marcadas.
+        """
+        with self._lock:
+            if not self._pendientes:
+                return set()
+            ahora = time.monotonic()
+            if not forzar and ahora - self._ultima_aplicacion < INTERVALO_MARCAS:
+                return set()
+            pendientes, self._pendientes = self._pendientes, set()
+            self._marcadas |= pendientes
+            self._ultima_aplicacion = ahora
+            return pendientes
+
+    def devolver_pendientes(self, cuentas: Iterable[int]) -> None:
+        """Reponer marcas que no se pudieron aplicar"""
+        with self._lock:
+            cuentas = set(cuentas)
+            self._marcadas -= cuentas
+            self._pendientes |= cuentas
+
+    def reemplazar(self, otro: "VolumenCuentas", marcadas: Iterable[int]) -> None:
+        """Adoptar las cubetas de `otro` (recálculo completo) y las cuentas ya marcadas en la base de datos"""
+        with self._lock:
+            self._filas, self._cubetas, self._ultimo_dia = otro._filas, otro._cubetas, otro._ultimo_dia
+            self._marcadas = set(marcadas)
+            self._pendientes = set()
+
+    def reiniciar(self) -> None:
+        self.reemplazar(VolumenCuentas(self.dias, Decimal(self.umbral) / 100), [])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._filas)
+
+
+volumen_cuentas = VolumenCuentas()
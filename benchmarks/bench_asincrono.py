@@ -0,0 +1,163 @@
+"""
+Benchmark de capacidad concurrente: modo síncrono (threadpool) contra modo asíncrono.
+
+Lanza ráfagas de solicitudes concurrentes de lectura (GET /api/cuentas/{id}) y
+de depósito contra la aplicación en cada modo, con el mismo tamaño de pool de
+conexiones, y reporta throughput, latencia p95 y el máximo de hilos vivos.
+
+Uso:
+    python benchmarks/bench_asincrono.py [solicitudes] [concurrencia] [latencia_ms]
+
+Por defecto usa un SQLite temporal y simula `latencia_ms` de red por sentencia
+(bloqueante en modo síncrono, cediendo el event loop en modo asíncrono, como
+hacen los drivers reales). Definir BENCH_DATABASE_URL (URL síncrona, p. ej.
+mysql+pymysql://...) para medir contra otra base de datos exclusiva del
+benchmark; el modo asíncrono usa la misma URL con aiomysql. Con SQLite,
+aiosqlite usa un hilo por conexión, por lo que la columna de hilos solo es
+representativa con MySQL.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for variable, valor in {"DB_HOST": "localhost", "DB_PORT": "3306", "DB_USER": "bench", "DB_NAME": "bench"}.items():
+    os.environ.setdefault(variable, valor)
+
+import httpx
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.database import Base, get_db
+from app.models import *
+from app.utils.concurrencia import dormir
+
+POOL_SIZE = 10
+MAX_OVERFLOW = 20
+
+
+def urls():
+    url = os.getenv("BENCH_DATABASE_URL")
+    if url:
+        return url, url.replace("mysql+pymysql://", "mysql+aiomysql://", 1)
+    ruta = os.path.join(tempfile.mkdtemp(), "bench.db")
+    return f"sqlite:///{ruta}", f"sqlite+aiosqlite:///{ruta}"
+
+
+def preparar(SessionLocal, cuentas):
+    db = SessionLocal()
+    db.query(Movimiento).delete()
+    db.query(Cuenta).delete()
+    db.add_all([
+        Cuenta(IdCuenta=i, Numero=f"B{i}", FechaApertura=date.today(), IdTipoCuenta=1,
+               IdSucursal=1, Saldo=Decimal("1000000.00"), Sobregiro=Decimal("0.00"))
+        for i in range(1, cuentas + 1)
+    ])
+    db.commit()
+    db.close()
+
+
+def simular_latencia(engine, latencia_ms):
+    if latencia_ms <= 0:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _latencia(*args):
+        dormir(latencia_ms / 1000)
+
+
+async def rafaga(solicitudes, concurrencia, ruta_y_cuerpo):
+    transporte = httpx.ASGITransport(app=app)
+    semaforo = asyncio.Semaphore(concurrencia)
+    latencias = []
+    max_hilos = threading.active_count()
+
+    async def una(i):
+        nonlocal max_hilos
+        metodo, ruta, cuerpo = ruta_y_cuerpo(i)
+        async with semaforo:
+            inicio = time.perf_counter()
+            respuesta = await cliente.request(metodo, ruta, json=cuerpo)
+            latencias.append(time.perf_counter() - inicio)
+            max_hilos = max(max_hilos, threading.active_count())
+            assert respuesta.status_code < 300, respuesta.text
+
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        inicio = time.perf_counter()
+        await asyncio.gather(*[una(i) for i in range(solicitudes)])
+        duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "rps": solicitudes / duracion,
+        "p95_ms": latencias[int(len(latencias) * 0.95) - 1] * 1000,
+        "max_hilos": max_hilos,
+    }
+
+
+async def medir_modo(nombre, override, SessionLocal, solicitudes, concurrencia, cuentas, async_engine=None):
+    app.dependency_overrides[get_db] = override
+    preparar(SessionLocal, cuentas)
+    escenarios = {
+        "lectura": lambda i: ("GET", f"/api/cuentas/{i % cuentas + 1}", None),
+        "deposito": lambda i: ("POST", "/api/movimientos/deposito",
+                               {"IdCuenta": i % cuentas + 1, "IdSucursal": 1, "Valor": "1.00"}),
+    }
+    for escenario, generador in escenarios.items():
+        r = await rafaga(solicitudes, concurrencia, generador)
+        print(f"{nombre:<10} {escenario:<9} {r['rps']:>10.1f} sol/s   p95 {r['p95_ms']:>8.1f} ms   "
+              f"hilos máx {r['max_hilos']:>3}")
+    if async_engine is not None:
+        # Cerrar las conexiones dentro del event loop que las creó
+        await async_engine.dispose()
+
+
+def main():
+    solicitudes = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    concurrencia = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    latencia_ms = float(sys.argv[3]) if len(sys.argv) > 3 else (0 if os.getenv("BENCH_DATABASE_URL") else 5)
+    cuentas = 100
+
+    url_sincrona, url_asincrona = urls()
+    opciones = {"pool_size": POOL_SIZE, "max_overflow": MAX_OVERFLOW}
+    if url_sincrona.startswith("sqlite"):
+        opciones["connect_args"] = {"timeout": 30}
+
+    engine = create_engine(url_sincrona, **opciones)
+    Base.metadata.create_all(bind=engine)
+    simular_latencia(engine, latencia_ms)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+    async_engine = create_async_engine(url_asincrona, **opciones)
+    simular_latencia(async_engine.sync_engine, latencia_ms)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    def get_sync_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    print(f"{solicitudes} solicitudes, concurrencia {concurrencia}, pool {POOL_SIZE}+{MAX_OVERFLOW}, "
+          f"latencia simulada {latencia_ms} ms por sentencia ({engine.dialect.name})\n")
+    asyncio.run(medir_modo("síncrono", get_sync_db, SessionLocal, solicitudes, concurrencia, cuentas))
+    asyncio.run(medir_modo("asíncrono", get_async_db, SessionLocal, solicitudes, concurrencia, cuentas,
+                           async_engine=async_engine))
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
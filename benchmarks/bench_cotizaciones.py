@@ -0,0 +1,96 @@
+"""
+Benchmark de cotizaciones: una solicitud por escenario contra una solicitud en lote.
+
+Cotiza la misma grilla de montos × tasas × plazos llamando N veces a
+POST /api/prestamos/calcular-cuota y una sola vez a POST /api/prestamos/cotizaciones
+(modo grilla), y reporta cotizaciones por segundo de cada forma. Verifica además
+que ambas den las mismas cuotas.
+
+Uso:
+    python benchmarks/bench_cotizaciones.py [montos] [tasas] [plazos]
+
+Las solicitudes van por ASGI en el mismo proceso (sin red ni base de datos),
+así que la diferencia medida es la de la aplicación; con HTTP real el costo por
+solicitud es mayor y la ventaja del lote también.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for variable, valor in {"DB_HOST": "localhost", "DB_PORT": "3306", "DB_USER": "bench", "DB_NAME": "bench"}.items():
+    os.environ.setdefault(variable, valor)
+
+import httpx
+
+from app.main import app
+
+# Solicitudes individuales simultáneas
+CONCURRENCIA = 50
+
+
+def grilla(montos, tasas, plazos):
+    return (
+        [str(Decimal(1000000) * (k + 1)) for k in range(montos)],
+        [str(Decimal(k * 25) / 100) for k in range(tasas)],
+        [6 * (k + 1) for k in range(plazos)],
+    )
+
+
+async def individuales(cliente, valores, tasas, plazos):
+    semaforo = asyncio.Semaphore(CONCURRENCIA)
+
+    async def una(valor, tasa, plazo):
+        async with semaforo:
+            respuesta = await cliente.post(
+                "/api/prestamos/calcular-cuota", json={"Valor": valor, "Interes": tasa, "Plazo": plazo}
+            )
+            assert respuesta.status_code == 200, respuesta.text
+            return Decimal(str(respuesta.json()["CuotaMensual"]))
+
+    return await asyncio.gather(*[una(v, t, p) for v in valores for t in tasas for p in plazos])
+
+
+async def lote(cliente, valores, tasas, plazos):
+    respuesta = await cliente.post(
+        "/api/prestamos/cotizaciones",
+        json={"Modo": "grilla", "Valor": valores, "Interes": tasas, "Plazo": plazos},
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    return [Decimal(str(c)) for c in respuesta.json()["CuotaMensual"]]
+
+
+async def medir(montos, tasas, plazos):
+    valores, tasas_grilla, plazos_grilla = grilla(montos, tasas, plazos)
+    escenarios = montos * tasas * plazos
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        inicio = time.perf_counter()
+        cuotas_individuales = await individuales(cliente, valores, tasas_grilla, plazos_grilla)
+        duracion_individual = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        cuotas_lote = await lote(cliente, valores, tasas_grilla, plazos_grilla)
+        duracion_lote = time.perf_counter() - inicio
+
+    assert cuotas_individuales == cuotas_lote, "Las cuotas del lote no coinciden con las individuales"
+    print(f"{escenarios} escenarios ({montos} montos × {tasas} tasas × {plazos} plazos)\n")
+    print(f"{'individual':<11} {escenarios:>6} solicitudes {duracion_individual * 1000:>10.1f} ms "
+          f"{escenarios / duracion_individual:>12.0f} cotizaciones/s")
+    print(f"{'lote':<11} {1:>6} solicitudes {duracion_lote * 1000:>10.1f} ms "
+          f"{escenarios / duracion_lote:>12.0f} cotizaciones/s")
+    print(f"\nAceleración: {duracion_individual / duracion_lote:.0f}x")
+
+
+def main():
+    montos = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    tasas = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    plazos = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    asyncio.run(medir(montos, tasas, plazos))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark del cálculo de cuota: punto flotante contra decimal exacto memorizado.
+
+Calcula la cuota de una mezcla de solicitudes en la que los mismos parámetros se
+repiten (como al crear y actualizar préstamos y cotizar desde el simulador) con:
+
+- flotante: la fórmula anterior (math.pow y redondeo de Decimal(float))
+- exacto sin caché: app.utils.cuota evaluado en cada llamada
+- exacto con caché: app.utils.cuota con su LRU
+
+y reporta cálculos por segundo, la tasa de aciertos de la caché, la relación
+de cada versión exacta con la flotante (el cálculo exacto sin caché, el de
+cada parámetro nuevo, es una regresión si resulta más lento) y en cuántos
+escenarios la versión flotante difiere al centavo.
+
+Uso:
+    python benchmarks/bench_cuota.py [calculos] [parametros_distintos]
+"""
+
+import math
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import cuota
+
+
+def cuota_flotante(valor, interes, plazo, seguro):
+    P, tasa_anual, n, s = float(valor), float(interes), plazo, float(seguro)
+    if tasa_anual == 0:
+        cuota_mensual = P / n + s
+    else:
+        i = tasa_anual / 12 / 100
+        cuota_mensual = P * (i * math.pow(1 + i, n)) / (math.pow(1 + i, n) - 1) + s
+    total_a_pagar = cuota_mensual * n
+    return (round(Decimal(cuota_mensual), 2), round(Decimal(total_a_pagar), 2),
+            round(Decimal(total_a_pagar - P), 2))
+
+
+def parametros(cantidad, rng):
+    return [
+        (Decimal(rng.randrange(1_000_000, 2_000_000_000_00)) / 100, Decimal(rng.randrange(0, 4000)) / 100,
+         rng.choice((12, 24, 36, 48, 60, 72, 120, 180, 240, 360)), Decimal(rng.randrange(0, 50_000_00)) / 100)
+        for _ in range(cantidad)
+    ]
+
+
+def medir(nombre, funcion, solicitudes):
+    inicio = time.perf_counter()
+    for p in solicitudes:
+        funcion(*p)
+    duracion = time.perf_counter() - inicio
+    print(f"{nombre:<20} {len(solicitudes) / duracion:>12.0f} cálculos/s")
+    return duracion
+
+
+def main():
+    calculos = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    distintos = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    rng = random.Random(7)
+    unicos = parametros(distintos, rng)
+    solicitudes = [rng.choice(unicos) for _ in range(calculos)]
+    print(f"{calculos} cálculos sobre {distintos} parámetros distintos "
+          f"(caché de {cuota.CUOTAS_EN_CACHE} entradas)\n")
+
+    flotante = medir("flotante", cuota_flotante, solicitudes)
+    sin_cache = medir("exacto sin caché", cuota._cuota.__wrapped__, solicitudes)
+    cuota.limpiar_cache()
+    exacto = medir("exacto con caché", cuota.calcular_cuota_exacta, solicitudes)
+    estadisticas = cuota.estadisticas_cache()
+    print(f"\naciertos {estadisticas['Aciertos']}, fallos {estadisticas['Fallos']}; "
+          f"exacto con caché / flotante: {flotante / exacto:.1f}x")
+    # El ruido de una corrida es de algunos puntos porcentuales
+    relacion = flotante / sin_cache
+    veredicto = "REGRESIÓN: más lento que el flotante" if relacion < 0.95 else "no más lento que el flotante"
+    print(f"exacto sin caché / flotante: {relacion:.2f}x ({veredicto})")
+
+    diferentes = sum(cuota_flotante(*p) != tuple(cuota.calcular_cuota_exacta(*p)) for p in unicos)
+    print(f"El cálculo flotante difiere al centavo en {diferentes} de {distintos} parámetros")
+
+
+if __name__ == "__main__":
+    main()
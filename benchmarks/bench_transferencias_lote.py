@@ -0,0 +1,108 @@
+"""
+Benchmark de transferencias: endpoint individual en bucle contra el endpoint por lote.
+
+Uso:
+    python benchmarks/bench_transferencias_lote.py [transferencias] [cuentas]
+
+Por defecto usa un SQLite temporal; definir BENCH_DATABASE_URL para medir
+contra otra base de datos (debe ser exclusiva del benchmark).
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for variable, valor in {"DB_HOST": "localhost", "DB_PORT": "3306", "DB_USER": "bench", "DB_NAME": "bench"}.items():
+    os.environ.setdefault(variable, valor)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.database import Base, get_db
+from app.models import *
+
+
+def crear_engine():
+    url = os.getenv("BENCH_DATABASE_URL")
+    if url:
+        return create_engine(url)
+    ruta = os.path.join(tempfile.mkdtemp(), "bench.db")
+    return create_engine(f"sqlite:///{ruta}", connect_args={"check_same_thread": False})
+
+
+def preparar(SessionLocal, cuentas):
+    db = SessionLocal()
+    db.query(Movimiento).delete()
+    db.query(Cuenta).delete()
+    db.add_all([
+        Cuenta(IdCuenta=i, Numero=f"B{i}", FechaApertura=date.today(), IdTipoCuenta=1,
+               IdSucursal=1, Saldo=Decimal("1000000.00"), Sobregiro=Decimal("0.00"))
+        for i in range(1, cuentas + 1)
+    ])
+    db.commit()
+    db.close()
+
+
+def total(SessionLocal):
+    db = SessionLocal()
+    try:
+        return db.query(func.sum(Cuenta.Saldo)).scalar()
+    finally:
+        db.close()
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    cuentas = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    engine = crear_engine()
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+
+    aleatorio = random.Random(42)
+    transferencias = []
+    for _ in range(cantidad):
+        origen, destino = aleatorio.sample(range(1, cuentas + 1), 2)
+        transferencias.append({
+            "IdCuentaOrigen": origen, "IdCuentaDestino": destino,
+            "IdSucursal": 1, "Valor": str(Decimal(aleatorio.randint(100, 50000)) / 100)
+        })
+
+    preparar(SessionLocal, cuentas)
+    inicio = time.perf_counter()
+    for transferencia in transferencias:
+        client.post("/api/movimientos/transferencia", json=transferencia)
+    individual = cantidad / (time.perf_counter() - inicio)
+    saldo_individual = total(SessionLocal)
+
+    preparar(SessionLocal, cuentas)
+    inicio = time.perf_counter()
+    response = client.post("/api/movimientos/transferencias/lote", json={"Transferencias": transferencias})
+    lote = cantidad / (time.perf_counter() - inicio)
+
+    print(f"Motor: {engine.dialect.name}   transferencias: {cantidad}   cuentas: {cuentas}")
+    print(f"Endpoint individual en bucle  {individual:>10.1f} transferencias/s   suma de saldos {saldo_individual}")
+    print(f"Endpoint por lote             {lote:>10.1f} transferencias/s   suma de saldos {total(SessionLocal)}"
+          f"   exitosas {response.json()['Exitosas']}")
+    print(f"Aceleración: {lote / individual:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -86,13 +86,15 @@ BEGIN
     WHILE i <= 50 DO
         SET j = 1 + FLOOR(RAND() * 3);
         WHILE j > 0 DO
-            INSERT INTO cuenta (Numero, FechaApertura, IdTipoCuenta, IdSucursal, Saldo, Sobregiro, GranMovimiento, SobregiroNoAutorizado)
+            SET @saldo = ROUND(RAND() * 10000000, 2);
+            INSERT INTO cuenta (Numero, FechaApertura, IdTipoCuenta, IdSucursal, Saldo, SaldoApertura, Sobregiro, GranMovimiento, SobregiroNoAutorizado)
             VALUES (
                 CONCAT('CU', LPAD(i, 6, '0')),
                 DATE_SUB(CURDATE(), INTERVAL FLOOR(RAND() * 1000) DAY),
                 FLOOR(1 + RAND() * 5),
                 FLOOR(1 + RAND() * 5),
-                ROUND(RAND() * 10000000, 2),
+                @saldo,
+                @saldo,
                 ROUND(RAND() * 1000, 2),
                 RAND() > 0.8,
                 RAND() > 0.9
@@ -10,9 +10,15 @@ USE BancoDB;
 -- ELIMINAR TABLAS (ORDEN CORRECTO)
 -- ======================================
 -- Se eliminan primero las tablas con FOREIGN KEY hacia otras.
+DROP TABLE IF EXISTS saldo_diario;
+DROP TABLE IF EXISTS saldo_fragmento;
+DROP TABLE IF EXISTS evento_cuenta;
+DROP TABLE IF EXISTS resumen_sucursal_diario;
+DROP TABLE IF EXISTS idempotencia;
 DROP TABLE IF EXISTS movimiento;
 DROP TABLE IF EXISTS titular;
-DROP TABLE IF EXISTS prestamo;
+DROP TABLE IF EXISTS cuota_prestamo;
+DROP TABLE IF EXISTS Prestamo;
 DROP TABLE IF EXISTS cuenta;
 DROP TABLE IF EXISTS sucursal;
 DROP TABLE IF EXISTS cuentahabiente;
@@ -89,6 +95,7 @@ CREATE TABLE cuenta (
     IdTipoCuenta INT,
     IdSucursal INT,
     Saldo DECIMAL(15,2),
+    SaldoApertura DECIMAL(15,2) NULL,
     Sobregiro DECIMAL(15,2),
     GranMovimiento BOOLEAN,
     SobregiroNoAutorizado BOOLEAN,
@@ -104,17 +111,25 @@ CREATE TABLE titular (
     FOREIGN KEY (IdCuentahabiente) REFERENCES cuentahabiente(IdCuentahabiente)
 );
 
+-- Particionada por mes de Fecha (ver app/utils/particiones.py). MySQL no admite
+-- llaves foráneas en tablas particionadas y exige que la llave primaria incluya
+-- Fecha. Después de cargar datos, crear las particiones mensuales con
+--   python -m app.jobs.particiones_movimiento
 CREATE TABLE movimiento (
-    IdMovimiento INT AUTO_INCREMENT PRIMARY KEY,
+    IdMovimiento INT AUTO_INCREMENT,
     IdCuenta INT,
     IdSucursal INT,
-    Fecha DATE,
+    Fecha DATE NOT NULL,
     Valor DECIMAL(15,2),
     IdTipoMovimiento INT,
     Descripcion VARCHAR(200),
-    FOREIGN KEY (IdCuenta) REFERENCES cuenta(IdCuenta),
-    FOREIGN KEY (IdSucursal) REFERENCES sucursal(IdSucursal),
-    FOREIGN KEY (IdTipoMovimiento) REFERENCES tipomovimiento(IdTipoMovimiento)
+    PRIMARY KEY (IdMovimiento, Fecha),
+    INDEX ix_movimiento_cuenta_fecha (IdCuenta, Fecha, IdMovimiento),
+    INDEX ix_movimiento_fecha_sucursal (Fecha, IdSucursal)
+)
+PARTITION BY RANGE COLUMNS(Fecha) (
+    PARTITION pinicial VALUES LESS THAN ('2020-01-01'),
+    PARTITION pfuturo VALUES LESS THAN (MAXVALUE)
 );
 
 CREATE TABLE Prestamo (
@@ -128,4 +143,73 @@ CREATE TABLE Prestamo (
     Seguro DECIMAL(10,2),
     Cuota DECIMAL(15,2),
     FOREIGN KEY (IdCuenta) REFERENCES cuenta(IdCuenta)
-);
\ No newline at end of file
+);
+CREATE TABLE idempotencia (
+    Clave VARCHAR(100) PRIMARY KEY,
+    Ruta VARCHAR(100) NOT NULL,
+    HashSolicitud CHAR(64) NOT NULL,
+    Estado VARCHAR(20) NOT NULL,
+    CodigoEstado INT,
+    Respuesta TEXT,
+    FechaCreacion DATETIME NOT NULL,
+    FechaExpiracion DATETIME NOT NULL,
+    INDEX ix_idempotencia_FechaExpiracion (FechaExpiracion)
+);
+
+CREATE TABLE saldo_diario (
+    IdCuenta INT NOT NULL,
+    Fecha DATE NOT NULL,
+    Saldo DECIMAL(15,2) NOT NULL,
+    PRIMARY KEY (IdCuenta, Fecha),
+    FOREIGN KEY (IdCuenta) REFERENCES cuenta(IdCuenta) ON DELETE CASCADE
+);
+
+CREATE TABLE saldo_fragmento (
+    IdCuenta INT NOT NULL,
+    Fragmento INT NOT NULL,
+    Saldo DECIMAL(15,2) NOT NULL DEFAULT 0.00,
+    PRIMARY KEY (IdCuenta, Fragmento),
+    FOREIGN KEY (IdCuenta) REFERENCES cuenta(IdCuenta) ON DELETE CASCADE
+);
+
+CREATE TABLE resumen_sucursal_diario (
+    Fecha DATE NOT NULL,
+    IdSucursal INT NOT NULL,
+    IdTipoMovimiento INT NOT NULL,
+    Cantidad INT NOT NULL DEFAULT 0,
+    Total DECIMAL(18,2) NOT NULL DEFAULT 0.00,
+    PRIMARY KEY (Fecha, IdSucursal, IdTipoMovimiento),
+    INDEX ix_resumen_sucursal_fecha (IdSucursal, Fecha),
+    FOREIGN KEY (IdSucursal) REFERENCES sucursal(IdSucursal),
+    FOREIGN KEY (IdTipoMovimiento) REFERENCES tipomovimiento(IdTipoMovimiento)
+);
+
+CREATE TABLE evento_cuenta (
+    IdEvento INT AUTO_INCREMENT PRIMARY KEY,
+    IdCuenta INT NOT NULL,
+    IdMovimiento INT NULL,
+    IdTipoMovimiento INT NOT NULL,
+    Fecha DATE NOT NULL,
+    Valor DECIMAL(15,2) NOT NULL,
+    Descripcion VARCHAR(200),
+    FechaCreacion DATETIME NOT NULL,
+    INDEX ix_evento_cuenta_cuenta (IdCuenta, IdEvento),
+    INDEX ix_evento_cuenta_FechaCreacion (FechaCreacion),
+    FOREIGN KEY (IdCuenta) REFERENCES cuenta(IdCuenta) ON DELETE CASCADE
+);
+
+CREATE TABLE cuota_prestamo (
+    IdCuota INT AUTO_INCREMENT PRIMARY KEY,
+    IdPrestamo INT NOT NULL,
+    NumeroCuota INT NOT NULL,
+    FechaVencimiento DATE NOT NULL,
+    Capital DECIMAL(15,2) NOT NULL,
+    Interes DECIMAL(15,2) NOT NULL,
+    Seguro DECIMAL(10,2) NOT NULL,
+    Valor DECIMAL(15,2) NOT NULL,
+    Estado VARCHAR(10) NOT NULL,
+    FechaPago DATE,
+    UNIQUE KEY uq_cuota_prestamo_numero (IdPrestamo, NumeroCuota),
+    INDEX ix_cuota_prestamo_estado_vencimiento (Estado, FechaVencimiento),
+    FOREIGN KEY (IdPrestamo) REFERENCES Prestamo(IdPrestamo) ON DELETE CASCADE
+);
@@ -0,0 +1,137 @@
+import os
+
+# app.database construye la URL de MySQL al importarse; las pruebas usan SQLite
+for variable, valor in {
+    "DB_HOST": "localhost",
+    "DB_PORT": "3306",
+    "DB_USER": "test",
+    "DB_NAME": "test",
+    "DEBUG": "True",
+    # Sin límites de velocidad salvo en las pruebas que los configuran
+    "VELOCIDAD_OPERACIONES_HORA": "",
+    "VELOCIDAD_MONTO_HORA": "",
+    "VELOCIDAD_OPERACIONES_DIA": "",
+    "VELOCIDAD_MONTO_DIA": "",
+    "VELOCIDAD_PRECARGAR": "False",
+    "FRAGMENTOS_REFRESCO": "0",
+    "EVENTOS_INTERVALO": "0",
+}.items():
+    os.environ.setdefault(variable, valor)
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.main import app
+from app.database import Base, get_db
+from app.models import *
+from app.utils.velocidad import limites_velocidad
+
+
+@pytest.fixture(autouse=True)
+def reiniciar_limites_velocidad():
+    """Los contadores de velocidad viven en el proceso: cada prueba parte de cero"""
+    limites_velocidad.reiniciar()
+    yield
+    limites_velocidad.reiniciar()
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    """Base de datos SQLite en archivo, compartible entre hilos"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'bytebank.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30}
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def SessionLocal(engine):
+    return sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+@pytest.fixture()
+def client(SessionLocal):
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    anterior = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    if anterior is None:
+        app.dependency_overrides.pop(get_db, None)
+    else:
+        app.dependency_overrides[get_db] = anterior
+
+
+@pytest.fixture()
+def override_get_async_db(engine):
+    """Dependencia get_db en modo asíncrono (aiosqlite) sobre la misma base de datos"""
+    # NullPool: las conexiones de aiosqlite quedan ligadas al event loop que las creó
+    async_engine = create_async_engine(
+        engine.url.set(drivername="sqlite+aiosqlite"),
+        connect_args={"timeout": 30},
+        poolclass=NullPool
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    anterior = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    yield override_get_db
+    if anterior is None:
+        app.dependency_overrides.pop(get_db, None)
+    else:
+        app.dependency_overrides[get_db] = anterior
+
+
+@pytest.fixture()
+def async_client(override_get_async_db):
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture()
+def datos_base(SessionLocal):
+    """Catálogos mínimos, una sucursal y tres cuentas (IDs 1, 2 y 3)"""
+    db = SessionLocal()
+    db.add_all([
+        Ciudad(Ciudad="Bogotá"),
+        TipoSucursal(TipoSucursal="Sucursal Principal"),
+        TipoCuenta(TipoCuenta="Cuenta de Ahorros", Sobregiro=Decimal("0.00")),
+        TipoCuenta(TipoCuenta="Cuenta Corriente", Sobregiro=Decimal("5000000.00")),
+    ])
+    db.add_all([
+        TipoMovimiento(TipoMovimiento=nombre)
+        for nombre in ["Depósito", "Retiro", "Transferencia Enviada", "Transferencia Recibida",
+                       "Pago de Servicios", "Consignación"]
+    ])
+    db.flush()
+    db.add(Sucursal(Sucursal="ByteBank Centro", IdCiudad=1, IdTipoSucursal=1))
+    db.flush()
+    db.add_all([
+        Cuenta(Numero="1001", FechaApertura=date(2024, 1, 15), IdTipoCuenta=1, IdSucursal=1,
+               Saldo=Decimal("1000.00"), Sobregiro=Decimal("0.00")),
+        Cuenta(Numero="2002", FechaApertura=date(2024, 1, 15), IdTipoCuenta=2, IdSucursal=1,
+               Saldo=Decimal("500.00"), Sobregiro=Decimal("300.00")),
+        Cuenta(Numero="3003", FechaApertura=date(2024, 1, 15), IdTipoCuenta=1, IdSucursal=1,
+               Saldo=Decimal("0.00"), Sobregiro=Decimal("0.00")),
+    ])
+    db.commit()
+    db.close()
@@ -0,0 +1,80 @@
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from fractions import Fraction
+
+import pytest
+
+from app.models import Prestamo
+from app.utils.amortizacion import tabla_amortizacion
+
+
+def _sumar(cuotas, campo):
+    return sum((Decimal(str(c[campo])) for c in cuotas), Decimal("0"))
+
+
+@pytest.mark.parametrize("valor, interes, plazo", [
+    ("10000000.00", "12.50", 36),
+    ("1234567.89", "0.00", 7),
+    ("500000000.00", "28.90", 360),
+    ("10.00", "99.99", 360),
+    ("1284316943.91", "18.37", 240),
+    ("750000.00", "7.125", 60),
+])
+def test_tabla_cuadra_al_centavo(valor, interes, plazo):
+    tabla = tabla_amortizacion(Decimal(valor), Decimal(interes), plazo, Decimal("1500.00"))
+    cuotas = tabla["Cuotas"]
+
+    assert len(cuotas) == plazo
+    assert _sumar(cuotas, "Capital") == Decimal(valor)
+    assert cuotas[-1]["Saldo"] == Decimal("0")
+    assert all(c["Cuota"] == c["Interes"] + c["Capital"] for c in cuotas)
+    assert all(c["CuotaTotal"] == c["Cuota"] + Decimal("1500.00") for c in cuotas)
+    assert tabla["TotalIntereses"] == _sumar(cuotas, "Interes")
+    assert tabla["TotalAPagar"] == Decimal(valor) + tabla["TotalIntereses"] + tabla["TotalSeguro"]
+
+    # Interés de cada periodo: saldo anterior por la tasa mensual, redondeado al centavo
+    tasa = Fraction(Decimal(interes)) / 1200
+    saldo = Decimal(valor)
+    for cuota in cuotas:
+        exacto = Fraction(saldo) * tasa
+        assert cuota["Interes"] == (Decimal(exacto.numerator) / Decimal(exacto.denominator)).quantize(
+            Decimal("0.01"), rounding=ROUND_HALF_UP
+        )
+        assert cuota["Saldo"] == saldo - cuota["Capital"]
+        saldo = cuota["Saldo"]
+
+
+def test_endpoint_sin_estado_y_cache(client):
+    tabla_amortizacion.cache_clear()
+    datos = {"Valor": "10000000.00", "Interes": "12.50", "Plazo": 36, "Seguro": "50000.00"}
+
+    primera = client.post("/api/prestamos/tabla-amortizacion", json=datos)
+    segunda = client.post("/api/prestamos/tabla-amortizacion", json=datos)
+
+    assert primera.status_code == 200, primera.text
+    assert primera.json() == segunda.json()
+    assert tabla_amortizacion.cache_info().hits == 1
+    cuerpo = primera.json()
+    assert Decimal(str(cuerpo["Cuota"])) == Decimal("334536.26")
+    assert len(cuerpo["Cuotas"]) == 36
+
+    datos["Plazo"] = 361
+    assert client.post("/api/prestamos/tabla-amortizacion", json=datos).status_code == 422
+
+
+def test_amortizacion_de_prestamo(client, datos_base, SessionLocal):
+    db = SessionLocal()
+    db.add(Prestamo(
+        IdCuenta=1, Numero="P-0001", Fecha=date(2025, 1, 10), Valor=Decimal("2400000.00"),
+        Interes=Decimal("0.00"), Plazo=24, Seguro=Decimal("0.00"), Cuota=Decimal("100000.00")
+    ))
+    db.commit()
+    db.close()
+
+    response = client.get("/api/prestamos/1/amortizacion")
+    assert response.status_code == 200, response.text
+    cuotas = response.json()["Cuotas"]
+    assert {Decimal(str(c["Cuota"])) for c in cuotas} == {Decimal("100000.00")}
+    assert Decimal(str(cuotas[0]["Saldo"])) == Decimal("2300000.00")
+
+    assert client.get("/api/prestamos/99/amortizacion").status_code == 404
@@ -0,0 +1,86 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.crud import analitica
+from app.models import Ciudad, Movimiento, Sucursal
+from app.utils import tiempo_consulta
+
+
+@pytest.fixture()
+def movimientos(datos_base, SessionLocal):
+    db = SessionLocal()
+    db.add(Ciudad(Ciudad="Medellín"))
+    db.flush()
+    db.add(Sucursal(Sucursal="ByteBank Poblado", IdCiudad=2, IdTipoSucursal=1))
+    db.flush()
+    db.add_all([
+        # Lunes 3, domingo 9 y lunes 10 de marzo; 1 de abril
+        Movimiento(IdCuenta=1, IdSucursal=1, Fecha=date(2025, 3, 3), Valor=Decimal("100.00"), IdTipoMovimiento=1),
+        Movimiento(IdCuenta=2, IdSucursal=1, Fecha=date(2025, 3, 9), Valor=Decimal("50.00"), IdTipoMovimiento=1),
+        Movimiento(IdCuenta=1, IdSucursal=2, Fecha=date(2025, 3, 10), Valor=Decimal("-30.00"), IdTipoMovimiento=2),
+        Movimiento(IdCuenta=3, IdSucursal=2, Fecha=date(2025, 4, 1), Valor=Decimal("25.00"), IdTipoMovimiento=1),
+    ])
+    db.commit()
+    db.close()
+
+
+def _consultar(client, **parametros):
+    parametros.setdefault("desde", "2025-03-01")
+    parametros.setdefault("hasta", "2025-04-30")
+    response = client.get("/api/analitica/movimientos", params=parametros)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _grupos(cuerpo, *llaves):
+    return {
+        tuple(g[llave] for llave in llaves): (g["Cantidad"], Decimal(str(g["Total"])), Decimal(str(g["Promedio"])))
+        for g in cuerpo["Grupos"]
+    }
+
+
+def test_agrupaciones(client, movimientos):
+    cuerpo = _consultar(client, agrupar=["mes", "tipo_movimiento"])
+    assert _grupos(cuerpo, "Periodo", "IdTipoMovimiento") == {
+        ("2025-03-01", 1): (2, Decimal("150.00"), Decimal("75.00")),
+        ("2025-03-01", 2): (1, Decimal("-30.00"), Decimal("-30.00")),
+        ("2025-04-01", 1): (1, Decimal("25.00"), Decimal("25.00")),
+    }
+    assert "IdCiudad" not in cuerpo["Grupos"][0]
+
+    # Las semanas empiezan el lunes
+    semanas = _grupos(_consultar(client, agrupar="semana"), "Periodo")
+    assert {s: c for (s,), (c, _, _) in semanas.items()} == {"2025-03-03": 2, "2025-03-10": 1, "2025-03-31": 1}
+
+    cuerpo = _consultar(client, agrupar=["ciudad", "tipo_cuenta"], tipo_movimiento_id=1)
+    assert _grupos(cuerpo, "IdCiudad", "IdTipoCuenta") == {
+        (1, 1): (1, Decimal("100.00"), Decimal("100.00")),
+        (1, 2): (1, Decimal("50.00"), Decimal("50.00")),
+        (2, 1): (1, Decimal("25.00"), Decimal("25.00")),
+    }
+
+    # Filtro por ciudad sin agrupar: un solo total
+    cuerpo = _consultar(client, ciudad_id=2)
+    assert _grupos(cuerpo) == {(): (2, Decimal("-5.00"), Decimal("-2.50"))}
+    assert _consultar(client, ciudad_id=3)["Grupos"] == []
+
+
+def test_limites(client, movimientos, monkeypatch):
+    cuerpo = _consultar(client, agrupar="dia", limite=2)
+    assert [g["Periodo"] for g in cuerpo["Grupos"]] == ["2025-03-03", "2025-03-09"]
+    assert cuerpo["Truncado"] is True
+    assert _consultar(client, agrupar="dia", limite=4)["Truncado"] is False
+
+    respuesta = client.get("/api/analitica/movimientos", params={"agrupar": ["dia", "mes"]})
+    assert respuesta.status_code == 400
+    respuesta = client.get("/api/analitica/movimientos", params={"desde": "2024-01-01", "hasta": "2025-04-30"})
+    assert respuesta.status_code == 400
+    respuesta = client.get("/api/analitica/movimientos", params={"agrupar": "anio"})
+    assert respuesta.status_code == 422
+
+    monkeypatch.setattr(analitica, "ANALITICA_TIEMPO_MAXIMO", 0)
+    monkeypatch.setattr(tiempo_consulta, "PASOS_SQLITE", 1)
+    respuesta = client.get("/api/analitica/movimientos", params={"desde": "2025-03-01", "hasta": "2025-04-30", "agrupar": "sucursal"})
+    assert respuesta.status_code == 504
@@ -0,0 +1,132 @@
+import gzip
+import json
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import func, select
+
+from app.jobs import archivar_movimientos
+from app.models import Movimiento
+from app.utils import archivo
+from app.utils.archivo import ArchivoMovimientos, MovimientoArchivado, escribir_mes
+
+
+def _fila(id_movimiento, id_cuenta, fecha, valor):
+    return MovimientoArchivado(id_movimiento, id_cuenta, 1, fecha, Decimal(valor), 1, f"Movimiento {id_movimiento}")
+
+
+def test_lectura_solo_de_los_bloques_de_la_cuenta(tmp_path, monkeypatch):
+    mes = date(2023, 1, 1)
+    filas = [
+        _fila(i * 10 + dia, cuenta, date(2023, 1, dia), f"{cuenta}.{dia:02d}")
+        for i, cuenta in enumerate([1, 2, 3, 4, 5], start=1)
+        for dia in (3, 7, 20)
+    ]
+    assert escribir_mes(str(tmp_path), mes, filas, filas_por_bloque=4) == 15
+
+    # Los bloques concatenados siguen siendo un gzip válido
+    with gzip.open(tmp_path / "movimientos_202301.ndjson.gz", "rt", encoding="utf-8") as datos:
+        assert [json.loads(linea)["IdMovimiento"] for linea in datos] == [f.IdMovimiento for f in filas]
+    indice = json.loads((tmp_path / "movimientos_202301.idx.json").read_text())
+    assert [(b[0], b[1], b[4]) for b in indice["Bloques"]] == [(1, 2, 4), (2, 3, 4), (3, 4, 4), (5, 5, 3)]
+
+    descomprimidos = []
+    descomprimir = gzip.decompress
+    monkeypatch.setattr(archivo.gzip, "decompress", lambda datos: descomprimidos.append(datos) or descomprimir(datos))
+
+    lector = ArchivoMovimientos(str(tmp_path))
+    assert lector.meses() == [mes]
+    assert lector.fecha_corte() == date(2023, 2, 1)
+    assert [f.IdMovimiento for f in lector.movimientos_cuenta(2)] == [23, 27, 40]
+    assert len(descomprimidos) == 2
+    assert [f.IdMovimiento for f in lector.movimientos_cuenta(5, desde=date(2023, 1, 5), descendente=True)] == [70, 57]
+    assert len(descomprimidos) == 3
+    assert lector.sumar_cuenta(4, hasta=date(2023, 1, 10)) == Decimal("8.10")
+    assert len(descomprimidos) == 4
+    assert list(lector.movimientos_cuenta(9)) == []
+    assert len(descomprimidos) == 4
+
+
+def test_archivado_transparente_para_listados_extracto_y_saldo(client, datos_base, SessionLocal, tmp_path, monkeypatch):
+    monkeypatch.setattr(archivar_movimientos, "SessionLocal", SessionLocal)
+    monkeypatch.setattr(archivo.archivo_movimientos, "directorio", str(tmp_path / "archivo"))
+    hoy = date.today()
+    db = SessionLocal()
+    db.add_all([
+        Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("300.00"), Fecha=date(2023, 1, 10)),
+        Movimiento(IdCuenta=2, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("80.00"), Fecha=date(2023, 1, 12)),
+        Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=2, Valor=Decimal("-100.00"), Fecha=date(2023, 1, 31)),
+        Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("40.00"), Fecha=date(2023, 3, 2)),
+        Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("50.00"), Fecha=hoy),
+        Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=2, Valor=Decimal("-20.00"), Fecha=hoy),
+    ])
+    db.commit()
+    db.close()
+
+    def recorrer_con_cursor():
+        ids, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/api/movimientos/cuenta/1", params=params)
+            ids += [m["IdMovimiento"] for m in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return ids
+
+    def consultas():
+        return {
+            "listado": client.get("/api/movimientos/cuenta/1").json(),
+            "cursor": recorrer_con_cursor(),
+            "skip": [client.get("/api/movimientos/cuenta/1", params={"skip": s, "limit": 2}).json() for s in (1, 3, 4)],
+            "rango": client.get("/api/movimientos/cuenta/1", params={"desde": "2023-01-11", "hasta": "2023-03-31"}).json(),
+            "extracto": client.get("/api/cuentas/1/extracto", params={"desde": "2023-01-11", "hasta": hoy.isoformat()}).json(),
+            "saldo": client.get("/api/cuentas/1/saldo", params={"fecha": "2023-01-20"}).json(),
+        }
+
+    antes = consultas()
+    assert antes["cursor"] == [6, 5, 4, 3, 1]
+    assert archivar_movimientos.archivar(meses=3, hoy=hoy) == [(date(2023, 1, 1), 3), (date(2023, 3, 1), 1)]
+
+    db = SessionLocal()
+    assert db.execute(select(func.count()).select_from(Movimiento)).scalar() == 2
+    db.close()
+    assert consultas() == antes
+
+    # Un movimiento nuevo en un mes archivado se integra al volver a archivar, sin duplicados
+    db = SessionLocal()
+    db.add(Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("5.00"), Fecha=date(2023, 1, 15)))
+    db.commit()
+    db.close()
+    assert archivar_movimientos.archivar(meses=3, hoy=hoy)[0] == (date(2023, 1, 1), 4)
+    ids = [m["IdMovimiento"] for m in client.get("/api/movimientos/cuenta/1").json()]
+    assert ids == [6, 5, 4, 3, 7, 1]
+
+
+def test_fila_insertada_durante_el_archivado_no_se_pierde(datos_base, SessionLocal, tmp_path, monkeypatch):
+    monkeypatch.setattr(archivar_movimientos, "SessionLocal", SessionLocal)
+    monkeypatch.setattr(archivo.archivo_movimientos, "directorio", str(tmp_path / "archivo"))
+    db = SessionLocal()
+    db.add(Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("10.00"), Fecha=date(2023, 1, 10)))
+    db.commit()
+    db.close()
+
+    escribir = archivar_movimientos.escribir_mes
+
+    def escribir_e_insertar(directorio, mes, filas):
+        escritas = escribir(directorio, mes, filas)
+        # Otra solicitud registra un movimiento del mismo mes entre la lectura y el borrado
+        otra = SessionLocal()
+        otra.add(Movimiento(IdCuenta=2, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("5.00"), Fecha=date(2023, 1, 20)))
+        otra.commit()
+        otra.close()
+        return escritas
+
+    monkeypatch.setattr(archivar_movimientos, "escribir_mes", escribir_e_insertar)
+    assert archivar_movimientos.archivar(meses=3, hoy=date(2023, 6, 1)) == [(date(2023, 1, 1), 1)]
+    db = SessionLocal()
+    assert [m.IdCuenta for m in db.query(Movimiento)] == [2]
+    db.close()
+
+    monkeypatch.setattr(archivar_movimientos, "escribir_mes", escribir)
+    assert archivar_movimientos.archivar(meses=3, hoy=date(2023, 6, 1)) == [(date(2023, 1, 1), 2)]
+    assert [f.IdCuenta for f in ArchivoMovimientos(str(tmp_path / "archivo")).filas_mes(date(2023, 1, 1))] == [1, 2]
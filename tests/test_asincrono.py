@@ -0,0 +1,62 @@
+import asyncio
+import uuid
+from decimal import Decimal
+
+import httpx
+
+from app.main import app
+from app.models import Cuenta
+
+
+def _saldo(SessionLocal, cuenta_id):
+    db = SessionLocal()
+    try:
+        return db.get(Cuenta, cuenta_id).Saldo
+    finally:
+        db.close()
+
+
+def test_modo_asincrono_crud_y_movimientos(async_client, datos_base, SessionLocal):
+    response = async_client.post("/api/ciudades/", json={"Ciudad": "Medellín"})
+    assert response.status_code == 201
+    ciudad_id = response.json()["IdCiudad"]
+    response = async_client.put(f"/api/ciudades/{ciudad_id}", json={"Ciudad": "Cali"})
+    assert response.json()["Ciudad"] == "Cali"
+    assert int(response.headers["X-DB-Round-Trips"]) <= 2
+    assert async_client.get("/api/ciudades/999").status_code == 404
+
+    response = async_client.post("/api/movimientos/deposito", json={"IdCuenta": 1, "IdSucursal": 1, "Valor": "250.00"})
+    assert response.status_code == 201
+    assert "X-Lock-Wait-Ms" in response.headers
+    assert int(response.headers["X-DB-Round-Trips"]) <= 6
+
+    response = async_client.post("/api/movimientos/transferencia", json={
+        "IdCuentaOrigen": 1, "IdCuentaDestino": 3, "IdSucursal": 1, "Valor": "2000.00"
+    })
+    assert response.status_code == 400
+    assert "Saldo insuficiente" in response.json()["detail"]
+
+    # Idempotencia sobre la sesión asíncrona
+    clave = {"Idempotency-Key": str(uuid.uuid4())}
+    retiro = {"IdCuenta": 1, "IdSucursal": 1, "Valor": "50.00"}
+    primera = async_client.post("/api/movimientos/retiro", json=retiro, headers=clave)
+    repetida = async_client.post("/api/movimientos/retiro", json=retiro, headers=clave)
+    assert repetida.headers["Idempotent-Replayed"] == "true"
+    assert repetida.json() == primera.json()
+    assert _saldo(SessionLocal, 1) == Decimal("1200.00")
+
+
+def test_retiros_concurrentes_en_modo_asincrono(override_get_async_db, datos_base, SessionLocal):
+    async def retirar_concurrentemente():
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://test") as cliente:
+            respuestas = await asyncio.gather(*[
+                cliente.post("/api/movimientos/retiro", json={"IdCuenta": 1, "IdSucursal": 1, "Valor": "30.00"})
+                for _ in range(50)
+            ])
+        return [r.status_code for r in respuestas]
+
+    codigos = asyncio.run(retirar_concurrentemente())
+    assert codigos.count(201) == 33
+    assert codigos.count(400) == 17
+    assert _saldo(SessionLocal, 1) == Decimal("10.00")
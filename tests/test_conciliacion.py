@@ -0,0 +1,105 @@
+import json
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import update
+
+from app.jobs import conciliacion, saldos_apertura
+from app.models import Cuenta, Movimiento
+from app.utils import archivo
+from app.utils.archivo import MovimientoArchivado, escribir_mes
+
+
+@pytest.fixture()
+def job(SessionLocal, monkeypatch):
+    monkeypatch.setattr(conciliacion, "SessionLocal", SessionLocal)
+    monkeypatch.setattr(saldos_apertura, "SessionLocal", SessionLocal)
+    return conciliacion
+
+
+def test_conciliacion_reporta_cuentas_descuadradas(client, datos_base, SessionLocal, job, tmp_path):
+    client.post("/api/movimientos/deposito", json={"IdCuenta": 1, "IdSucursal": 1, "Valor": "250.00"})
+    client.post("/api/movimientos/transferencia", json={
+        "IdCuentaOrigen": 2, "IdCuentaDestino": 3, "IdSucursal": 1, "Valor": "100.00"
+    })
+    db = SessionLocal()
+    # Descuadres: un movimiento sin cambio de saldo y un saldo modificado sin movimiento
+    db.add(Movimiento(IdCuenta=2, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("30.00"), Fecha=date.today()))
+    db.execute(update(Cuenta).where(Cuenta.IdCuenta == 3).values(Saldo=Decimal("90.00")))
+    db.commit()
+    db.close()
+
+    reporte = job.conciliar(tamano_lote=2, hilos=2, directorio=str(tmp_path))
+    assert reporte["Modo"] == "COMPLETA"
+    assert reporte["Lotes"] == 2
+    assert reporte["CuentasRevisadas"] == 3
+    assert [(d["IdCuenta"], d["Diferencia"]) for d in reporte["Discrepancias"]] == [(2, "-30.00"), (3, "-10.00")]
+    with open(reporte["Archivo"], encoding="utf-8") as archivo:
+        assert json.load(archivo)["Discrepancias"] == reporte["Discrepancias"]
+
+
+def test_conciliacion_continua_tras_interrupcion_e_incremental(client, datos_base, SessionLocal, job, tmp_path, monkeypatch):
+    revisados = []
+    conciliar_lote = job.conciliar_lote
+
+    def fallar_en_la_cuenta_3(lote):
+        if lote.get("Desde") == 3:
+            raise RuntimeError("conexión perdida")
+        revisados.append(lote)
+        return conciliar_lote(lote)
+
+    monkeypatch.setattr(job, "conciliar_lote", fallar_en_la_cuenta_3)
+    with pytest.raises(RuntimeError):
+        job.conciliar(tamano_lote=2, hilos=1, directorio=str(tmp_path))
+    assert revisados == [{"Desde": 1, "Hasta": 2}]
+
+    # La siguiente ejecución solo concilia el lote pendiente
+    monkeypatch.setattr(job, "conciliar_lote", lambda lote: revisados.append(lote) or conciliar_lote(lote))
+    reporte = job.conciliar(tamano_lote=2, hilos=1, directorio=str(tmp_path))
+    assert revisados[1:] == [{"Desde": 3, "Hasta": 3}]
+    assert reporte["CuentasRevisadas"] == 3 and reporte["Discrepancias"] == []
+
+    # Incremental: solo la cuenta con movimientos desde la última ejecución
+    client.post("/api/movimientos/deposito", json={"IdCuenta": 2, "IdSucursal": 1, "Valor": "10.00"})
+    reporte = job.conciliar(incremental=True, directorio=str(tmp_path))
+    assert reporte["Modo"] == "INCREMENTAL"
+    assert revisados[2:] == [{"Cuentas": [2]}]
+    assert reporte["CuentasRevisadas"] == 1 and reporte["Discrepancias"] == []
+
+
+def test_saldo_apertura_de_cuentas_existentes_con_linea_base(datos_base, SessionLocal, job, tmp_path, monkeypatch):
+    # Cuentas anteriores a la columna: sin saldo de apertura; la 2 tiene un mes archivado
+    monkeypatch.setattr(archivo.archivo_movimientos, "directorio", str(tmp_path / "archivo"))
+    escribir_mes(str(tmp_path / "archivo"), date(2023, 1, 1), [
+        MovimientoArchivado(90, 2, 1, date(2023, 1, 5), Decimal("200.00"), 1, "Depósito")
+    ])
+    db = SessionLocal()
+    db.add(Movimiento(IdCuenta=2, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("50.00"), Fecha=date.today()))
+    db.execute(update(Cuenta).where(Cuenta.IdCuenta.in_([1, 2])).values(SaldoApertura=None))
+    db.commit()
+    db.close()
+
+    reporte = job.conciliar(directorio=str(tmp_path))
+    assert (reporte["CuentasRevisadas"], reporte["SinApertura"], reporte["Discrepancias"]) == (1, 2, [])
+
+    linea_base = saldos_apertura.establecer(tamano_lote=2, directorio=str(tmp_path))
+    assert (linea_base["CuentasAsignadas"], linea_base["ConSaldoNoExplicado"]) == (2, 2)
+    # La apertura descuenta también los movimientos archivados: 500 - 50 - 200
+    assert [(c["IdCuenta"], c["SumaMovimientos"], c["SaldoApertura"]) for c in linea_base["Cuentas"]] == [
+        (1, "0", "1000.00"), (2, "250.00", "250.00")
+    ]
+    with open(linea_base["Archivo"], encoding="utf-8") as reporte_archivo:
+        assert json.load(reporte_archivo)["Cuentas"] == linea_base["Cuentas"]
+    reporte = job.conciliar(directorio=str(tmp_path))
+    assert (reporte["CuentasRevisadas"], reporte["SinApertura"], reporte["Discrepancias"]) == (3, 0, [])
+
+    # Una apertura calculada sin el archivo se corrige con --recalcular y queda en la línea base
+    db = SessionLocal()
+    db.execute(update(Cuenta).where(Cuenta.IdCuenta == 2).values(SaldoApertura=Decimal("450.00")))
+    db.commit()
+    db.close()
+    linea_base = saldos_apertura.establecer(recalcular=True, directorio=str(tmp_path))
+    assert [(c["IdCuenta"], c["SaldoAperturaAnterior"], c["SaldoApertura"]) for c in linea_base["Cuentas"]] == [
+        (2, "450.00", "250.00")
+    ]
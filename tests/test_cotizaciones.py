@@ -0,0 +1,71 @@
+import asyncio
+from decimal import Decimal
+from itertools import product
+
+from app.crud import prestamo
+from app.crud.prestamo import calcular_cuota
+from app.routers import prestamos as router_prestamos
+from app.schemas.prestamo import CalculoCuota
+
+CAMPOS = ("CuotaMensual", "TotalAPagar", "TotalIntereses")
+
+
+def test_grilla_coincide_con_calcular_cuota(client):
+    valores, tasas, plazos, seguros = ["1000000.00", "25000000.50"], ["0.00", "12.50", "33.33"], [1, 36, 360], ["0.00", "4500.00"]
+    response = client.post("/api/prestamos/cotizaciones", json={
+        "Modo": "grilla", "Valor": valores, "Interes": tasas, "Plazo": plazos, "Seguro": seguros
+    })
+    assert response.status_code == 200, response.text
+    cuerpo = response.json()
+
+    assert cuerpo["Escenarios"] == 36
+    assert cuerpo["Dimensiones"] == [2, 3, 3, 2]
+    for k, (valor, tasa, plazo, seguro) in enumerate(product(valores, tasas, plazos, seguros)):
+        assert (cuerpo["Valor"][k], cuerpo["Plazo"][k], cuerpo["Seguro"][k]) == (float(valor), plazo, float(seguro))
+        esperado = calcular_cuota(CalculoCuota(Valor=valor, Interes=tasa, Plazo=plazo, Seguro=seguro))
+        assert {c: Decimal(str(cuerpo[c][k])) for c in CAMPOS} == esperado
+
+
+def test_vectores_repiten_listas_de_un_elemento(client):
+    response = client.post("/api/prestamos/cotizaciones", json={
+        "Valor": ["10000000.00"], "Interes": ["12.00", "18.00", "24.00"], "Plazo": [12, 24, 36]
+    })
+    assert response.status_code == 200, response.text
+    cuerpo = response.json()
+    assert cuerpo["Escenarios"] == 3
+    assert "Dimensiones" not in cuerpo
+    assert cuerpo["Valor"] == [10000000.0] * 3
+    assert cuerpo["Seguro"] == [0.0] * 3
+
+    response = client.post("/api/prestamos/cotizaciones", json={
+        "Valor": ["1.00", "2.00"], "Interes": ["12.00", "18.00", "24.00"], "Plazo": [12]
+    })
+    assert response.status_code == 400
+    response = client.post("/api/prestamos/cotizaciones", json={
+        "Valor": ["1.00"], "Interes": ["101.00"], "Plazo": [12]
+    })
+    assert response.status_code == 422
+
+
+def test_calculos_fuera_del_event_loop(client, monkeypatch):
+    hilos = []
+
+    def sin_loop(funcion):
+        def envoltura(*args):
+            try:
+                asyncio.get_running_loop()
+                hilos.append("event loop")
+            except RuntimeError:
+                hilos.append("threadpool")
+            return funcion(*args)
+        return envoltura
+
+    monkeypatch.setattr(prestamo, "cotizar_lote", sin_loop(prestamo.cotizar_lote))
+    monkeypatch.setattr(router_prestamos, "tabla_amortizacion", sin_loop(router_prestamos.tabla_amortizacion))
+    assert client.post("/api/prestamos/cotizaciones", json={
+        "Valor": ["1000.00"], "Interes": ["12.00"], "Plazo": [12]
+    }).status_code == 200
+    assert client.post("/api/prestamos/tabla-amortizacion", json={
+        "Valor": "1000.00", "Interes": "12.00", "Plazo": 12
+    }).status_code == 200
+    assert hilos == ["threadpool", "threadpool"]
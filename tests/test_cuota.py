@@ -0,0 +1,57 @@
+from decimal import ROUND_HALF_UP, Decimal
+from fractions import Fraction
+
+import pytest
+
+from app.utils import cuota
+
+
+def _referencia(valor, interes, plazo, seguro):
+    """Fórmula en racionales exactos"""
+    valor, seguro = Fraction(valor), Fraction(seguro)
+    if interes == 0:
+        cuota_capital = valor / plazo
+    else:
+        i = Fraction(interes) / 1200
+        cuota_capital = valor * i * (1 + i) ** plazo / ((1 + i) ** plazo - 1)
+    cuota_mensual = cuota_capital + seguro
+    valores = (cuota_mensual, cuota_mensual * plazo, cuota_mensual * plazo - valor)
+    return tuple(
+        (Decimal(x.numerator) / Decimal(x.denominator)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        for x in valores
+    )
+
+
+@pytest.mark.parametrize("valor, interes, plazo, seguro", [
+    ("10000000.00", "12.50", 36, "50000.00"),
+    ("1284316943.91", "0.14", 48, "33417.86"),
+    ("9999999999999.99", "99.99", 360, "0.00"),
+    ("1.00", "0.01", 1, "0.00"),
+    ("1000.00", "0.00", 3, "0.00"),
+])
+def test_cuota_exacta(valor, interes, plazo, seguro):
+    esperado = _referencia(Decimal(valor), Decimal(interes), plazo, Decimal(seguro))
+    assert tuple(cuota.calcular_cuota_exacta(Decimal(valor), Decimal(interes), plazo, Decimal(seguro))) == esperado
+
+
+def test_potencia_por_cuadrados():
+    assert cuota.potencia(Decimal(3), 0) == 1
+    assert cuota.potencia(Decimal(3), 13) == 3 ** 13
+    # (1.01)^360 tiene 720 decimales: se conserva la precisión del contexto
+    error = Fraction(cuota.potencia(Decimal("1.01"), 360)) / Fraction(101, 100) ** 360 - 1
+    assert abs(error) < Fraction(1, 10 ** (cuota.PRECISION - 5))
+
+
+def test_cache_por_entradas_normalizadas(client):
+    cuota.limpiar_cache()
+    datos = {"Valor": "25000000", "Interes": "18.5", "Plazo": 60}
+
+    primera = client.post("/api/prestamos/calcular-cuota", json=datos).json()
+    segunda = client.post(
+        "/api/prestamos/calcular-cuota", json={**datos, "Valor": "25000000.00", "Interes": "18.50", "Seguro": "0"}
+    ).json()
+
+    assert primera == segunda
+    estadisticas = client.get("/api/prestamos/estadisticas/cuotas").json()
+    assert (estadisticas["Aciertos"], estadisticas["Fallos"], estadisticas["Tamano"]) == (1, 1, 1)
+    assert estadisticas["Capacidad"] == cuota.CUOTAS_EN_CACHE
@@ -0,0 +1,140 @@
+import calendar
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.crud.cuota_prestamo import TIPO_MOVIMIENTO_COBRO
+from app.jobs import cobrar_cuotas
+from app.models import Cuenta, CuotaPrestamo, Movimiento, Prestamo
+from app.utils.particiones import sumar_meses
+
+# Préstamos fechados en el futuro: ninguna cuota vence antes de crearlos
+ANIO = date.today().year + 1
+FEBRERO = calendar.monthrange(ANIO, 2)[1]
+
+
+@pytest.fixture()
+def job(SessionLocal, monkeypatch):
+    monkeypatch.setattr(cobrar_cuotas, "SessionLocal", SessionLocal)
+    return cobrar_cuotas
+
+
+def _crear_prestamo(client, cuenta_id, numero, valor="600.00", interes="12.00", plazo=3, fecha=None):
+    response = client.post("/api/prestamos/", json={
+        "IdCuenta": cuenta_id, "Numero": numero, "Fecha": (fecha or date(ANIO, 1, 31)).isoformat(),
+        "Valor": valor, "Interes": interes, "Plazo": plazo, "Seguro": "1.00",
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["IdPrestamo"]
+
+
+def _cuotas(client, prestamo_id):
+    response = client.get(f"/api/prestamos/{prestamo_id}/cuotas")
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_plan_generado_y_reamortizado(client, datos_base, job):
+    prestamo_id = _crear_prestamo(client, 1, "P1")
+    cuotas = _cuotas(client, prestamo_id)
+
+    assert [c["FechaVencimiento"] for c in cuotas] == [f"{ANIO}-02-{FEBRERO}", f"{ANIO}-03-31", f"{ANIO}-04-30"]
+    assert sum(Decimal(c["Capital"]) for c in cuotas) == Decimal("600.00")
+    assert {c["Estado"] for c in cuotas} == {"PENDIENTE"}
+    assert all(Decimal(c["Valor"]) == Decimal(c["Capital"]) + Decimal(c["Interes"]) + 1 for c in cuotas)
+
+    job.cobrar(fecha=date(ANIO, 2, FEBRERO))
+    response = client.put(f"/api/prestamos/{prestamo_id}", json={"Interes": "24.00", "Plazo": 4})
+    assert response.status_code == 200, response.text
+
+    cuotas = _cuotas(client, prestamo_id)
+    assert [(c["NumeroCuota"], c["Estado"]) for c in cuotas] == [
+        (1, "PAGADA"), (2, "PENDIENTE"), (3, "PENDIENTE"), (4, "PENDIENTE")
+    ]
+    # Las cuotas nuevas amortizan el capital que faltaba con la tasa nueva
+    assert sum(Decimal(c["Capital"]) for c in cuotas) == Decimal("600.00")
+    pendiente = Decimal("600.00") - Decimal(cuotas[0]["Capital"])
+    assert Decimal(cuotas[1]["Interes"]) == (pendiente * Decimal("0.02")).quantize(Decimal("0.01"))
+
+    assert client.get("/api/prestamos/99/cuotas").status_code == 404
+
+
+def test_cobro_diario_mora_y_reanudacion(client, datos_base, SessionLocal, job):
+    al_dia = _crear_prestamo(client, 1, "P1")
+    sin_fondos = _crear_prestamo(client, 3, "P2")
+    valor_cuota = Decimal(_cuotas(client, al_dia)[0]["Valor"])
+
+    # Dos lotes de un préstamo en paralelo; se cobran las cuotas de febrero y marzo
+    totales = job.cobrar(fecha=date(ANIO, 3, 31), tamano_lote=1, hilos=2)
+    assert (totales["Prestamos"], totales["Lotes"], totales["Cobradas"], totales["EnMora"]) == (2, 2, 2, 2)
+
+    db = SessionLocal()
+    assert db.get(Cuenta, 1).Saldo == Decimal("1000.00") - 2 * valor_cuota
+    assert db.get(Cuenta, 3).Saldo == Decimal("0.00")
+    movimientos = db.query(Movimiento).filter(Movimiento.IdTipoMovimiento == TIPO_MOVIMIENTO_COBRO).all()
+    assert sorted(m.Descripcion for m in movimientos) == ["Cuota 1/3 préstamo P1", "Cuota 2/3 préstamo P1"]
+    db.close()
+    assert [c["FechaPago"] for c in _cuotas(client, al_dia)] == [f"{ANIO}-03-31", f"{ANIO}-03-31", None]
+    assert [c["Estado"] for c in _cuotas(client, sin_fondos)] == ["MORA", "MORA", "PENDIENTE"]
+
+    # Repetir el cobro no vuelve a debitar lo pagado; la mora se reintenta
+    totales = job.cobrar(fecha=date(ANIO, 3, 31))
+    assert (totales["Prestamos"], totales["Cobradas"], totales["EnMora"]) == (1, 0, 2)
+
+    client.post("/api/movimientos/deposito", json={"IdCuenta": 3, "IdSucursal": 1, "Valor": "1000.00"})
+    totales = job.cobrar(fecha=date(ANIO, 3, 31))
+    assert (totales["Cobradas"], totales["EnMora"]) == (2, 0)
+    assert [c["Estado"] for c in _cuotas(client, sin_fondos)] == ["PAGADA", "PAGADA", "PENDIENTE"]
+
+
+def test_generar_planes_de_prestamos_existentes(client, datos_base, SessionLocal, job):
+    db = SessionLocal()
+    db.add(Prestamo(
+        IdCuenta=1, Numero="P9", Fecha=date(2025, 1, 10), Valor=Decimal("1200.00"),
+        Interes=Decimal("0.00"), Plazo=12, Seguro=Decimal("0.00"), Cuota=Decimal("100.00")
+    ))
+    db.commit()
+    db.close()
+
+    totales = job.cobrar(fecha=date(2025, 6, 10), generar_planes=True)
+
+    assert (totales["PlanesGenerados"], totales["Cobradas"]) == (1, 1)
+    db = SessionLocal()
+    estados = [c.Estado for c in db.query(CuotaPrestamo).order_by(CuotaPrestamo.NumeroCuota)]
+    db.close()
+    # Vencidas antes de la fecha: pagadas por fuera; la del día se cobra
+    assert estados == ["PAGADA"] * 4 + ["PAGADA"] + ["PENDIENTE"] * 7
+
+
+def test_prestamos_con_fecha_anterior_no_cobran_lo_vencido(client, datos_base, SessionLocal, job):
+    hoy = date.today()
+    fecha = sumar_meses(hoy.replace(day=1), -4)
+    creado = _crear_prestamo(client, 1, "P1", plazo=6, fecha=fecha)
+    db = SessionLocal()
+    db.add(Prestamo(
+        IdCuenta=1, Numero="P2", Fecha=fecha, Valor=Decimal("600.00"),
+        Interes=Decimal("0.00"), Plazo=6, Seguro=Decimal("0.00"), Cuota=Decimal("100.00")
+    ))
+    db.commit()
+    anterior = db.query(Prestamo).filter_by(Numero="P2").one().IdPrestamo
+    db.close()
+
+    # Un préstamo sin plan que se actualiza recibe primero el original, con lo vencido pagado
+    response = client.put(f"/api/prestamos/{anterior}", json={"Interes": "12.00"})
+    assert response.status_code == 200, response.text
+
+    for prestamo_id in (creado, anterior):
+        cuotas = _cuotas(client, prestamo_id)
+        assert len(cuotas) == 6
+        assert [c["Estado"] for c in cuotas] == [
+            "PAGADA" if c["FechaVencimiento"] < hoy.isoformat() else "PENDIENTE" for c in cuotas
+        ]
+    # Las pagadas del préstamo anterior conservan los términos originales (sin interés)
+    assert [Decimal(c["Interes"]) for c in _cuotas(client, anterior)[:3]] == [Decimal("0.00")] * 3
+    assert sum(Decimal(c["Capital"]) for c in _cuotas(client, anterior)) == Decimal("600.00")
+
+    # Hoy se cobra a lo sumo la cuota que vence hoy de cada préstamo
+    totales = job.cobrar(fecha=hoy, generar_planes=True)
+    assert totales["PlanesGenerados"] == 0
+    assert totales["Cobradas"] + totales["EnMora"] <= 2
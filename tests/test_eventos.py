@@ -0,0 +1,100 @@
+import asyncio
+from decimal import Decimal
+
+from app.crud import evento_cuenta
+from app.utils.eventos import CentroEventos, CursorEventos, centro_eventos
+from app.utils.fragmentos import cuentas_fragmentadas
+
+
+def _depositar(client, cuenta_id, valor):
+    response = client.post("/api/movimientos/deposito", json={"IdCuenta": cuenta_id, "IdSucursal": 1, "Valor": valor})
+    assert response.status_code == 201
+    return response.json()["IdMovimiento"]
+
+
+def test_bandeja_y_websocket(client, datos_base, SessionLocal):
+    id_deposito = _depositar(client, 1, "100.00")
+    client.post("/api/movimientos/transferencia", json={
+        "IdCuentaOrigen": 1, "IdCuentaDestino": 2, "IdSucursal": 1, "Valor": "40.00"
+    })
+
+    # El relevo ubica su cursor al final de la bandeja
+    db = SessionLocal()
+    cursor = CursorEventos()
+    assert evento_cuenta.leer_nuevos(db, cursor) == []
+    assert cursor.ultimo == 3
+
+    with client.websocket_connect("/api/cuentas/1/eventos/ws?ultimo_evento=0") as ws:
+        # Reanudación: los eventos de la cuenta que el cliente no había recibido
+        primero, segundo = ws.receive_json(), ws.receive_json()
+        assert (primero["Tipo"], primero["IdEvento"], primero["IdMovimiento"]) == ("movimiento", 1, id_deposito)
+        assert (segundo["IdTipoMovimiento"], Decimal(str(segundo["Valor"]))) == (3, Decimal("-40.00"))
+
+        # En vivo: lo que publica el relevo para la cuenta suscrita
+        _depositar(client, 2, "5.00")
+        _depositar(client, 1, "7.00")
+        nuevos = evento_cuenta.leer_nuevos(db, cursor)
+        assert [e["IdCuenta"] for e in nuevos] == [2, 1]
+        centro_eventos.publicar(nuevos)
+        evento = ws.receive_json()
+        assert (evento["IdEvento"], evento["IdCuenta"], Decimal(str(evento["Valor"]))) == (5, 1, Decimal("7.00"))
+    db.close()
+
+    assert client.get("/api/cuentas/999/eventos").status_code == 404
+
+
+def test_consumidor_lento_y_huecos():
+    async def escenario():
+        centro = CentroEventos(tamano_cola=2)
+        lenta = centro.suscribir(1)
+        otra = centro.suscribir(2)
+        centro.publicar([{"IdEvento": i, "IdCuenta": 1} for i in range(1, 4)] + [{"IdEvento": 4, "IdCuenta": 2}])
+        # La cola llena se vacía y la suscripción se cierra; las demás no se afectan
+        assert await lenta.recibir(1) is None
+        assert (await otra.recibir(1))["IdEvento"] == 4
+        centro.cancelar(lenta)
+        centro.cancelar(otra)
+        assert len(centro) == 0
+
+    asyncio.run(escenario())
+
+    # IDs confirmados fuera de orden: el 3 se lee después del 4 y los huecos vencen
+    cursor = CursorEventos(espera_huecos=10)
+    cursor.ultimo = 2
+    cursor.avanzar([4], ahora=0)
+    assert (cursor.ultimo, set(cursor.huecos)) == (4, {3})
+    cursor.avanzar([3], ahora=1)
+    assert cursor.huecos == {}
+    cursor.avanzar([7], ahora=2)
+    cursor.avanzar([], ahora=20)
+    assert (cursor.ultimo, cursor.huecos) == (7, {})
+
+
+def test_cuenta_fragmentada_eventos_fuera_de_orden(client, datos_base, SessionLocal):
+    cuentas_fragmentadas.reemplazar([])
+    assert client.put("/api/cuentas/1/fragmentos", json={"Fragmentos": 4}).status_code == 200
+    _depositar(client, 1, "1.00")
+    _depositar(client, 1, "2.00")
+    db = SessionLocal()
+    cursor = CursorEventos()
+    evento_cuenta.leer_nuevos(db, cursor)
+
+    try:
+        # El cliente recibió el 2 antes de que se confirmara el 1: al reanudar lo recibe
+        with client.websocket_connect("/api/cuentas/1/eventos/ws?ultimo_evento=2") as ws:
+            assert ws.receive_json()["IdEvento"] == 1
+
+            # En vivo, el crédito de ID menor se confirma después y no se descarta
+            _depositar(client, 1, "3.00")
+            _depositar(client, 1, "4.00")
+            nuevos = evento_cuenta.leer_nuevos(db, cursor)
+            centro_eventos.publicar(reversed(nuevos))
+            assert [ws.receive_json()["IdEvento"] for _ in nuevos] == [4, 3]
+
+        # Sin fragmentos el orden de la cuenta se conserva y solo se reenvía lo posterior
+        assert client.put("/api/cuentas/1/fragmentos", json={"Fragmentos": 0}).status_code == 200
+        pendientes = evento_cuenta.get_eventos_cuenta(db, 1, despues_de=2)
+        assert [e["IdEvento"] for e in pendientes.eventos] == [3, 4]
+    finally:
+        db.close()
+        cuentas_fragmentadas.reemplazar([])
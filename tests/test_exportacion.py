@@ -0,0 +1,81 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.crud import movimiento as crud
+from app.models import Movimiento
+from app.utils import exportacion
+
+
+def _sembrar_movimientos(SessionLocal, cantidad):
+    db = SessionLocal()
+    db.add_all([
+        Movimiento(IdCuenta=1 + i % 3, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("1.50"),
+                   Fecha=date(2024, 1, 1) + timedelta(days=i % 10), Descripcion=f"Mov, {i}")
+        for i in range(cantidad)
+    ])
+    db.commit()
+    db.close()
+
+
+def test_exportacion_emite_un_trozo_por_lote(datos_base, SessionLocal):
+    _sembrar_movimientos(SessionLocal, 57)
+    consulta = crud.consulta_exportacion_by_fecha(date(2024, 1, 1), date(2024, 1, 5))
+
+    async def recolectar(db):
+        lotes = exportacion.iterar_lotes(db, consulta, lote=10)
+        return [trozo async for trozo in exportacion.formatear_csv(["IdMovimiento"], lotes)]
+
+    db = SessionLocal()
+    trozos = asyncio.run(recolectar(db))
+    db.close()
+    # Encabezado + 3 lotes de 10 filas: la respuesta nunca se arma completa en memoria
+    assert len(trozos) == 4
+    assert sum(t.count(b"\n") for t in trozos[1:]) == 30
+
+
+def test_exportar_csv(client, datos_base, SessionLocal):
+    _sembrar_movimientos(SessionLocal, 57)
+
+    response = client.get("/api/movimientos/exportar", params={"fecha_inicio": "2024-01-01", "fecha_fin": "2024-01-05"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="movimientos_2024-01-01_2024-01-05.csv"' in response.headers["content-disposition"]
+    filas = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(filas) == 30
+    assert filas[0]["Descripcion"] == "Mov, 0"
+    assert [f["Fecha"] for f in filas] == sorted(f["Fecha"] for f in filas)
+    assert Decimal(filas[0]["Valor"]) == Decimal("1.50")
+
+
+def test_exportar_ndjson_comprimido(client, datos_base, SessionLocal):
+    _sembrar_movimientos(SessionLocal, 20)
+
+    response = client.get("/api/movimientos/exportar", params={
+        "fecha_inicio": "2024-01-01", "fecha_fin": "2024-12-31", "formato": "ndjson", "comprimir": True
+    })
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    lineas = gzip.decompress(response.content).decode("utf-8").splitlines()
+    assert len(lineas) == 20
+    assert json.loads(lineas[0]) == {
+        "IdMovimiento": 1, "IdCuenta": 1, "IdSucursal": 1, "Fecha": "2024-01-01",
+        "Valor": "1.50", "IdTipoMovimiento": 1, "Descripcion": "Mov, 0"
+    }
+
+    assert client.get("/api/movimientos/exportar", params={
+        "fecha_inicio": "2024-02-01", "fecha_fin": "2024-01-01"
+    }).status_code == 400
+
+
+def test_exportar_en_modo_asincrono(async_client, datos_base, SessionLocal):
+    _sembrar_movimientos(SessionLocal, 15)
+    response = async_client.get("/api/movimientos/exportar", params={
+        "fecha_inicio": "2024-01-01", "fecha_fin": "2024-12-31", "formato": "ndjson"
+    })
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 15
@@ -0,0 +1,60 @@
+import json
+from datetime import date
+from decimal import Decimal
+
+from app.crud import extracto
+from app.models import Movimiento
+
+
+def _sembrar(SessionLocal):
+    """Movimientos de la cuenta 1 (saldo actual 1000.00) antes, durante y después de marzo"""
+    db = SessionLocal()
+    db.add_all([
+        Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("300.00"), Fecha=date(2024, 2, 20)),
+        Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("200.00"), Fecha=date(2024, 3, 5)),
+        Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=2, Valor=Decimal("-50.25"), Fecha=date(2024, 3, 5)),
+        Movimiento(IdCuenta=2, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("999.00"), Fecha=date(2024, 3, 6)),
+        Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=2, Valor=Decimal("-100.00"), Fecha=date(2024, 3, 30)),
+        Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("70.00"), Fecha=date(2024, 4, 2)),
+    ])
+    db.commit()
+    db.close()
+
+
+def _extracto(client):
+    response = client.get("/api/cuentas/1/extracto", params={"desde": "2024-03-01", "hasta": "2024-03-31"})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_extracto_con_saldo_acumulado(client, datos_base, SessionLocal):
+    _sembrar(SessionLocal)
+    data = _extracto(client)
+
+    # 1000.00 actuales - (200.00 - 50.25 - 100.00 + 70.00) desde el 1 de marzo
+    assert Decimal(data["SaldoApertura"]) == Decimal("880.25")
+    assert [Decimal(m["Saldo"]) for m in data["Movimientos"]] == [
+        Decimal("1080.25"), Decimal("1030.00"), Decimal("930.00")
+    ]
+    assert Decimal(data["SaldoCierre"]) == Decimal("930.00")
+    assert [(t["TipoMovimiento"], t["Cantidad"], Decimal(t["Total"])) for t in data["TotalesPorTipo"]] == [
+        ("Depósito", 1, Decimal("200.00")),
+        ("Retiro", 2, Decimal("-150.25")),
+    ]
+
+
+def test_extracto_sin_funciones_de_ventana(client, datos_base, SessionLocal, monkeypatch):
+    _sembrar(SessionLocal)
+    con_ventana = _extracto(client)
+    monkeypatch.setattr(extracto, "soporta_funciones_ventana", lambda db: False)
+    assert _extracto(client) == con_ventana
+
+
+def test_extracto_sin_movimientos_y_errores(client, datos_base):
+    response = client.get("/api/cuentas/3/extracto", params={"desde": "2024-03-01", "hasta": "2024-03-31"})
+    data = json.loads(response.content)
+    assert (data["Movimientos"], data["TotalesPorTipo"]) == ([], [])
+    assert Decimal(data["SaldoApertura"]) == Decimal(data["SaldoCierre"]) == Decimal("0.00")
+
+    assert client.get("/api/cuentas/99/extracto").status_code == 404
+    assert client.get("/api/cuentas/1/extracto", params={"desde": "2024-03-02", "hasta": "2024-03-01"}).status_code == 400
@@ -0,0 +1,115 @@
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+
+from app.crud import gran_movimiento
+from app.crud.gran_movimiento import recalcular_gran_movimiento
+from app.jobs import clasificar_gran_movimiento
+from app.models import Cuenta, Movimiento
+from app.utils import volumen
+from app.utils.volumen import VolumenCuentas
+
+
+@pytest.fixture()
+def volumen_cuentas(monkeypatch):
+    """Umbral de 1000.00 y marcas aplicadas sin esperar el intervalo"""
+    monkeypatch.setattr(volumen, "INTERVALO_MARCAS", 0)
+    monkeypatch.setattr(volumen.volumen_cuentas, "umbral", 100000)
+    volumen.volumen_cuentas.reiniciar()
+    yield volumen.volumen_cuentas
+    volumen.volumen_cuentas.reiniciar()
+
+
+def _marcadas(SessionLocal):
+    db = SessionLocal()
+    try:
+        return set(db.execute(select(Cuenta.IdCuenta).where(Cuenta.GranMovimiento.is_(True))).scalars())
+    finally:
+        db.close()
+
+
+def test_ventana_deslizante_de_cubetas_diarias():
+    hoy = date(2025, 3, 31)
+    ventana = VolumenCuentas(dias=30, umbral=Decimal("100.00"))
+    ventana.registrar([(1, Decimal("40.00")), (1, Decimal("-35.50"))], hoy - timedelta(days=29))
+    ventana.registrar([(1, Decimal("20.00")), (2, Decimal("99.99"))], hoy)
+    assert ventana.volumen(1, hoy) == Decimal("95.50")
+    assert ventana.tomar_pendientes(forzar=True) == set()
+
+    # Un movimiento fuera de la ventana no suma; uno dentro, aunque llegue tarde, sí
+    ventana.registrar([(1, Decimal("500.00"))], hoy - timedelta(days=30))
+    ventana.registrar([(2, Decimal("0.01"))], hoy - timedelta(days=3))
+    assert ventana.volumen(1, hoy) == Decimal("95.50")
+    assert ventana.tomar_pendientes(forzar=True) == {2}
+    assert ventana.volumen(1, hoy + timedelta(days=1)) == Decimal("20.00")
+    assert ventana.volumen(2, hoy + timedelta(days=30)) == Decimal("0.00")
+
+
+def test_operaciones_marcan_y_recalculo_desmarca(client, datos_base, SessionLocal, volumen_cuentas, monkeypatch):
+    client.post("/api/movimientos/deposito", json={"IdCuenta": 3, "IdSucursal": 1, "Valor": "600.00"})
+    assert _marcadas(SessionLocal) == set()
+    client.post("/api/movimientos/transferencia", json={
+        "IdCuentaOrigen": 3, "IdCuentaDestino": 2, "IdSucursal": 1, "Valor": "400.00"
+    })
+    assert _marcadas(SessionLocal) == {3}
+    client.post("/api/movimientos/transferencias/lote", json={"Transferencias": [
+        {"IdCuentaOrigen": 2, "IdCuentaDestino": 1, "IdSucursal": 1, "Valor": "700.00"},
+    ]})
+    assert _marcadas(SessionLocal) == {2, 3}
+
+    # Recalculado 31 días después todos los movimientos salieron de la ventana
+    db = SessionLocal()
+    db.add(Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("1000.00"),
+                      Fecha=date.today() + timedelta(days=31)))
+    db.commit()
+    marcadas, desmarcadas = recalcular_gran_movimiento(db, hoy=date.today() + timedelta(days=31))
+    db.close()
+    assert (marcadas, desmarcadas) == ({1}, {2, 3})
+    assert _marcadas(SessionLocal) == {1}
+
+    monkeypatch.setattr(clasificar_gran_movimiento, "SessionLocal", SessionLocal)
+    assert clasificar_gran_movimiento.clasificar() == ({2, 3}, {1})
+
+
+def test_falla_al_marcar_no_afecta_la_operacion_confirmada(client, datos_base, SessionLocal, volumen_cuentas, monkeypatch):
+    def fallar(db, cuentas, valor):
+        raise RuntimeError("sin conexión")
+
+    aplicar_marcas = gran_movimiento.aplicar_marcas
+    monkeypatch.setattr(gran_movimiento, "aplicar_marcas", fallar)
+    clave = {"Idempotency-Key": str(uuid.uuid4())}
+    deposito = {"IdCuenta": 3, "IdSucursal": 1, "Valor": "1500.00"}
+
+    primera = client.post("/api/movimientos/deposito", json=deposito, headers=clave)
+    repetida = client.post("/api/movimientos/deposito", json=deposito, headers=clave)
+    assert primera.status_code == repetida.status_code == 201
+    assert repetida.headers["Idempotent-Replayed"] == "true"
+    db = SessionLocal()
+    assert db.query(func.count(Movimiento.IdMovimiento)).scalar() == 1
+    db.close()
+
+    # La marca quedó pendiente y se aplica con la siguiente operación
+    monkeypatch.setattr(gran_movimiento, "aplicar_marcas", aplicar_marcas)
+    client.post("/api/movimientos/deposito", json={"IdCuenta": 1, "IdSucursal": 1, "Valor": "1.00"})
+    assert _marcadas(SessionLocal) == {3}
+
+
+def test_cuentas_inactivas_se_descartan():
+    hoy = date(2025, 3, 31)
+    ventana = VolumenCuentas(dias=30, umbral=Decimal("100.00"))
+    ventana.registrar([(cuenta_id, Decimal("150.00")) for cuenta_id in range(1, 101)], hoy)
+    assert ventana.tomar_pendientes(forzar=True) == set(range(1, 101))
+    ventana.registrar([(1, Decimal("1.00"))], hoy + timedelta(days=29))
+    assert len(ventana) == 100
+
+    # Al pasar la ventana solo queda la cuenta que siguió operando, con su volumen intacto
+    ventana.registrar([(2, Decimal("1.00"))], hoy + timedelta(days=30))
+    assert len(ventana) == 2
+    assert ventana.volumen(1, hoy + timedelta(days=30)) == Decimal("1.00")
+    assert ventana.volumen(3, hoy + timedelta(days=30)) == Decimal("0.00")
+    # Una cuenta descartada que vuelve a superar el umbral queda pendiente de nuevo
+    ventana.registrar([(3, Decimal("100.00"))], hoy + timedelta(days=30))
+    assert ventana.tomar_pendientes(forzar=True) == {3}
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import Base
+from app.models import *
+
+ALEMBIC_INI = Path(__file__).resolve().parents[1] / "alembic.ini"
+
+
+def _config(url):
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def _indices_movimiento(engine):
+    return {i["name"]: i["column_names"] for i in inspect(engine).get_indexes("movimiento")}
+
+
+def test_migraciones_llevan_el_esquema_inicial_a_los_modelos(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migraciones.db'}"
+    engine = create_engine(url)
+
+    # Esquema de la línea base: sin las tablas nuevas y con índices de una sola columna
+    nuevas = {
+        "idempotencia", "saldo_diario", "saldo_fragmento", "resumen_sucursal_diario", "evento_cuenta", "cuota_prestamo"
+    }
+    tablas = [t for t in Base.metadata.sorted_tables if t.name not in nuevas]
+    Base.metadata.create_all(engine, tables=tablas)
+    with engine.begin() as conexion:
+        conexion.execute(text("DROP INDEX ix_movimiento_cuenta_fecha"))
+        conexion.execute(text("DROP INDEX ix_movimiento_fecha_sucursal"))
+        conexion.execute(text("CREATE INDEX ix_movimiento_IdCuenta ON movimiento (IdCuenta)"))
+        conexion.execute(text("CREATE INDEX ix_movimiento_Fecha ON movimiento (Fecha)"))
+        conexion.execute(text("ALTER TABLE cuenta DROP COLUMN SaldoApertura"))
+
+    config = _config(url)
+    command.stamp(config, "0001")
+    command.upgrade(config, "head")
+
+    indices = _indices_movimiento(engine)
+    assert indices["ix_movimiento_cuenta_fecha"] == ["IdCuenta", "Fecha", "IdMovimiento"]
+    assert indices["ix_movimiento_fecha_sucursal"] == ["Fecha", "IdSucursal"]
+    assert "ix_movimiento_IdCuenta" not in indices and "ix_movimiento_Fecha" not in indices
+    # Tras las migraciones la base de datos coincide con los modelos
+    with engine.connect() as conexion:
+        diferencias = compare_metadata(MigrationContext.configure(conexion), Base.metadata)
+    assert diferencias == []
+
+    command.downgrade(config, "0001")
+    indices = _indices_movimiento(engine)
+    assert {"ix_movimiento_IdCuenta", "ix_movimiento_Fecha"} <= set(indices)
+    assert "ix_movimiento_cuenta_fecha" not in indices
+    assert not nuevas & set(inspect(engine).get_table_names())
+    assert "SaldoApertura" not in {c["name"] for c in inspect(engine).get_columns("cuenta")}
+    engine.dispose()
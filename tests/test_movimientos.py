@@ -0,0 +1,265 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func
+
+from app.crud import movimiento as crud
+from app.crud.idempotencia import purgar_idempotencias_vencidas
+from app.models import Cuenta, Idempotencia, Movimiento
+from app.schemas.movimiento import RetiroCreate, TransferenciaCreate
+from app.utils.idempotencia import GestorIdempotencia
+
+
+def _saldo(SessionLocal, cuenta_id):
+    db = SessionLocal()
+    try:
+        return db.get(Cuenta, cuenta_id).Saldo
+    finally:
+        db.close()
+
+
+def test_deposito_retiro_transferencia(client, datos_base, SessionLocal):
+    # Depósito
+    response = client.post("/api/movimientos/deposito", json={"IdCuenta": 1, "IdSucursal": 1, "Valor": "250.00"})
+    assert response.status_code == 201
+    assert response.json()["IdTipoMovimiento"] == 1
+    assert "X-Lock-Wait-Ms" in response.headers
+    assert _saldo(SessionLocal, 1) == Decimal("1250.00")
+
+    # Retiro
+    response = client.post("/api/movimientos/retiro", json={"IdCuenta": 1, "IdSucursal": 1, "Valor": "50.00"})
+    assert response.status_code == 201
+    assert Decimal(response.json()["Valor"]) == Decimal("-50.00")
+    assert _saldo(SessionLocal, 1) == Decimal("1200.00")
+
+    # Transferencia
+    response = client.post("/api/movimientos/transferencia", json={
+        "IdCuentaOrigen": 1, "IdCuentaDestino": 3, "IdSucursal": 1, "Valor": "200.00"
+    })
+    assert response.status_code == 201
+    assert response.json()["movimiento_salida"]["IdCuenta"] == 1
+    assert response.json()["movimiento_entrada"]["IdCuenta"] == 3
+    assert _saldo(SessionLocal, 1) == Decimal("1000.00")
+    assert _saldo(SessionLocal, 3) == Decimal("200.00")
+
+    # Estadísticas de bloqueo por operación
+    response = client.get("/api/movimientos/estadisticas/bloqueos")
+    assert response.status_code == 200
+    assert {"deposito", "retiro", "transferencia"} <= set(response.json())
+
+
+def test_retiro_saldo_insuficiente_y_sobregiro(client, datos_base, SessionLocal):
+    # Sin sobregiro: se rechaza y el saldo no cambia
+    response = client.post("/api/movimientos/retiro", json={"IdCuenta": 1, "IdSucursal": 1, "Valor": "1000.01"})
+    assert response.status_code == 400
+    assert "Saldo insuficiente" in response.json()["detail"]
+    assert _saldo(SessionLocal, 1) == Decimal("1000.00")
+
+    # Cuenta inexistente
+    response = client.post("/api/movimientos/retiro", json={"IdCuenta": 99, "IdSucursal": 1, "Valor": "1.00"})
+    assert response.status_code == 400
+    assert "no encontrada" in response.json()["detail"]
+
+    # Con sobregiro: el saldo queda negativo y se marca la cuenta
+    response = client.post("/api/movimientos/retiro", json={"IdCuenta": 2, "IdSucursal": 1, "Valor": "700.00"})
+    assert response.status_code == 201
+    db = SessionLocal()
+    cuenta = db.get(Cuenta, 2)
+    assert cuenta.Saldo == Decimal("-200.00")
+    assert cuenta.SobregiroNoAutorizado is True
+    db.close()
+
+
+def test_transferencia_cuenta_destino_inexistente_no_debita(client, datos_base, SessionLocal):
+    response = client.post("/api/movimientos/transferencia", json={
+        "IdCuentaOrigen": 1, "IdCuentaDestino": 99, "IdSucursal": 1, "Valor": "10.00"
+    })
+    assert response.status_code == 400
+    assert _saldo(SessionLocal, 1) == Decimal("1000.00")
+
+
+def test_retiros_concurrentes_no_pierden_actualizaciones(datos_base, SessionLocal):
+    def retirar(_):
+        db = SessionLocal()
+        try:
+            crud.realizar_retiro(db, RetiroCreate(IdCuenta=1, IdSucursal=1, Valor=Decimal("30.00")))
+            return True
+        except ValueError:
+            return False
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        exitosos = sum(pool.map(retirar, range(50)))
+
+    # 1000 / 30 = 33 retiros caben en el saldo; ninguno más
+    assert exitosos == 33
+    assert _saldo(SessionLocal, 1) == Decimal("10.00")
+
+
+def test_transferencias_cruzadas_conservan_el_dinero(datos_base, SessionLocal):
+    def transferir(i):
+        origen, destino = (1, 2) if i % 2 else (2, 1)
+        db = SessionLocal()
+        try:
+            crud.realizar_transferencia(db, TransferenciaCreate(
+                IdCuentaOrigen=origen, IdCuentaDestino=destino, IdSucursal=1, Valor=Decimal("7.00")
+            ))
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(transferir, range(40)))
+
+    db = SessionLocal()
+    assert db.query(func.sum(Cuenta.Saldo)).scalar() == Decimal("1500.00")
+    assert db.query(func.count(Movimiento.IdMovimiento)).scalar() == 80
+    assert db.query(func.sum(Movimiento.Valor)).scalar() == 0
+    db.close()
+
+
+def test_transferencias_lote_con_fallos_parciales(client, datos_base, SessionLocal):
+    response = client.post("/api/movimientos/transferencias/lote", json={"Transferencias": [
+        {"IdCuentaOrigen": 1, "IdCuentaDestino": 3, "IdSucursal": 1, "Valor": "600.00"},
+        {"IdCuentaOrigen": 1, "IdCuentaDestino": 3, "IdSucursal": 1, "Valor": "600.00"},  # Saldo insuficiente
+        {"IdCuentaOrigen": 3, "IdCuentaDestino": 99, "IdSucursal": 1, "Valor": "1.00"},   # Destino inexistente
+        {"IdCuentaOrigen": 3, "IdCuentaDestino": 2, "IdSucursal": 1, "Valor": "100.00"},  # Usa lo recibido en el lote
+        {"IdCuentaOrigen": 2, "IdCuentaDestino": 1, "IdSucursal": 1, "Valor": "800.00"},  # Usa el sobregiro
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["Total"], data["Exitosas"], data["Fallidas"]) == (5, 3, 2)
+    assert [r["Exitosa"] for r in data["Resultados"]] == [True, False, False, True, True]
+    assert "Saldo insuficiente" in data["Resultados"][1]["Error"]
+    assert data["Resultados"][0]["IdMovimientoSalida"] is not None
+
+    assert _saldo(SessionLocal, 1) == Decimal("1200.00")
+    assert _saldo(SessionLocal, 2) == Decimal("-200.00")
+    assert _saldo(SessionLocal, 3) == Decimal("500.00")
+
+    db = SessionLocal()
+    assert db.get(Cuenta, 2).SobregiroNoAutorizado is True
+    assert db.query(func.count(Movimiento.IdMovimiento)).scalar() == 6
+    salida = db.get(Movimiento, data["Resultados"][3]["IdMovimientoSalida"])
+    assert (salida.IdCuenta, salida.Valor, salida.IdTipoMovimiento) == (3, Decimal("-100.00"), 3)
+    db.close()
+
+
+def test_idempotency_key_repite_la_respuesta_sin_volver_a_contabilizar(client, datos_base, SessionLocal):
+    clave = {"Idempotency-Key": str(uuid.uuid4())}
+    deposito = {"IdCuenta": 1, "IdSucursal": 1, "Valor": "250.00"}
+
+    primera = client.post("/api/movimientos/deposito", json=deposito, headers=clave)
+    repetida = client.post("/api/movimientos/deposito", json=deposito, headers=clave)
+    assert primera.status_code == repetida.status_code == 201
+    assert "Idempotent-Replayed" not in primera.headers
+    assert repetida.headers["Idempotent-Replayed"] == "true"
+    assert repetida.json() == primera.json()
+    assert _saldo(SessionLocal, 1) == Decimal("1250.00")
+
+    # La misma clave con otro cuerpo se rechaza
+    response = client.post("/api/movimientos/deposito", json={**deposito, "Valor": "1.00"}, headers=clave)
+    assert response.status_code == 422
+
+    # Los errores de negocio también quedan almacenados
+    clave = {"Idempotency-Key": str(uuid.uuid4())}
+    retiro = {"IdCuenta": 3, "IdSucursal": 1, "Valor": "10.00"}
+    assert client.post("/api/movimientos/retiro", json=retiro, headers=clave).status_code == 400
+    response = client.post("/api/movimientos/retiro", json=retiro, headers=clave)
+    assert response.status_code == 400
+    assert response.headers["Idempotent-Replayed"] == "true"
+
+
+def test_idempotency_key_duplicados_concurrentes_esperan_la_primera_ejecucion(datos_base, SessionLocal):
+    gestor = GestorIdempotencia()
+    ejecuciones = []
+    candado = threading.Lock()
+
+    def operacion():
+        with candado:
+            ejecuciones.append(1)
+        time.sleep(0.2)
+        return 201, {"IdMovimiento": 1}
+
+    def ejecutar(_):
+        db = SessionLocal()
+        try:
+            return gestor.ejecutar(db, "clave-concurrente", "deposito", {"Valor": "1"}, operacion)
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        resultados = list(pool.map(ejecutar, range(6)))
+
+    assert len(ejecuciones) == 1
+    assert sum(1 for _, _, repetida in resultados if not repetida) == 1
+    assert all(cuerpo == {"IdMovimiento": 1} for _, cuerpo, _ in resultados)
+
+    # Otro proceso (sin el LRU) obtiene la respuesta desde la base de datos
+    db = SessionLocal()
+    codigo, cuerpo, repetida = GestorIdempotencia().ejecutar(
+        db, "clave-concurrente", "deposito", {"Valor": "1"}, operacion
+    )
+    db.close()
+    assert (codigo, cuerpo, repetida) == (201, {"IdMovimiento": 1}, True)
+    assert len(ejecuciones) == 1
+
+
+def test_purgar_idempotencias_vencidas(datos_base, SessionLocal):
+    db = SessionLocal()
+    ahora = datetime.now()
+    db.add_all([
+        Idempotencia(Clave=f"k{i}", Ruta="deposito", HashSolicitud="x", Estado="COMPLETADO",
+                     FechaCreacion=ahora, FechaExpiracion=ahora + timedelta(hours=-1 if i < 5 else 1))
+        for i in range(7)
+    ])
+    db.commit()
+    assert purgar_idempotencias_vencidas(db, lote=2) == 5
+    assert db.query(func.count(Idempotencia.Clave)).scalar() == 2
+    db.close()
+
+
+def test_idempotency_key_falla_despues_de_confirmar_no_repite(datos_base, SessionLocal):
+    gestor = GestorIdempotencia()
+    retiro = RetiroCreate(IdCuenta=1, IdSucursal=1, Valor=Decimal("100.00"))
+
+    def operacion_que_falla_al_responder(db):
+        def operacion():
+            crud.realizar_retiro(db, retiro)
+            raise RuntimeError("Conexión perdida al serializar la respuesta")
+        return operacion
+
+    db = SessionLocal()
+    try:
+        gestor.ejecutar(db, "clave-confirmada", "retiro", {"Valor": "100.00"}, operacion_que_falla_al_responder(db))
+    except RuntimeError:
+        pass
+    finally:
+        db.close()
+    assert _saldo(SessionLocal, 1) == Decimal("900.00")
+
+    # El reintento con la misma clave recibe el 500 guardado y no vuelve a debitar
+    db = SessionLocal()
+    codigo, cuerpo, repetida = gestor.ejecutar(
+        db, "clave-confirmada", "retiro", {"Valor": "100.00"}, operacion_que_falla_al_responder(db)
+    )
+    db.close()
+    assert (codigo, repetida) == (500, True)
+    assert _saldo(SessionLocal, 1) == Decimal("900.00")
+
+    # Un fallo antes de confirmar sí libera la clave
+    def falla_antes():
+        raise RuntimeError("Falla antes de confirmar")
+
+    db = SessionLocal()
+    try:
+        gestor.ejecutar(db, "clave-sin-confirmar", "retiro", {"Valor": "1"}, falla_antes)
+    except RuntimeError:
+        pass
+    codigo, cuerpo, repetida = gestor.ejecutar(db, "clave-sin-confirmar", "retiro", {"Valor": "1"}, lambda: (201, {}))
+    db.close()
+    assert (codigo, repetida) == (201, False)
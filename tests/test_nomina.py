@@ -0,0 +1,50 @@
+import csv
+import io
+from decimal import Decimal
+
+from sqlalchemy import func
+
+from app.models import Cuenta, Movimiento
+
+
+def test_dispersion_nomina(client, datos_base, SessionLocal):
+    response = client.post("/api/nomina/dispersion", json={
+        "IdCuentaOrigen": 2,
+        "IdSucursal": 1,
+        "Descripcion": "Nómina",
+        "Pagos": [
+            {"IdCuentaDestino": 1, "Valor": "300.00", "Referencia": "EMP-1"},
+            {"IdCuentaDestino": 99, "Valor": "50.00", "Referencia": "EMP-2"},
+            {"IdCuentaDestino": 3, "Valor": "400.00", "Referencia": "EMP-3"},
+        ]
+    })
+    assert response.status_code == 201
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["X-Pagos-Rechazados"] == "1"
+
+    filas = list(csv.DictReader(io.StringIO(response.text)))
+    assert [f["Referencia"] for f in filas] == ["EMP-1", "EMP-2", "EMP-3"]
+    assert [f["Estado"] for f in filas] == ["PAGADO", "RECHAZADO", "PAGADO"]
+    assert filas[0]["IdMovimientoSalida"] != ""
+
+    db = SessionLocal()
+    # Un solo débito por el total: 500 - 700 = -200 (dentro del sobregiro de 300)
+    assert db.get(Cuenta, 2).Saldo == Decimal("-200.00")
+    assert db.get(Cuenta, 1).Saldo == Decimal("1300.00")
+    assert db.get(Cuenta, 3).Saldo == Decimal("400.00")
+    tipos = dict(db.query(Movimiento.IdTipoMovimiento, func.count()).group_by(Movimiento.IdTipoMovimiento).all())
+    assert tipos == {3: 2, 4: 2}
+    db.close()
+
+
+def test_dispersion_nomina_sin_fondos_no_paga_a_nadie(client, datos_base, SessionLocal):
+    response = client.post("/api/nomina/dispersion", json={
+        "IdCuentaOrigen": 3,
+        "IdSucursal": 1,
+        "Pagos": [{"IdCuentaDestino": 1, "Valor": "10.00"}, {"IdCuentaDestino": 2, "Valor": "10.00"}]
+    })
+    assert response.status_code == 400
+    db = SessionLocal()
+    assert db.get(Cuenta, 1).Saldo == Decimal("1000.00")
+    assert db.query(func.count(Movimiento.IdMovimiento)).scalar() == 0
+    db.close()
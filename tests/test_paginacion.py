@@ -0,0 +1,87 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.models import Cuenta, Movimiento
+from app.utils.paginacion import codificar_cursor, decodificar_cursor
+
+
+def _recorrer(client, url, limit):
+    """Recorrer un listado completo siguiendo X-Next-Cursor"""
+    filas, cursor, paginas = [], None, 0
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        filas.extend(response.json())
+        paginas += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return filas, paginas
+
+
+def test_cursor_ida_y_vuelta():
+    valores = (datetime(2024, 3, 1, 10, 30), 42)
+    assert decodificar_cursor(codificar_cursor(valores)) == valores
+
+
+def test_movimientos_por_cursor_coinciden_con_offset(client, datos_base, SessionLocal):
+    db = SessionLocal()
+    inicio = datetime(2024, 1, 1)
+    # Varios movimientos comparten fecha: el desempate por ID evita saltos y duplicados
+    db.add_all([
+        Movimiento(IdCuenta=1 + i % 2, IdTipoMovimiento=1, IdSucursal=1, Valor=Decimal("1.00"),
+                   Fecha=inicio + timedelta(minutes=i // 3))
+        for i in range(23)
+    ])
+    db.commit()
+    db.close()
+
+    por_offset = client.get("/api/movimientos/", params={"limit": 100}).json()
+    por_cursor, paginas = _recorrer(client, "/api/movimientos/", 5)
+    assert [m["IdMovimiento"] for m in por_cursor] == [m["IdMovimiento"] for m in por_offset]
+    assert len(por_cursor) == 23 and paginas == 5
+    fechas = [m["Fecha"] for m in por_cursor]
+    assert fechas == sorted(fechas, reverse=True)
+
+    de_cuenta, _ = _recorrer(client, "/api/movimientos/cuenta/1", 4)
+    assert {m["IdCuenta"] for m in de_cuenta} == {1}
+    assert len(de_cuenta) == 12
+
+
+def test_cuentas_por_cursor_y_cursor_invalido(client, datos_base, SessionLocal):
+    db = SessionLocal()
+    db.add_all([
+        Cuenta(Numero=f"9{i:03d}", FechaApertura=datetime(2024, 2, 1).date(), IdTipoCuenta=1,
+               IdSucursal=1, Saldo=Decimal("0.00"), Sobregiro=Decimal("0.00"))
+        for i in range(7)
+    ])
+    db.commit()
+    db.close()
+
+    cuentas, paginas = _recorrer(client, "/api/cuentas/", 3)
+    assert [c["IdCuenta"] for c in cuentas] == list(range(1, 11))
+    assert paginas == 4
+
+    assert client.get("/api/cuentas/", params={"cursor": "no-es-un-cursor"}).status_code == 400
+    # Cursor de movimientos (fecha, id) usado en el listado de cuentas (id)
+    cursor = codificar_cursor((datetime(2024, 1, 1), 5))
+    assert client.get("/api/cuentas/", params={"cursor": cursor}).status_code == 400
+
+
+@pytest.mark.parametrize("valores", [(5,), ("abc", 1), (5, 1), (date(2024, 1, 1), "x"), (date(2024, 1, 1), 1, 2)])
+def test_movimientos_cursor_malformado(client, datos_base, valores):
+    cursor = codificar_cursor(valores)
+    for ruta in ("/api/movimientos/", "/api/movimientos/cuenta/1"):
+        response = client.get(ruta, params={"cursor": cursor})
+        assert response.status_code == 400, (ruta, response.text)
+
+
+def test_cors_expone_el_cursor(client, datos_base):
+    response = client.get("/api/cuentas/", params={"limit": 1}, headers={"Origin": "http://localhost:5173"})
+    assert response.headers["X-Next-Cursor"]
+    expuestos = {h.strip() for h in response.headers["Access-Control-Expose-Headers"].split(",")}
+    assert "X-Next-Cursor" in expuestos
@@ -0,0 +1,88 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import event
+
+from app.models import Movimiento
+from app.utils.particiones import (
+    definicion_particion, mes_de_particion, nombre_particion, planificar_mantenimiento, sumar_meses
+)
+
+
+def test_nombres_y_limites_de_particion():
+    assert nombre_particion(date(2024, 12, 1)) == "p202412"
+    assert mes_de_particion("p202412") == date(2024, 12, 1)
+    assert mes_de_particion("pfuturo") is None
+    assert definicion_particion(date(2024, 12, 1)) == "PARTITION p202412 VALUES LESS THAN ('2025-01-01')"
+    assert sumar_meses(date(2024, 1, 1), -13) == date(2022, 12, 1)
+
+
+def test_planificar_mantenimiento():
+    hoy = date(2025, 3, 15)
+    existentes = [date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1)]
+
+    crear, separar = planificar_mantenimiento(existentes, hoy, meses_adelante=2)
+    assert crear == [date(2025, 3, 1), date(2025, 4, 1), date(2025, 5, 1)]
+    assert separar == []
+
+    # Ya al día: no hay nada que crear; se conservan 3 meses (enero a marzo)
+    crear, separar = planificar_mantenimiento(existentes + crear, hoy, meses_adelante=2, retener_meses=3)
+    assert crear == []
+    assert separar == [date(2024, 11, 1), date(2024, 12, 1)]
+
+    # Tabla recién particionada: se empieza en el mes más antiguo con datos
+    crear, _ = planificar_mantenimiento([], hoy, meses_adelante=1, primer_mes=date(2025, 1, 20))
+    assert crear == [date(2025, 1, 1), date(2025, 2, 1), date(2025, 3, 1), date(2025, 4, 1)]
+
+
+def test_consultas_de_movimientos_con_predicado_de_fecha(client, datos_base, SessionLocal):
+    db = SessionLocal()
+    db.add_all([
+        Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("1.00"), Fecha=date(2024, mes, 10))
+        for mes in range(1, 7)
+    ])
+    db.commit()
+    db.close()
+
+    response = client.get("/api/movimientos/cuenta/1", params={"desde": "2024-02-01", "hasta": "2024-04-30"})
+    assert [m["Fecha"] for m in response.json()] == ["2024-04-10", "2024-03-10", "2024-02-10"]
+
+    response = client.get("/api/movimientos/", params={"desde": "2024-05-01", "limit": 1})
+    assert [m["Fecha"] for m in response.json()] == ["2024-06-10"]
+    siguiente = client.get("/api/movimientos/", params={
+        "desde": "2024-05-01", "limit": 1, "cursor": response.headers["X-Next-Cursor"]
+    })
+    assert [m["Fecha"] for m in siguiente.json()] == ["2024-05-10"]
+
+    assert client.get("/api/movimientos/3", params={"fecha": "2024-03-10"}).status_code == 200
+    assert client.get("/api/movimientos/3", params={"fecha": "2024-03-11"}).status_code == 404
+
+
+def test_listados_sin_rango_consultan_ventanas_de_fechas(client, datos_base, SessionLocal, engine):
+    hoy = date.today()
+    fechas = [sumar_meses(hoy.replace(day=1), -meses) for meses in (0, 1, 5, 13, 40)] + [hoy]
+    db = SessionLocal()
+    db.add_all([
+        Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("1.00"), Fecha=fecha)
+        for fecha in fechas
+    ])
+    db.commit()
+    esperados = [m.IdMovimiento for m in sorted(
+        db.query(Movimiento), key=lambda m: (m.Fecha, m.IdMovimiento), reverse=True
+    )]
+    db.close()
+
+    paginas = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: paginas.append(sql)
+                 if "LIMIT" in sql and "FROM movimiento" in sql else None)
+
+    def listar(ruta, **params):
+        response = client.get(ruta, params=params)
+        return [m["IdMovimiento"] for m in response.json()], response.headers.get("X-Next-Cursor")
+
+    for ruta in ("/api/movimientos/cuenta/1", "/api/movimientos/"):
+        assert listar(ruta)[0] == esperados
+        assert listar(ruta, skip=2, limit=3)[0] == esperados[2:5]
+        ids, cursor = listar(ruta, limit=4)
+        assert ids + listar(ruta, limit=4, cursor=cursor)[0] == esperados
+    assert paginas and all('"Fecha" >=' in sql for sql in paginas)
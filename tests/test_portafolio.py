@@ -0,0 +1,113 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models import Ciudad, Cuenta, Sucursal
+from app.utils.portafolio import cache_portafolio
+
+CORTE = "2025-04-10"
+
+
+@pytest.fixture()
+def cartera(client, datos_base, SessionLocal):
+    """Un préstamo en la sucursal 1 (Bogotá) y otro sin interés en la 2 (Medellín)"""
+    cache_portafolio.invalidar()
+    db = SessionLocal()
+    db.add(Ciudad(Ciudad="Medellín"))
+    db.flush()
+    db.add(Sucursal(Sucursal="ByteBank Poblado", IdCiudad=2, IdTipoSucursal=1))
+    db.flush()
+    db.add(Cuenta(Numero="4004", FechaApertura=date(2024, 1, 15), IdTipoCuenta=1, IdSucursal=2,
+                  Saldo=Decimal("0.00"), Sobregiro=Decimal("0.00")))
+    db.commit()
+    db.close()
+    ids = []
+    for cuenta_id, numero, interes, plazo, seguro in ((1, "P1", "12.00", 12, "1.00"), (4, "P2", "0.00", 6, "0.00")):
+        response = client.post("/api/prestamos/", json={
+            "IdCuenta": cuenta_id, "Numero": numero, "Fecha": "2025-01-10",
+            "Valor": "1200.00" if numero == "P1" else "600.00", "Interes": interes, "Plazo": plazo, "Seguro": seguro,
+        })
+        assert response.status_code == 201, response.text
+        ids.append(response.json()["IdPrestamo"])
+    return ids
+
+
+def _get(client, ruta, **params):
+    response = client.get(f"/api/prestamos/portafolio/{ruta}", params={"fecha_corte": CORTE, **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_resumen_coincide_con_el_plan_de_cuotas(client, cartera):
+    # Sin cambios de términos, la estimación contractual coincide con el plan generado
+    # Al corte vencieron las cuotas de febrero, marzo y abril (día 10) de ambos préstamos
+    por_cobrar = [
+        c for prestamo_id in cartera
+        for c in client.get(f"/api/prestamos/{prestamo_id}/cuotas").json() if c["NumeroCuota"] > 3
+    ]
+    resumen = _get(client, "resumen")
+
+    assert resumen["Prestamos"] == 2
+    assert Decimal(resumen["ValorDesembolsado"]) == Decimal("1800.00")
+    capital = sum(Decimal(c["Capital"]) for c in por_cobrar)
+    intereses = sum(Decimal(c["Interes"]) for c in por_cobrar)
+    assert abs(Decimal(resumen["SaldoCapital"]) - capital) <= Decimal("0.05")
+    assert abs(Decimal(resumen["InteresesPorCobrar"]) - intereses) <= Decimal("0.05")
+
+    # Antes de otorgarse no cuenta; terminados los plazos tampoco
+    assert _get(client, "resumen", fecha_corte="2025-01-09")["Prestamos"] == 0
+    assert _get(client, "resumen", fecha_corte="2026-01-10")["Prestamos"] == 0
+
+
+def test_proyeccion_mensual(client, cartera):
+    proyeccion = _get(client, "proyeccion", meses=4)
+    meses = proyeccion["Meses"]
+
+    assert [m["Mes"] for m in meses] == ["2025-04-01", "2025-05-01", "2025-06-01", "2025-07-01"]
+    # La cuota de abril ya venció; P2 termina en julio
+    assert [m["Cuotas"] for m in meses] == [0, 2, 2, 2]
+    assert Decimal(meses[1]["Seguro"]) == Decimal("1.00")
+    saldo = Decimal(_get(client, "resumen")["SaldoCapital"])
+    assert Decimal(meses[0]["SaldoFinal"]) == saldo
+    # Interés de mayo: 1% mensual del saldo de P1 (P2 no tiene interés)
+    saldo_p1 = saldo - Decimal("300.00")
+    assert abs(Decimal(meses[1]["Interes"]) - saldo_p1 / 100) <= Decimal("0.01")
+    assert abs(Decimal(meses[1]["SaldoFinal"]) - (saldo - Decimal(meses[1]["Capital"]))) <= Decimal("0.01")
+    for mes in meses:
+        assert Decimal(mes["Total"]) == Decimal(mes["Capital"]) + Decimal(mes["Interes"]) + Decimal(mes["Seguro"])
+
+    response = client.get("/api/prestamos/portafolio/proyeccion", params={"meses": 361})
+    assert response.status_code == 422
+
+
+def test_exposicion_por_sucursal_y_ciudad(client, cartera):
+    for por in ("sucursal", "ciudad"):
+        exposicion = _get(client, "exposicion", por=por)
+        assert exposicion["Agrupacion"] == por
+        # De mayor a menor saldo: el préstamo con interés de la 1 y el de 300 pendientes de la 2
+        assert [(g["Id"], g["Prestamos"]) for g in exposicion["Grupos"]] == [(1, 1), (2, 1)]
+        assert Decimal(exposicion["Grupos"][1]["SaldoCapital"]) == Decimal("300.00")
+        assert sum(Decimal(g["SaldoCapital"]) for g in exposicion["Grupos"]) == Decimal(exposicion["SaldoCapital"])
+
+    response = client.get("/api/prestamos/portafolio/exposicion", params={"por": "pais"})
+    assert response.status_code == 422
+
+
+def test_cache_se_invalida_al_cambiar_un_prestamo(client, cartera):
+    primero = _get(client, "resumen")
+    antes = cache_portafolio.estadisticas()
+    assert _get(client, "resumen") == primero
+    despues = cache_portafolio.estadisticas()
+    assert (despues["Aciertos"], despues["Fallos"]) == (antes["Aciertos"] + 1, antes["Fallos"])
+
+    response = client.put(f"/api/prestamos/{cartera[1]}", json={"Plazo": 12})
+    assert response.status_code == 200, response.text
+    assert cache_portafolio.estadisticas()["Version"] == despues["Version"] + 1
+
+    # La cartera se vuelve a cargar con el plazo nuevo: 600 en 12 cuotas, 9 por pagar.
+    # Es una estimación contractual: en el plan las 6 cuotas ya vencidas quedaron pagadas
+    resumen = _get(client, "resumen")
+    assert Decimal(resumen["SaldoCapital"]) - Decimal(primero["SaldoCapital"]) == Decimal("150.00")
+    cuotas = client.get(f"/api/prestamos/{cartera[1]}/cuotas").json()
+    assert {c["Estado"] for c in cuotas} == {"PAGADA"}
@@ -0,0 +1,62 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import delete, select
+
+from app.jobs import reconstruir_resumen_sucursal
+from app.models import ResumenSucursalDiario
+
+
+def _resumen(SessionLocal):
+    db = SessionLocal()
+    try:
+        return {
+            (f.Fecha, f.IdSucursal, f.IdTipoMovimiento): (f.Cantidad, f.Total)
+            for f in db.execute(select(ResumenSucursalDiario)).scalars()
+        }
+    finally:
+        db.close()
+
+
+def test_operaciones_actualizan_resumen(client, datos_base, SessionLocal, monkeypatch):
+    hoy = date.today()
+    client.post("/api/movimientos/deposito", json={"IdCuenta": 1, "IdSucursal": 1, "Valor": "100.00"})
+    client.post("/api/movimientos/deposito", json={"IdCuenta": 3, "IdSucursal": 1, "Valor": "50.00"})
+    client.post("/api/movimientos/retiro", json={"IdCuenta": 1, "IdSucursal": 1, "Valor": "30.00"})
+    client.post("/api/movimientos/transferencia", json={
+        "IdCuentaOrigen": 1, "IdCuentaDestino": 2, "IdSucursal": 1, "Valor": "20.00"
+    })
+    client.post("/api/movimientos/transferencias/lote", json={"Transferencias": [
+        {"IdCuentaOrigen": 2, "IdCuentaDestino": 3, "IdSucursal": 1, "Valor": "5.00"},
+        {"IdCuentaOrigen": 3, "IdCuentaDestino": 1, "IdSucursal": 1, "Valor": "1.00"},
+    ]})
+
+    resumen = _resumen(SessionLocal)
+    assert resumen[(hoy, 1, 1)] == (2, Decimal("150.00"))
+    assert resumen[(hoy, 1, 2)] == (1, Decimal("-30.00"))
+    assert resumen[(hoy, 1, 3)] == (3, Decimal("-26.00"))
+    assert resumen[(hoy, 1, 4)] == (3, Decimal("26.00"))
+
+    response = client.get(f"/api/sucursales/1/resumen?desde={hoy}&hasta={hoy}")
+    assert response.status_code == 200
+    totales = {t["IdTipoMovimiento"]: t for t in response.json()["TotalesPorTipo"]}
+    assert totales[1]["Cantidad"] == 2
+    assert Decimal(str(totales[1]["Total"])) == Decimal("150.00")
+    assert len(response.json()["Dias"]) == 4
+
+    # La reconstrucción desde movimiento llega al mismo resultado
+    db = SessionLocal()
+    db.execute(delete(ResumenSucursalDiario))
+    db.commit()
+    db.close()
+    monkeypatch.setattr(reconstruir_resumen_sucursal, "SessionLocal", SessionLocal)
+    assert reconstruir_resumen_sucursal.reconstruir() == 4
+    assert _resumen(SessionLocal) == resumen
+
+
+def test_resumen_validaciones(client, datos_base):
+    assert client.get("/api/sucursales/999/resumen").status_code == 404
+    assert client.get("/api/sucursales/1/resumen?desde=2025-02-01&hasta=2025-01-01").status_code == 400
+    response = client.get("/api/sucursales/1/resumen?desde=2025-01-01&hasta=2025-01-31")
+    assert response.status_code == 200
+    assert response.json()["Dias"] == [] and response.json()["TotalesPorTipo"] == []
@@ -0,0 +1,73 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from app.jobs import reconstruir_saldos_diarios
+from app.models import Movimiento, SaldoDiario
+
+
+def _instantaneas(SessionLocal, cuenta_id):
+    db = SessionLocal()
+    try:
+        return dict(db.execute(
+            select(SaldoDiario.Fecha, SaldoDiario.Saldo).where(SaldoDiario.IdCuenta == cuenta_id)
+        ).all())
+    finally:
+        db.close()
+
+
+def test_operaciones_mantienen_la_instantanea_del_dia(client, datos_base, SessionLocal):
+    hoy = date.today()
+    client.post("/api/movimientos/deposito", json={"IdCuenta": 1, "IdSucursal": 1, "Valor": "250.00"})
+    client.post("/api/movimientos/transferencia", json={
+        "IdCuentaOrigen": 1, "IdCuentaDestino": 3, "IdSucursal": 1, "Valor": "100.00"
+    })
+    client.post("/api/movimientos/transferencias/lote", json={"Transferencias": [
+        {"IdCuentaOrigen": 3, "IdCuentaDestino": 2, "IdSucursal": 1, "Valor": "40.00"},
+    ]})
+    client.post("/api/nomina/dispersion", json={
+        "IdCuentaOrigen": 2, "IdSucursal": 1, "Pagos": [{"IdCuentaDestino": 1, "Valor": "5.00"}]
+    })
+
+    assert _instantaneas(SessionLocal, 1) == {hoy: Decimal("1155.00")}
+    assert _instantaneas(SessionLocal, 2) == {hoy: Decimal("535.00")}
+    assert _instantaneas(SessionLocal, 3) == {hoy: Decimal("60.00")}
+
+    response = client.get("/api/cuentas/1/saldo", params={"fecha": hoy.isoformat()})
+    assert response.json()["Origen"] == "SALDO_ACTUAL"
+    assert Decimal(response.json()["Saldo"]) == Decimal("1155.00")
+
+
+def test_saldo_historico_desde_instantaneas(client, datos_base, SessionLocal, monkeypatch):
+    monkeypatch.setattr(reconstruir_saldos_diarios, "SessionLocal", SessionLocal)
+    hoy = date.today()
+    db = SessionLocal()
+    # Cuenta 1 (saldo actual 1000.00): +300 hace 10 días, -100 hace 5 días, +50 hoy
+    db.add_all([
+        Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("300.00"), Fecha=hoy - timedelta(days=10)),
+        Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=2, Valor=Decimal("-100.00"), Fecha=hoy - timedelta(days=5)),
+        Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("50.00"), Fecha=hoy),
+    ])
+    db.commit()
+    db.close()
+
+    def saldo(dias_atras):
+        fecha = (hoy - timedelta(days=dias_atras)).isoformat()
+        data = client.get("/api/cuentas/1/saldo", params={"fecha": fecha}).json()
+        return data["Origen"], Decimal(data["Saldo"])
+
+    # Sin instantáneas: saldo actual menos los movimientos posteriores
+    assert saldo(7) == ("MOVIMIENTOS", Decimal("1050.00"))
+
+    assert reconstruir_saldos_diarios.reconstruir(lote=2) == 2
+    assert _instantaneas(SessionLocal, 1) == {
+        hoy - timedelta(days=10): Decimal("1050.00"),
+        hoy - timedelta(days=5): Decimal("950.00"),
+    }
+    assert saldo(10) == ("INSTANTANEA", Decimal("1050.00"))
+    assert saldo(7) == ("INSTANTANEA", Decimal("1050.00"))
+    assert saldo(1) == ("INSTANTANEA", Decimal("950.00"))
+    assert saldo(11) == ("MOVIMIENTOS", Decimal("750.00"))
+
+    assert client.get("/api/cuentas/99/saldo", params={"fecha": hoy.isoformat()}).status_code == 404
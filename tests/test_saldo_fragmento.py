@@ -0,0 +1,99 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app.crud.conciliacion import conciliar_cuentas
+from app.crud.saldo_fragmento import cargar_fragmentadas
+from app.jobs import consolidar_fragmentos
+from app.models import Cuenta, SaldoDiario, SaldoFragmento
+from app.utils.fragmentos import cuentas_fragmentadas
+
+
+@pytest.fixture()
+def registro():
+    cuentas_fragmentadas.reemplazar([])
+    yield cuentas_fragmentadas
+    cuentas_fragmentadas.reemplazar([])
+
+
+def _saldos(SessionLocal, cuenta_id):
+    """(cuenta.Saldo, saldos de los fragmentos)"""
+    db = SessionLocal()
+    try:
+        saldo = db.execute(select(Cuenta.Saldo).where(Cuenta.IdCuenta == cuenta_id)).scalar_one()
+        fragmentos = db.execute(
+            select(SaldoFragmento.Saldo).where(SaldoFragmento.IdCuenta == cuenta_id).order_by(SaldoFragmento.Fragmento)
+        ).scalars().all()
+        return saldo, fragmentos
+    finally:
+        db.close()
+
+
+def _saldo_total(client, ruta):
+    return Decimal(str(client.get(ruta).json()["Saldo"]))
+
+
+def test_creditos_a_fragmentos_debitos_y_consolidacion(client, datos_base, SessionLocal, registro, monkeypatch):
+    response = client.put("/api/cuentas/1/fragmentos", json={"Fragmentos": 4})
+    assert response.status_code == 200
+    assert response.json() == {"IdCuenta": 1, "Fragmentos": 4}
+
+    for _ in range(8):
+        response = client.post("/api/movimientos/deposito", json={"IdCuenta": 1, "IdSucursal": 1, "Valor": "100.00"})
+        assert response.status_code == 201
+        # UPDATE del fragmento + INSERT + evento + resumen + COMMIT: ni la fila de cuenta ni la instantánea del día
+        assert int(response.headers["X-DB-Round-Trips"]) <= 5
+    saldo, fragmentos = _saldos(SessionLocal, 1)
+    assert saldo == Decimal("1000.00") and sum(fragmentos) == Decimal("800.00")
+    assert _saldo_total(client, "/api/cuentas/1/saldo") == Decimal("1800.00")
+
+    # El débito vacía en la cuenta solo los fragmentos que necesita
+    assert client.post("/api/movimientos/retiro", json={"IdCuenta": 1, "IdSucursal": 1, "Valor": "1100.00"}).status_code == 201
+    saldo, fragmentos = _saldos(SessionLocal, 1)
+    assert saldo + sum(fragmentos) == Decimal("700.00") and 0 in fragmentos
+    response = client.post("/api/movimientos/retiro", json={"IdCuenta": 1, "IdSucursal": 1, "Valor": "800.00"})
+    assert response.status_code == 400
+    assert "Disponible: 700.00" in response.json()["detail"]
+    client.post("/api/movimientos/transferencia", json={
+        "IdCuentaOrigen": 1, "IdCuentaDestino": 3, "IdSucursal": 1, "Valor": "650.00"
+    })
+    client.post("/api/movimientos/transferencias/lote", json={"Transferencias": [
+        {"IdCuentaOrigen": 2, "IdCuentaDestino": 1, "IdSucursal": 1, "Valor": "50.00"},
+    ]})
+    assert _saldo_total(client, "/api/cuentas/1/saldo") == Decimal("100.00")
+
+    db = SessionLocal()
+    assert conciliar_cuentas(db, 1, 3) == (3, [])
+    db.close()
+
+    monkeypatch.setattr(consolidar_fragmentos, "SessionLocal", SessionLocal)
+    assert consolidar_fragmentos.consolidar() == 1
+    assert _saldos(SessionLocal, 1) == (Decimal("100.00"), [Decimal("0.00")] * 4)
+    db = SessionLocal()
+    assert db.get(SaldoDiario, (1, date.today())).Saldo == Decimal("100.00")
+    db.close()
+
+    assert client.put("/api/cuentas/1/fragmentos", json={"Fragmentos": 0}).json()["Fragmentos"] == 0
+    assert _saldos(SessionLocal, 1) == (Decimal("100.00"), [])
+    assert not registro.fragmentada(1)
+    assert client.put("/api/cuentas/1/fragmentos", json={"Fragmentos": 1}).status_code == 400
+    assert client.put("/api/cuentas/99/fragmentos", json={"Fragmentos": 2}).status_code == 404
+
+
+def test_registro_desactualizado_no_altera_saldos(client, datos_base, SessionLocal, registro):
+    client.put("/api/cuentas/3/fragmentos", json={"Fragmentos": 2})
+    client.post("/api/movimientos/deposito", json={"IdCuenta": 3, "IdSucursal": 1, "Valor": "300.00"})
+
+    # Otro proceso sin la cuenta en su registro: acredita cuenta.Saldo y debita desde los fragmentos
+    registro.reemplazar([])
+    client.post("/api/movimientos/deposito", json={"IdCuenta": 3, "IdSucursal": 1, "Valor": "20.00"})
+    response = client.post("/api/movimientos/retiro", json={"IdCuenta": 3, "IdSucursal": 1, "Valor": "250.00"})
+    assert response.status_code == 201
+    assert _saldo_total(client, "/api/cuentas/3/saldo") == Decimal("70.00")
+
+    db = SessionLocal()
+    assert cargar_fragmentadas(db) == 1
+    db.close()
+    assert registro.fragmentada(3)
@@ -0,0 +1,137 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.crud.velocidad import precargar
+from app.models import Movimiento
+from app.utils.velocidad import (
+    LimiteVelocidadExcedido, LimitesVelocidad, ReglaVelocidad, limites_velocidad, reglas_configuradas
+)
+
+HORA = ReglaVelocidad("hora", 3600, 12, max_operaciones=3, max_monto=Decimal("500.00"))
+DIA = ReglaVelocidad("día", 86400, 24, max_operaciones=4)
+# Inicio de una cubeta de cinco minutos, para que las cuentas sean exactas
+T0 = 1_700_000_100.0
+
+
+@pytest.fixture()
+def limites(monkeypatch):
+    """Tres operaciones por hora en la instancia que usan los endpoints"""
+    monkeypatch.setattr(limites_velocidad, "reglas", [ReglaVelocidad("hora", 3600, 12, max_operaciones=3)])
+    limites_velocidad.reiniciar()
+    return limites_velocidad
+
+
+def test_ventana_deslizante_y_reintento():
+    limites = LimitesVelocidad([HORA, DIA])
+    limites.reservar(1, Decimal("100.00"), T0)
+    limites.reservar(1, Decimal("100.00"), T0 + 600)
+    limites.reservar(1, Decimal("100.00"), T0 + 1200)
+
+    with pytest.raises(LimiteVelocidadExcedido) as error:
+        limites.reservar(1, Decimal("1.00"), T0 + 1800)
+    assert "hora" in str(error.value)
+    # La primera operación sale de la ventana cuando su cubeta cumple una hora
+    assert error.value.reintentar_en == 1800
+    limites.reservar(2, Decimal("1.00"), T0 + 1800)
+
+    # Monto: 100 + 100 dentro de la hora, 350 más supera 500.00
+    with pytest.raises(LimiteVelocidadExcedido) as error:
+        limites.reservar(1, Decimal("350.00"), T0 + 3600)
+    assert error.value.reintentar_en == 600
+    reserva = limites.reservar(1, Decimal("300.00"), T0 + 3600)
+
+    # Una reserva liberada deja el espacio disponible otra vez
+    limites.liberar(reserva, T0 + 3601)
+    limites.reservar(1, Decimal("300.00"), T0 + 3602)
+
+    # El límite diario sigue contando lo que ya salió de la ventana de una hora
+    with pytest.raises(LimiteVelocidadExcedido) as error:
+        limites.reservar(1, Decimal("1.00"), T0 + 7200)
+    assert "día" in str(error.value)
+
+
+def test_lru_acotado_descarta_primero_cuentas_inactivas():
+    limites = LimitesVelocidad([HORA], max_cuentas=3)
+    limites.reservar(1, Decimal("1.00"), T0)
+    limites.reservar(2, Decimal("1.00"), T0 + 3600)
+    limites.reservar(3, Decimal("1.00"), T0 + 3600)
+    # La cuenta 1 ya no tiene operaciones en la ventana: se descarta aunque no sea la única candidata
+    limites.reservar(4, Decimal("1.00"), T0 + 3600)
+    assert len(limites) == 3 and set(limites._cuentas) == {2, 3, 4}
+
+    # Si todas tienen operaciones vigentes se descarta la menos usada
+    limites.reservar(2, Decimal("1.00"), T0 + 3601)
+    limites.reservar(5, Decimal("1.00"), T0 + 3602)
+    assert set(limites._cuentas) == {2, 4, 5}
+
+
+def test_precarga_desde_movimientos_recientes(SessionLocal, datos_base):
+    ahora = datetime.combine(date.today(), datetime.min.time()).timestamp() + 12 * 3600
+    db = SessionLocal()
+    db.add_all(
+        [Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=2, Valor=Decimal("-10.00"), Fecha=date.today())
+         for _ in range(3)]
+        + [Movimiento(IdCuenta=1, IdSucursal=1, IdTipoMovimiento=1, Valor=Decimal("10.00"), Fecha=date.today()),
+           Movimiento(IdCuenta=2, IdSucursal=1, IdTipoMovimiento=3, Valor=Decimal("-10.00"),
+                      Fecha=date.today() - timedelta(days=5))]
+    )
+    db.commit()
+
+    limites = LimitesVelocidad([HORA, DIA])
+    assert precargar(db, limites, ahora) == 1
+    db.close()
+    # Los movimientos históricos no tienen hora: solo cuentan para el límite diario
+    limites.reservar(1, Decimal("1.00"), ahora)
+    with pytest.raises(LimiteVelocidadExcedido):
+        limites.reservar(1, Decimal("1.00"), ahora)
+
+
+def test_endpoints_responden_429_y_liberan_operaciones_fallidas(client, datos_base, limites):
+    retiro = {"IdCuenta": 1, "IdSucursal": 1, "Valor": "100.00"}
+    assert client.post("/api/movimientos/retiro", json=retiro).status_code == 201
+    # Un retiro rechazado por saldo no consume el límite
+    assert client.post("/api/movimientos/retiro", json={**retiro, "Valor": "5000.00"}).status_code == 400
+    assert client.post("/api/movimientos/transferencia", json={
+        "IdCuentaOrigen": 1, "IdCuentaDestino": 3, "IdSucursal": 1, "Valor": "100.00"
+    }).status_code == 201
+
+    response = client.post("/api/movimientos/transferencias/lote", json={"Transferencias": [
+        {"IdCuentaOrigen": 1, "IdCuentaDestino": 2, "IdSucursal": 1, "Valor": "100.00"},
+        {"IdCuentaOrigen": 1, "IdCuentaDestino": 2, "IdSucursal": 1, "Valor": "100.00"},
+        {"IdCuentaOrigen": 2, "IdCuentaDestino": 3, "IdSucursal": 1, "Valor": "100.00"},
+    ]})
+    resultados = response.json()["Resultados"]
+    assert [r["Exitosa"] for r in resultados] == [True, False, True]
+    assert "límite" in resultados[1]["Error"]
+
+    response = client.post("/api/movimientos/retiro", json=retiro)
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= 3600
+    assert client.get("/api/cuentas/1").json()["Saldo"] == "700.00"
+
+
+def test_sin_variables_no_hay_limites(monkeypatch):
+    for variable in ("VELOCIDAD_OPERACIONES_HORA", "VELOCIDAD_MONTO_HORA",
+                     "VELOCIDAD_OPERACIONES_DIA", "VELOCIDAD_MONTO_DIA"):
+        monkeypatch.delenv(variable, raising=False)
+    assert reglas_configuradas() == []
+    monkeypatch.setenv("VELOCIDAD_OPERACIONES_DIA", "50")
+    assert reglas_configuradas() == [ReglaVelocidad("día", 86400, 24, max_operaciones=50)]
+
+
+def test_nomina_consume_una_operacion_por_pago(client, datos_base, limites):
+    def dispersar(*destinos):
+        return client.post("/api/nomina/dispersion", json={"IdCuentaOrigen": 1, "IdSucursal": 1, "Pagos": [
+            {"IdCuentaDestino": destino, "Valor": "10.00"} for destino in destinos
+        ]})
+
+    # Cuatro pagos superan las tres operaciones por hora
+    assert dispersar(2, 3, 2, 3).status_code == 429
+    # El pago rechazado (cuenta inexistente) no consume el límite: quedan dos pagos y un retiro
+    assert dispersar(2, 99, 3).status_code == 201
+    retiro = {"IdCuenta": 1, "IdSucursal": 1, "Valor": "10.00"}
+    assert client.post("/api/movimientos/retiro", json=retiro).status_code == 201
+    assert client.post("/api/movimientos/retiro", json=retiro).status_code == 429
+    assert client.get("/api/cuentas/1").json()["Saldo"] == "970.00"
@@ -0,0 +1,57 @@
+"""
+Presupuesto de viajes a la base de datos por endpoint (encabezado X-DB-Round-Trips).
+
+Los presupuestos corresponden a SQLite, que soporta RETURNING; en MySQL las
+actualizaciones requieren un SELECT adicional.
+"""
+
+from decimal import Decimal
+
+
+def _viajes(response) -> int:
+    return int(response.headers["X-DB-Round-Trips"])
+
+
+def test_presupuesto_catalogos_y_cuentas(client, datos_base):
+    # INSERT + COMMIT
+    response = client.post("/api/ciudades/", json={"Ciudad": "Medellín"})
+    assert response.status_code == 201
+    assert _viajes(response) <= 2
+    ciudad_id = response.json()["IdCiudad"]
+
+    # UPDATE ... RETURNING + COMMIT
+    response = client.put(f"/api/ciudades/{ciudad_id}", json={"Ciudad": "Cali"})
+    assert response.status_code == 200
+    assert response.json()["Ciudad"] == "Cali"
+    assert _viajes(response) <= 2
+
+    response = client.put("/api/cuentas/1", json={"Sobregiro": "100.00"})
+    assert response.status_code == 200
+    assert Decimal(response.json()["Sobregiro"]) == Decimal("100.00")
+    assert _viajes(response) <= 2
+
+    # Un registro inexistente no confirma nada
+    response = client.put("/api/ciudades/999", json={"Ciudad": "X"})
+    assert response.status_code == 404
+    assert _viajes(response) <= 1
+
+
+def test_presupuesto_movimientos(client, datos_base):
+    # UPDATE + upsert de saldo_diario + INSERT + INSERT del evento + upsert del resumen de sucursal + COMMIT
+    response = client.post("/api/movimientos/deposito", json={"IdCuenta": 1, "IdSucursal": 1, "Valor": "10.00"})
+    assert response.status_code == 201
+    assert response.json()["IdMovimiento"] is not None
+    assert _viajes(response) <= 6
+
+    response = client.post("/api/movimientos/retiro", json={"IdCuenta": 1, "IdSucursal": 1, "Valor": "10.00"})
+    assert response.status_code == 201
+    assert _viajes(response) <= 6
+
+    # SELECT ... FOR UPDATE + 2 UPDATE + upsert de saldo_diario + 2 INSERT + INSERT de los eventos
+    # + upsert del resumen + COMMIT
+    response = client.post("/api/movimientos/transferencia", json={
+        "IdCuentaOrigen": 1, "IdCuentaDestino": 2, "IdSucursal": 1, "Valor": "10.00"
+    })
+    assert response.status_code == 201
+    assert response.json()["movimiento_entrada"]["IdMovimiento"] is not None
+    assert _viajes(response) <= 9
@@ -36,7 +36,9 @@ def verify_database():
             'cuenta',
             'titular',
             'movimiento',
-            'prestamo'
+            'prestamo',
+            'idempotencia',
+            'saldo_diario'
         ]
         
         # Tablas existentes en la BD